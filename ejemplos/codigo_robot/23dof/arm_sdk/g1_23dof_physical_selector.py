@@ -5,6 +5,10 @@
 # Uso en robot físico:
 #   python3 g1_23dof_physical_selector.py eth0
 #
+# Sin robot (no importan NumPy, el SDK ni DDS):
+#   python3 g1_23dof_physical_selector.py --list
+#   python3 g1_23dof_physical_selector.py --validate [rutina.json ...]
+#
 # Estructura esperada:
 #   codigo_robot/23dof/arm_sdk/
 #   ├── g1_23dof_physical_selector.py
@@ -24,40 +28,72 @@
 #       13, 14, 20, 21, 27, 28
 #   - Catálogo dinámico: cualquier JSON agregado a poses_json aparece en el menú.
 #   - Corrige pausas: pasos repetidos se ejecutan como hold real, sin retroceso.
+#   - Cada rutina se compila a una tabla con una fila por tick, que el writer
+#     periódico copia al LowCmd preasignado (solo actualiza q, dq y crc).
+#   - El CSV de telemetría guarda el q, kp y kd comandados junto al estado
+#     medido; al final de cada rutina se imprime el error de seguimiento y los
+#     inicios de paso quedan en <csv>.steps.csv para analizar_logs.py.
+#
+# Opciones (detalle en --help):
+#   --trajectory spline    spline C2 entre pasos con dq de feedforward; la
+#                          tabla se revisa contra --max-abs-rad.
+#   --fastest              duraciones mínimas dentro de los límites por joint
+#                          (--limits, --speed-scale); la pose segura conserva
+#                          las suyas.
+#   --no-cache             compila sin leer ni guardar <nombre>.*.traj.npz.
+#   --writer-mode, --deadline-policy, --writer-cpus
+#                          planificación del writer sobre deadlines absolutos.
+#   --timing               histogramas de periodo, cómputo, crc y publicación.
+#   --record, --live-shm   grabación a tasa completa y estado en vivo.
+#   --loopback             transporte en proceso con planta PD simulada (o
+#                          G1_CHANNEL=loopback), sin robot ni DDS.
+#   --alloc-report         al detener el writer, asignaciones por tick de
+#                          write() medidas sin otros hilos.
+#   --list, --validate     revisan el catálogo y terminan; --validate sale
+#                          con código 1 si alguna rutina no es ejecutable.
 # -----------------------------------------------------------------------------
 
 import argparse
-import csv
-import json
+import gc
 import math
-import os
 import re
 import sys
-import threading
 import time
 from datetime import datetime
 from pathlib import Path
 
-from unitree_sdk2py.core.channel import ChannelPublisher, ChannelFactoryInitialize
-from unitree_sdk2py.core.channel import ChannelSubscriber
-from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-from unitree_sdk2py.utils.crc import CRC
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize, add_channel_arguments, configure_channel
+from g1_comun.joints import G1_23DOF_ARM_SDK, G1_29DOF_ONLY
+from g1_comun.livestate import DEFAULT_SHM_NAME, make_state_publisher
+from g1_comun.recorder import add_recorder_arguments, make_recorder, recorder_kwargs
+from g1_comun.retime import add_retime_arguments, format_report, limits_from_args, retime_routine
+from g1_comun.routine import (
+    add_trajectory_arguments,
+    check_routine,
+    compile_file,
+    compile_routine,
+    load_json_routine,
+    resolve_trajectory,
+)
+from g1_comun.runtime import ArmSdkBackend, MotionRuntime
+from g1_comun.scheduler import add_scheduler_arguments, scheduler_kwargs
+from g1_comun.setpoint import SetpointBuffer
+from g1_comun.startup import Startup
+from g1_comun.telemetry import TelemetryRecorder
+from g1_comun.timing import add_timing_arguments, make_timing, timing_kwargs
+from g1_comun.tracking import TrackingError
 
 
 G1_NUM_MOTOR = 30
-K_NOT_USED_JOINT = 29
 
-ACTIVE_JOINTS = [
-    12,
-    15, 16, 17, 18, 19,
-    22, 23, 24, 25, 26
-]
+# 12, 15-19, 22-26 (numeración de 29 motores).
+ACTIVE_JOINTS = G1_23DOF_ARM_SDK.joint_list
 
-EXCLUDED_29DOF_ONLY_JOINTS = [
-    13, 14, 20, 21, 27, 28
-]
+# 13, 14, 20, 21, 27, 28
+EXCLUDED_29DOF_ONLY_JOINTS = list(G1_29DOF_ONLY)
 
 JOINT_NAMES = {
     12: "waist_yaw_joint",
@@ -74,6 +110,74 @@ JOINT_NAMES = {
 }
 
 
+class AllocationProbe:
+    """
+    Mide el balance de bloques de memoria y objetos rastreados por el GC
+    alrededor de cada tick del writer. Un hot path sin basura mantiene
+    ambos contadores en cero.
+
+    sys.getallocatedblocks() y gc.get_count() son de todo el proceso: con
+    el writer en su hilo contarían también el callback de rt/lowstate y el
+    planner. measure() corre los ticks en el hilo que llama sin ceder el
+    GIL, así el balance es solo del tick.
+    """
+
+    def __init__(self):
+        self.ticks = 0
+        self.dirty_ticks = 0
+        self.total_blocks = 0
+        self.max_blocks = 0
+        self.total_gc_objects = 0
+        self._blocks0 = 0
+        self._gc0 = 0
+
+    def begin(self):
+        self._gc0 = gc.get_count()[0]
+        self._blocks0 = sys.getallocatedblocks()
+
+    def end(self):
+        blocks = sys.getallocatedblocks() - self._blocks0
+        gc_objects = gc.get_count()[0] - self._gc0
+
+        self.ticks += 1
+        if blocks > 0 or gc_objects > 0:
+            self.dirty_ticks += 1
+        if blocks > 0:
+            self.total_blocks += blocks
+            self.max_blocks = max(self.max_blocks, blocks)
+        if gc_objects > 0:
+            self.total_gc_objects += gc_objects
+
+    def measure(self, tick, ticks: int = 500):
+        # Con un intervalo de cambio de hilo de 1 s ningún otro hilo toma el
+        # GIL mientras `tick` no bloquee (sin sleep ni E/S).
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1.0)
+        try:
+            for _ in range(ticks):
+                self.begin()
+                tick()
+                self.end()
+        finally:
+            sys.setswitchinterval(interval)
+
+    def summary(self):
+        if self.ticks == 0:
+            return "[ALLOC] Sin ticks medidos."
+
+        return (
+            f"[ALLOC] write() aislado | ticks={self.ticks} | ticks_con_asignacion={self.dirty_ticks} | "
+            f"bloques/tick={self.total_blocks / self.ticks:.3f} | "
+            f"bloques_max={self.max_blocks} | "
+            f"objetos_gc/tick={self.total_gc_objects / self.ticks:.3f}"
+        )
+
+
+class _DiscardPublisher:
+    def Write(self, msg):
+        return True
+
+
 class G123DoFPhysicalSelector:
     def __init__(
         self,
@@ -86,6 +190,15 @@ class G123DoFPhysicalSelector:
         hold_epsilon: float = 1e-4,
         max_abs_rad: float = 2.8,
         log_csv: bool = True,
+        alloc_report: bool = False,
+        scheduler: dict = None,
+        timing: dict = None,
+        record: dict = None,
+        live_shm: str = None,
+        routine_cache: bool = True,
+        trajectory: str = "cosine",
+        fastest: bool = False,
+        limits=None,
     ):
         self.interface = interface
         self.poses_dir = poses_dir
@@ -95,29 +208,43 @@ class G123DoFPhysicalSelector:
         self.min_duration = float(min_duration)
         self.hold_epsilon = float(hold_epsilon)
         self.max_abs_rad = float(max_abs_rad)
+        self.routine_cache = routine_cache
+        self.trajectory = trajectory
+        self.fastest = fastest
+        self.limits = limits
+
+        # Primer estado y tiempo hasta el primer comando.
+        self.startup = Startup(Path(__file__).stem)
+        self.alloc_probe = AllocationProbe() if alloc_report else None
+
+        # Writer de rt/arm_sdk: el LowCmd se asigna una sola vez al abrir los
+        # canales y se reutiliza en cada tick.
+        self.runtime = MotionRuntime(
+            ArmSdkBackend(G1_23DOF_ARM_SDK, self.kp, self.kd),
+            self.control_dt,
+            name="g1_23dof_physical_writer",
+            timing=make_timing(Path(__file__).stem, self.control_dt, **(timing or {})),
+            scheduler=scheduler,
+            startup=self.startup,
+        )
+        # El writer evalúa el setpoint publicado por el planner.
+        self.runtime.source = self.write_setpoint
 
-        self.lock = threading.RLock()
-        self.crc = CRC()
-
-        self.low_state = None
-        self.first_update_low_state = False
-        self.arm_sdk_publisher = None
-        self.lowstate_subscriber = None
-
-        self.writer_thread = None
-        self.writer_stop = threading.Event()
+        # Grabación a tasa completa de rt/lowstate (--record / G1_RECORD).
+        self.recorder = self.runtime.attach(make_recorder(Path(__file__).stem, **(record or {})))
+        # Estado en vivo para el visualizador (--live-shm / G1_LIVE_SHM).
+        self.live = self.runtime.attach(make_state_publisher(ACTIVE_JOINTS, live_shm))
+        # Error q medido - q comandado, acumulado por paso de rutina.
+        self.tracking = self.runtime.attach(TrackingError(ACTIVE_JOINTS))
 
-        self.current_cmd_pos = {j: 0.0 for j in ACTIVE_JOINTS}
-        self.motion_start_pos = {j: 0.0 for j in ACTIVE_JOINTS}
-        self.motion_target_pos = {j: 0.0 for j in ACTIVE_JOINTS}
+        # current/target solo los modifica el hilo del planner; command es
+        # el búfer de salida del writer.
+        self.joints = self.runtime.joints
 
-        self.motion_active = False
-        self.motion_start_time = 0.0
-        self.motion_duration = 1.0
+        # Setpoint publicado al writer (orden de ACTIVE_JOINTS).
+        self.setpoint = SetpointBuffer(len(ACTIVE_JOINTS))
 
-        self.csv_file = None
-        self.csv_writer = None
-        self.sample_count = 0
+        self.telemetry = None
         self.log_csv = log_csv
 
     # ---------------------------------------------------------
@@ -125,68 +252,50 @@ class G123DoFPhysicalSelector:
     # ---------------------------------------------------------
 
     def init_dds(self):
+        # Los tipos del SDK se importan al conectar (g1_comun.runtime):
+        # --help, --list y --validate no cargan unitree_sdk2py ni CycloneDDS.
         print(f"[INFO] Inicializando ChannelFactory en interfaz: {self.interface}")
         ChannelFactoryInitialize(0, self.interface)
+        self.startup.mark("DDS")
 
-        self.arm_sdk_publisher = ChannelPublisher("rt/arm_sdk", LowCmd_)
-        self.arm_sdk_publisher.Init()
-
-        self.lowstate_subscriber = ChannelSubscriber("rt/lowstate", LowState_)
-        self.lowstate_subscriber.Init(self.low_state_handler, 10)
+        self.runtime.open()
 
         if self.log_csv:
             log_dir = Path.cwd() / "logs_physical"
             log_dir.mkdir(parents=True, exist_ok=True)
 
-            self.csv_file = open(
+            # El callback solo copia q/tau medidos y q/kp/kd comandados al
+            # anillo; el CSV lo escribe un hilo de fondo, así el disco no
+            # retrasa la entrega del estado.
+            columns = []
+            for j in ACTIVE_JOINTS:
+                columns.extend([
+                    f"q_{j}_{JOINT_NAMES.get(j, '')}", f"tau_{j}", f"q_cmd_{j}", f"kp_{j}", f"kd_{j}",
+                ])
+            self.telemetry = TelemetryRecorder(
                 log_dir / f"g1_23dof_physical_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mode="w",
-                newline="",
-                encoding="utf-8"
+                ACTIVE_JOINTS,
+                columns,
+                every=500,
+                command_fields=("q", "kp", "kd"),
             )
-            self.csv_writer = csv.writer(self.csv_file)
+            self.runtime.attach(self.telemetry)
 
-            header = ["timestamp"]
-            for j in ACTIVE_JOINTS:
-                header.extend([f"q_{j}_{JOINT_NAMES.get(j, '')}", f"tau_{j}"])
-            self.csv_writer.writerow(header)
-
-    def low_state_handler(self, msg: LowState_):
-        with self.lock:
-            self.low_state = msg
-            self.first_update_low_state = True
-
-        if self.log_csv and self.csv_writer is not None:
-            self.sample_count += 1
-            if self.sample_count >= 500:
-                self.sample_count = 0
-                row = [datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")]
-                for j in ACTIVE_JOINTS:
-                    try:
-                        row.extend([msg.motor_state[j].q, msg.motor_state[j].tau_est])
-                    except Exception:
-                        row.extend(["", ""])
-                self.csv_writer.writerow(row)
+    @property
+    def low_state(self):
+        return self.runtime.low_state
 
     def wait_lowstate(self, timeout: float = 8.0):
         print("[INFO] Esperando rt/lowstate...")
-        start = time.time()
-
-        while not self.first_update_low_state:
-            if time.time() - start > timeout:
-                raise RuntimeError("No se recibió rt/lowstate. Revisa interfaz, red y estado del robot.")
-            time.sleep(0.05)
+        if not self.startup.wait_state(timeout):
+            raise RuntimeError("No se recibió rt/lowstate. Revisa interfaz, red y estado del robot.")
 
-        with self.lock:
-            for j in ACTIVE_JOINTS:
-                q = float(self.low_state.motor_state[j].q)
-                self.current_cmd_pos[j] = q
-                self.motion_start_pos[j] = q
-                self.motion_target_pos[j] = q
+        current = self.joints.read_state(self.low_state.motor_state)
+        self.setpoint.hold(current)
 
         print("\n[POSE INICIAL REAL - JOINTS CONTROLADOS]")
-        for j in ACTIVE_JOINTS:
-            print(f'  "{j}": {self.current_cmd_pos[j]: .6f},  # {JOINT_NAMES.get(j, "")}')
+        for j, q in zip(ACTIVE_JOINTS, current.tolist()):
+            print(f'  "{j}": {q: .6f},  # {JOINT_NAMES.get(j, "")}')
         print("[FIN POSE INICIAL]\n")
 
     # ---------------------------------------------------------
@@ -199,258 +308,196 @@ class G123DoFPhysicalSelector:
         return 0.5 - 0.5 * math.cos(math.pi * ratio)
 
     def start_writer(self):
-        if self.writer_thread is not None and self.writer_thread.is_alive():
+        if not self.runtime.start_writer():
             print("[WARN] Writer ya estaba activo.")
             return
 
-        self.writer_stop.clear()
-        self.writer_thread = threading.Thread(
-            target=self.writer_loop,
-            name="g1_23dof_physical_writer",
-            daemon=True
+        writer = self.runtime.writer_thread
+        print(
+            f"[INFO] Hilo de escritura físico iniciado "
+            f"(modo={writer.mode}, política={writer.policy})."
         )
-        self.writer_thread.start()
-        print("[INFO] Hilo de escritura físico iniciado.")
-
-    def writer_loop(self):
-        next_time = time.monotonic()
-
-        while not self.writer_stop.is_set():
-            self.low_cmd_write()
 
-            next_time += self.control_dt
-            sleep_time = next_time - time.monotonic()
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-            else:
-                next_time = time.monotonic()
-
-    def low_cmd_write(self):
-        with self.lock:
-            if self.low_state is None:
-                return
-
-            now = time.monotonic()
-
-            if self.motion_active:
-                elapsed = now - self.motion_start_time
-                ratio = elapsed / max(self.motion_duration, 1e-6)
-                s = self.smooth_ratio(ratio)
-
-                q_cmd = {}
-                for j in ACTIVE_JOINTS:
-                    q0 = self.motion_start_pos[j]
-                    q1 = self.motion_target_pos[j]
-                    q_cmd[j] = q0 + (q1 - q0) * s
-
-                if ratio >= 1.0:
-                    for j in ACTIVE_JOINTS:
-                        self.current_cmd_pos[j] = self.motion_target_pos[j]
-                        q_cmd[j] = self.motion_target_pos[j]
-                    self.motion_active = False
-            else:
-                q_cmd = dict(self.current_cmd_pos)
+    def measure_allocations(self):
+        """
+        Balance de asignaciones del tick del writer (setpoint, interpolación,
+        q/dq y crc) con el writer detenido. La trama no se publica: el robot
+        no recibe una ráfaga de comandos y el transporte no entra en la medida.
+        """
+        runtime = self.runtime
+        publisher = runtime.publisher
+        runtime.publisher = _DiscardPublisher()
+        try:
+            self.alloc_probe.measure(runtime.write)
+        finally:
+            runtime.publisher = publisher
+        print(self.alloc_probe.summary())
 
-            cmd = unitree_hg_msg_dds__LowCmd_()
+    def write_setpoint(self, command, dq):
+        setpoint = self.setpoint
 
-            # Activación obligatoria de arm_sdk para robot físico.
-            cmd.motor_cmd[K_NOT_USED_JOINT].q = 1.0
+        # Seqlock: si el planner publica dos veces durante el tick, se repite.
+        while True:
+            seq, slot = setpoint.read()
+            ratio = setpoint.evaluate(slot, time.monotonic(), command, self.smooth_ratio, dq)
 
-            for j in ACTIVE_JOINTS:
-                cmd.motor_cmd[j].q = float(q_cmd[j])
-                cmd.motor_cmd[j].dq = 0.0
-                cmd.motor_cmd[j].tau = 0.0
-                cmd.motor_cmd[j].kp = self.kp
-                cmd.motor_cmd[j].kd = self.kd
+            if setpoint.valid(seq):
+                break
+            setpoint.retries += 1
 
-            cmd.crc = self.crc.Crc(cmd)
-            self.arm_sdk_publisher.Write(cmd)
+        if ratio >= 1.0:
+            setpoint.done_seq = seq
 
     # ---------------------------------------------------------
     # Movimiento y hold
     # ---------------------------------------------------------
 
-    def build_target_from_step(self, raw_positions: dict):
-        target = dict(self.current_cmd_pos)
-        ignored_excluded = []
-        ignored_unknown = []
-
-        for k, v in raw_positions.items():
-            try:
-                idx = int(k)
-                value = float(v)
-            except Exception:
-                ignored_unknown.append(k)
-                continue
-
-            if abs(value) > self.max_abs_rad:
-                raise ValueError(
-                    f"Valor fuera de límite conservador en joint {idx}: {value} rad. "
-                    f"Límite actual: ±{self.max_abs_rad} rad."
-                )
-
-            if idx in ACTIVE_JOINTS:
-                target[idx] = value
-            elif idx in EXCLUDED_29DOF_ONLY_JOINTS:
-                ignored_excluded.append(idx)
-            else:
-                ignored_unknown.append(idx)
+    @staticmethod
+    def report_ignored(compiled):
+        excluded = set(EXCLUDED_29DOF_ONLY_JOINTS)
+        ignored_excluded = [idx for idx in compiled.ignored if idx in excluded]
+        ignored_unknown = compiled.invalid + [idx for idx in compiled.ignored if idx not in excluded]
 
         if ignored_excluded:
-            print(f"[INFO] Joints 29 DoF ignorados para G1 23 DoF: {sorted(set(ignored_excluded))}")
+            print(f"[INFO] Joints 29 DoF ignorados para G1 23 DoF: {ignored_excluded}")
 
         if ignored_unknown:
             print(f"[WARN] Joints desconocidos ignorados: {ignored_unknown}")
 
-        return target
+        for name in compiled.skipped:
+            print(f"[WARN] {name}: posiciones inválidas. Se omite.")
+
+    def freeze_command(self):
+        """Sostiene la posición que el writer está comandando ahora mismo."""
+        values = self.setpoint.position_at(profile=self.smooth_ratio)
+        self.joints.reset(values)
+        self.setpoint.hold(values)
 
     def hold_current_command(self, duration: float, label: str = "hold"):
         duration = max(float(duration), self.min_duration)
 
-        with self.lock:
-            self.motion_active = False
+        self.setpoint.hold(self.joints.current)
 
         print(f"  [HOLD] {label} durante {duration:.2f}s")
         time.sleep(duration)
 
-    def move_to_target(self, target: dict, duration: float, label: str = "paso"):
-        duration = max(float(duration), self.min_duration)
-
-        with self.lock:
-            deltas = [abs(target[j] - self.current_cmd_pos[j]) for j in ACTIVE_JOINTS]
-            max_delta = max(deltas) if deltas else 0.0
-
-            if max_delta <= self.hold_epsilon:
-                self.motion_active = False
-                hold_needed = True
-            else:
-                hold_needed = False
-                self.motion_start_pos = dict(self.current_cmd_pos)
-                self.motion_target_pos = dict(target)
-                self.motion_duration = duration
-                self.motion_start_time = time.monotonic()
-                self.motion_active = True
-
-        if hold_needed:
-            self.hold_current_command(duration, label)
-            return
-
-        start = time.time()
-        max_wait = duration + 2.0
-
-        while True:
-            with self.lock:
-                active = self.motion_active
-
-            if not active:
-                break
-
-            if time.time() - start > max_wait:
-                print(f"[WARN] Timeout en {label}. Se sostiene última posición comandada.")
-                with self.lock:
-                    self.motion_active = False
-                break
-
-            time.sleep(self.control_dt)
-
-        with self.lock:
-            for j in ACTIVE_JOINTS:
-                self.current_cmd_pos[j] = target[j]
-
     # ---------------------------------------------------------
     # Rutinas
     # ---------------------------------------------------------
 
-    def load_routine(self, filepath: Path):
+    def load_routine(self, filepath: Path, fastest: bool = None):
+        """Compila la rutina a una tabla de setpoints a control_dt (con caché)."""
         if not filepath.is_file():
             raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            routine = json.load(f)
-
-        pasos = routine.get("pasos", [])
-        if not isinstance(pasos, list) or not pasos:
-            raise ValueError("La rutina no contiene una lista válida de pasos.")
+        if self.fastest if fastest is None else fastest:
+            return self.load_fastest_routine(filepath)
+
+        compiled, cached = compile_file(
+            filepath,
+            G1_23DOF_ARM_SDK,
+            self.control_dt,
+            profile=self.trajectory,
+            min_duration=self.min_duration,
+            max_abs_rad=self.max_abs_rad,
+            loader=load_json_routine,
+            cache=self.routine_cache,
+        )
+        print(
+            f"[INFO] Tabla {'en caché' if cached else 'compilada'}: "
+            f"{compiled.rows} filas x {len(compiled.joints)} joints ({compiled.duration:.2f}s)"
+        )
 
-        return routine
+        return compiled
+
+    def load_fastest_routine(self, filepath: Path):
+        """Re-temporiza la rutina desde la pose actual; sin caché."""
+        routine, report = retime_routine(
+            load_json_routine(filepath),
+            G1_23DOF_ARM_SDK,
+            self.limits,
+            profile=self.trajectory,
+            initial=self.joints.current,
+            min_duration=self.min_duration,
+        )
+        compiled = compile_routine(
+            routine,
+            G1_23DOF_ARM_SDK,
+            self.control_dt,
+            profile=self.trajectory,
+            min_duration=self.min_duration,
+            max_abs_rad=self.max_abs_rad,
+        )
+        print(f"[INFO] Modo más rápido seguro: {format_report(report)}")
 
-    def play_routine(self, routine: dict):
-        name = routine.get("nombre_rutina", "rutina")
-        pasos = routine.get("pasos", [])
+        return compiled
 
+    def play_routine(self, compiled):
         print("\n" + "=" * 72)
-        print(f"[INFO] Ejecutando rutina física: {name}")
-        print(f"[INFO] Pasos: {len(pasos)}")
+        print(f"[INFO] Ejecutando rutina física: {compiled.name}")
+        print(f"[INFO] Pasos: {len(compiled.step_names)}")
         print("=" * 72)
 
-        for i, paso in enumerate(pasos, start=1):
-            pname = paso.get("nombre", f"Paso {i}")
-            dur = float(paso.get("duracion", 1.0))
-            raw = paso.get("posiciones", {})
+        self.report_ignored(compiled)
 
-            if not isinstance(raw, dict):
-                print(f"[WARN] {pname}: posiciones inválidas. Se omite.")
-                continue
+        joints = self.joints
+        initial = joints.current.copy()
+        table = compiled.table(initial)
+        dq_table = compiled.velocity_table(initial)
 
-            target = self.build_target_from_step(raw)
+        violations = joints.limit_violations(self.max_abs_rad, abs(table).max(axis=0))
+        if violations:
+            raise ValueError(
+                f"La trayectoria de {compiled.name} supera ±{self.max_abs_rad} rad "
+                f"en joints {violations}."
+            )
 
-            active_changed = [
-                j for j in ACTIVE_JOINTS
-                if abs(target[j] - self.current_cmd_pos[j]) > self.hold_epsilon
-            ]
+        # El writer indexa una fila por tick; aquí solo se informa cada paso
+        # y se marca el paso en curso para el error de seguimiento y en
+        # <csv>.steps.csv para g1_comun.analysis.
+        tracking = self.tracking
+        telemetry = self.telemetry
+        tracking.begin(len(compiled.step_names))
+        t0 = time.monotonic()
+        seq = self.setpoint.publish_table(table, compiled.dt, t0=t0, dq_table=dq_table)
 
-            print(
-                f"  -> {i:02d}. {pname} | dur={max(dur, self.min_duration):.2f}s | "
-                f"joints_activos={active_changed if active_changed else 'hold'}"
-            )
+        try:
+            for i, pname, dur, first_row, _ in compiled.steps():
+                self.sleep_until(t0 + first_row * compiled.dt)
+                tracking.step(i)
+                if telemetry is not None:
+                    telemetry.mark(compiled.name, i, pname)
+                active_changed = compiled.changed_joints(table, i, initial, self.hold_epsilon)
+                print(
+                    f"  -> {i + 1:02d}. {pname} | dur={dur:.2f}s | "
+                    f"joints_activos={active_changed if active_changed else 'hold'}"
+                )
 
-            self.move_to_target(target, duration=dur, label=pname)
+            self.sleep_until(t0 + compiled.duration)
+            if not self.setpoint.wait_done(seq, timeout=2.0, poll=self.control_dt):
+                print(f"[WARN] Timeout en {compiled.name}. Se sostiene la última fila de la rutina.")
+                self.setpoint.hold(table[-1])
+        finally:
+            stats = tracking.end()
+            if telemetry is not None:
+                telemetry.mark(compiled.name)
 
+        joints.reset(table[-1])
+        print(stats.summary(compiled.step_names))
         print("[INFO] Rutina finalizada. Última postura sostenida.")
 
+    @staticmethod
+    def sleep_until(deadline: float):
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
     # ---------------------------------------------------------
     # Catálogo dinámico
     # ---------------------------------------------------------
 
-    @staticmethod
-    def extract_number(path: Path):
-        match = re.match(r"^\s*(\d+)", path.stem)
-        if match:
-            return int(match.group(1))
-        return None
-
-    @staticmethod
-    def sort_key(path: Path):
-        n = G123DoFPhysicalSelector.extract_number(path)
-        if n is None:
-            return (9999, path.name.lower())
-        return (n, path.name.lower())
-
     def build_catalog(self):
-        if not self.poses_dir.is_dir():
-            return []
-
-        files = sorted(self.poses_dir.glob("*.json"), key=self.sort_key)
-        catalog = []
-        used = set()
-        fallback = 1
-
-        for path in files:
-            number = self.extract_number(path)
-
-            if number is None or number in used:
-                while fallback in used:
-                    fallback += 1
-                number = fallback
-
-            used.add(number)
-            catalog.append({
-                "number": number,
-                "path": path,
-                "name": path.name
-            })
-
-        return catalog
+        return build_catalog(self.poses_dir)
 
     def print_menu(self):
         catalog = self.build_catalog()
@@ -521,8 +568,7 @@ class G123DoFPhysicalSelector:
                 self.play_routine(routine)
             except KeyboardInterrupt:
                 print("\n[INFO] Ctrl+C durante rutina. Se sostiene última postura comandada.")
-                with self.lock:
-                    self.motion_active = False
+                self.freeze_command()
             except Exception as e:
                 print(f"[ERROR] No se pudo ejecutar {item['name']}: {e}")
 
@@ -541,7 +587,7 @@ class G123DoFPhysicalSelector:
         if not candidates:
             return None
 
-        return sorted(candidates, key=self.sort_key)[0]
+        return sorted(candidates, key=sort_key)[0]
 
     def move_to_safe_pose_if_available(self):
         safe_path = self.find_safe_pose_file()
@@ -553,53 +599,43 @@ class G123DoFPhysicalSelector:
         print(f"[INFO] Moviendo a pose segura antes de liberar: {safe_path.name}")
 
         try:
-            routine = self.load_routine(safe_path)
+            routine = self.load_routine(safe_path, fastest=False)
             self.play_routine(routine)
             self.hold_current_command(0.5, "hold final pose segura")
         except Exception as e:
             print(f"[WARN] No se pudo ejecutar pose segura final: {e}")
 
     def stop_writer(self):
-        self.writer_stop.set()
+        self.runtime.stop_writer()
 
-        if self.writer_thread is not None:
-            self.writer_thread.join(timeout=1.0)
-            self.writer_thread = None
+        if self.alloc_probe is not None:
+            self.measure_allocations()
 
     def release_control(self):
         print("[INFO] Liberando arm_sdk...")
 
         self.stop_writer()
 
-        if self.low_state is None:
-            print("[WARN] Sin low_state. No se puede liberar con estado medido.")
-            return
+        # Los registros se cierran antes de las tramas de liberación: con el
+        # brazo suelto, el q/kp/kd comandado del LowCmd ya no es lo que sigue
+        # el robot y esas filas falsearían el error de seguimiento.
+        if self.telemetry is not None:
+            self.telemetry.close()
+            print(f"[INFO] Telemetría: {self.telemetry.summary()}")
+            self.telemetry = None
 
-        cmd = unitree_hg_msg_dds__LowCmd_()
+        if self.recorder.enabled:
+            self.recorder.close()
+            print(f"[INFO] Grabación: {self.recorder.summary()}")
 
-        with self.lock:
-            for j in ACTIVE_JOINTS:
-                try:
-                    q_now = float(self.low_state.motor_state[j].q)
-                except Exception:
-                    q_now = float(self.current_cmd_pos.get(j, 0.0))
+        self.live.close()
 
-                cmd.motor_cmd[j].q = q_now
-                cmd.motor_cmd[j].dq = 0.0
-                cmd.motor_cmd[j].tau = 0.0
-                cmd.motor_cmd[j].kp = 0.0
-                cmd.motor_cmd[j].kd = 0.0
-
-            cmd.motor_cmd[K_NOT_USED_JOINT].q = 0.0
-            cmd.crc = self.crc.Crc(cmd)
-
-        for _ in range(20):
-            self.arm_sdk_publisher.Write(cmd)
-            time.sleep(0.02)
+        if self.low_state is None:
+            print("[WARN] Sin low_state. No se puede liberar con estado medido.")
+            return
 
-        if self.csv_file is not None:
-            self.csv_file.close()
-            self.csv_file = None
+        # Peso de arm_sdk a 0 y kp/kd a 0 sobre la posición medida.
+        self.runtime.close(repeat=20, delay=0.02)
 
         print("[INFO] Control liberado.")
 
@@ -611,6 +647,94 @@ class G123DoFPhysicalSelector:
             self.release_control()
 
 
+def extract_number(path: Path):
+    match = re.match(r"^\s*(\d+)", path.stem)
+    if match:
+        return int(match.group(1))
+    return None
+
+
+def sort_key(path: Path):
+    n = extract_number(path)
+    if n is None:
+        return (9999, path.name.lower())
+    return (n, path.name.lower())
+
+
+def build_catalog(poses_dir: Path):
+    if not poses_dir.is_dir():
+        return []
+
+    files = sorted(poses_dir.glob("*.json"), key=sort_key)
+    catalog = []
+    used = set()
+    fallback = 1
+
+    for path in files:
+        number = extract_number(path)
+
+        if number is None or number in used:
+            while fallback in used:
+                fallback += 1
+            number = fallback
+
+        used.add(number)
+        catalog.append({
+            "number": number,
+            "path": path,
+            "name": path.name
+        })
+
+    return catalog
+
+
+# ---------------------------------------------------------
+# Subcomandos sin robot (--list, --validate)
+# ---------------------------------------------------------
+
+def list_routines(poses_dir: Path, min_duration: float):
+    """Imprime el catálogo con pasos y duración de cada rutina."""
+    catalog = build_catalog(poses_dir)
+    print(f"Carpeta de rutinas: {poses_dir}")
+    if not catalog:
+        print("[WARN] No hay archivos .json en la carpeta.")
+        return
+
+    for item in catalog:
+        try:
+            report = check_routine(load_json_routine(item["path"]), G1_23DOF_ARM_SDK, min_duration)
+        except (OSError, ValueError) as e:
+            print(f"{item['number']:02d}. {item['name']:<40} [ERROR] {e}")
+            continue
+        print(
+            f"{item['number']:02d}. {item['name']:<40} "
+            f"{report['steps']:>3} pasos  {report['duration']:7.2f} s  {report['name']}"
+        )
+
+
+def validate_routines(paths, min_duration: float, max_abs_rad: float) -> bool:
+    """Revisa cada rutina como la compilaría el selector; True si todas son ejecutables."""
+    ok = True
+    for path in paths:
+        try:
+            report = check_routine(load_json_routine(path), G1_23DOF_ARM_SDK, min_duration, max_abs_rad)
+        except (OSError, ValueError) as e:
+            report = {"errors": [str(e)], "ignored": [], "invalid": [], "skipped": []}
+
+        status = "ERROR" if report["errors"] else "OK"
+        ok = ok and not report["errors"]
+        print(f"[{status}] {path.name}")
+        for error in report["errors"]:
+            print(f"    {error}")
+        if report["ignored"]:
+            print(f"    Joints fuera del G1 23 DoF (se ignoran): {report['ignored']}")
+        if report["invalid"]:
+            print(f"    Claves no numéricas (se ignoran): {report['invalid']}")
+        if report["skipped"]:
+            print(f"    Pasos sin posiciones válidas: {report['skipped']}")
+    return ok
+
+
 def auto_resolve_poses_dir(user_dir: str = None):
     if user_dir:
         return Path(user_dir).expanduser().resolve()
@@ -638,8 +762,19 @@ def main():
     parser = argparse.ArgumentParser(
         description="Selector físico de rutinas JSON para Unitree G1 23 DoF."
     )
-    parser.add_argument("interface", help="Interfaz de red del robot. Ej: eth0")
+    parser.add_argument("interface", nargs="?", help="Interfaz de red del robot. Ej: eth0")
     parser.add_argument("--poses-dir", default=None, help="Carpeta con rutinas .json")
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="Lista el catálogo de rutinas y sale (sin robot ni DDS).",
+    )
+    parser.add_argument(
+        "--validate",
+        nargs="*",
+        metavar="RUTINA",
+        help="Valida las rutinas indicadas (por defecto todo el catálogo) y sale.",
+    )
     parser.add_argument("--control-dt", type=float, default=0.02)
     parser.add_argument("--kp", type=float, default=60.0)
     parser.add_argument("--kd", type=float, default=1.5)
@@ -648,8 +783,52 @@ def main():
     parser.add_argument("--max-abs-rad", type=float, default=2.8)
     parser.add_argument("--no-safe-on-exit", action="store_true")
     parser.add_argument("--no-log", action="store_true")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Compila cada rutina sin leer ni guardar tablas .traj.npz.",
+    )
+    parser.add_argument(
+        "--alloc-report",
+        action="store_true",
+        help="Al salir, mide las asignaciones de memoria por tick de write() sin otros hilos.",
+    )
+    add_channel_arguments(parser)
+    add_scheduler_arguments(parser)
+    add_timing_arguments(parser)
+    add_recorder_arguments(parser)
+    parser.add_argument(
+        "--live-shm",
+        nargs="?",
+        const=DEFAULT_SHM_NAME,
+        default=None,
+        metavar="NOMBRE",
+        help="Publica q/tau/q comandado en memoria compartida para el visualizador (--shm).",
+    )
+    add_trajectory_arguments(parser, "cosine")
+    add_retime_arguments(parser)
     args = parser.parse_args()
 
+    if args.list or args.validate is not None:
+        poses_dir = auto_resolve_poses_dir(args.poses_dir)
+        if args.list:
+            list_routines(poses_dir, args.min_duration)
+        if args.validate is not None:
+            paths = [Path(p) for p in args.validate] or [item["path"] for item in build_catalog(poses_dir)]
+            if not validate_routines(paths, args.min_duration, args.max_abs_rad):
+                sys.exit(1)
+        return
+
+    if not args.interface:
+        parser.error("falta la interfaz de red (o usa --list / --validate).")
+    configure_channel(args)
+
+    try:
+        trajectory = resolve_trajectory(args.trajectory, "cosine")
+        limits = limits_from_args(G1_23DOF_ARM_SDK, args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
     poses_dir = auto_resolve_poses_dir(args.poses_dir)
 
     print("\n" + "=" * 72)
@@ -661,6 +840,7 @@ def main():
     print("4. Este script usa rt/arm_sdk y controla solo torso yaw + brazos 23 DoF.")
     print(f"5. Interfaz: {args.interface}")
     print(f"6. Carpeta de poses: {poses_dir}")
+    print(f"7. Trayectoria: {trajectory}{' (más rápido seguro)' if args.fastest else ''}")
     print("=" * 72)
 
     confirm = input("Escribe 'ENTIENDO' para habilitar el selector físico: ").strip()
@@ -678,6 +858,15 @@ def main():
         hold_epsilon=args.hold_epsilon,
         max_abs_rad=args.max_abs_rad,
         log_csv=not args.no_log,
+        alloc_report=args.alloc_report,
+        scheduler=scheduler_kwargs(args),
+        timing=timing_kwargs(args),
+        record=recorder_kwargs(args),
+        live_shm=args.live_shm,
+        routine_cache=not args.no_cache,
+        trajectory=trajectory,
+        fastest=args.fastest,
+        limits=limits,
     )
 
     try:
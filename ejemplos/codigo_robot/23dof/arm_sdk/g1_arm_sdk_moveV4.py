@@ -56,26 +56,31 @@ esas articulaciones no existen en el G1 de 23 DoF.
 - Retorno a cero.
 - Posición de descanso antes de liberar el control.
 - Registro CSV de posición y torque estimado.
+- Movimientos no bloqueantes (g1_comun.motion): move_to devuelve un futuro
+  que el hilo de control completa al terminar la interpolación o al
+  alcanzar la tolerancia; la secuencia interactiva lo espera.
+- Posiciones en vectores NumPy (g1_comun.joints) en el orden del G1 23 DoF.
 """
 
-import csv
-import math
 import sys
-import threading
-import time
 from datetime import datetime
+from pathlib import Path
 
-from unitree_sdk2py.core.channel import (
-    ChannelFactoryInitialize,
-    ChannelPublisher,
-    ChannelSubscriber,
-)
-from unitree_sdk2py.idl.default import (
-    unitree_hg_msg_dds__LowCmd_,
-)
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_, LowState_
-from unitree_sdk2py.utils.crc import CRC
-from unitree_sdk2py.utils.thread import RecurrentThread
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize
+from g1_comun.joints import G1_23DOF_ARM_SDK, read_positions
+from g1_comun.lazy import lazy_import
+from g1_comun.livestate import make_state_publisher
+from g1_comun.recorder import make_recorder
+from g1_comun.routine import cosine_profile
+from g1_comun.runtime import ArmSdkBackend, MotionRuntime
+from g1_comun.startup import Startup
+from g1_comun.telemetry import TelemetryRecorder, joint_columns
+from g1_comun.timing import make_timing
+
+np = lazy_import("numpy")
 
 
 class G1JointIndex:
@@ -107,29 +112,35 @@ class G1JointIndex:
 
 
 class Custom:
-    def __init__(self):
-        self.lock = threading.Lock()
+    def __init__(self, startup: Startup = None):
+        # Primer estado y tiempo hasta el primer comando (g1_comun.startup).
+        self.startup = startup or Startup(Path(__file__).stem)
 
         # Periodo y ganancias conservados respecto al código de 29 DoF.
         self.control_dt_ = 0.02
         self.kp = 60.0
         self.kd = 1.5
 
-        self.low_cmd = unitree_hg_msg_dds__LowCmd_()
-        self.low_state = None
-        self.first_update_low_state = False
-        self.crc = CRC()
-
-        self.stop_event = threading.Event()
+        # Writer de rt/arm_sdk (g1_comun.runtime). El SDK se importa al abrir
+        # los canales: el mensaje de uso y la advertencia inicial no esperan
+        # a cargar CycloneDDS.
+        self.runtime = MotionRuntime(
+            ArmSdkBackend(G1_23DOF_ARM_SDK, self.kp, self.kd),
+            self.control_dt_,
+            name="control",
+            timing=make_timing(Path(__file__).stem, self.control_dt_),
+            startup=self.startup,
+            from_command=False,
+        )
+        self.runtime.source = self.write_arms
+        # Grabación a tasa completa de rt/lowstate con G1_RECORD=<carpeta>.
+        self.recorder = self.runtime.attach(make_recorder(Path(__file__).stem))
 
         # Duración de la interpolación cosenoidal.
         self.T = 5.0
-        self.t = 0.0
-        self.is_moving = False
 
-        # Evita que el hilo periódico vuelva a publicar y reactive arm_sdk
-        # después de la liberación final.
-        self.control_enabled = True
+        # Tras la liberación final el runtime ya no publica ni reactiva
+        # arm_sdk.
         self.control_released = False
 
         # Articulaciones superiores disponibles en el G1 de 23 DoF.
@@ -163,7 +174,10 @@ class Custom:
             G1JointIndex.WaistYaw: -0.0033,
         }
 
-        self.target_pos = {joint: 0.0 for joint in self.arm_joints}
+        # Vectores en el orden de G1_23DOF_ARM_SDK; `start` guarda la
+        # posición medida del tick, desde la que interpola este script.
+        self.joints = self.runtime.joints
+        self.motion = self.runtime.motion
 
         self.joint_names = {
             value: name
@@ -171,30 +185,21 @@ class Custom:
             if not name.startswith("_") and isinstance(value, int)
         }
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.csv_file = open(
-            f"data_g1_23dof_{timestamp}.csv",
-            mode="w",
-            newline="",
-            encoding="utf-8",
-        )
-        self.csv_writer = csv.writer(self.csv_file)
+        # Estado en vivo para el visualizador (--shm) con G1_LIVE_SHM=<nombre>.
+        self.live = self.runtime.attach(make_state_publisher(self.arm_joints))
 
-        header = ["timestamp"]
-        for joint in self.arm_joints:
-            header.extend([f"q_joint{joint}", f"tau_joint{joint}"])
-        self.csv_writer.writerow(header)
-
-        self.sample_count = 0
-        self.lowCmdWriteThreadPtr = None
+        # El callback de lowstate solo copia q/tau al anillo; el CSV lo
+        # escribe un hilo de fondo.
+        self.telemetry = self.runtime.attach(TelemetryRecorder(
+            f"data_g1_23dof_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            self.arm_joints,
+            joint_columns(self.arm_joints),
+            every=500,
+        ), command=False)
 
     def Init(self):
         """Inicializa el publicador de arm_sdk y el suscriptor de lowstate."""
-        self.arm_sdk_publisher = ChannelPublisher("rt/arm_sdk", LowCmd_)
-        self.arm_sdk_publisher.Init()
-
-        self.lowstate_subscriber = ChannelSubscriber("rt/lowstate", LowState_)
-        self.lowstate_subscriber.Init(self.LowStateHandler, 10)
+        self.runtime.open()
 
     def Start(self):
         """
@@ -202,99 +207,35 @@ class Custom:
         inicia el hilo de control y abre la secuencia interactiva.
         """
         print("Esperando el primer mensaje de rt/lowstate...")
-        while not self.first_update_low_state:
-            time.sleep(1.0)
+        self.startup.wait_state()
 
-        with self.lock:
-            for joint in self.arm_joints:
-                self.target_pos[joint] = self.low_state.motor_state[joint].q
-
-        self.lowCmdWriteThreadPtr = RecurrentThread(
-            interval=self.control_dt_,
-            target=self.LowCmdWrite,
-            name="control",
-        )
-        self.lowCmdWriteThreadPtr.Start()
+        self.runtime.read_state()
+        self.runtime.start_writer()
 
         self.run_sequence()
 
-    def LowStateHandler(self, msg: LowState_):
-        """
-        Actualiza el último estado recibido y registra periódicamente posición
-        y torque estimado de las articulaciones controladas.
-        """
-        with self.lock:
-            self.low_state = msg
-
-            if not self.first_update_low_state:
-                self.first_update_low_state = True
-
-            self.sample_count += 1
-            if self.sample_count % 500 == 0:
-                self.sample_count = 0
-
-                row = [datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")]
-                for joint in self.arm_joints:
-                    row.extend(
-                        [
-                            msg.motor_state[joint].q,
-                            msg.motor_state[joint].tau_est,
-                        ]
-                    )
-
-                self.csv_writer.writerow(row)
-                self.csv_file.flush()
-
-    def interpolate_position(self, q_init, q_target):
-        """
-        Calcula una interpolación cosenoidal entre la posición inicial y la
-        posición objetivo, conservando la ecuación del código original.
-        """
-        if self.t < self.T:
-            ratio = (1.0 - math.cos(math.pi * (self.t / self.T))) / 2.0
-        else:
-            ratio = 1.0
+    @property
+    def low_state(self):
+        return self.runtime.low_state
 
-        return q_init + (q_target - q_init) * ratio
+    @property
+    def lowCmdWriteThreadPtr(self):
+        return self.runtime.writer_thread
 
-    def LowCmdWrite(self):
+    def write_arms(self, command, dq):
         """
-        Publica a 50 Hz los objetivos articulares interpolados mediante
-        rt/arm_sdk.
+        Interpola desde la posición medida hacia el objetivo publicado; el
+        runtime lo publica a 50 Hz mediante rt/arm_sdk.
         """
-        if not self.control_enabled:
-            return
-
-        with self.lock:
-            if not self.control_enabled or self.low_state is None:
-                return
-
-            # 1: habilitar arm_sdk.
-            self.low_cmd.motor_cmd[G1JointIndex.kNotUsedJoint].q = 1.0
-
-            for joint in self.arm_joints:
-                q_interp = self.interpolate_position(
-                    self.low_state.motor_state[joint].q,
-                    self.target_pos[joint],
-                )
+        joints = self.joints
+        read_positions(self.low_state.motor_state, G1_23DOF_ARM_SDK.joint_list, joints.start)
+        self.motion.interpolate(cosine_profile)
 
-                self.low_cmd.motor_cmd[joint].q = q_interp
-                self.low_cmd.motor_cmd[joint].tau = 0.0
-                self.low_cmd.motor_cmd[joint].dq = 0.0
-                self.low_cmd.motor_cmd[joint].kp = self.kp
-                self.low_cmd.motor_cmd[joint].kd = self.kd
-
-            self.low_cmd.crc = self.crc.Crc(self.low_cmd)
-            self.arm_sdk_publisher.Write(self.low_cmd)
-
-            self.t += self.control_dt_
-            if self.t >= self.T:
-                self.is_moving = False
-
-    def move_to(self, target_positions, max_wait_time=6.0):
+    def move_to(self, target_positions, tolerance=0.05):
         """
         Inicia una transición hacia un diccionario de posiciones objetivo y
-        espera hasta que finalice, se alcance la tolerancia o venza el tiempo.
+        devuelve su MotionFuture (g1_comun.motion), que el writer completa al
+        terminar la interpolación o cuando la medida queda a `tolerance`.
         """
         missing_joints = [
             joint for joint in self.arm_joints if joint not in target_positions
@@ -305,45 +246,30 @@ class Custom:
                 f"controladas: {missing_joints}"
             )
 
-        with self.lock:
-            self.target_pos = dict(target_positions)
-            self.t = 0.0
-            self.is_moving = True
-
-        self.stop_event.clear()
-        start_time = time.time()
-
-        while self.is_moving:
-            if time.time() - start_time > max_wait_time:
-                print("Tiempo de espera excedido.")
-                break
+        target, _ = G1_23DOF_ARM_SDK.vector(target_positions, default=np.nan)
+        return self.motion.move(target, self.T, tolerance=tolerance)
 
-            if self.stop_event.is_set():
-                print("Movimiento interrumpido.")
-                break
-
-            if self.has_reached_position(target_positions):
-                print("Posición alcanzada.")
-                break
-
-            time.sleep(self.control_dt_)
-
-        self.is_moving = False
+    def wait_motion(self, future, max_wait_time=6.0):
+        """Espera el movimiento de move_to e informa cómo terminó."""
+        if not future.wait(max_wait_time):
+            print("Tiempo de espera excedido.")
+        elif future.cancelled():
+            print("Movimiento interrumpido.")
+        else:
+            print("Posición alcanzada.")
 
     def has_reached_position(self, target_positions, tolerance=0.05):
         """Comprueba si todas las articulaciones están dentro de la tolerancia."""
-        with self.lock:
-            if self.low_state is None:
-                return False
-
-            return all(
-                abs(
-                    self.low_state.motor_state[joint].q
-                    - target_positions[joint]
-                )
-                <= tolerance
-                for joint in self.arm_joints
-            )
+        low_state = self.low_state
+        if low_state is None:
+            return False
+
+        layout = G1_23DOF_ARM_SDK
+        measured = read_positions(
+            low_state.motor_state, layout.joint_list, np.empty(layout.size)
+        )
+        target, _ = layout.vector(target_positions, default=measured)
+        return bool(np.all(np.abs(measured - target) <= tolerance))
 
     def release_control(self, move_to_rest=True):
         """
@@ -355,35 +281,21 @@ class Custom:
 
         if move_to_rest and self.low_state is not None:
             print("\n➡️ Moviendo a posición de descanso...")
-            self.move_to(self.release_position)
-
-        with self.lock:
-            # Detiene nuevas publicaciones del hilo antes de enviar q = 0.
-            self.control_enabled = False
-            self.is_moving = False
-            self.stop_event.set()
-
-            if self.low_state is not None:
-                for joint in self.arm_joints:
-                    self.low_cmd.motor_cmd[joint].q = (
-                        self.low_state.motor_state[joint].q
-                    )
-                    self.low_cmd.motor_cmd[joint].dq = 0.0
-                    self.low_cmd.motor_cmd[joint].tau = 0.0
-                    self.low_cmd.motor_cmd[joint].kp = 0.0
-                    self.low_cmd.motor_cmd[joint].kd = 0.0
-
-            # 0: liberar arm_sdk.
-            self.low_cmd.motor_cmd[G1JointIndex.kNotUsedJoint].q = 0.0
-            self.low_cmd.crc = self.crc.Crc(self.low_cmd)
-            self.arm_sdk_publisher.Write(self.low_cmd)
-
-            self.control_released = True
-
-        if not self.csv_file.closed:
-            self.csv_file.flush()
-            self.csv_file.close()
+            self.wait_motion(self.move_to(self.release_position))
+
+        # close() detiene el hilo antes de enviar q = 0 (espera a que
+        # termine el tick en curso) y publica la posición medida con kp/kd
+        # a 0 y arm_sdk liberado.
+        self.runtime.close(repeat=1, delay=0.0)
+
+        self.control_released = True
 
+        self.telemetry.close()
+        print(f"Telemetría: {self.telemetry.summary()}")
+        if self.recorder.enabled:
+            self.recorder.close()
+            print(f"Grabación: {self.recorder.summary()}")
+        self.live.close()
         print("📁 CSV cerrado. Control liberado.")
 
     def get_user_joint_positions(self):
@@ -416,7 +328,7 @@ class Custom:
         cero -> nueva posición o cero -> nueva posición o salida.
         """
         input("Presiona Enter para mover a cero...")
-        self.move_to({joint: 0.0 for joint in self.arm_joints})
+        self.wait_motion(self.move_to({joint: 0.0 for joint in self.arm_joints}))
 
         while True:
             print("\nMenú:")
@@ -428,10 +340,10 @@ class Custom:
             if option == "1":
                 positions = self.get_user_joint_positions()
                 if positions is not None:
-                    self.move_to(positions)
+                    self.wait_motion(self.move_to(positions))
 
             elif option == "2":
-                self.move_to({joint: 0.0 for joint in self.arm_joints})
+                self.wait_motion(self.move_to({joint: 0.0 for joint in self.arm_joints}))
 
                 print("\n1. Nueva posición")
                 print("2. Salir y liberar control")
@@ -460,9 +372,11 @@ def main():
     print("⚠️ Mantén acceso inmediato al control remoto y al paro de emergencia.")
     input("Presiona Enter para continuar...")
 
+    startup = Startup(Path(__file__).stem)
     ChannelFactoryInitialize(0, sys.argv[1])
+    startup.mark("DDS")
 
-    custom = Custom()
+    custom = Custom(startup)
     custom.Init()
 
     try:
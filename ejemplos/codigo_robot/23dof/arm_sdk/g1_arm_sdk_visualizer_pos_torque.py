@@ -1,13 +1,66 @@
-import csv
-import time
-from datetime import datetime
-from collections import deque
+import argparse
+import sys
+from pathlib import Path
+
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
+from g1_comun.livestate import DEFAULT_SHM_NAME
+from g1_comun.statehub import DEFAULT_HUB_NAME
+
+# Muestras por segundo de rt/lowstate en las fuentes en vivo.
+LIVE_RATE_HZ = 500
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Gráfica de posición y torque: CSV de telemetría o fuente en vivo."
+    )
+    parser.add_argument("csv", nargs="?", help="CSV de telemetría (sin argumentos se pregunta).")
+    parser.add_argument("--dds", metavar="INTERFAZ", help="Se suscribe a rt/lowstate en esta interfaz.")
+    parser.add_argument(
+        "--command-topic",
+        default="rt/arm_sdk",
+        help="Tópico LowCmd del que se toma el q comandado en modo --dds.",
+    )
+    parser.add_argument(
+        "--shm",
+        nargs="?",
+        const=DEFAULT_SHM_NAME,
+        help="Lee el anillo compartido del proceso de control (G1_LIVE_SHM=<nombre>).",
+    )
+    parser.add_argument(
+        "--hub",
+        nargs="?",
+        const=DEFAULT_HUB_NAME,
+        help="Lee rt/lowstate del hub de estado local (herramientas/state_hub.py), sin q comandado.",
+    )
+    parser.add_argument("--window", type=float, default=10.0, help="Segundos visibles en modo en vivo.")
+    args = parser.parse_args()
+
+    if not (args.dds or args.shm or args.hub) and not args.csv:
+        args.csv = input("Ingrese la ruta del archivo .csv: ").strip()
+    return args
+
+
+# Los argumentos y la ruta del CSV se piden antes de importar Qt, pyqtgraph
+# y NumPy (varios cientos de ms): --help y la pregunta responden al instante.
+if __name__ == "__main__":
+    ARGS = parse_args()
 
+import numpy as np
 from PyQt5 import QtWidgets, QtCore
 import pyqtgraph as pg
 
+from g1_comun.joints import G1_23DOF_ARM_SDK
+from g1_comun.livestate import DDSStateSource, SharedStateSource
+from g1_comun.ringbuffer import SignalRing, minmax_decimate
+from g1_comun.statehub import HubStateSource
+from g1_comun.telemetry import CSVTail
+
+
 class CSVVisualizer(QtWidgets.QMainWindow):
-    def __init__(self, csv_file, max_samples=500, refresh_rate=50):
+    def __init__(self, csv_file=None, max_samples=500, refresh_rate=50, source=None):
         super().__init__()
         self.setWindowTitle("Torque y Posición de Articulaciones")
 
@@ -15,19 +68,23 @@ class CSVVisualizer(QtWidgets.QMainWindow):
         self.max_samples = max_samples
         self.refresh_rate = refresh_rate
 
-        # Leer encabezado
-        with open(csv_file, 'r') as f:
-            reader = csv.reader(f)
-            header = next(reader)
-            self.joint_labels = header[1:]
-            self.num_joints = len(self.joint_labels) // 2
-
-        # Preparar datos
-        self.q_data = [deque(maxlen=max_samples) for _ in range(self.num_joints)]
-        self.tau_data = [deque(maxlen=max_samples) for _ in range(self.num_joints)]
-        self.time_data = deque(maxlen=max_samples)
+        # Fuente de datos: el CSV con lectura incremental (cada refresco lee
+        # solo lo agregado; un log largo se abre por sus últimos bytes) o una
+        # fuente en vivo de g1_comun.livestate, que agrega el q comandado.
+        if source is None:
+            source = CSVTail(csv_file, backlog_bytes=max_samples * 1024)
+        self.source = source
+        self.fields = getattr(source, "fields", ("q", "tau"))
+        self.joint_labels = source.header[1:]
+        self.num_joints = len(self.joint_labels) // len(self.fields)
+        self.q_col = self.fields.index("q")
+        self.tau_col = self.fields.index("tau")
+        self.cmd_col = self.fields.index("q_cmd") if "q_cmd" in self.fields else None
+
+        # Preparar datos: un búfer circular con las columnas de la fuente
+        # (campos por joint) cuyas vistas se pasan directo a pyqtgraph.
+        self.samples = SignalRing(max_samples, len(self.joint_labels))
         self.initial_time = None
-        self.last_line = 1
 
         # Layout principal
         central_widget = QtWidgets.QWidget()
@@ -37,8 +94,9 @@ class CSVVisualizer(QtWidgets.QMainWindow):
         # Checkboxes para seleccionar articulaciones
         self.checkboxes = []
         checkbox_layout = QtWidgets.QVBoxLayout()
+        fields = len(self.fields)
         for i in range(self.num_joints):
-            q_label = self.joint_labels[i * 2]
+            q_label = self.joint_labels[i * fields + self.q_col]
             joint_label = q_label[2:] if q_label.startswith("q_") else q_label
 
             cb = QtWidgets.QCheckBox(joint_label)
@@ -65,13 +123,14 @@ class CSVVisualizer(QtWidgets.QMainWindow):
 
         self.curves_q = []
         self.curves_tau = []
+        self.curves_cmd = []
 
         colors = ['r', 'g', 'b', 'c', 'm', 'y', 'w']
 
         for i in range(self.num_joints):
             color = colors[i % len(colors)]
-            q_label = self.joint_labels[i * 2]
-            tau_label = self.joint_labels[i * 2 + 1]
+            q_label = self.joint_labels[i * fields + self.q_col]
+            tau_label = self.joint_labels[i * fields + self.tau_col]
 
             curve_q = self.plot_widget_q.plot(
                 pen=pg.mkPen(color, width=2),
@@ -84,6 +143,13 @@ class CSVVisualizer(QtWidgets.QMainWindow):
             self.curves_q.append(curve_q)
             self.curves_tau.append(curve_tau)
 
+            if self.cmd_col is not None:
+                curve_cmd = self.plot_widget_q.plot(
+                    pen=pg.mkPen(color, style=pg.QtCore.Qt.DotLine),
+                    name=self.joint_labels[i * fields + self.cmd_col]
+                )
+                self.curves_cmd.append(curve_cmd)
+
         graph_layout.addWidget(self.plot_widget_q)
         graph_layout.addWidget(self.plot_widget_tau)
 
@@ -97,49 +163,57 @@ class CSVVisualizer(QtWidgets.QMainWindow):
             visible = cb.isChecked()
             self.curves_q[i].setVisible(visible)
             self.curves_tau[i].setVisible(visible)
+            if self.curves_cmd:
+                self.curves_cmd[i].setVisible(visible)
+        self.redraw()
 
     def update_plot(self):
         try:
-            with open(self.csv_file, 'r') as f:
-                reader = list(csv.reader(f))
-                new_rows = reader[self.last_line:]
-                if not new_rows:
-                    return
-
-                for row in new_rows:
-                    if len(row) < 2:
-                        continue
-
-                    timestamp_str = row[0]
-                    timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
-                    if self.initial_time is None:
-                        self.initial_time = timestamp
-
-                    elapsed = (timestamp - self.initial_time).total_seconds()
-                    self.time_data.append(elapsed)
-
-                    values = row[1:]
-                    for j in range(self.num_joints):
-                        q = float(values[j * 2])
-                        tau = float(values[j * 2 + 1])
-                        self.q_data[j].append(q)
-                        self.tau_data[j].append(tau)
-
-                self.last_line += len(new_rows)
-
-                # Actualizar gráficas
-                t = list(self.time_data)
-                for j in range(self.num_joints):
-                    self.curves_q[j].setData(t, list(self.q_data[j]))
-                    self.curves_tau[j].setData(t, list(self.tau_data[j]))
+            new_rows = self.source.read()
+            if not new_rows:
+                return
+
+            times = np.array([timestamp for timestamp, _ in new_rows])
+            if self.initial_time is None:
+                self.initial_time = times[0]
+            self.samples.extend(times - self.initial_time, [values for _, values in new_rows])
+            self.redraw()
 
         except Exception as e:
             print("Error actualizando gráfico:", e)
 
-if __name__ == "__main__":
-    import sys
+    def redraw(self):
+        # Con más puntos que píxeles se dibujan solo el mín./máx. de cada columna.
+        t, data = self.samples.view()
+        bins = max(1, self.plot_widget_q.width())
+        fields = len(self.fields)
+        for j in range(self.num_joints):
+            if not self.checkboxes[j].isChecked():
+                continue
+            base = j * fields
+            self.curves_q[j].setData(*minmax_decimate(t, data[:, base + self.q_col], bins))
+            self.curves_tau[j].setData(*minmax_decimate(t, data[:, base + self.tau_col], bins))
+            if self.curves_cmd:
+                self.curves_cmd[j].setData(*minmax_decimate(t, data[:, base + self.cmd_col], bins))
+
+def main(args):
     app = QtWidgets.QApplication(sys.argv)
-    csv_path = input("Ingrese la ruta del archivo .csv: ").strip()
-    viewer = CSVVisualizer(csv_path)
+
+    if args.dds or args.shm or args.hub:
+        if args.dds:
+            source = DDSStateSource(args.dds, G1_23DOF_ARM_SDK.joint_list, command_topic=args.command_topic)
+        elif args.hub:
+            source = HubStateSource(G1_23DOF_ARM_SDK.joint_list, args.hub)
+        else:
+            source = SharedStateSource(args.shm)
+        # A tasa completa: la decimación min/max mantiene el costo por cuadro.
+        viewer = CSVVisualizer(max_samples=int(args.window * LIVE_RATE_HZ), source=source)
+    else:
+        viewer = CSVVisualizer(args.csv)
+
     viewer.show()
     sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main(ARGS)
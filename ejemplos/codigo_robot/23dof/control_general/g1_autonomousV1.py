@@ -36,6 +36,7 @@ y timeout por objetivo. Los objetivos se ingresan manualmente por consola.
 - Límite de velocidades y retroceso leve para evitar colisiones.
 - Reorientación previa y posterior al movimiento.
 - Timeout de 30 segundos por objetivo durante el desplazamiento.
+- Detención de la marcha si la odometría deja de llegar (G1_STALE_MS, 100 ms por defecto).
 - Modo seguro de detención ante interrupción o error.
 """
 
@@ -43,18 +44,34 @@ y timeout por objetivo. Los objetivos se ingresan manualmente por consola.
 
 import time
 import math
+import sys
+from pathlib import Path
+
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
 from unitree_sdk2py.g1.loco.g1_loco_client import LocoClient
-from unitree_sdk2py.core.channel import ChannelFactoryInitialize, ChannelSubscriber
 from unitree_sdk2py.idl.unitree_go.msg.dds_ import SportModeState_
 
+from g1_comun.channel import ChannelFactoryInitialize, ChannelSubscriber
+from g1_comun.startup import Startup
+from g1_comun.stateslot import StateSlot, make_watchdog
+
 class AutonomousNavigator:
     def __init__(self, interface):
+        self.startup = Startup(Path(__file__).stem)
         ChannelFactoryInitialize(0, interface)
+        self.startup.mark("DDS")
         self.client = LocoClient()
         self.client.SetTimeout(10.0)
-        self.client.Init()
-
-        self.odom = None
+        # LocoClient.Init() corre mientras se suscribe y llega la odometría.
+        self.startup.background("LocoClient.Init", self.client.Init)
+
+        # Odometría con instante de llegada: si pasa G1_STALE_MS (100 ms) sin
+        # mensajes, el watchdog detiene la locomoción y get_current_pose
+        # devuelve None hasta que vuelva.
+        self.odom = StateSlot("rt/odommodestate")
+        self.watchdog = make_watchdog(self.odom, action="stop", on_stale=self.on_odom_stale)
         self.targets = []
         self.max_vyaw = 0.5
 
@@ -64,14 +81,19 @@ class AutonomousNavigator:
 
     def Start(self):
         print("Esperando odometría...")
-        start_time = time.time()
-        while self.odom is None and time.time() - start_time < 5:
-            time.sleep(0.1)
-        if self.odom is None:
+        if not self.startup.wait_state(timeout=5):
             raise RuntimeError("No se recibió odometría a tiempo.")
+        self.startup.join()
+        self.watchdog.start()
+        print(self.startup.summary())
 
     def OdomMessageHandler(self, msg: SportModeState_):
-        self.odom = msg
+        self.odom.put(msg)
+        self.startup.state_received()
+
+    def on_odom_stale(self, age):
+        # Corre en el hilo del watchdog: frena aunque el lazo esté en un sleep.
+        self.client.Move(0, 0, 0)
 
     def load_targets(self):
         print("Ingrese manualmente los objetivos (x y yaw). Escriba 'fin' para terminar:")
@@ -87,10 +109,11 @@ class AutonomousNavigator:
                 print("Formato inválido. Usa: x y yaw")
 
     def get_current_pose(self):
-        if self.odom is None:
+        odom = self.odom.msg
+        if odom is None or not self.watchdog.check():
             return None, None, None
-        x, y, _ = self.odom.position
-        yaw = self.odom.imu_state.rpy[2]
+        x, y, _ = odom.position
+        yaw = odom.imu_state.rpy[2]
         return x, y, yaw
 
     def compute_control(self, goal_x, goal_y, current_x, current_y, current_yaw):
@@ -214,6 +237,9 @@ def main():
     nav.Start()
     nav.load_targets()
     nav.navigate()
+    nav.watchdog.stop()
+    print(nav.odom.summary())
+    print(nav.watchdog.summary())
 
 if __name__ == "__main__":
     main()
@@ -19,6 +19,11 @@ Este script ejecuta una secuencia de locomoción preestablecida para el G1:
 un desplazamiento en forma de cuadrado y un saludo corporal final. Utiliza
 `LocoClient` de Unitree SDK2 para enviar comandos de velocidad.
 
+El cuadrado se cierra sobre la odometría de `rt/odommodestate` con
+`g1_comun.locomotion`: cada lado termina cuando el robot recorrió la
+distancia medida y los tramos se encadenan sin pausas. Si la odometría no
+llega, se ejecuta el cuadrado original por tiempos.
+
 La llamada `WaveHand()` fue retirada porque corresponde a una tarea integrada
 de brazos y su disponibilidad depende de la configuración y del firmware del
 robot. El saludo final se realiza únicamente mediante locomoción, por lo que
@@ -35,16 +40,24 @@ no requiere manos ni control articular de los brazos.
     python3 "g1_move_in_time (23 dof).py" <nombreInterfaz>
 
 @funcionalidades
-- Movimiento en cuadrado mediante avance y giro.
+- Movimiento en cuadrado mediante avance y giro, en lazo cerrado por odometría.
 - Saludo corporal final compatible con el G1 de 23 DoF sin manos.
 - Detención segura al terminar, ante una interrupción o ante un error.
 """
 
 import sys
 import time
+from pathlib import Path
+
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
 
-from unitree_sdk2py.core.channel import ChannelFactoryInitialize
 from unitree_sdk2py.g1.loco.g1_loco_client import LocoClient
+from unitree_sdk2py.idl.unitree_go.msg.dds_ import SportModeState_
+
+from g1_comun.channel import ChannelFactoryInitialize, ChannelSubscriber
+from g1_comun.locomotion import LocoMover, square
+from g1_comun.stateslot import StateSlot
 
 
 # Configuración de velocidades y tiempos.
@@ -87,6 +100,20 @@ def initialize_robot(network_interface):
     return client
 
 
+def subscribe_odometry():
+    """
+    Suscribe la odometría del robot para cerrar el lazo del cuadrado.
+
+    Returns:
+        tuple: `StateSlot` con el último `SportModeState_` recibido y el
+            suscriptor, que debe mantenerse vivo mientras se use.
+    """
+    odom = StateSlot("rt/odommodestate")
+    subscriber = ChannelSubscriber("rt/odommodestate", SportModeState_)
+    subscriber.Init(odom.put, 10)
+    return odom, subscriber
+
+
 def stop_robot(client):
     """
     Envía comandos redundantes de detención al robot.
@@ -135,13 +162,35 @@ def move(
         time.sleep(pause)
 
 
-def execute_square(client):
+def execute_square(client, odom=None):
     """
-    Ejecuta cuatro segmentos de avance y cuatro giros aproximados de 90°.
+    Ejecuta cuatro segmentos de avance y cuatro giros de 90°.
+
+    Con odometría, cada tramo termina al medir la distancia o el ángulo
+    pedido y los vértices se planifican desde la pose inicial, así el error
+    no se acumula. Sin ella, cada tramo dura un tiempo fijo y el recorrido
+    puede diferir del cuadrado por deslizamiento, irregularidades del piso,
+    estado de calibración y respuesta dinámica.
+
+    Args:
+        client (LocoClient): Cliente de locomoción inicializado.
+        odom (StateSlot): Odometría de `subscribe_odometry()`, opcional.
 
-    El recorrido real puede diferir de un cuadrado perfecto por deslizamiento,
-    irregularidades del piso, estado de calibración y respuesta dinámica.
+    Returns:
+        bool: False si la odometría se perdió a mitad del cuadrado y el
+            robot quedó detenido fuera de su recorrido.
     """
+    if odom is not None:
+        mover = LocoMover(client, odom)
+        if mover.wait_pose() is not None:
+            print("Iniciando reto: movimiento en cuadrado (lazo cerrado por odometría)...")
+            results = mover.run(square(FORWARD_SPEED * FORWARD_DURATION, FORWARD_SPEED, ROTATION_SPEED))
+            if results[-1].stale:
+                print("[WARN] Se perdió la odometría durante el cuadrado: se omite el resto de la rutina.")
+                return False
+            return True
+        print("[WARN] No llega odometría de rt/odommodestate: cuadrado en lazo abierto.")
+
     print("Iniciando reto: movimiento en cuadrado...")
 
     for side in range(1, 5):
@@ -159,6 +208,8 @@ def execute_square(client):
             duration=TURN_DURATION,
         )
 
+    return True
+
 
 def execute_body_greeting(client):
     """
@@ -210,17 +261,20 @@ def main():
 
     try:
         client = initialize_robot(network_interface)
+        odom, _odom_subscriber = subscribe_odometry()
 
         input(
             "Presiona Enter cuando el G1 esté de pie, estable "
             "y listo para iniciar..."
         )
 
-        execute_square(client)
-        execute_body_greeting(client)
+        completed = execute_square(client, odom)
+        if completed:
+            execute_body_greeting(client)
 
         stop_robot(client)
-        print("\nRutina terminada correctamente.")
+        if completed:
+            print("\nRutina terminada correctamente.")
 
     except KeyboardInterrupt:
         print("\nPrograma interrumpido por el usuario.")
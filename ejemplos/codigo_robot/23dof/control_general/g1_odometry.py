@@ -25,74 +25,113 @@ posición, orientación, velocidad lineal y velocidad angular de yaw.
 
 @uso
     python3 g1_odometry.py <nombreInterfaz>
+    python3 g1_odometry.py --hub [nombre]
 
     - <nombreInterfaz>: nombre de la interfaz de red conectada al robot
       (ej. 'eth0', 'enp0s31f6').
+    - --hub: lee la odometría del hub de estado local (herramientas/state_hub.py)
+      en lugar de suscribirse; útil si otros procesos ya leen el robot.
 """
 
 import sys
 import time
 import math
+from pathlib import Path
 
-from unitree_sdk2py.core.channel import ChannelFactoryInitialize, ChannelPublisher, ChannelSubscriber
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-from unitree_sdk2py.idl.unitree_go.msg.dds_ import SportModeState_, IMUState_
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize, ChannelSubscriber
+from g1_comun.startup import Startup
+from g1_comun.statehub import DEFAULT_HUB_NAME, StateHubClient
+
+
+def print_odometry(pos, vel, yaw_rate, rpy):
+    """pos [x, y, z], vel [vx, vy, vz], rpy [roll, pitch, yaw]."""
+    roll, pitch, yaw = rpy
+
+    print("\n ODOMETRÍA ACTUAL")
+    print(f" Posición     -> x: {pos[0]:.3f}, y: {pos[1]:.3f}, z: {pos[2]:.3f}")
+    print(f" Orientación  -> roll: {roll:.3f}, pitch: {pitch:.3f}, yaw: {yaw:.3f}")
+    print(f" Yaw Vel      -> {yaw_rate:.3f} rad/s")
+    print(f" Velocidad    -> vx: {vel[0]:.3f}, vy: {vel[1]:.3f}, vz: {vel[2]:.3f}")
 
 
 class OdomRegister:
     def __init__(self):
         self.low_state = None
-        self.first_update = False
+        self.startup = Startup(Path(__file__).stem)
         self.odom_state = None
         self.counter_ = 0
 
     def Init(self):
+        from unitree_sdk2py.idl.unitree_go.msg.dds_ import SportModeState_
+        from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
+
         self.subscriber_low = ChannelSubscriber("rt/lowstate", LowState_)
         self.subscriber_low.Init(self.LowStateHandler, 10)
         self.subscriber_odom = ChannelSubscriber("rt/odommodestate", SportModeState_)
         self.subscriber_odom.Init(self.OdomMessageHandler, 10)
 
     def Start(self):
-        while not self.first_update:
-            time.sleep(0.1)
+        self.startup.wait_state()
         print("Iniciando registro de odometría")
 
-    def LowStateHandler(self, msg: LowState_):
+    def LowStateHandler(self, msg: "LowState_"):
         self.low_state = msg
 
-    def OdomMessageHandler(self, msg: SportModeState_):
+    def OdomMessageHandler(self, msg: "SportModeState_"):
         self.odom_state = msg
-        if not self.first_update:
-            self.first_update = True
+        self.startup.state_received()
 
         self.counter_ += 1
         if self.counter_ % 500 == 0:
             self.counter_ = 0
-            pos = self.odom_state.position       # [x, y, z]
-            vel = self.odom_state.velocity       # [vx, vy, vz]
-            yaw_rate = self.odom_state.yaw_speed
-            rpy = self.odom_state.imu_state.rpy  # [roll, pitch, yaw]
-            roll, pitch, yaw = rpy
+            print_odometry(
+                self.odom_state.position,
+                self.odom_state.velocity,
+                self.odom_state.yaw_speed,
+                self.odom_state.imu_state.rpy,
+            )
+
 
-            print("\n ODOMETRÍA ACTUAL")
-            print(f" Posición     -> x: {pos[0]:.3f}, y: {pos[1]:.3f}, z: {pos[2]:.3f}")
-            print(f" Orientación  -> roll: {roll:.3f}, pitch: {pitch:.3f}, yaw: {yaw:.3f}")
-            print(f" Yaw Vel      -> {yaw_rate:.3f} rad/s")
-            print(f" Velocidad    -> vx: {vel[0]:.3f}, vy: {vel[1]:.3f}, vz: {vel[2]:.3f}")
+class HubOdomRegister:
+    """Registro de odometría leído del hub de estado local, una vez por segundo."""
+
+    def __init__(self, name):
+        try:
+            self.hub = StateHubClient(name)
+        except FileNotFoundError as e:
+            sys.exit(str(e))
+        if self.hub.odom is None:
+            sys.exit(f"El hub '{name}' no publica rt/odommodestate (se inició con --no-odom).")
+
+    def Start(self):
+        self.hub.wait(kind="odom")
+        print("Iniciando registro de odometría")
+
+    def Update(self):
+        record = self.hub.odom.latest()
+        if record is not None:
+            print_odometry(record["position"], record["velocity"], float(record["yaw_speed"]), record["imu_rpy"])
 
 
 def main():
     if len(sys.argv) < 2:
-        sys.exit("Uso: python3 g1_odometry.py <interfaz_red>")
-
-    ChannelFactoryInitialize(0, sys.argv[1])
-    odom = OdomRegister()
-    odom.Init()
+        sys.exit("Uso: python3 g1_odometry.py <interfaz_red> | --hub [nombre]")
+
+    if sys.argv[1] == "--hub":
+        odom = HubOdomRegister(sys.argv[2] if len(sys.argv) > 2 else DEFAULT_HUB_NAME)
+    else:
+        ChannelFactoryInitialize(0, sys.argv[1])
+        odom = OdomRegister()
+        odom.Init()
     odom.Start()
 
     try:
         while True:
             time.sleep(1)
+            if isinstance(odom, HubOdomRegister):
+                odom.Update()
     except KeyboardInterrupt:
         print("\nFinalizando registro de odometría.")
 
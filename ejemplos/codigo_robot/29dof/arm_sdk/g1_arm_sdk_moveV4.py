@@ -36,22 +36,25 @@ en pruebas con sus brazos, cintura y otras articulaciones superiores.
 """
 # Versión editada de g1_arm_sdk_moveV4.py con entrada solo manual y posición de descanso al liberar
 
-import time
 import sys
-import numpy as np
-import threading
-import math
-import csv
 from datetime import datetime
+from pathlib import Path
 
-from unitree_sdk2py.core.channel import ChannelPublisher, ChannelFactoryInitialize
-from unitree_sdk2py.core.channel import ChannelSubscriber
-from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
-from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowState_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-from unitree_sdk2py.utils.crc import CRC
-from unitree_sdk2py.utils.thread import RecurrentThread
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize
+from g1_comun.joints import G1_29DOF_UPPER, read_positions
+from g1_comun.lazy import lazy_import
+from g1_comun.livestate import make_state_publisher
+from g1_comun.recorder import make_recorder
+from g1_comun.routine import cosine_profile
+from g1_comun.runtime import ArmSdkBackend, MotionRuntime
+from g1_comun.startup import Startup
+from g1_comun.telemetry import TelemetryRecorder, joint_columns
+from g1_comun.timing import make_timing
+
+np = lazy_import("numpy")
 
 class G1JointIndex:
     LeftShoulderPitch = 15
@@ -74,19 +77,31 @@ class G1JointIndex:
     kNotUsedJoint = 29
 
 class Custom:
-    def __init__(self):
-        self.lock = threading.Lock()
+    def __init__(self, startup: Startup = None):
+        self.startup = startup or Startup(Path(__file__).stem)
         self.control_dt_ = 0.02
         self.kp = 60.
         self.kd = 1.5
-        self.low_cmd = unitree_hg_msg_dds__LowCmd_()
-        self.low_state = None
-        self.first_update_low_state = False
-        self.crc = CRC()
-        self.stop_event = threading.Event()
-        self.T = 5.0
-        self.t = 0.0
-        self.is_moving = False
+        # Writer de rt/arm_sdk (g1_comun.runtime). El SDK se importa al abrir
+        # los canales: el mensaje de uso y la advertencia inicial no esperan
+        # a cargar CycloneDDS. Los vectores siguen el orden de
+        # G1_29DOF_UPPER; `start` guarda la posición medida del tick, desde
+        # la que interpola este player. move_to devuelve un futuro que el
+        # writer completa al terminar.
+        self.runtime = MotionRuntime(
+            ArmSdkBackend(G1_29DOF_UPPER, self.kp, self.kd),
+            self.control_dt_,
+            name="control",
+            timing=make_timing(Path(__file__).stem, self.control_dt_),
+            startup=self.startup,
+            from_command=False,
+        )
+        self.runtime.source = self.write_arms
+        self.joints = self.runtime.joints
+        self.motion = self.runtime.motion
+        # Grabación a tasa completa de rt/lowstate con G1_RECORD=<carpeta>.
+        self.recorder = self.runtime.attach(make_recorder(Path(__file__).stem))
+        self.T = 5.0  # duración de cada movimiento (s)
 
         self.arm_joints = [
             G1JointIndex.LeftShoulderPitch, G1JointIndex.LeftShoulderRoll,
@@ -120,105 +135,74 @@ class Custom:
             G1JointIndex.WaistPitch: 0.0
         }
 
-        self.target_pos = {joint: 0.0 for joint in self.arm_joints}
+        # Estado en vivo para el visualizador (--shm) con G1_LIVE_SHM=<nombre>.
+        self.live = self.runtime.attach(make_state_publisher(self.arm_joints))
 
-        self.csv_file = open(f"data_g1_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", mode="w", newline="")
-        self.csv_writer = csv.writer(self.csv_file)
-        header = ["timestamp"]
-        for joint in self.arm_joints:
-            header.extend([f"q_joint{joint}", f"tau_joint{joint}"])
-        self.csv_writer.writerow(header)
-        self.sample_count = 0
+        # El callback de lowstate solo copia q/tau al anillo; el CSV lo
+        # escribe un hilo de fondo.
+        self.telemetry = self.runtime.attach(TelemetryRecorder(
+            f"data_g1_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            self.arm_joints,
+            joint_columns(self.arm_joints),
+            every=500,
+        ), command=False)
 
     def Init(self):
-        self.arm_sdk_publisher = ChannelPublisher("rt/arm_sdk", LowCmd_)
-        self.arm_sdk_publisher.Init()
-        self.lowstate_subscriber = ChannelSubscriber("rt/lowstate", LowState_)
-        self.lowstate_subscriber.Init(self.LowStateHandler, 10)
+        self.runtime.open()
 
     def Start(self):
-        from unitree_sdk2py.utils.thread import RecurrentThread
-        while not self.first_update_low_state:
-            time.sleep(1)
-        for joint in self.arm_joints:
-            self.target_pos[joint] = self.low_state.motor_state[joint].q
-        self.lowCmdWriteThreadPtr = RecurrentThread(
-            interval=self.control_dt_, target=self.LowCmdWrite, name="control")
-        self.lowCmdWriteThreadPtr.Start()
+        self.startup.wait_state()
+        self.runtime.read_state()
+        self.runtime.start_writer()
         self.run_sequence()
 
-    def LowStateHandler(self, msg: LowState_):
-        with self.lock:
-            self.low_state = msg
-        if not self.first_update_low_state:
-            self.first_update_low_state = True
-        self.sample_count += 1
-        if self.sample_count % 500 == 0:
-            self.sample_count = 0
-            row = [datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")]
-            for joint in self.arm_joints:
-                row.extend([msg.motor_state[joint].q, msg.motor_state[joint].tau_est])
-            self.csv_writer.writerow(row)
+    @property
+    def low_state(self):
+        return self.runtime.low_state
+
+    @property
+    def lowCmdWriteThreadPtr(self):
+        return self.runtime.writer_thread
 
-    def interpolate_position(self, q_init, q_target):
-        ratio = (1 - math.cos(math.pi * (self.t / self.T))) / 2 if self.t < self.T else 1.0
-        return q_init + (q_target - q_init) * ratio
+    def write_arms(self, command, dq):
+        joints = self.joints
+        read_positions(self.low_state.motor_state, joints.layout.joint_list, joints.start)
+        self.motion.interpolate(cosine_profile)
 
-    def LowCmdWrite(self):
-        if self.low_state is None:
-            return
-        with self.lock:
-            self.low_cmd.motor_cmd[G1JointIndex.kNotUsedJoint].q = 1
-            for joint in self.arm_joints:
-                q_interp = self.interpolate_position(
-                    self.low_state.motor_state[joint].q,
-                    self.target_pos[joint])
-                self.low_cmd.motor_cmd[joint].q = q_interp
-                self.low_cmd.motor_cmd[joint].tau = 0.
-                self.low_cmd.motor_cmd[joint].dq = 0.
-                self.low_cmd.motor_cmd[joint].kp = self.kp
-                self.low_cmd.motor_cmd[joint].kd = self.kd
-            self.low_cmd.crc = self.crc.Crc(self.low_cmd)
-            self.arm_sdk_publisher.Write(self.low_cmd)
-        self.t += self.control_dt_
-        if self.t >= self.T:
-            self.is_moving = False
+    def move_to(self, target_positions, tolerance=0.05):
+        """
+        Publica el movimiento y devuelve su MotionFuture: el writer lo completa
+        al terminar la interpolación o cuando la medida queda a `tolerance`.
+        """
+        target, _ = self.joints.layout.vector(target_positions, default=np.nan)
+        return self.motion.move(target, self.T, tolerance=tolerance)
 
-    def move_to(self, target_positions, max_wait_time=6.0):
-        self.target_pos = target_positions
-        self.t = 0.0
-        self.is_moving = True
-        self.stop_event.clear()
-        start_time = time.time()
-        while self.is_moving:
-            if time.time() - start_time > max_wait_time:
-                print("Tiempo de espera excedido.")
-                break
-            if self.stop_event.is_set():
-                print("Movimiento interrumpido.")
-                break
-            if self.has_reached_position(target_positions):
-                print("Posición alcanzada.")
-                break
-            time.sleep(self.control_dt_)
+    def wait_motion(self, future, max_wait_time=6.0):
+        if not future.wait(max_wait_time):
+            print("Tiempo de espera excedido.")
+        elif future.cancelled():
+            print("Movimiento interrumpido.")
+        else:
+            print("Posición alcanzada.")
 
     def has_reached_position(self, target_positions, tolerance=0.05):
-        return all(abs(self.low_state.motor_state[j].q - target_positions[j]) <= tolerance
-                   for j in self.arm_joints if j in target_positions)
+        layout = self.joints.layout
+        measured = read_positions(self.low_state.motor_state, layout.joint_list, np.empty(layout.size))
+        target, _ = layout.vector(target_positions, default=measured)
+        return bool(np.all(np.abs(measured - target) <= tolerance))
 
     def release_control(self):
         print("\n➡️ Moviendo a posición de descanso...")
-        self.move_to(self.release_position)
-        for joint in self.arm_joints:
-            self.low_cmd.motor_cmd[joint].q = self.low_state.motor_state[joint].q
-            self.low_cmd.motor_cmd[joint].dq = 0.0
-            self.low_cmd.motor_cmd[joint].tau = 0.0
-            self.low_cmd.motor_cmd[joint].kp = 0.0
-            self.low_cmd.motor_cmd[joint].kd = 0.0
-        self.low_cmd.motor_cmd[G1JointIndex.kNotUsedJoint].q = 0
-        self.low_cmd.crc = self.crc.Crc(self.low_cmd)
-        self.arm_sdk_publisher.Write(self.low_cmd)
-        self.csv_file.close()
+        self.wait_motion(self.move_to(self.release_position))
+        # Detiene el writer y publica la posición medida con kp/kd y el peso
+        # de arm_sdk a 0.
+        self.runtime.close(repeat=1, delay=0.0)
+        self.telemetry.close()
+        print(f"Telemetría: {self.telemetry.summary()}")
+        if self.recorder.enabled:
+            self.recorder.close()
+            print(f"Grabación: {self.recorder.summary()}")
+        self.live.close()
         print("📁 CSV cerrado. Control liberado.")
 
     def get_user_joint_positions(self):
@@ -237,7 +221,7 @@ class Custom:
 
     def run_sequence(self):
         input("Presiona Enter para mover a cero...")
-        self.move_to({joint: 0.0 for joint in self.arm_joints})
+        self.wait_motion(self.move_to({joint: 0.0 for joint in self.arm_joints}))
         while True:
             print("\nMenú:")
             print("1. Ingresar nueva posición")
@@ -246,9 +230,9 @@ class Custom:
             if opt == '1':
                 pos = self.get_user_joint_positions()
                 if pos:
-                    self.move_to(pos)
+                    self.wait_motion(self.move_to(pos))
             elif opt == '2':
-                self.move_to({joint: 0.0 for joint in self.arm_joints})
+                self.wait_motion(self.move_to({joint: 0.0 for joint in self.arm_joints}))
                 print("\n1. Nueva posición\n2. Salir y liberar control")
                 sub = input("Opción (1/2): ")
                 if sub == '1':
@@ -264,7 +248,9 @@ if __name__ == '__main__':
         sys.exit(-1)
     print("⚠️ Asegúrate de que no haya obstáculos cerca del robot.")
     input("Presiona Enter para continuar...")
+    startup = Startup(Path(__file__).stem)
     ChannelFactoryInitialize(0, sys.argv[1])
-    custom = Custom()
+    startup.mark("DDS")
+    custom = Custom(startup)
     custom.Init()
     custom.Start()
@@ -38,25 +38,34 @@
     - Verificación de posición alcanzada al final de cada movimiento.
     - Registro automático de posiciones y torques en archivo `.csv` con timestamp.
     - Liberación progresiva del control y finalización segura del script.
+    - Trayectorias de caminata en lazo cerrado sobre rt/odommodestate (por tiempos si no llega).
+    - Watchdog de estado: si rt/lowstate no llega durante G1_STALE_MS (100 ms por defecto)
+      se aplica G1_STALE_ACTION: hold (cancela el movimiento), freeze (congela la
+      interpolación hasta que vuelva el estado) o stop (además detiene la caminata).
 """
 
 import time
 import sys
-import numpy as np
-import threading
-import math
-import csv
 from datetime import datetime
-
-from unitree_sdk2py.core.channel import ChannelPublisher, ChannelFactoryInitialize
-from unitree_sdk2py.core.channel import ChannelSubscriber
-from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
-from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowState_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-from unitree_sdk2py.utils.crc import CRC
-from unitree_sdk2py.utils.thread import RecurrentThread
-from unitree_sdk2py.g1.loco.g1_loco_client import LocoClient
+from pathlib import Path
+
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize, ChannelSubscriber
+from g1_comun.joints import G1_29DOF_UPPER, read_positions
+from g1_comun.lazy import lazy_import
+from g1_comun.livestate import make_state_publisher
+from g1_comun.locomotion import LocoMover, from_velocity
+from g1_comun.recorder import make_recorder
+from g1_comun.routine import cosine_profile
+from g1_comun.runtime import ArmSdkBackend, MotionRuntime
+from g1_comun.startup import Startup
+from g1_comun.stateslot import StateSlot, make_watchdog
+from g1_comun.telemetry import TelemetryRecorder, joint_columns
+from g1_comun.timing import make_timing
+
+np = lazy_import("numpy")
 
 class G1JointIndex:
     LeftShoulderPitch = 15
@@ -79,21 +88,39 @@ class G1JointIndex:
     kNotUsedJoint = 29
 
 class Custom:
-    def __init__(self):
-        self.lock = threading.Lock()
+    def __init__(self, startup: Startup = None):
+        # El SDK se importa al crear el controlador: el mensaje de uso y la
+        # advertencia inicial no esperan a cargar CycloneDDS.
+        from unitree_sdk2py.g1.loco.g1_loco_client import LocoClient
+
+        self.startup = startup or Startup(Path(__file__).stem)
         self.control_dt_ = 0.02
         self.kp = 60.
         self.kd = 1.5
-        self.low_cmd = unitree_hg_msg_dds__LowCmd_()
-        self.low_state = None
-        self.first_update_low_state = False
-        self.crc = CRC()
+        # Writer de rt/arm_sdk (g1_comun.runtime). Los vectores siguen el
+        # orden de G1_29DOF_UPPER; `start` guarda la posición medida del tick,
+        # desde la que interpola este player. move_to devuelve un futuro que
+        # el writer completa al terminar.
+        self.runtime = MotionRuntime(
+            ArmSdkBackend(G1_29DOF_UPPER, self.kp, self.kd),
+            self.control_dt_,
+            name="control",
+            timing=make_timing(Path(__file__).stem, self.control_dt_),
+            startup=self.startup,
+            from_command=False,
+        )
+        self.runtime.source = self.write_arms
+        self.joints = self.runtime.joints
+        self.motion = self.runtime.motion
+        # Último rt/lowstate con instante de llegada y secuencia; el watchdog
+        # aplica la acción de degradación cuando el estado queda viejo.
+        self.state = self.runtime.state
+        self.watchdog = make_watchdog(self.state, on_stale=self.on_state_stale)
+        # Grabación a tasa completa de rt/lowstate con G1_RECORD=<carpeta>.
+        self.recorder = self.runtime.attach(make_recorder(Path(__file__).stem))
         self.done = False
         self.current_stage = 0
-        self.T = 5.0
-        self.t = 0.0
-        self.is_moving = False
-        self.stop_event = threading.Event()
+        self.T = 5.0  # duración de cada movimiento (s)
         self.DEFAULT_X_VEL = 0.3
         self.DEFAULT_Y_VEL = 0.3
         self.DEFAULT_YAW_VEL = 0.5
@@ -130,150 +157,119 @@ class Custom:
             G1JointIndex.WaistPitch: 0.0
         }
 
-        self.target_pos = {joint: 0.0 for joint in self.arm_joints}
         self.alpha = 0.05
 
-        self.csv_file = open(f"data_g1_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", mode="w", newline="")
-        self.csv_writer = csv.writer(self.csv_file)
-
-        header = ["timestamp"]
-        for joint in self.arm_joints:
-            header.extend([f"q_joint{joint}", f"tau_joint{joint}"])
-        self.csv_writer.writerow(header)
+        # Estado en vivo para el visualizador (--shm) con G1_LIVE_SHM=<nombre>.
+        self.live = self.runtime.attach(make_state_publisher(self.arm_joints))
 
-        self.sample_count = 0
+        # El callback de lowstate solo copia q/tau al anillo; el CSV lo
+        # escribe un hilo de fondo.
+        self.telemetry = self.runtime.attach(TelemetryRecorder(
+            f"data_g1_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            self.arm_joints,
+            joint_columns(self.arm_joints),
+            every=500,
+        ), command=False)
 
         self.client = LocoClient()
         self.client.SetTimeout(10.0)
-        self.client.Init()
+        # Odometría para caminar en lazo cerrado (g1_comun.locomotion): cada
+        # paso termina al medir la distancia o el ángulo pedido.
+        self.odom = StateSlot("rt/odommodestate")
+        self.mover = LocoMover(self.client, self.odom)
 
     def Init(self):
-        self.arm_sdk_publisher = ChannelPublisher("rt/arm_sdk", LowCmd_)
-        self.arm_sdk_publisher.Init()
+        # LocoClient.Init() corre mientras se crean los canales y llega el
+        # primer estado; Start() lo espera antes de usar el cliente.
+        self.startup.background("LocoClient.Init", self.client.Init)
+        self.runtime.open()
+        from unitree_sdk2py.idl.unitree_go.msg.dds_ import SportModeState_
 
-        self.lowstate_subscriber = ChannelSubscriber("rt/lowstate", LowState_)
-        self.lowstate_subscriber.Init(self.LowStateHandler, 10)
+        self.subscriber_odom = ChannelSubscriber("rt/odommodestate", SportModeState_)
+        self.subscriber_odom.Init(self.odom.put, 10)
 
     def Start(self):
         try:
-            self.lowCmdWriteThreadPtr = RecurrentThread(
-                interval=self.control_dt_, target=self.LowCmdWrite, name="control")
-
-            while not self.first_update_low_state:
-                time.sleep(1)
-
-            if self.first_update_low_state:
-                for joint in self.arm_joints:
-                    self.target_pos[joint] = self.low_state.motor_state[joint].q
-                self.lowCmdWriteThreadPtr.Start()
-                self.run_sequence()
+            self.startup.wait_state()
+            self.runtime.read_state()
+            self.runtime.start_writer()
+            # La acción stop del watchdog usa el cliente de locomoción.
+            self.startup.join()
+            self.watchdog.start()
+            self.run_sequence()
         except KeyboardInterrupt:
             print("\nInterrupción detectada. Liberando el control...")
             self.release_control()
             return
 
-    def LowStateHandler(self, msg: LowState_):
-        with self.lock:
-            self.low_state = msg
-
-        if not self.first_update_low_state:
-            self.first_update_low_state = True
-
-        self.sample_count += 1
-        if self.sample_count % 500 == 0:
-            self.sample_count = 0
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
-            row = [timestamp]
-            for joint in self.arm_joints:
-                tau = msg.motor_state[joint].tau_est
-                q = msg.motor_state[joint].q
-                row.extend([q, tau])
-            self.csv_writer.writerow(row)
-
-    def interpolate_position(self, q_init, q_target):
-        ratio = (1 - math.cos(math.pi * (self.t / self.T))) / 2 if self.t < self.T else 1.0
-        return q_init + (q_target - q_init) * ratio
-
-    def LowCmdWrite(self):
-        if self.low_state is None:
-            return
-
-        with self.lock:
-            self.low_cmd.motor_cmd[G1JointIndex.kNotUsedJoint].q = 1
-            for joint in self.arm_joints:
-                q_init = self.low_state.motor_state[joint].q
-                q_target = self.target_pos[joint]
-                q_interpolated = self.interpolate_position(q_init, q_target)
-
-                self.low_cmd.motor_cmd[joint].q = q_interpolated
-                self.low_cmd.motor_cmd[joint].tau = 0.
-                self.low_cmd.motor_cmd[joint].dq = 0.
-                self.low_cmd.motor_cmd[joint].kp = self.kp
-                self.low_cmd.motor_cmd[joint].kd = self.kd
-
-            self.low_cmd.crc = self.crc.Crc(self.low_cmd)
-            self.arm_sdk_publisher.Write(self.low_cmd)
-
-        with self.lock:
-            self.t += self.control_dt_
-            if self.t >= self.T:
-                self.is_moving = False
-
-    def move_to(self, target_positions, max_wait_time=6.0):
-        with self.lock:
-            self.target_pos = target_positions
-            self.t = 0.0
-            self.is_moving = True
-            self.stop_event.clear()
-
-        start_time = time.time()
-
-        while True:
-            with self.lock:
-                if not self.is_moving:
-                    print("Movimiento completado.")
-                    break
-
-            if time.time() - start_time > max_wait_time:
-                print("Advertencia: Tiempo de espera excedido. Posición no alcanzada.")
-                break
-
-            if self.stop_event.is_set():
-                print("Movimiento detenido por solicitud.")
-                break
-
-            if self.has_reached_position(target_positions, tolerance=0.05):
-                print("Posición alcanzada con éxito.")
-                break
-
-            time.sleep(self.control_dt_)
+    @property
+    def low_state(self):
+        return self.state.msg
+
+    @property
+    def lowCmdWriteThreadPtr(self):
+        return self.runtime.writer_thread
+
+    def write_arms(self, command, dq):
+        # Con el estado viejo no se relee la posición medida: hold y stop
+        # sostienen el último comando (on_state_stale canceló el movimiento)
+        # y freeze congela la interpolación.
+        joints = self.joints
+        fresh = not self.watchdog.stale
+        if fresh:
+            read_positions(self.low_state.motor_state, joints.layout.joint_list, joints.start)
+        self.motion.interpolate(cosine_profile, advance=fresh)
+
+    def on_state_stale(self, age):
+        # Corre en el hilo del watchdog, no en el writer.
+        action = self.watchdog.action
+        if action in ("hold", "stop"):
+            self.motion.cancel()
+        if action == "stop":
+            self.client.Move(0, 0, 0)
+
+    def move_to(self, target_positions, tolerance=0.05):
+        """
+        Publica el movimiento y devuelve su MotionFuture: el writer lo completa
+        al terminar la interpolación o cuando la medida queda a `tolerance`.
+        """
+        target, _ = self.joints.layout.vector(target_positions, default=np.nan)
+        return self.motion.move(target, self.T, tolerance=tolerance)
+
+    def wait_motion(self, future, max_wait_time=6.0):
+        if not future.wait(max_wait_time):
+            print("Advertencia: Tiempo de espera excedido. Posición no alcanzada.")
+        elif future.cancelled():
+            print("Movimiento detenido por solicitud.")
+        else:
+            print("Movimiento completado.")
 
     def has_reached_position(self, target_positions, tolerance=0.05):
         if self.low_state is None:
             return False
 
-        for joint in self.arm_joints:
-            if joint not in target_positions:
-                continue
-            if abs(self.low_state.motor_state[joint].q - target_positions[joint]) > tolerance:
-                return False
-        return True
+        layout = self.joints.layout
+        measured = read_positions(self.low_state.motor_state, layout.joint_list, np.empty(layout.size))
+        target, _ = layout.vector(target_positions, default=measured)
+        return bool(np.all(np.abs(measured - target) <= tolerance))
 
     def release_control(self):
-        self.stop_event.set()
+        self.motion.cancel()
         print("\nMoviendo a posición de descanso antes de liberar control...")
-        self.move_to(self.release_position)
-
-        for joint in self.arm_joints:
-            self.low_cmd.motor_cmd[joint].q = self.low_state.motor_state[joint].q
-            self.low_cmd.motor_cmd[joint].dq = 0.0
-            self.low_cmd.motor_cmd[joint].tau = 0.0
-            self.low_cmd.motor_cmd[joint].kp = 0.0
-            self.low_cmd.motor_cmd[joint].kd = 0.0
-        self.low_cmd.motor_cmd[G1JointIndex.kNotUsedJoint].q = 0
-        self.low_cmd.crc = self.crc.Crc(self.low_cmd)
-        self.arm_sdk_publisher.Write(self.low_cmd)
-        self.csv_file.close()
+        self.wait_motion(self.move_to(self.release_position))
+
+        # Detiene el writer y publica la posición medida con kp/kd y el peso
+        # de arm_sdk a 0.
+        self.runtime.close(repeat=1, delay=0.0)
+        self.watchdog.stop()
+        print(self.state.summary())
+        print(self.watchdog.summary())
+        self.telemetry.close()
+        print(f"Telemetría: {self.telemetry.summary()}")
+        if self.recorder.enabled:
+            self.recorder.close()
+            print(f"Grabación: {self.recorder.summary()}")
+        self.live.close()
         print("Archivo CSV cerrado.\nControl liberado completamente.")
 
     def get_user_joint_positions(self):
@@ -338,6 +334,18 @@ class Custom:
             print(" Ejecución cancelada.")
             return
         print("\n Ejecutando secuencia...")
+        # Con odometría los pasos se encadenan sin frenar entre ellos y los
+        # objetivos se planifican desde la pose inicial; sin ella, por tiempos.
+        plan = [from_velocity(x, y, yaw, duration) for x, y, yaw, duration in movimientos]
+        if all(plan):
+            if self.mover.wait_pose(timeout=1.0) is not None:
+                results = self.mover.run([segment for steps in plan for segment in steps])
+                if results[-1].stale:
+                    print("\n Secuencia interrumpida: se perdió la odometría.")
+                else:
+                    print("\n Secuencia de movimientos completada.")
+                return
+            print("[WARN] No llega odometría de rt/odommodestate: secuencia por tiempos.")
         for i, (x, y, yaw, duration) in enumerate(movimientos, 1):
             print(f"\n Movimiento #{i}")
             self.move(self.client, x_vel=x, y_vel=y, yaw_vel=yaw, duration=duration)
@@ -361,7 +369,7 @@ class Custom:
 
     def run_sequence(self):
         input("\nMoviendo a posición cero... Presione Enter para continuar.")
-        self.move_to({joint: 0.0 for joint in self.arm_joints})
+        self.wait_motion(self.move_to({joint: 0.0 for joint in self.arm_joints}))
         self.ask_walk_after_arm_motion()
         while True:
             print("\nOpciones:")
@@ -373,10 +381,10 @@ class Custom:
                 if target_positions is None:
                     print("\nCancelando la secuencia.")
                     continue
-                self.move_to(target_positions)
+                self.wait_motion(self.move_to(target_positions))
                 self.ask_walk_after_arm_motion()
             elif option == "2":
-                self.move_to({joint: 0.0 for joint in self.arm_joints})
+                self.wait_motion(self.move_to({joint: 0.0 for joint in self.arm_joints}))
                 self.ask_walk_after_arm_motion()
                 print("\nOpciones tras volver a cero:")
                 print("1. Ingresar otra posición objetivo")
@@ -400,7 +408,9 @@ if __name__ == '__main__':
         sys.exit(-1)
     print("ADVERTENCIA: Asegúrese de que no haya obstáculos cerca del robot.")
     input("Presione Enter para continuar...")
+    startup = Startup(Path(__file__).stem)
     ChannelFactoryInitialize(0, sys.argv[1])
-    custom = Custom()
+    startup.mark("DDS")
+    custom = Custom(startup)
     custom.Init()
     custom.Start()
@@ -19,6 +19,10 @@ Este script define una secuencia de movimientos preestablecidos para el robot G1
 de desplazamiento en forma de cuadrado y un gesto de saludo final. Utiliza la API `loco_client` 
 de la SDK2 de Unitree para enviar comandos de locomoción y gestos.
 
+El cuadrado se cierra sobre la odometría (`rt/odommodestate`) con `g1_comun.locomotion`: cada
+lado termina al medir la distancia recorrida y los tramos se encadenan sin pausas. Si la
+odometría no llega, se ejecuta por tiempos como antes.
+
 @requisitos
 - Conexión Ethernet activa entre el PC y el G1.
 - Robot en modo normal (cero torque) al inicio.
@@ -28,15 +32,24 @@ de la SDK2 de Unitree para enviar comandos de locomoción y gestos.
     python3 g1_move_in_time.py <nombreInterfaz>
 
 @funcionalidades
-- Movimiento en cuadrado (avance + giro).
+- Movimiento en cuadrado (avance + giro), en lazo cerrado por odometría.
 - Saludo con la "mano" del robot.
 """
 
 
 import sys
 import time
-from unitree_sdk2py.core.channel import ChannelFactoryInitialize
+from pathlib import Path
+
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
 from unitree_sdk2py.g1.loco.g1_loco_client import LocoClient
+from unitree_sdk2py.idl.unitree_go.msg.dds_ import SportModeState_
+
+from g1_comun.channel import ChannelFactoryInitialize, ChannelSubscriber
+from g1_comun.locomotion import LocoMover, square
+from g1_comun.stateslot import StateSlot
 
 # Configuración de velocidades y tiempos (ajustables según el escenario)
 FORWARD_SPEED = 0.4    # Velocidad de avance en metros por segundo (m/s)
@@ -84,6 +97,18 @@ def move(client, x_vel=0.0, y_vel=0.0, yaw_vel=0.0, duration=DURATION):
     client.Move(0, 0, 0)  # Detener el robot tras la duración establecida
     time.sleep(1.0)  # Pequeña pausa antes de cualquier otro comando
 
+def subscribe_odometry():
+    """
+    Suscribe rt/odommodestate para cerrar el lazo del cuadrado.
+
+    Returns:
+        tuple: StateSlot con el último SportModeState_ y el suscriptor (debe mantenerse vivo).
+    """
+    odom = StateSlot("rt/odommodestate")
+    subscriber = ChannelSubscriber("rt/odommodestate", SportModeState_)
+    subscriber.Init(odom.put, 10)
+    return odom, subscriber
+
 def main():
     """
     Función principal del programa. Se encarga de:
@@ -102,13 +127,24 @@ def main():
 
     try:
         client = initialize_robot(sys.argv[1])  # Inicializar el robot
+        odom, _odom_subscriber = subscribe_odometry()  # Odometría para el lazo cerrado
 
         # RETO: Movimiento en cuadrado
         input("Presiona Enter cuando el robot este listo para iniciar")
-        print("Iniciando reto: Movimiento en cuadrado...")
-        for _ in range(4):  # Repetir 4 veces para completar el cuadrado
-            move(client, x_vel=FORWARD_SPEED, duration=3.0)  # Avanza
-            move(client, yaw_vel=-ROTATION_SPEED, duration=3.14)  # Gira 90° a la izquierda
+        mover = LocoMover(client, odom)
+        if mover.wait_pose() is not None:
+            # Cada lado termina al medir 1.2 m y cada giro al medir 90°, sin pausas
+            print("Iniciando reto: Movimiento en cuadrado (lazo cerrado por odometría)...")
+            results = mover.run(square(FORWARD_SPEED * 3.0, FORWARD_SPEED, ROTATION_SPEED))
+            if results[-1].stale:
+                print("[WARN] Se perdió la odometría durante el cuadrado: se omite el saludo.")
+                return
+        else:
+            print("[WARN] No llega odometría de rt/odommodestate: cuadrado en lazo abierto.")
+            print("Iniciando reto: Movimiento en cuadrado...")
+            for _ in range(4):  # Repetir 4 veces para completar el cuadrado
+                move(client, x_vel=FORWARD_SPEED, duration=3.0)  # Avanza
+                move(client, yaw_vel=-ROTATION_SPEED, duration=3.14)  # Gira 90° a la izquierda
 
         # RETO: Saludo final
         print("Finalizando con un saludo...")
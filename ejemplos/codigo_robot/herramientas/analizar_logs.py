@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Estadísticas por joint de uno o varios logs CSV de telemetría
+# (logs_physical/g1_23dof_physical_*.csv, data_g1_*.csv) con g1_comun.analysis.
+#
+# Uso:
+#   python3 analizar_logs.py logs_physical/
+#   python3 analizar_logs.py data_g1_*.csv --per-file
+#   python3 analizar_logs.py logs_physical/ --steps --tau-threshold 8 15
+#   python3 analizar_logs.py logs_physical/ --json resumen.json --jobs 4
+#
+# Las carpetas se recorren recursivamente buscando *.csv. Cada archivo se lee
+# por bloques (--chunk-mb) y los archivos se reparten entre --jobs procesos,
+# así la memoria no depende del tamaño de los logs. Se reporta por joint:
+# rango de q, |v| y |a| estimadas, RMS/pico de tau, segundos con |tau| sobre
+# cada umbral y, si el log tiene q_cmd, el error de seguimiento. Con marcas
+# de rutina (<csv>.steps.csv del selector físico) se agrega un resumen por
+# paso; --steps imprime además la tabla completa de cada paso.
+# No requiere unitree_sdk2py.
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.analysis import (
+    CHUNK_BYTES,
+    TAU_THRESHOLDS,
+    analyze_logs,
+    combine,
+    find_logs,
+    format_segments,
+    format_stats,
+)
+from g1_comun.joints import G1_29DOF_NAMES
+
+
+JOINT_NAMES = dict(enumerate(G1_29DOF_NAMES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estadísticas por joint de logs CSV de telemetría.")
+    parser.add_argument("paths", nargs="+", help="Archivos CSV o carpetas con logs.")
+    parser.add_argument("--jobs", type=int, default=None, help="Procesos (por defecto, uno por CPU).")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / (1 << 20), help="Tamaño de bloque de lectura.")
+    parser.add_argument(
+        "--tau-threshold",
+        type=float,
+        nargs="+",
+        default=list(TAU_THRESHOLDS),
+        help="Umbrales de |tau| en Nm para el tiempo acumulado sobre ellos.",
+    )
+    parser.add_argument(
+        "--max-gap",
+        type=float,
+        default=2.0,
+        help="Intervalo máximo entre muestras (s); los mayores se tratan como corte.",
+    )
+    parser.add_argument("--per-file", action="store_true", help="Imprime también la tabla de cada archivo.")
+    parser.add_argument("--steps", action="store_true", help="Imprime la tabla completa de cada paso de rutina.")
+    parser.add_argument("--json", default=None, help="Guarda el resumen completo en este archivo JSON.")
+    args = parser.parse_args()
+
+    logs = find_logs(args.paths)
+    if not logs:
+        parser.error("No se encontraron archivos .csv.")
+
+    started = time.perf_counter()
+    try:
+        summaries = analyze_logs(
+            logs,
+            jobs=args.jobs,
+            thresholds=args.tau_threshold,
+            max_gap=args.max_gap,
+            chunk_bytes=int(args.chunk_mb * (1 << 20)),
+        )
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - started
+    total = combine(summaries, args.tau_threshold)
+
+    if args.per_file:
+        for summary in summaries:
+            print(
+                f"\n[LOG] {summary.path} | filas={summary.rows} | descartadas={summary.skipped} "
+                f"| {summary.stats.duration:.1f}s"
+            )
+            print(format_stats(summary.stats, JOINT_NAMES))
+
+    print(
+        f"\n[TOTAL] {len(summaries)} archivos | filas={total.rows} | descartadas={total.skipped} "
+        f"| {total.stats.duration:.1f}s de datos"
+    )
+    print(format_stats(total.stats, JOINT_NAMES))
+
+    if total.segments:
+        print("\n[PASOS] (tau en Nm, err en mrad)")
+        print(format_segments(total.segments))
+        if args.steps:
+            for (routine, step, name), stats in total.segments.items():
+                print(f"\n[PASO] {routine} | {step + 1:02d}. {name} | {stats.duration:.2f}s")
+                print(format_stats(stats, JOINT_NAMES))
+
+    print(
+        f"\n[INFO] {total.bytes / 1e6:.1f} MB en {elapsed:.2f}s "
+        f"({total.bytes / 1e6 / max(elapsed, 1e-9):.1f} MB/s)"
+    )
+
+    if args.json:
+        result = {
+            "files": {s.path: s.stats.as_dict() for s in summaries},
+            "total": total.stats.as_dict(),
+            "steps": [
+                {"routine": routine, "step": step, "name": name, **stats.as_dict()}
+                for (routine, step, name), stats in total.segments.items()
+            ],
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"[INFO] Resumen JSON: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
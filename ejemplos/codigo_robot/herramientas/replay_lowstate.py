@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Reproduce LowState grabado en rt/lowstate con ChannelPublisher, para probar
+# selectores, capture_pose_mujoco_23dof.py o el visualizador sin robot ni
+# MuJoCo.
+#
+# Uso:
+#   python3 replay_lowstate.py recordings/g1_23dof_physical_selector_20250101_120000
+#   python3 replay_lowstate.py logs_physical/g1_23dof_physical_x.csv --speed 4
+#   python3 replay_lowstate.py recordings/x --asap --loop 10
+#   python3 replay_lowstate.py recordings/x --start 12 --duration 5 --loop 0
+#
+# Fuentes: una carpeta de g1_comun.recorder (--record / G1_RECORD), que
+# tiene q, dq, tau_est, temperatura, IMU y tick de cada mensaje, o un CSV de
+# telemetría (q y tau muestreados; dq estimado, IMU en reposo).
+#
+# Con la interfaz "lo" se publica en el dominio 1, igual que los scripts de
+# MuJoCo; en otra interfaz en el dominio 0. --domain fuerza el dominio (los
+# scripts físicos usan 0 también sobre "lo").
+#
+# Pacing: --speed 1 es tiempo real, --speed k acelera k veces y --asap
+# publica sin esperar. Los deadlines son absolutos (espera hybrid por
+# defecto) y al terminar se imprime el retraso p50/p99/máx. de publicación.
+# -----------------------------------------------------------------------------
+
+import argparse
+import signal
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize, ChannelPublisher
+from g1_comun.replay import LowStatePlayer, load_trace
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce LowState grabado en rt/lowstate.")
+    parser.add_argument("source", help="Carpeta de grabación (meta.json) o CSV de telemetría.")
+    parser.add_argument("--interface", default="lo")
+    parser.add_argument("--domain", type=int, default=None, help="Dominio DDS (por defecto 1 en lo, 0 si no).")
+    parser.add_argument("--topic", default="rt/lowstate")
+    parser.add_argument("--speed", type=float, default=1.0, help="Factor de tiempo real (1 = tiempo real).")
+    parser.add_argument("--asap", action="store_true", help="Publica lo más rápido posible.")
+    parser.add_argument("--loop", type=int, default=1, help="Vueltas (0 = hasta Ctrl+C).")
+    parser.add_argument("--start", type=float, default=0.0, help="Segundo de la traza desde el que empezar.")
+    parser.add_argument("--duration", type=float, default=None, help="Segundos de traza a reproducir.")
+    parser.add_argument("--wait", choices=("sleep", "hybrid"), default="hybrid")
+    args = parser.parse_args()
+
+    if args.speed <= 0 and not args.asap:
+        parser.error("--speed debe ser > 0 (usa --asap para no esperar).")
+
+    try:
+        trace = load_trace(args.source).window(args.start, args.duration)
+        if len(trace) == 0:
+            raise ValueError("La ventana pedida no tiene muestras.")
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    # El SDK se carga después de leer la traza: --help y los errores de
+    # argumentos no esperan a CycloneDDS.
+    from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowState_
+    from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
+
+    domain = args.domain if args.domain is not None else (1 if args.interface == "lo" else 0)
+    ChannelFactoryInitialize(domain, args.interface)
+    publisher = ChannelPublisher(args.topic, LowState_)
+    publisher.Init()
+
+    player = LowStatePlayer(
+        trace,
+        publisher.Write,
+        unitree_hg_msg_dds__LowState_(),
+        speed=0.0 if args.asap else args.speed,
+        loops=args.loop,
+        wait=args.wait,
+    )
+    signal.signal(signal.SIGINT, lambda *_: player.stop())
+
+    mode = "asap" if args.asap else f"x{args.speed:g}"
+    print(
+        f"[INFO] {trace.source}: {len(trace)} muestras, {trace.duration:.2f}s, "
+        f"{len(trace.motors)} motores -> {args.topic} (dominio {domain}, {args.interface}, {mode})"
+    )
+    player.run()
+    print(player.summary())
+
+
+if __name__ == "__main__":
+    main()
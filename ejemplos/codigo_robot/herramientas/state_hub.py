@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Hub local de estado: un único suscriptor de rt/lowstate y rt/odommodestate
+# que reparte cada mensaje por memoria compartida a los consumidores de la
+# misma máquina (g1_comun.statehub).
+#
+# Uso:
+#   python3 state_hub.py eth0
+#   python3 state_hub.py lo --name g1_hub --capacity 4096
+#   python3 state_hub.py eth0 --no-odom --report 10
+#
+# Consumidores:
+#   visualizador_csv_tiempo_real_*.py --hub [nombre]
+#   capture_pose_mujoco_23dof.py --hub [nombre]
+#   g1_odometry.py --hub [nombre]
+#
+# Con la interfaz "lo" se suscribe en el dominio 1, igual que los scripts de
+# MuJoCo; en otra interfaz en el dominio 0. --domain fuerza el dominio.
+# Cada --report segundos imprime mensajes recibidos y el costo de
+# decodificación; Ctrl+C cierra y elimina los bloques compartidos.
+# -----------------------------------------------------------------------------
+
+import argparse
+import signal
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize
+from g1_comun.statehub import DEFAULT_CAPACITY, DEFAULT_HUB_NAME, StateHub
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reparte rt/lowstate y rt/odommodestate por memoria compartida.")
+    parser.add_argument("interface", nargs="?", default="lo")
+    parser.add_argument("--domain", type=int, default=None, help="Dominio DDS (por defecto 1 en lo, 0 si no).")
+    parser.add_argument("--name", default=DEFAULT_HUB_NAME, help="Prefijo de los bloques de memoria compartida.")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="Registros por anillo.")
+    parser.add_argument("--no-odom", action="store_true", help="No suscribirse a rt/odommodestate.")
+    parser.add_argument("--report", type=float, default=5.0, help="Segundos entre reportes (0 = solo al salir).")
+    args = parser.parse_args()
+
+    if args.capacity < 2:
+        parser.error("--capacity debe ser al menos 2.")
+
+    domain = args.domain if args.domain is not None else (1 if args.interface == "lo" else 0)
+    ChannelFactoryInitialize(domain, args.interface)
+
+    hub = StateHub(args.name, args.capacity, odom=not args.no_odom)
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    try:
+        hub.start()
+        blocks = ", ".join(topic.block_name for topic in hub.topics.values())
+        print(f"[INFO] Hub '{args.name}' en dominio {domain} ({args.interface}): {blocks}. Ctrl+C para salir.")
+        while not stop.wait(args.report if args.report > 0 else 3600):
+            if args.report <= 0:
+                continue
+            print(hub.summary())
+    finally:
+        print(hub.summary())
+        hub.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Librería compartida de los ejemplos del G1 (Robotics 4.0).
+
+Los scripts de `codigo_robot/` y `simulacion_mujoco/` agregan la carpeta
+`ejemplos/` al `sys.path` para importar estos módulos sin instalación.
+"""
@@ -0,0 +1,557 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file analysis.py
+# @brief Análisis offline de logs CSV de telemetría, por bloques y vectorizado.
+#
+# @descripcion
+#   Lee los CSV de TelemetryRecorder (logs_physical/g1_23dof_physical_*.csv,
+#   data_g1_*.csv) por bloques de `chunk_bytes` y acumula estadísticas por
+#   joint sin cargar el archivo entero:
+#     q         mínimo, máximo y rango.
+#     v, a      velocidad y aceleración estimadas por diferencias finitas
+#               (RMS y pico de |v| y |a|).
+#     tau       RMS, pico de |tau| y tiempo con |tau| sobre cada umbral.
+#     err       q medido - q comandado si el log tiene q_cmd (RMS y pico).
+#               Con columnas kp, las filas con kp comandado 0 (arm_sdk ya
+#               liberado: el q_cmd no es lo que sigue el robot) no cuentan.
+#   Si existe <csv>.steps.csv (TelemetryRecorder.mark) las mismas métricas
+#   se acumulan también por (rutina, paso).
+#
+#   Parseo de un bloque: se corta en la última línea completa. Los
+#   timestamps tienen ancho fijo (TIMESTAMP_FORMAT) y se convierten con
+#   aritmética sobre los bytes; el resto se lee de una vez con
+#   np.fromstring después de reemplazar timestamps y saltos de línea por
+#   separadores. Las líneas con otra cantidad de campos o sin timestamp
+#   (log cortado, encabezado repetido) se quitan y se cuentan en `skipped`;
+#   solo si queda un valor no numérico se reparsea el bloque línea a línea.
+#
+#   Los intervalos entre muestras mayores que `max_gap` (pausas del log,
+#   otra sesión) no cuentan como tiempo ni se usan para derivar.
+#   analyze_logs() reparte los archivos, y los archivos grandes en tramos de
+#   bytes alineados a línea, entre procesos; los acumuladores se combinan
+#   con merge().
+# -----------------------------------------------------------------------------
+
+import csv
+import os
+import time
+import warnings
+from pathlib import Path
+
+from g1_comun.lazy import lazy_import
+from g1_comun.telemetry import column_key, markers_path, parse_timestamp
+
+np = lazy_import("numpy")
+
+
+MOTORS = 35
+CHUNK_BYTES = 32 << 20
+PART_BYTES = 256 << 20
+TAU_THRESHOLDS = (5.0, 10.0, 20.0)
+STAMP_WIDTH = 26   # "YYYY-mm-dd HH:MM:SS.ffffff"
+
+_MICROS = (100000, 10000, 1000, 100, 10, 1)
+
+
+# ---------------------------------------------------------
+# Parseo
+# ---------------------------------------------------------
+
+def _parse_stamps(stamps):
+    """Segundos de un array (n, STAMP_WIDTH) de bytes de timestamp."""
+    digits = stamps.astype(np.int64) - 48
+    seconds = (
+        (digits[:, 11] * 10 + digits[:, 12]) * 3600
+        + (digits[:, 14] * 10 + digits[:, 15]) * 60
+        + digits[:, 17] * 10 + digits[:, 18]
+        + (digits[:, 20:26] @ _MICROS) * 1e-6
+    )
+    days, inverse = np.unique(np.ascontiguousarray(stamps[:, :10]).view("S10").ravel(), return_inverse=True)
+    base = np.array([parse_timestamp(day.decode() + " 00:00:00") for day in days])
+    return base[inverse.ravel()] + seconds
+
+
+def _parse_lines(raw: bytes, width: int):
+    """Camino lento: línea a línea, descartando las inválidas."""
+    times, rows, skipped = [], [], 0
+    for line in raw.split(b"\n"):
+        line = line.rstrip(b"\r")
+        if not line:
+            continue
+        fields = line.split(b",")
+        if len(fields) != width + 1:
+            skipped += 1
+            continue
+        # Se agrega la fila solo si el tiempo y todos los valores son
+        # válidos, para que times y rows no se desalineen.
+        try:
+            t = parse_timestamp(fields[0].decode())
+            row = [float(x) for x in fields[1:]]
+        except ValueError:
+            skipped += 1
+            continue
+        times.append(t)
+        rows.append(row)
+    values = np.array(rows, dtype=float).reshape(len(rows), width)
+    return np.array(times, dtype=float), values, skipped
+
+
+def parse_block(raw: bytes, width: int):
+    """
+    Parsea líneas completas de un CSV de telemetría (sin encabezado).
+    Devuelve (tiempos (n,), valores (n, width), líneas descartadas).
+    """
+    buf = np.frombuffer(raw, dtype=np.uint8)
+    ends = np.flatnonzero(buf == 10)
+    if len(ends) == 0:
+        return np.zeros(0), np.zeros((0, width)), 0
+    starts = np.empty(len(ends), dtype=np.int64)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+
+    # Cada línea debe empezar con un timestamp completo seguido de "," y
+    # tener `width` comas; las que no (log cortado, encabezado repetido) se
+    # quitan del bloque sin salir del camino vectorizado.
+    commas = np.flatnonzero(buf == 44)
+    good = np.searchsorted(commas, ends) - np.searchsorted(commas, starts) == width
+    good &= ends - starts > STAMP_WIDTH
+    probe = np.where(good, starts, 0)
+    good &= (
+        (buf[probe + 4] == 45) & (buf[probe + 10] == 32) & (buf[probe + 13] == 58)
+        & (buf[probe + 19] == 46) & (buf[probe + STAMP_WIDTH] == 44)
+    )
+    if not good.all():
+        bad = np.flatnonzero(~good).tolist()
+        pieces, position = [], 0
+        for line in bad:
+            pieces.append(raw[position:starts[line]])
+            position = ends[line] + 1
+        pieces.append(raw[position:])
+        times, values, skipped = parse_block(b"".join(pieces), width)
+        return times, values, skipped + len(bad)
+
+    stamp_index = starts[:, None] + np.arange(STAMP_WIDTH)
+    stamps = buf[stamp_index]
+
+    work = buf[:ends[-1]].copy()
+    work[stamp_index.ravel()] = 32
+    work[starts + STAMP_WIDTH] = 32
+    work[ends[:-1]] = 44
+    work[work == 13] = 32
+    try:
+        with warnings.catch_warnings():
+            # NumPy < 2 avisa con DeprecationWarning y trunca en vez de fallar.
+            warnings.simplefilter("error", DeprecationWarning)
+            flat = np.fromstring(work.tobytes(), sep=",")
+    except (ValueError, DeprecationWarning):
+        return _parse_lines(raw, width)
+    if flat.size != len(ends) * width:
+        return _parse_lines(raw, width)
+
+    return _parse_stamps(stamps), flat.reshape(len(ends), width), 0
+
+
+class LogReader:
+    """
+    Recorre un CSV de telemetría por bloques: `header` es el encabezado e
+    iterar produce (tiempos, valores) de cada bloque. Con start/stop lee
+    solo las líneas que empiezan en ese rango de bytes, para repartir un
+    archivo grande entre procesos.
+    """
+
+    def __init__(self, path, chunk_bytes: int = CHUNK_BYTES, start: int = 0, stop: int = None):
+        self.path = Path(path)
+        self.chunk_bytes = int(chunk_bytes)
+        self.skipped = 0
+        self.bytes = self.path.stat().st_size
+        with open(self.path, "rb") as f:
+            self.header = f.readline().decode("utf-8").rstrip("\r\n").split(",")
+            first = f.tell()
+            self._start = self._line_start(f, max(start, first))
+            self._stop = self._line_start(f, self.bytes if stop is None else min(stop, self.bytes))
+
+    @property
+    def size(self) -> int:
+        """Bytes de datos que recorre este lector."""
+        return max(0, self._stop - self._start)
+
+    def _line_start(self, f, offset: int) -> int:
+        """Primer inicio de línea en `offset` o después."""
+        if offset >= self.bytes:
+            return self.bytes
+        f.seek(offset - 1)
+        if f.read(1) != b"\n":
+            f.readline()
+        return f.tell()
+
+    def __iter__(self):
+        width = len(self.header) - 1
+        rest = b""
+        with open(self.path, "rb") as f:
+            f.seek(self._start)
+            remaining = self._stop - self._start
+            while remaining > 0:
+                chunk = f.read(min(self.chunk_bytes, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                chunk = rest + chunk
+                cut = chunk.rfind(b"\n") + 1
+                rest = chunk[cut:]
+                if cut:
+                    yield self._parse(chunk[:cut], width)
+        if rest.strip():
+            # Última línea sin salto (log cortado).
+            yield self._parse(rest + b"\n", width)
+
+    def _parse(self, raw: bytes, width: int):
+        times, values, skipped = parse_block(raw, width)
+        self.skipped += skipped
+        return times, values
+
+
+def load_markers(path):
+    """
+    Marcas de rutina de <csv>.steps.csv: (tiempos, claves) con clave
+    (rutina, paso, nombre), o None en el fin de rutina. None si no hay archivo.
+    """
+    path = markers_path(path)
+    if not path.is_file():
+        return None
+    times, keys = [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                stamp, step = parse_timestamp(row["timestamp"]), int(row["step"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            times.append(stamp)
+            keys.append((row["routine"], step, row["name"]) if step >= 0 else None)
+    return np.array(times), keys
+
+
+# ---------------------------------------------------------
+# Acumuladores
+# ---------------------------------------------------------
+
+class _Moments:
+    """Suma de cuadrados, pico de |x| y cantidad, por motor (ignora NaN)."""
+
+    def __init__(self):
+        self.sumsq = np.zeros(MOTORS)
+        self.peak = np.zeros(MOTORS)
+        self.count = np.zeros(MOTORS, dtype=np.int64)
+
+    def add(self, joints, x):
+        x = np.abs(x)
+        valid = ~np.isnan(x)
+        self.sumsq[joints] += np.where(valid, x * x, 0.0).sum(axis=0)
+        self.peak[joints] = np.fmax(self.peak[joints], np.fmax.reduce(x, axis=0, initial=0.0))
+        self.count[joints] += valid.sum(axis=0)
+
+    def merge(self, other):
+        self.sumsq += other.sumsq
+        np.fmax(self.peak, other.peak, out=self.peak)
+        self.count += other.count
+
+    def rms(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self.sumsq / self.count)
+
+    def max(self):
+        return np.where(self.count > 0, self.peak, np.nan)
+
+
+class JointStats:
+    """Estadísticas por joint de un log, un paso de rutina o un conjunto."""
+
+    def __init__(self, thresholds=TAU_THRESHOLDS):
+        self.thresholds = tuple(float(x) for x in thresholds)
+        self.present = np.zeros(MOTORS, dtype=bool)
+        self.samples = 0
+        self.duration = 0.0
+        self.q_min = np.full(MOTORS, np.inf)
+        self.q_max = np.full(MOTORS, -np.inf)
+        self.v = _Moments()
+        self.a = _Moments()
+        self.tau = _Moments()
+        self.err = _Moments()
+        self.above = np.zeros((len(self.thresholds), MOTORS))
+
+    def update(self, joints, dt, q, v, a, tau=None, err=None):
+        """
+        Agrega n muestras de los motores `joints`. `dt` (n,) es el intervalo
+        desde la muestra anterior, 0 en los cortes.
+        """
+        self.present[joints] = True
+        self.samples += len(dt)
+        self.duration += float(dt.sum())
+        if len(dt):
+            self.q_min[joints] = np.fmin(self.q_min[joints], np.fmin.reduce(q, axis=0))
+            self.q_max[joints] = np.fmax(self.q_max[joints], np.fmax.reduce(q, axis=0))
+        self.v.add(joints, v)
+        self.a.add(joints, a)
+        if tau is not None:
+            self.tau.add(joints, tau)
+            magnitude = np.abs(tau)
+            for k, threshold in enumerate(self.thresholds):
+                self.above[k, joints] += dt @ (magnitude > threshold)
+        if err is not None:
+            self.err.add(joints, err)
+
+    def merge(self, other):
+        if other.thresholds != self.thresholds:
+            raise ValueError("No se pueden combinar estadísticas con otros umbrales de torque.")
+        self.present |= other.present
+        self.samples += other.samples
+        self.duration += other.duration
+        np.fmin(self.q_min, other.q_min, out=self.q_min)
+        np.fmax(self.q_max, other.q_max, out=self.q_max)
+        for name in ("v", "a", "tau", "err"):
+            getattr(self, name).merge(getattr(other, name))
+        self.above += other.above
+
+    def joints(self):
+        return np.flatnonzero(self.present).tolist()
+
+    def as_dict(self):
+        """Resumen serializable a JSON: métricas por joint."""
+        result = {}
+        v_rms, v_max = self.v.rms(), self.v.max()
+        a_rms, a_max = self.a.rms(), self.a.max()
+        tau_rms, tau_max = self.tau.rms(), self.tau.max()
+        err_rms, err_max = self.err.rms(), self.err.max()
+        for j in self.joints():
+            entry = {
+                "q_min": self.q_min[j], "q_max": self.q_max[j], "q_range": self.q_max[j] - self.q_min[j],
+                "v_rms": v_rms[j], "v_max": v_max[j], "a_rms": a_rms[j], "a_max": a_max[j],
+                "tau_rms": tau_rms[j], "tau_max": tau_max[j],
+                "tau_above_s": {str(t): self.above[k, j] for k, t in enumerate(self.thresholds)},
+                "err_rms": err_rms[j], "err_max": err_max[j],
+            }
+            result[str(j)] = {
+                key: (None if np.isnan(value) else float(value)) if not isinstance(value, dict) else value
+                for key, value in entry.items()
+            }
+        return {"samples": self.samples, "duration_s": self.duration, "joints": result}
+
+
+# ---------------------------------------------------------
+# Un archivo
+# ---------------------------------------------------------
+
+class LogSummary:
+    """Resultado de analyze_log: totales, pasos de rutina y conteos de parseo."""
+
+    def __init__(self, path, thresholds):
+        self.path = str(path)
+        self.stats = JointStats(thresholds)
+        self.segments = {}
+        self.rows = 0
+        self.skipped = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+
+    def segment(self, key):
+        stats = self.segments.get(key)
+        if stats is None:
+            stats = self.segments[key] = JointStats(self.stats.thresholds)
+        return stats
+
+    def merge(self, other):
+        self.stats.merge(other.stats)
+        for key, stats in other.segments.items():
+            self.segment(key).merge(stats)
+        self.rows += other.rows
+        self.skipped += other.skipped
+        self.bytes += other.bytes
+        self.elapsed += other.elapsed
+
+
+def _columns(header):
+    """Motores y columnas de q, tau, q_cmd y kp del encabezado (None si falta)."""
+    columns = {}
+    for index, name in enumerate(header[1:]):
+        key = column_key(name)
+        if key is not None:
+            columns.setdefault(key[1], {})[key[0]] = index
+    joints = sorted(j for j, fields in columns.items() if "q" in fields and j < MOTORS)
+
+    def pick(field):
+        found = [columns[j].get(field, -1) for j in joints]
+        return np.array(found) if all(c >= 0 for c in found) else None
+
+    return np.array(joints, dtype=np.intp), pick("q"), pick("tau"), pick("q_cmd"), pick("kp")
+
+
+def analyze_log(path, thresholds=TAU_THRESHOLDS, max_gap: float = 2.0, chunk_bytes: int = CHUNK_BYTES,
+                start: int = 0, stop: int = None):
+    """Recorre un log (o el rango de bytes [start, stop)) y devuelve su LogSummary."""
+    started = time.perf_counter()
+    summary = LogSummary(path, thresholds)
+    reader = LogReader(path, chunk_bytes, start, stop)
+    summary.bytes = reader.size
+    joints, q_cols, tau_cols, cmd_cols, kp_cols = _columns(reader.header)
+    if q_cols is None or len(joints) == 0:
+        raise ValueError(f"{path}: el encabezado no tiene columnas q por joint.")
+
+    markers = load_markers(path)
+    # Última muestra del bloque anterior, para derivar a través del corte.
+    t_prev, dt_prev = np.nan, np.nan
+    q_prev = np.full(len(joints), np.nan)
+    v_prev = np.full(len(joints), np.nan)
+
+    for times, values in reader:
+        if len(times) == 0:
+            continue
+        q = values[:, q_cols]
+        dt = np.diff(times, prepend=t_prev)
+        valid = (dt > 0) & (dt <= max_gap)
+        dt = np.where(valid, dt, 0.0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            v = np.diff(q, axis=0, prepend=q_prev[None]) / dt[:, None]
+            v[~valid] = np.nan
+            dt_mid = 0.5 * (dt + np.concatenate(([dt_prev], dt[:-1])))
+            a = np.diff(v, axis=0, prepend=v_prev[None]) / dt_mid[:, None]
+        a[np.isinf(a)] = np.nan
+
+        tau = values[:, tau_cols] if tau_cols is not None else None
+        err = q - values[:, cmd_cols] if cmd_cols is not None else None
+        if err is not None and kp_cols is not None:
+            err[values[:, kp_cols] == 0.0] = np.nan
+        summary.stats.update(joints, dt, q, v, a, tau, err)
+        summary.rows += len(times)
+
+        if markers is not None and len(markers[0]):
+            marker = np.searchsorted(markers[0], times, side="right") - 1
+            for index in np.unique(marker).tolist():
+                key = markers[1][index] if index >= 0 else None
+                if key is None:
+                    continue
+                rows = marker == index
+                summary.segment(key).update(
+                    joints, dt[rows], q[rows], v[rows], a[rows],
+                    tau[rows] if tau is not None else None,
+                    err[rows] if err is not None else None,
+                )
+
+        t_prev, dt_prev = times[-1], dt[-1] if valid[-1] else np.nan
+        q_prev, v_prev = q[-1], v[-1]
+
+    summary.skipped = reader.skipped
+    summary.elapsed = time.perf_counter() - started
+    return summary
+
+
+# ---------------------------------------------------------
+# Varios archivos
+# ---------------------------------------------------------
+
+def find_logs(paths):
+    """CSV de telemetría de una lista de archivos y carpetas (sin los .steps.csv)."""
+    found = []
+    for path in map(Path, paths):
+        candidates = sorted(path.rglob("*.csv")) if path.is_dir() else [path]
+        found.extend(p for p in candidates if not p.name.endswith(".steps.csv"))
+    return found
+
+
+def analyze_logs(paths, jobs: int = None, part_bytes: int = PART_BYTES, **kwargs):
+    """
+    Un LogSummary por archivo. Con más de un proceso cada archivo se corta
+    en tramos de `part_bytes` que se analizan en paralelo y se combinan; en
+    cada corte se pierde la derivada de una o dos muestras.
+    """
+    paths = [str(p) for p in paths]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1:
+        return [analyze_log(p, **kwargs) for p in paths]
+
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        parts = max(1, -(-size // int(part_bytes)))
+        tasks.extend((path, size * k // parts, size * (k + 1) // parts) for k in range(parts))
+
+    # Solo al repartir en procesos: el módulo carga multiprocessing (~25 ms).
+    from concurrent.futures import ProcessPoolExecutor
+
+    summaries = {}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        futures = [pool.submit(analyze_log, path, start=start, stop=stop, **kwargs) for path, start, stop in tasks]
+        for (path, _, _), future in zip(tasks, futures):
+            part = future.result()
+            if path in summaries:
+                summaries[path].merge(part)
+            else:
+                summaries[path] = part
+    return [summaries[path] for path in paths]
+
+
+def combine(summaries, thresholds=TAU_THRESHOLDS):
+    """Un LogSummary con todos los archivos; los pasos se combinan por clave."""
+    total = LogSummary("total", thresholds)
+    for summary in summaries:
+        total.merge(summary)
+    return total
+
+
+# ---------------------------------------------------------
+# Formato
+# ---------------------------------------------------------
+
+def _cell(value, spec):
+    return f"{'-':>{len(format(0.0, spec))}}" if np.isnan(value) else format(value, spec)
+
+
+def format_stats(stats: JointStats, names=None) -> str:
+    """Tabla por joint: q (rad), v (rad/s), a (rad/s²), tau (Nm), tiempos (s), err (mrad)."""
+    names = names or {}
+    above = " ".join(f"{f't>{t:g}':>7}" for t in stats.thresholds)
+    lines = [
+        f"  {'joint':<30} {'q mín':>7} {'q máx':>7} {'rango':>6} | {'v rms':>6} {'v máx':>6} "
+        f"| {'a rms':>7} {'a máx':>7} | {'tau rms':>7} {'tau máx':>7} {above} | {'err rms':>7} {'err máx':>7}"
+    ]
+    v_rms, v_max = stats.v.rms(), stats.v.max()
+    a_rms, a_max = stats.a.rms(), stats.a.max()
+    tau_rms, tau_max = stats.tau.rms(), stats.tau.max()
+    err_rms, err_max = stats.err.rms() * 1e3, stats.err.max() * 1e3
+    has_tau = stats.tau.count.any()
+
+    for j in stats.joints():
+        label = f"{j:>2} {names.get(j, '')}"[:30]
+        times = " ".join(
+            _cell(stats.above[k, j] if has_tau else np.nan, "7.2f") for k in range(len(stats.thresholds))
+        )
+        lines.append(
+            f"  {label:<30} {stats.q_min[j]:7.3f} {stats.q_max[j]:7.3f} {stats.q_max[j] - stats.q_min[j]:6.3f} "
+            f"| {_cell(v_rms[j], '6.3f')} {_cell(v_max[j], '6.3f')} "
+            f"| {_cell(a_rms[j], '7.2f')} {_cell(a_max[j], '7.2f')} "
+            f"| {_cell(tau_rms[j], '7.2f')} {_cell(tau_max[j], '7.2f')} {times} "
+            f"| {_cell(err_rms[j], '7.1f')} {_cell(err_max[j], '7.1f')}"
+        )
+    return "\n".join(lines)
+
+
+def format_segments(segments) -> str:
+    """Una línea por paso de rutina: duración y el peor joint en tau y err."""
+    lines = [
+        f"  {'rutina':<24} {'paso':<24} {'dur s':>7} {'muestras':>8} "
+        f"| {'tau máx':>7} {'joint':>5} | {'err rms':>7} {'joint':>5}"
+    ]
+    for (routine, step, name), stats in segments.items():
+        tau_max, err_rms = stats.tau.max(), stats.err.rms() * 1e3
+        worst_tau = int(np.nanargmax(tau_max)) if not np.isnan(tau_max).all() else None
+        worst_err = int(np.nanargmax(err_rms)) if not np.isnan(err_rms).all() else None
+        lines.append(
+            f"  {routine[:24]:<24} {f'{step + 1:02d}. {name}'[:24]:<24} {stats.duration:7.2f} {stats.samples:8d} "
+            f"| {_cell(tau_max[worst_tau] if worst_tau is not None else np.nan, '7.2f')} "
+            f"{worst_tau if worst_tau is not None else '-':>5} "
+            f"| {_cell(err_rms[worst_err] if worst_err is not None else np.nan, '7.1f')} "
+            f"{worst_err if worst_err is not None else '-':>5}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark de g1_comun.analysis: throughput del análisis offline de logs
+# CSV de telemetría.
+#
+# Uso:
+#   python3 bench_analysis.py
+#   python3 bench_analysis.py --mb 2048 --jobs 8
+#   python3 bench_analysis.py --log logs_physical/g1_23dof_physical_x.csv
+#
+# Sin --log se genera un CSV sintético de `--mb` MB con el formato del
+# selector físico (q, tau, q_cmd, kp, kd por joint a 500 Hz) y se analiza
+# con 1 y con `--jobs` procesos. Se reporta MB/s, filas/s y el pico de RSS
+# del proceso principal; se verifica que no falten filas. Antes se analiza
+# un log corto con líneas dañadas (campo vacío o no numérico, línea
+# cortada, encabezado repetido) que deben descartarse sin perder las demás,
+# y uno que termina con arm_sdk liberado (kp 0), fuera del error de
+# seguimiento.
+# No requiere unitree_sdk2py.
+# -----------------------------------------------------------------------------
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.analysis import analyze_log, analyze_logs
+from g1_comun.joints import G1_23DOF_ARM_SDK
+from g1_comun.telemetry import TIMESTAMP_FORMAT
+
+
+BLOCK_ROWS = 5000
+
+
+def write_log(path: Path, megabytes: float, rate_hz: float = 500.0) -> int:
+    """CSV sintético: un bloque de valores repetido con timestamps crecientes."""
+    joints = G1_23DOF_ARM_SDK.joint_list
+    rng = np.random.default_rng(0)
+    values = rng.normal(scale=0.5, size=(BLOCK_ROWS, 5 * len(joints)))
+    values[:, 3::5], values[:, 4::5] = 60.0, 1.5
+    body = [",".join(repr(x) for x in row) for row in values.tolist()]
+
+    t0 = datetime.now().timestamp()
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("timestamp," + ",".join(
+            f"{field}_{j}" for j in joints for field in ("q", "tau", "q_cmd", "kp", "kd")
+        ) + "\r\n")
+        while f.tell() < megabytes * 1e6:
+            for line in body:
+                stamp = datetime.fromtimestamp(t0 + rows / rate_hz).strftime(TIMESTAMP_FORMAT)
+                f.write(f"{stamp},{line}\r\n")
+                rows += 1
+    return rows
+
+
+def verify(folder: Path):
+    joints = G1_23DOF_ARM_SDK.joint_list
+    width = 5 * len(joints)
+    header = "timestamp," + ",".join(f"{field}_{j}" for j in joints for field in ("q", "tau", "q_cmd", "kp", "kd"))
+    t0 = datetime.now().timestamp()
+
+    def line(i, fields=None):
+        stamp = datetime.fromtimestamp(t0 + i / 500.0).strftime(TIMESTAMP_FORMAT)
+        fields = fields if fields is not None else [repr(0.001 * i)] * width
+        return f"{stamp},{','.join(fields)}"
+
+    good = [line(i) for i in range(20)]
+    bad = [
+        line(20, ["3.0"] * (width - 1) + [""]),      # campo final vacío
+        line(21, ["3.0"] * (width - 1) + ["abc"]),   # campo no numérico
+        line(22)[: len(line(22)) // 2],               # línea cortada
+        header,                                       # encabezado repetido
+    ]
+    path = folder / "bench_analysis_verify.csv"
+    path.write_text("\r\n".join([header, *good[:10], *bad, *good[10:]]) + "\r\n", encoding="utf-8")
+
+    summary = analyze_log(path)
+    if summary.rows != len(good) or summary.skipped != len(bad):
+        raise AssertionError(
+            f"Log con líneas dañadas: filas={summary.rows} (esperadas {len(good)}), "
+            f"descartadas={summary.skipped} (esperadas {len(bad)})"
+        )
+
+    # Filas tras liberar arm_sdk: kp comandado 0 y q lejos del último q_cmd.
+    released = [line(20 + i, ["0.0", "0.0", "1.0", "0.0", "0.0"] * len(joints)) for i in range(5)]
+    path = folder / "bench_analysis_released.csv"
+    path.write_text("\n".join([header, *good, *released]) + "\n", encoding="utf-8")
+
+    peak = analyze_log(path).stats.err.max()[joints]
+    if np.nanmax(peak) > 1e-9:
+        raise AssertionError(f"El error de seguimiento incluye filas con kp = 0 (pico {np.nanmax(peak):.3f} rad).")
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del análisis offline de logs.")
+    parser.add_argument("--mb", type=float, default=256.0, help="Tamaño del log sintético.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log", default=None, help="Analiza este log en lugar de uno sintético.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        verify(Path(folder))
+    print("[OK] Líneas dañadas descartadas sin desalinear; filas con kp 0 fuera del seguimiento.")
+
+    if args.log:
+        path, expected = Path(args.log), None
+    else:
+        path = Path(tempfile.mkstemp(prefix="bench_analysis_", suffix=".csv")[1])
+        print(f"Generando {args.mb:.0f} MB en {path}...")
+        expected = write_log(path, args.mb)
+
+    size = path.stat().st_size
+    try:
+        for jobs in sorted({1, args.jobs}):
+            started = time.perf_counter()
+            summary = analyze_logs([path], jobs=jobs)[0]
+            elapsed = time.perf_counter() - started
+            missing = "" if expected is None else f" | faltantes {expected - summary.rows}"
+            print(
+                f"jobs={jobs}: {size / 1e6:.0f} MB en {elapsed:.2f}s | {size / 1e6 / elapsed:.1f} MB/s "
+                f"| {summary.rows / elapsed:,.0f} filas/s{missing}"
+            )
+        print(f"RSS máx. {rss_mb():.1f} MB")
+    finally:
+        if not args.log:
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark del CRC de LowCmd: CRC().Crc del SDK frente a g1_comun.crc.
+#
+# Uso:
+#   python3 bench_crc.py
+#   python3 bench_crc.py --seconds 3 --joints 12,15,16,17,18,19,22,23,24,25,26
+#
+# Cada "tick" reproduce el trabajo de un writer: actualizar q de los joints
+# activos y calcular el crc del mensaje. Antes de medir se verifica que los
+# tres caminos producen exactamente el mismo CRC que el SDK.
+# -----------------------------------------------------------------------------
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
+from unitree_sdk2py.utils.crc import CRC
+
+from g1_comun.crc import LowCmdCrc
+
+
+DEFAULT_JOINTS = "12,15,16,17,18,19,22,23,24,25,26"
+
+
+def random_cmd(rng):
+    cmd = unitree_hg_msg_dds__LowCmd_()
+    cmd.mode_pr = 0
+    cmd.mode_machine = rng.randint(0, 255)
+
+    for m in cmd.motor_cmd:
+        m.mode = 1
+        m.q = rng.uniform(-2.5, 2.5)
+        m.kp = 60.0
+        m.kd = 1.5
+
+    return cmd
+
+
+def verify(rng, joints, rounds=50):
+    stock = CRC()
+    full = LowCmdCrc()
+    incremental = LowCmdCrc()
+    table = LowCmdCrc(kernel="table")
+
+    cmd = random_cmd(rng)
+    incremental.pack(cmd)
+
+    for _ in range(rounds):
+        for j in joints:
+            q = rng.uniform(-2.5, 2.5)
+            cmd.motor_cmd[j].q = q
+            incremental.set_q(j, q)
+
+        expected = stock.Crc(cmd)
+        got = (full.Crc(cmd), incremental.compute(), table.Crc(cmd))
+
+        if any(value != expected for value in got):
+            raise AssertionError(
+                f"CRC distinto al del SDK: esperado={expected:#010x}, "
+                f"obtenido={[hex(v) for v in got]}"
+            )
+
+
+def measure(label, tick, seconds):
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+
+    while True:
+        for _ in range(100):
+            tick()
+        count += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+
+    rate = count / (now - start)
+    print(f"{label:<28} {rate:>12,.0f} ticks/s  {1e6 / rate:>9.2f} us/tick")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del CRC de LowCmd.")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--joints", default=DEFAULT_JOINTS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    joints = [int(j) for j in args.joints.split(",") if j.strip()]
+
+    verify(rng, joints)
+    print("[OK] Los CRC coinciden con unitree_sdk2py.utils.crc.CRC.\n")
+
+    cmd = random_cmd(rng)
+    values = [rng.uniform(-2.5, 2.5) for _ in range(64)]
+    state = {"i": 0}
+
+    def next_q():
+        state["i"] = (state["i"] + 1) & 63
+        return values[state["i"]]
+
+    stock = CRC()
+
+    def tick_stock():
+        q = next_q()
+        for j in joints:
+            cmd.motor_cmd[j].q = q
+        cmd.crc = stock.Crc(cmd)
+
+    full = LowCmdCrc()
+
+    def tick_full():
+        q = next_q()
+        for j in joints:
+            cmd.motor_cmd[j].q = q
+        cmd.crc = full.Crc(cmd)
+
+    incremental = LowCmdCrc()
+    incremental.pack(cmd)
+
+    def tick_incremental():
+        q = next_q()
+        for j in joints:
+            cmd.motor_cmd[j].q = q
+            incremental.set_q(j, q)
+        cmd.crc = incremental.compute()
+
+    base = measure("CRC().Crc (SDK)", tick_stock, args.seconds)
+    rate_full = measure("LowCmdCrc.Crc", tick_full, args.seconds)
+    rate_incr = measure("LowCmdCrc incremental", tick_incremental, args.seconds)
+
+    print("")
+    print(f"Aceleración LowCmdCrc.Crc:        x{rate_full / base:.1f}")
+    print(f"Aceleración LowCmdCrc incremental: x{rate_incr / base:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Presupuesto de imports de los comandos que no tocan el robot.
+#
+# Uso:
+#   python3 bench_imports.py
+#   python3 bench_imports.py --budget 100 --top 8
+#
+# Ejecuta cada caso con `python -X importtime`, suma el tiempo de los imports
+# de primer nivel y le resta el de `python -c pass` (site, encodings...), así
+# que el número es lo que agrega el script sobre el arranque del intérprete.
+# Falla (código 1) si algún caso supera --budget ms o si carga un módulo
+# pesado que su camino no necesita (NumPy, unitree_sdk2py, CycloneDDS, Qt).
+# Antes compila los .pyc para no medir la compilación. No requiere robot;
+# unitree_sdk2py solo hace falta si un caso lo importa por error.
+# -----------------------------------------------------------------------------
+
+import argparse
+import compileall
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+EJEMPLOS = Path(__file__).resolve().parents[2]
+
+FORBIDDEN = ("numpy", "unitree_sdk2py", "cyclonedds", "PyQt5", "pyqtgraph")
+
+SELECTOR = "codigo_robot/23dof/arm_sdk/g1_23dof_physical_selector.py"
+
+# (nombre, script relativo a ejemplos/, argumentos)
+CASES = (
+    ("selector --help", SELECTOR, ["--help"]),
+    ("selector --list", SELECTOR, ["--list"]),
+    ("selector --validate", SELECTOR, ["--validate"]),
+    ("moveV5 23dof (uso)", "codigo_robot/23dof/arm_sdk/g1_arm_sdk_moveV5.py", []),
+    ("moveV5 29dof (uso)", "codigo_robot/29dof/arm_sdk/g1_arm_sdk_moveV5.py", []),
+    ("visualizador --help", "codigo_robot/23dof/arm_sdk/g1_arm_sdk_visualizer_pos_torque.py", ["--help"]),
+    ("analizar_logs --help", "codigo_robot/herramientas/analizar_logs.py", ["--help"]),
+    ("replay_lowstate --help", "codigo_robot/herramientas/replay_lowstate.py", ["--help"]),
+    ("retime_poses --help", "simulacion_mujoco/23dof/scripts/herramientas_extra/retime_poses.py", ["--help"]),
+    ("play_pose --help", "simulacion_mujoco/23dof/scripts/herramientas_extra/play_pose_mujoco_23dof.py", ["--help"]),
+    ("capture_pose --help", "simulacion_mujoco/23dof/scripts/herramientas_extra/capture_pose_mujoco_23dof.py", ["--help"]),
+)
+
+
+def parse_importtime(stderr: str):
+    """(total de primer nivel en us, {módulo: acumulado us}) de la salida de -X importtime."""
+    total = 0
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:  self | cumulative | nombre", con dos espacios de sangría por nivel.
+        _, cumulative, name = line.split("|")
+        cumulative = int(cumulative)
+        name = name[1:]
+        if not name.startswith(" "):
+            total += cumulative
+        modules[name.strip()] = cumulative
+    return total, modules
+
+
+def run(args):
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        # Sin entrada: un script que pregunte algo termina con EOF en vez de esperar.
+        input="",
+        capture_output=True,
+        text=True,
+        cwd=EJEMPLOS,
+        env=env,
+    )
+    wall = time.perf_counter() - started
+    total, modules = parse_importtime(proc.stderr)
+    return proc.returncode, wall, total, modules
+
+
+def best_of(args, repeats: int):
+    """La repetición más rápida: el resto es ruido del sistema (caché de disco, planificador)."""
+    runs = [run(args) for _ in range(repeats)]
+    return min(runs, key=lambda r: r[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Presupuesto de imports de los comandos sin robot.")
+    parser.add_argument("--budget", type=float, default=100.0, help="ms de imports por caso sobre `python -c pass`.")
+    parser.add_argument("--repeats", type=int, default=3, help="Ejecuciones por caso (se toma la más rápida).")
+    parser.add_argument("--top", type=int, default=5, help="Módulos más caros a listar por caso.")
+    args = parser.parse_args()
+
+    for folder in ("g1_comun", "codigo_robot", "simulacion_mujoco"):
+        compileall.compile_dir(str(EJEMPLOS / folder), quiet=1)
+
+    _, base_wall, base_total, base_modules = best_of(["-c", "pass"], args.repeats)
+    print(f"[BASE] python -c pass: imports {base_total / 1e3:.1f} ms | proceso {base_wall * 1e3:.0f} ms")
+
+    failed = False
+    for name, script, script_args in CASES:
+        rc, wall, total, modules = best_of([script, *script_args], args.repeats)
+        extra_ms = (total - base_total) / 1e3
+        heavy = sorted(m for m in modules if m in FORBIDDEN)
+        over = extra_ms > args.budget
+        failed |= over or bool(heavy)
+        status = "ERROR" if over or heavy else "OK"
+        print(
+            f"[{status}] {name}: imports +{extra_ms:.1f} ms | proceso {wall * 1e3:.0f} ms "
+            f"(+{(wall - base_wall) * 1e3:.0f} ms) | salida {rc}"
+        )
+        if heavy:
+            print(f"    carga {', '.join(heavy)}")
+        if over or heavy:
+            own = sorted(
+                ((us, m) for m, us in modules.items() if m not in base_modules),
+                reverse=True,
+            )
+            for us, module in own[: args.top]:
+                print(f"    {us / 1e3:7.1f} ms  {module}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
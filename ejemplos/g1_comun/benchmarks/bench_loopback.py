@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark de g1_comun.loopback: latencia de entrega del transporte en
+# proceso y respuesta en lazo cerrado de la planta PD.
+#
+# Uso:
+#   python3 bench_loopback.py
+#   python3 bench_loopback.py --latency-ms 2 --loss 0.05 --rate-hz 250
+#   python3 bench_loopback.py --seconds 5 --step 0.8 --kp 40 --kd 1
+#
+# 1) Publica LowCmd_ a --hz en un tópico de prueba y mide el retraso entre
+#    Write() y el handler del suscriptor (p50/p99/máx.), más pérdidas y
+#    límites por tasa según el enlace pedido.
+# 2) Arranca la planta, comanda por rt/arm_sdk un escalón de --step rad en
+#    el hombro izquierdo (motor 15) y reporta el tiempo al 90 % y el error
+#    final leído de rt/lowstate.
+# Requiere los tipos IDL de unitree_sdk2py (no DDS ni robot).
+# -----------------------------------------------------------------------------
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
+from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_, LowState_
+
+from g1_comun import loopback
+from g1_comun.loopback import ARM_SDK_WEIGHT_INDEX, LinkConfig, PDPlant, snapshot
+from g1_comun.scheduler import DeadlineThread
+from g1_comun.timing import LogHistogram
+
+
+MOTOR = 15
+
+
+def bench_transport(args, link):
+    bus = loopback.reset(link)
+    publisher = loopback.ChannelPublisher("bench/ping", LowCmd_)
+    publisher.Init()
+    latency = LogHistogram()
+    sent = {}
+
+    def on_ping(msg):
+        seq = int(msg.motor_cmd[0].q)
+        latency.record(int((time.monotonic() - sent[seq]) * 1e9))
+
+    subscriber = loopback.ChannelSubscriber("bench/ping", LowCmd_)
+    subscriber.Init(on_ping, 10)
+
+    msg = unitree_hg_msg_dds__LowCmd_()
+    started = time.perf_counter()
+    copies = 200
+    for _ in range(copies):
+        snapshot(msg)
+    copy_us = (time.perf_counter() - started) / copies * 1e6
+
+    seq = 0
+
+    def ping():
+        nonlocal seq
+        msg.motor_cmd[0].q = float(seq)
+        sent[seq] = time.monotonic()
+        publisher.Write(msg)
+        seq += 1
+
+    thread = DeadlineThread(interval=1.0 / args.hz, target=ping, name="bench_ping", mode="sleep", report=False)
+    thread.Start()
+    time.sleep(args.seconds)
+    thread.Wait()
+    time.sleep(link.latency_s + 0.05)
+    subscriber.Close()
+
+    print(
+        f"[TRANSPORTE] {seq} escritos a {args.hz:.0f} Hz | recibidos {latency.count} | "
+        f"copia {copy_us:.1f} us | retraso p50 {latency.percentile(50) / 1e3:.1f} us "
+        f"p99 {latency.percentile(99) / 1e3:.1f} us máx. {latency.max_ns / 1e3:.1f} us"
+    )
+    print(bus.summary())
+
+
+def bench_plant(args, link):
+    loopback.reset(link)
+    plant = PDPlant(rate_hz=args.hz).start()
+
+    states = []
+
+    def on_state(msg):
+        states.append((time.monotonic(), msg.motor_state[MOTOR].q))
+
+    subscriber = loopback.ChannelSubscriber("rt/lowstate", LowState_)
+    subscriber.Init(on_state, 10)
+    publisher = loopback.ChannelPublisher("rt/arm_sdk", LowCmd_)
+    publisher.Init()
+
+    cmd = unitree_hg_msg_dds__LowCmd_()
+    cmd.motor_cmd[ARM_SDK_WEIGHT_INDEX].q = 1.0
+    cmd.motor_cmd[MOTOR].q = args.step
+    cmd.motor_cmd[MOTOR].kp = args.kp
+    cmd.motor_cmd[MOTOR].kd = args.kd
+
+    thread = DeadlineThread(
+        interval=1.0 / args.hz, target=lambda: publisher.Write(cmd), name="bench_arm_sdk", mode="sleep", report=False
+    )
+    started = time.monotonic()
+    thread.Start()
+    time.sleep(args.seconds)
+    thread.Wait()
+    plant.stop()
+    subscriber.Close()
+
+    rise = next((t - started for t, q in states if t >= started and q >= 0.9 * args.step), None)
+    final = states[-1][1] if states else float("nan")
+    rise_text = f"{rise * 1e3:.0f} ms" if rise is not None else "no alcanzado"
+    print(
+        f"[PLANTA] {len(states)} estados | escalón {args.step:g} rad kp={args.kp:g} kd={args.kd:g} | "
+        f"90 % en {rise_text} | error final {(args.step - final) * 1e3:.2f} mrad"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del transporte loopback y la planta PD.")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--hz", type=float, default=500.0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    parser.add_argument("--rate-hz", type=float, default=0.0)
+    parser.add_argument("--step", type=float, default=0.5)
+    parser.add_argument("--kp", type=float, default=60.0)
+    parser.add_argument("--kd", type=float, default=1.5)
+    args = parser.parse_args()
+
+    link = LinkConfig(args.latency_ms * 1e-3, args.loss, args.rate_hz, seed=0)
+    bench_transport(args, link)
+    bench_plant(args, link)
+
+
+if __name__ == "__main__":
+    main()
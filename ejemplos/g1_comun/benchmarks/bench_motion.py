@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark del writer de g1_comun.motion: costo de interpolate() por tick.
+#
+# Uso:
+#   python3 bench_motion.py
+#   python3 bench_motion.py --seconds 3 --move-s 0.5
+#
+# Mide el tick del writer sosteniendo la pose, interpolando un movimiento y
+# comparando con la medida (tolerance). Antes de medir se verifica la
+# semántica de los futuros: el writer completa el movimiento con su
+# objetivo, uno nuevo cancela al anterior y cancelar dos veces (el usuario
+# y luego move_to o el writer) no interrumpe el writer. No requiere
+# unitree_sdk2py.
+# -----------------------------------------------------------------------------
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.joints import G1_23DOF_ARM_SDK, JointState
+from g1_comun.motion import MotionDriver
+
+
+DT = 0.02
+
+
+def run_ticks(driver, count):
+    for _ in range(count):
+        driver.interpolate()
+
+
+def verify():
+    joints = JointState(G1_23DOF_ARM_SDK)
+    driver = MotionDriver(joints, DT)
+    target = np.linspace(-0.5, 0.5, joints.layout.size)
+
+    future = driver.move(target, 0.1)
+    run_ticks(driver, 6)
+    if not future.done() or not np.allclose(future.result(), target):
+        raise AssertionError("El writer no completó el movimiento con su objetivo.")
+
+    first = driver.move(-target, 1.0)
+    run_ticks(driver, 3)
+    second = driver.move(target, 1.0)
+    run_ticks(driver, 1)
+    if not first.cancelled():
+        raise AssertionError("Un movimiento nuevo no canceló al anterior.")
+
+    # Cancelar dos veces y luego publicar otro movimiento: _activate vuelve
+    # a cancelar el futuro desde el writer.
+    run_ticks(driver, 5)
+    held = joints.command.copy()
+    if not (second.cancel() and second.cancel()):
+        raise AssertionError("cancel() devolvió False sobre un movimiento en curso.")
+    if not second.wait(0):
+        raise AssertionError("wait() no vuelve con el movimiento cancelado.")
+    driver.cancel()
+    run_ticks(driver, 3)
+    if not np.array_equal(joints.command, held):
+        raise AssertionError("Tras cancelar, el writer no sostuvo el último comando.")
+    third = driver.move(-target, 0.1)
+    run_ticks(driver, 6)
+    if not third.done() or third.cancelled():
+        raise AssertionError("El writer no completó el movimiento publicado tras cancelar.")
+
+
+def measure(label, tick, seconds):
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+
+    while True:
+        for _ in range(100):
+            tick()
+        count += 100
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+
+    rate = count / (now - start)
+    print(f"{label:<28} {rate:>12,.0f} ticks/s  {1e6 / rate:>9.2f} us/tick")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del writer de g1_comun.motion.")
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--move-s", type=float, default=1.0, help="Duración de cada movimiento.")
+    args = parser.parse_args()
+
+    verify()
+    print("[OK] Completado, reemplazo y doble cancelación de movimientos.\n")
+
+    size = G1_23DOF_ARM_SDK.size
+    rng = np.random.default_rng(0)
+
+    for label, tolerance in (("sostener", None), ("interpolar", None), ("interpolar + tolerancia", 1e-6)):
+        joints = JointState(G1_23DOF_ARM_SDK)
+        driver = MotionDriver(joints, DT, from_command=tolerance is None)
+        state = {"future": None}
+
+        def tick():
+            future = state["future"]
+            if label != "sostener" and (future is None or future.done()):
+                state["future"] = driver.move(rng.uniform(-1.0, 1.0, size), args.move_s, tolerance)
+            driver.interpolate()
+
+        measure(label, tick, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
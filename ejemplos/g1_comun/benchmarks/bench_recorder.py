@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark de g1_comun.recorder: costo de capture() en el callback y
+# grabación sostenida a la tasa de rt/lowstate con rotación y compresión.
+#
+# Uso:
+#   python3 bench_recorder.py
+#   python3 bench_recorder.py --seconds 120 --rate 500 --chunk 10
+#   python3 bench_recorder.py --raw --dir /tmp/grabaciones
+#
+# El hilo principal alimenta capture() a `--rate` Hz con mensajes sintéticos con la
+# forma de LowState_ (35 motores, IMU) y un LowCmd adjunto. Se reporta el
+# costo de capture() (p50/p99/máx.), las muestras descartadas, los
+# overruns del hilo de fondo, el RSS del proceso al inicio y al final y el
+# tamaño en disco por minuto. Al terminar se relee la grabación y se
+# verifica que no falten ticks.
+# No requiere unitree_sdk2py.
+# -----------------------------------------------------------------------------
+
+import argparse
+import math
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.recorder import LowStateRecorder, load_recording
+from g1_comun.timing import LogHistogram
+
+
+def fake_low_state():
+    motors = [
+        SimpleNamespace(q=0.0, dq=0.0, tau_est=0.0, temperature=[30, 31])
+        for _ in range(35)
+    ]
+    imu = SimpleNamespace(quaternion=[1.0, 0.0, 0.0, 0.0], gyroscope=[0.0] * 3,
+                          accelerometer=[0.0, 0.0, 9.81], rpy=[0.0] * 3)
+    return SimpleNamespace(tick=0, motor_state=motors, imu_state=imu)
+
+
+def fake_low_cmd():
+    return SimpleNamespace(motor_cmd=[SimpleNamespace(q=0.0, kp=60.0, kd=1.5) for _ in range(35)])
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la grabadora columnar de LowState.")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--rate", type=float, default=500.0)
+    parser.add_argument("--chunk", type=float, default=10.0, help="Segundos por chunk.")
+    parser.add_argument("--raw", action="store_true", help="Sin compresión al rotar.")
+    parser.add_argument("--dir", default=None, help="Carpeta de salida (por defecto temporal).")
+    args = parser.parse_args()
+
+    out_dir = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="bench_recorder_"))
+    msg, cmd = fake_low_state(), fake_low_cmd()
+    recorder = LowStateRecorder(out_dir, "bench", rate_hz=args.rate, chunk_s=args.chunk,
+                                compress=not args.raw)
+    recorder.attach_command(cmd)
+
+    hist = LogHistogram()
+    period = 1.0 / args.rate
+    total = int(args.seconds * args.rate)
+    rss_start = rss_mb()
+    next_t = time.perf_counter()
+
+    for tick in range(total):
+        t = tick * period
+        msg.tick = tick
+        for j, m in enumerate(msg.motor_state):
+            m.q = 0.5 * math.sin(t + j)
+            m.dq = 0.5 * math.cos(t + j)
+        for c in cmd.motor_cmd:
+            c.q = msg.motor_state[0].q
+
+        started = time.perf_counter_ns()
+        recorder.capture(msg)
+        hist.record(time.perf_counter_ns() - started)
+
+        next_t += period
+        delay = next_t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    recorder.close()
+    rss_end = rss_mb()
+
+    size = sum(p.stat().st_size for p in recorder.path.rglob("*") if p.is_file())
+    data = load_recording(recorder.path, ["tick"])
+    missing = total - recorder.dropped - len(data["tick"])
+
+    print(f"Grabación: {recorder.path}")
+    print(f"muestras {total} | descartadas {recorder.dropped} | overruns {recorder.overruns} | faltantes {missing}")
+    print(
+        f"capture() p50 {hist.percentile(50) / 1e3:.1f} us | p99 {hist.percentile(99) / 1e3:.1f} us "
+        f"| máx. {hist.max_ns / 1e3:.1f} us"
+    )
+    print(f"RSS máx. {rss_start:.1f} MB -> {rss_end:.1f} MB")
+    print(f"disco {size / 1e6:.1f} MB ({size / 1e6 / (args.seconds / 60.0):.1f} MB/min)")
+
+    if not args.dir:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark de contención: RLock compartido frente a g1_comun.setpoint.
+#
+# Uso:
+#   python3 bench_setpoint.py
+#   python3 bench_setpoint.py --seconds 5 --state-hz 500 --writer-hz 500
+#
+# Reproduce los tres hilos de un player:
+#   estado   callback de rt/lowstate; cada `--csv-every` mensajes escribe y
+#            hace flush de una fila CSV (como g1_arm_sdk_moveV4 de 23 DoF).
+#   writer   interpola los joints activos y calcula el crc de la trama.
+#   planner  publica un nuevo objetivo cada `--move-s` y sondea el fin del
+#            movimiento cada periodo del writer.
+#
+# Para cada hilo se miden dos cosas:
+#   espera   tiempo bloqueado esperando a otro hilo. En modo "lock" es la
+#            adquisición del RLock compartido (código anterior); en modo
+#            "seqlock" es el tiempo gastado en relecturas del seqlock.
+#   sección  duración total de la sección compartida (espera incluida).
+# No requiere unitree_sdk2py.
+# -----------------------------------------------------------------------------
+
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.crc import FRAME_SIZE, crc32_words
+from g1_comun.scheduler import DeadlineThread
+from g1_comun.setpoint import SetpointBuffer
+from g1_comun.timing import LogHistogram
+
+
+NUM_JOINTS = 11
+ROLES = ("estado", "writer", "planner")
+
+
+def smooth(ratio):
+    return 0.5 - 0.5 * math.cos(math.pi * ratio)
+
+
+class LockedPlayer:
+    """Traspaso con RLock, como el selector físico antes de g1_comun.setpoint."""
+
+    def __init__(self, csv_writer, csv_file, csv_every):
+        self.lock = threading.RLock()
+        self.csv_writer = csv_writer
+        self.csv_file = csv_file
+        self.csv_every = csv_every
+        self.samples = 0
+
+        self.low_state = None
+        self.start = np.zeros(NUM_JOINTS)
+        self.target = np.zeros(NUM_JOINTS)
+        self.t0 = 0.0
+        self.duration = 1.0
+        self.active = False
+        self.frame = bytearray(FRAME_SIZE)
+        self.out = np.zeros(NUM_JOINTS)
+
+        self.wait = {role: LogHistogram() for role in ROLES}
+        self.section = {role: LogHistogram() for role in ROLES}
+
+    def _acquire(self, role):
+        t0 = time.perf_counter_ns()
+        self.lock.acquire()
+        self.wait[role].record(time.perf_counter_ns() - t0)
+        return t0
+
+    def _release(self, role, t0):
+        self.lock.release()
+        self.section[role].record(time.perf_counter_ns() - t0)
+
+    def on_state(self, msg):
+        t0 = self._acquire("estado")
+        try:
+            self.low_state = msg
+            self.samples += 1
+            if self.samples % self.csv_every == 0:
+                self.csv_writer.writerow(msg)
+                self.csv_file.flush()
+        finally:
+            self._release("estado", t0)
+
+    def tick(self):
+        t0 = self._acquire("writer")
+        try:
+            if self.active:
+                ratio = (time.monotonic() - self.t0) / self.duration
+                if ratio >= 1.0:
+                    self.start[:] = self.target
+                    self.active = False
+                    ratio = 1.0
+                np.subtract(self.target, self.start, out=self.out)
+                self.out *= smooth(ratio)
+                self.out += self.start
+            crc32_words(memoryview(self.frame)[:-4])
+        finally:
+            self._release("writer", t0)
+
+    def move(self, target, duration):
+        t0 = self._acquire("planner")
+        try:
+            self.target[:] = target
+            self.t0 = time.monotonic()
+            self.duration = duration
+            self.active = True
+        finally:
+            self._release("planner", t0)
+
+    def moving(self):
+        t0 = self._acquire("planner")
+        try:
+            return self.active
+        finally:
+            self._release("planner", t0)
+
+
+class SeqlockPlayer:
+    """Traspaso con g1_comun.setpoint.SetpointBuffer."""
+
+    def __init__(self, csv_writer, csv_file, csv_every):
+        self.csv_writer = csv_writer
+        self.csv_file = csv_file
+        self.csv_every = csv_every
+        self.samples = 0
+
+        self.low_state = None
+        self.setpoint = SetpointBuffer(NUM_JOINTS, initial=[0.0] * NUM_JOINTS)
+        self.current = np.zeros(NUM_JOINTS)
+        self.frame = bytearray(FRAME_SIZE)
+        self.out = np.zeros(NUM_JOINTS)
+        self.seq = 0
+
+        self.wait = {role: LogHistogram() for role in ROLES}
+        self.section = {role: LogHistogram() for role in ROLES}
+
+    def on_state(self, msg):
+        t0 = time.perf_counter_ns()
+        self.low_state = msg
+        self.wait["estado"].record(0)
+        self.section["estado"].record(time.perf_counter_ns() - t0)
+
+        self.samples += 1
+        if self.samples % self.csv_every == 0:
+            self.csv_writer.writerow(msg)
+            self.csv_file.flush()
+
+    def tick(self):
+        setpoint = self.setpoint
+        t0 = time.perf_counter_ns()
+        attempt = t0
+        while True:
+            seq, slot = setpoint.read()
+            ratio = setpoint.ratio(slot, time.monotonic())
+            setpoint.sample(slot, smooth(ratio), self.out)
+            if setpoint.valid(seq):
+                break
+            setpoint.retries += 1
+            attempt = time.perf_counter_ns()
+        self.wait["writer"].record(attempt - t0)
+        self.section["writer"].record(time.perf_counter_ns() - t0)
+
+        if ratio >= 1.0:
+            setpoint.done_seq = seq
+        crc32_words(memoryview(self.frame)[:-4])
+
+    def move(self, target, duration):
+        t0 = time.perf_counter_ns()
+        self.seq = self.setpoint.publish(self.current, target, duration)
+        self.wait["planner"].record(0)
+        self.section["planner"].record(time.perf_counter_ns() - t0)
+        self.current[:] = target
+
+    def moving(self):
+        t0 = time.perf_counter_ns()
+        done = self.setpoint.done_seq >= self.seq
+        self.wait["planner"].record(0)
+        self.section["planner"].record(time.perf_counter_ns() - t0)
+        return not done
+
+
+def run(player, args):
+    rng = random.Random(args.seed)
+    stop = threading.Event()
+    msg = [0.0] * (2 * NUM_JOINTS + 1)
+
+    def state_loop():
+        period = 1.0 / args.state_hz
+        deadline = time.monotonic()
+        while not stop.is_set():
+            player.on_state(msg)
+            deadline += period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+    def planner_loop():
+        poll = 1.0 / args.writer_hz
+        while not stop.is_set():
+            target = np.array([rng.uniform(-1.0, 1.0) for _ in range(NUM_JOINTS)])
+            player.move(target, args.move_s)
+            while player.moving() and not stop.is_set():
+                time.sleep(poll)
+
+    writer = DeadlineThread(1.0 / args.writer_hz, target=player.tick, name="writer", report=False)
+    threads = [
+        threading.Thread(target=state_loop, daemon=True),
+        threading.Thread(target=planner_loop, daemon=True),
+    ]
+
+    writer.Start()
+    for thread in threads:
+        thread.start()
+
+    time.sleep(args.seconds)
+    stop.set()
+    writer.Wait()
+    for thread in threads:
+        thread.join(timeout=1.0)
+
+    return writer.stats
+
+
+def report(label, player, stats):
+    print(f"\n[{label}]")
+    print(f"{'hilo':<10} {'medida':<8} {'n':>8} {'p50 us':>9} {'p99 us':>9} {'max us':>9}")
+    for role in ROLES:
+        for name, h in (("espera", player.wait[role]), ("sección", player.section[role])):
+            print(
+                f"{role:<10} {name:<8} {h.count:>8} {h.percentile(50) / 1e3:>9.1f} "
+                f"{h.percentile(99) / 1e3:>9.1f} {h.max_ns / 1e3:>9.1f}"
+            )
+    print(stats.summary("writer"))
+    if isinstance(player, SeqlockPlayer):
+        print(f"Relecturas del seqlock: {player.setpoint.retries}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de contención del traspaso de setpoints.")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--state-hz", type=float, default=500.0)
+    parser.add_argument("--writer-hz", type=float, default=500.0)
+    parser.add_argument("--move-s", type=float, default=0.05)
+    parser.add_argument("--csv-every", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, cls in (("lock", LockedPlayer), ("seqlock", SeqlockPlayer)):
+            with open(os.path.join(tmp, f"{label}.csv"), "w", newline="") as f:
+                player = cls(csv.writer(f), f, args.csv_every)
+                stats = run(player, args)
+                report(label, player, stats)
+
+
+if __name__ == "__main__":
+    main()
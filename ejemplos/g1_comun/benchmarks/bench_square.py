@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark del cuadrado de g1_moveInTime_control.py: lazo abierto (Move,
+# sleep, frenar, pausa) contra g1_comun.locomotion (lazo cerrado sobre la
+# odometría, segmentos encadenados).
+#
+# Uso:
+#   python3 bench_square.py
+#   python3 bench_square.py --speed-gain 0.85 --yaw-gain 1.15 --drift 0.08
+#   python3 bench_square.py --side 1.2 --trials 20 --noise-mm 5
+#
+# Simula en tiempo virtual un robot que sigue el comando de velocidad con
+# un retardo de primer orden, con errores de ganancia (lo que el robot
+# avanza o gira de más o de menos por cada m/s o rad/s pedido) y deriva
+# lateral y de yaw al caminar. La odometría se publica a --odom-hz con
+# ruido gaussiano. Reporta el tiempo total, la desviación máxima respecto
+# del cuadrado ideal y el error de la pose final. Con --trials > 1 sortea
+# las ganancias alrededor de las pedidas. Antes de medir verifica que un
+# corte de odometría aborta la secuencia con el robot detenido. No requiere
+# SDK ni robot.
+# -----------------------------------------------------------------------------
+
+import argparse
+import math
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.locomotion import LocoMover, from_velocity, square, wrap_angle
+from g1_comun.stateslot import StateSlot
+
+
+# Constantes de g1_moveInTime_control.py.
+FORWARD_SPEED = 0.4
+ROTATION_SPEED = 0.5
+FORWARD_DURATION = 3.0
+TURN_DURATION = 3.14
+PAUSE_BETWEEN_MOVES = 1.0
+
+
+class _Imu:
+    def __init__(self):
+        self.rpy = [0.0, 0.0, 0.0]
+
+
+class _Odom:
+    """Campos de SportModeState_ que usa g1_comun.locomotion."""
+
+    def __init__(self, x, y, yaw):
+        self.position = [x, y, 0.0]
+        self.imu_state = _Imu()
+        self.imu_state.rpy[2] = yaw
+
+
+class SimRobot:
+    """Robot de locomoción en tiempo virtual con la interfaz Move() de LocoClient."""
+
+    def __init__(self, args, speed_gain, yaw_gain, drift, yaw_drift, rng):
+        self.step_s = 0.002
+        self.tau = args.tau
+        self.odom_period = 1.0 / args.odom_hz
+        self.noise_m = args.noise_mm * 1e-3
+        self.noise_rad = args.noise_mrad * 1e-3
+        self.gains = (speed_gain, speed_gain, yaw_gain)
+        self.drift = drift
+        self.yaw_drift = yaw_drift
+        self.rng = rng
+
+        self.t = 0.0
+        self.x = self.y = self.yaw = 0.0
+        self.vel = [0.0, 0.0, 0.0]
+        self.cmd = (0.0, 0.0, 0.0)
+        self.odom = StateSlot("rt/odommodestate")
+        self.path = [(0.0, 0.0)]
+        self.moves = 0
+        # Instante desde el que la odometría deja de publicarse.
+        self.odom_until = math.inf
+        self._next_odom = 0.0
+        self._publish()
+
+    # Interfaz de LocoClient ------------------------------------
+
+    def Move(self, vx, vy, vyaw, continous_move=False):
+        self.cmd = (vx, vy, vyaw)
+        self.moves += 1
+        return 0
+
+    def StopMove(self):
+        self.cmd = (0.0, 0.0, 0.0)
+        return 0
+
+    # Reloj virtual ----------------------------------------------
+
+    def clock(self) -> float:
+        return self.t
+
+    def sleep(self, seconds: float):
+        end = self.t + seconds
+        while self.t < end - 1e-12:
+            self._advance(min(self.step_s, end - self.t))
+
+    def _advance(self, h: float):
+        alpha = min(1.0, h / self.tau)
+        for i in range(3):
+            self.vel[i] += (self.gains[i] * self.cmd[i] - self.vel[i]) * alpha
+        vx, vy, vyaw = self.vel
+        walking = math.hypot(vx, vy) + abs(vyaw) * 0.2
+        # Deriva: el robot se abre hacia un lado y gira un poco al caminar.
+        vy += self.drift * walking
+        vyaw += self.yaw_drift * walking
+
+        c, s = math.cos(self.yaw), math.sin(self.yaw)
+        self.x += (c * vx - s * vy) * h
+        self.y += (s * vx + c * vy) * h
+        self.yaw = wrap_angle(self.yaw + vyaw * h)
+        self.t += h
+        self.path.append((self.x, self.y))
+
+        if self.t >= self._next_odom and self.t < self.odom_until:
+            self._publish()
+
+    def _publish(self):
+        gauss = self.rng.gauss
+        msg = _Odom(
+            self.x + gauss(0.0, self.noise_m),
+            self.y + gauss(0.0, self.noise_m),
+            wrap_angle(self.yaw + gauss(0.0, self.noise_rad)),
+        )
+        self.odom.put(msg, now=self.t)
+        self._next_odom += self.odom_period
+
+
+def open_loop(robot, side):
+    """execute_square() de g1_moveInTime_control.py, con el mismo move()."""
+    def move(x_vel=0.0, yaw_vel=0.0, duration=1.0):
+        robot.Move(x_vel, 0.0, yaw_vel, True)
+        robot.sleep(duration)
+        robot.Move(0.0, 0.0, 0.0)
+        robot.StopMove()
+        robot.sleep(PAUSE_BETWEEN_MOVES)
+
+    for _ in range(4):
+        move(x_vel=FORWARD_SPEED, duration=side / FORWARD_SPEED)
+        move(yaw_vel=-ROTATION_SPEED, duration=TURN_DURATION)
+
+
+def closed_loop(robot, side, verbose):
+    mover = LocoMover(robot, robot.odom, clock=robot.clock, sleep=robot.sleep, log=verbose)
+    mover.run(square(side, FORWARD_SPEED, ROTATION_SPEED))
+    # Tras frenar, el robot sigue un poco por el retardo de velocidad.
+    robot.sleep(1.0)
+
+
+def verify(args):
+    if from_velocity(FORWARD_SPEED, 0.0, 0.0, 0.0) is not None:
+        raise AssertionError("from_velocity() con duración 0 no devolvió None.")
+
+    robot = SimRobot(args, 1.0, 1.0, 0.0, 0.0, random.Random(args.seed))
+    robot.odom_until = 1.0
+    mover = LocoMover(robot, robot.odom, clock=robot.clock, sleep=robot.sleep, log=False, max_stale_s=2.0)
+    results = mover.run(square(args.side, FORWARD_SPEED, ROTATION_SPEED))
+    if len(results) != 1 or not results[0].stale:
+        raise AssertionError("Un corte de odometría no abortó la secuencia.")
+    if robot.cmd != (0.0, 0.0, 0.0) or robot.t > 3.5:
+        raise AssertionError(f"El robot no se detuvo a tiempo sin odometría ({robot.t:.2f}s, {robot.cmd}).")
+
+
+def _distance_to_segment(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+def evaluate(robot, side):
+    """(tiempo, desviación máx. del cuadrado, error de posición final, error de yaw final)."""
+    corners = [(0.0, 0.0), (side, 0.0), (side, -side), (0.0, -side)]
+    edges = list(zip(corners, corners[1:] + corners[:1]))
+    deviation = max(
+        min(_distance_to_segment(px, py, *a, *b) for a, b in edges)
+        for px, py in robot.path[::5]
+    )
+    return robot.t, deviation, math.hypot(robot.x, robot.y), abs(wrap_angle(robot.yaw))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cuadrado en lazo abierto contra lazo cerrado por odometría.")
+    parser.add_argument("--side", type=float, default=FORWARD_SPEED * FORWARD_DURATION, help="Lado del cuadrado en m.")
+    parser.add_argument("--speed-gain", type=float, default=0.9, help="Velocidad lineal real / comandada.")
+    parser.add_argument("--yaw-gain", type=float, default=1.1, help="Velocidad de giro real / comandada.")
+    parser.add_argument("--drift", type=float, default=0.05, help="m/s laterales por m/s de marcha.")
+    parser.add_argument("--yaw-drift", type=float, default=0.03, help="rad/s de yaw por m/s de marcha.")
+    parser.add_argument("--tau", type=float, default=0.25, help="Constante de tiempo de la respuesta en s.")
+    parser.add_argument("--odom-hz", type=float, default=100.0)
+    parser.add_argument("--noise-mm", type=float, default=3.0)
+    parser.add_argument("--noise-mrad", type=float, default=5.0)
+    parser.add_argument("--trials", type=int, default=1, help="Con > 1 sortea ganancias y deriva alrededor de las pedidas.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Imprime cada segmento del lazo cerrado.")
+    args = parser.parse_args()
+
+    verify(args)
+    print("[OK] Corte de odometría: segmento abortado y robot detenido.\n")
+
+    rng = random.Random(args.seed)
+    rows = {"lazo abierto": [], "lazo cerrado": []}
+    for trial in range(args.trials):
+        if args.trials > 1:
+            params = (
+                args.speed_gain * rng.uniform(0.9, 1.1),
+                args.yaw_gain * rng.uniform(0.9, 1.1),
+                args.drift * rng.uniform(-1.0, 1.0),
+                args.yaw_drift * rng.uniform(-1.0, 1.0),
+            )
+        else:
+            params = (args.speed_gain, args.yaw_gain, args.drift, args.yaw_drift)
+
+        robot = SimRobot(args, *params, random.Random(args.seed + trial))
+        open_loop(robot, args.side)
+        rows["lazo abierto"].append(evaluate(robot, args.side))
+
+        robot = SimRobot(args, *params, random.Random(args.seed + trial))
+        closed_loop(robot, args.side, args.verbose)
+        rows["lazo cerrado"].append(evaluate(robot, args.side))
+
+    print(
+        f"[CUADRADO] lado {args.side:.2f} m | {args.trials} ensayo(s) | ganancias "
+        f"v {args.speed_gain:.2f} yaw {args.yaw_gain:.2f} | deriva {args.drift:.2f} m/s, "
+        f"{args.yaw_drift:.2f} rad/s por m/s"
+    )
+    for name, results in rows.items():
+        times, deviations, finals, yaws = zip(*results)
+        print(
+            f"  {name:13s} | tiempo {sum(times) / len(times):5.1f}s | desviación máx. "
+            f"{max(deviations) * 100:5.1f} cm | pose final {max(finals) * 100:5.1f} cm, "
+            f"{math.degrees(max(yaws)):5.1f}° (peor ensayo)"
+        )
+
+
+if __name__ == "__main__":
+    main()
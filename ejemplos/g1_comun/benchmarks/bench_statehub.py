@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark de g1_comun.statehub: costo de decodificar LowState_ en el hub y
+# de leerlo desde los consumidores en otros procesos.
+#
+# Uso:
+#   python3 bench_statehub.py
+#   python3 bench_statehub.py --consumers 4 --seconds 3 --hz 500
+#
+# 1) Decodificación: µs por mensaje de HubTopic.capture() (LowState_ ->
+#    registro en memoria compartida).
+# 2) Lectura en proceso: latest() y pull() de 500 registros.
+# 3) Fan-out: un escritor a --hz y --consumers procesos independientes que
+#    leen latest() en bucle; reporta lecturas por segundo, lecturas sin dato
+#    coherente y registros incoherentes (deben ser 0).
+# Requiere los tipos IDL de unitree_sdk2py (no DDS ni robot).
+# -----------------------------------------------------------------------------
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowState_
+
+from g1_comun.scheduler import DeadlineThread
+from g1_comun.statehub import HubTopic, StateHubClient
+
+
+NAME = "bench_statehub"
+
+
+def timed(fn, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - started) / repeats * 1e6
+
+
+def consumer(seconds: float):
+    client = StateHubClient(NAME)
+    ring = client.lowstate
+    out = None
+    reads = misses = torn = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        out = ring.latest(out)
+        if out is None:
+            misses += 1
+            continue
+        reads += 1
+        # El escritor llena todo el vector q con el mismo valor: una copia
+        # a medio escribir mezclaría dos valores.
+        q = out["q"]
+        if q[0] != q[-1]:
+            torn += 1
+    client.close()
+    print(reads, misses, torn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del hub de estado en memoria compartida.")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--hz", type=float, default=500.0)
+    parser.add_argument("--consumers", type=int, default=2)
+    parser.add_argument("--capacity", type=int, default=2048)
+    parser.add_argument("--consumer", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.consumer:
+        consumer(args.seconds)
+        return
+
+    topic = HubTopic(NAME, "lowstate", args.capacity)
+    msg = unitree_hg_msg_dds__LowState_()
+    try:
+        decode_us = timed(lambda: topic.capture(msg), 2000)
+        ring = topic.ring
+        latest_us = timed(ring.latest, 2000)
+        pull_us = timed(lambda: ring.pull(ring.head - 500), 200)
+        print(
+            f"[HUB] decodificación {decode_us:.1f} us/mensaje | latest() {latest_us:.1f} us | "
+            f"pull(500) {pull_us:.1f} us | registro {ring.dtype.itemsize} bytes"
+        )
+
+        value = 0.0
+
+        def publish():
+            nonlocal value
+            value += 1.0
+            for motor in msg.motor_state:
+                motor.q = value
+            topic.capture(msg)
+
+        thread = DeadlineThread(interval=1.0 / args.hz, target=publish, name="bench_hub", mode="sleep", report=False)
+        thread.Start()
+        # Procesos aparte (no multiprocessing), como los consumidores reales.
+        command = [sys.executable, __file__, "--consumer", "--seconds", str(args.seconds)]
+        procs = [subprocess.Popen(command, stdout=subprocess.PIPE, text=True) for _ in range(args.consumers)]
+        stats = [tuple(map(int, proc.communicate()[0].split())) for proc in procs]
+        thread.Wait()
+
+        for i, (reads, misses, torn) in enumerate(stats):
+            print(
+                f"[CONSUMIDOR {i}] {reads / args.seconds:.0f} lecturas/s | sin dato {misses} | "
+                f"incoherentes {torn}"
+            )
+        print(
+            f"[FAN-OUT] {topic.count} mensajes escritos a {args.hz:.0f} Hz para {args.consumers} consumidores | "
+            f"decodificación p50 {topic.cost.percentile(50) / 1e3:.1f} us p99 {topic.cost.percentile(99) / 1e3:.1f} us"
+        )
+    finally:
+        topic.close()
+
+
+if __name__ == "__main__":
+    main()
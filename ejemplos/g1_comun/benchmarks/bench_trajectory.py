@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Benchmark de seguimiento: perfil coseno punto a punto frente a spline C2.
+#
+# Uso:
+#   python3 bench_trajectory.py
+#   python3 bench_trajectory.py --routine ../../simulacion_mujoco/29dof/poses/saludoR.txt
+#   python3 bench_trajectory.py --kp 40 --kd 1 --inertia 0.05 --scales 1.0,0.8,0.6
+#
+# Compila la rutina con g1_comun.routine y simula cada joint del brazo como
+# una inercia con el PD del motor:
+#
+#   I * ddq = kp * (q_cmd - q) + kd * (dq_cmd - dq)
+#
+# El perfil coseno envía dq_cmd = 0 (como los players antes del spline); el
+# spline envía el dq de feedforward de la tabla. Para cada perfil y escala de
+# duraciones se reporta la duración total, el error RMS y máximo respecto a
+# la tabla y el error al final de cada paso (waypoints). Antes de medir
+# verifica que compile_routine y check_routine (--validate) rechazan los
+# mismos pasos y que ningún paso compilado dura menos que su duración.
+# No requiere unitree_sdk2py.
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # ejemplos/
+
+from g1_comun.joints import G1_29DOF
+from g1_comun.routine import check_routine, compile_routine
+
+
+DEFAULT_ROUTINE = Path(__file__).resolve().parents[2] / "simulacion_mujoco" / "29dof" / "poses" / "aplaudir.txt"
+ARMS = G1_29DOF.subset("g1_29dof_arms", range(15, 29))
+
+
+def scaled(routine, scale):
+    routine = json.loads(json.dumps(routine))
+    for step in routine.get("pasos", []):
+        step["duracion"] = float(step.get("duracion", 1.0)) * scale
+    return routine
+
+
+def verify(dt):
+    routine = {"pasos": [{"posiciones": {"15": 0.2}, "duracion": 0.5}, 1]}
+    if not check_routine(routine, ARMS)["errors"]:
+        raise AssertionError("check_routine aceptó un paso que no es un objeto JSON.")
+    try:
+        compile_routine(routine, ARMS, dt)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("compile_routine aceptó un paso que no es un objeto JSON.")
+
+    # 0.005 s a 0.002 s por fila son 2.5 filas: con round() quedaban 2.
+    compiled = compile_routine({"pasos": [{"posiciones": {"15": 0.2}, "duracion": 0.005}]}, ARMS, 0.002)
+    if compiled.rows * 0.002 < 0.005:
+        raise AssertionError("compile_routine acortó un paso por debajo de su duración.")
+
+
+def simulate(q_cmd, dq_cmd, dt, kp, kd, inertia, substeps):
+    """Integra el PD (Euler semi-implícito) y devuelve la posición por fila."""
+    h = dt / substeps
+    q = q_cmd[0].copy()
+    dq = np.zeros_like(q)
+    out = np.empty_like(q_cmd)
+
+    for row in range(len(q_cmd)):
+        target = q_cmd[row]
+        velocity = dq_cmd[row]
+        for _ in range(substeps):
+            dq += h * (kp * (target - q) + kd * (velocity - dq)) / inertia
+            q += h * dq
+        out[row] = q
+
+    return out
+
+
+def run(routine, profile, scale, args, initial):
+    compiled = compile_routine(scaled(routine, scale), ARMS, args.dt, profile=profile)
+    q_cmd = compiled.table(initial)
+    dq_cmd = compiled.velocity_table(initial)
+    if dq_cmd is None:
+        dq_cmd = np.zeros_like(q_cmd)
+
+    # Una fila previa en la pose inicial para que la planta arranque en reposo.
+    q_cmd = np.vstack([initial, q_cmd])
+    dq_cmd = np.vstack([np.zeros_like(initial), dq_cmd])
+
+    q = simulate(q_cmd, dq_cmd, args.dt, args.kp, args.kd, args.inertia, args.substeps)
+    error = np.abs(q - q_cmd)[1:]
+    waypoints = compiled.step_rows[1:] - 1
+
+    return {
+        "duration": compiled.duration,
+        "rms": float(np.sqrt(np.mean(error ** 2))),
+        "max": float(error.max()),
+        "waypoint": float(error[waypoints].max()),
+        "peak_dq": float(np.abs(np.diff(q_cmd, axis=0)).max() / args.dt),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de seguimiento coseno vs spline.")
+    parser.add_argument("--routine", default=str(DEFAULT_ROUTINE))
+    parser.add_argument("--dt", type=float, default=0.002)
+    parser.add_argument("--kp", type=float, default=40.0)
+    parser.add_argument("--kd", type=float, default=1.0)
+    parser.add_argument("--inertia", type=float, default=0.05, help="Inercia efectiva por joint (kg m^2).")
+    parser.add_argument("--substeps", type=int, default=4)
+    parser.add_argument("--scales", default="1.0,0.75,0.5", help="Factores sobre las duraciones de la rutina.")
+    args = parser.parse_args()
+
+    verify(args.dt)
+    print("[OK] Pasos inválidos rechazados y duraciones compiladas sin acortar.\n")
+
+    with open(args.routine, "r", encoding="utf-8") as f:
+        routine = json.load(f)
+
+    initial = np.zeros(ARMS.size)
+    scales = [float(x) for x in args.scales.split(",") if x.strip()]
+
+    print(f"Rutina: {args.routine} | kp={args.kp} kd={args.kd} I={args.inertia} dt={args.dt}")
+    print(
+        f"{'perfil':<8} {'escala':>6} {'duración s':>10} {'rms mrad':>9} "
+        f"{'max mrad':>9} {'waypoint mrad':>13} {'dq pico':>8}"
+    )
+    for scale in scales:
+        for profile in ("cosine", "spline"):
+            r = run(routine, profile, scale, args, initial)
+            print(
+                f"{profile:<8} {scale:>6.2f} {r['duration']:>10.2f} {r['rms'] * 1e3:>9.1f} "
+                f"{r['max'] * 1e3:>9.1f} {r['waypoint'] * 1e3:>13.1f} {r['peak_dq']:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file channel.py
+# @brief ChannelFactoryInitialize/ChannelPublisher/ChannelSubscriber sobre DDS
+#        (unitree_sdk2py) o sobre el loopback en proceso de g1_comun.loopback.
+#
+# @descripcion
+#   Los scripts importan los canales desde aquí en lugar de
+#   unitree_sdk2py.core.channel. El backend se resuelve en cada llamada:
+#     G1_CHANNEL=dds        (por defecto) unitree_sdk2py.
+#     G1_CHANNEL=loopback   colas en memoria y planta PD simulada.
+#   Los scripts con argparse pueden exponer --loopback con
+#   add_channel_arguments() y configure_channel(args), que debe llamarse
+#   antes de ChannelFactoryInitialize.
+# -----------------------------------------------------------------------------
+
+import os
+
+
+BACKENDS = ("dds", "loopback")
+
+_backend = None
+
+
+def set_channel_backend(name: str):
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de canales no soportado: {name}. Usa {BACKENDS}.")
+    _backend = name
+
+
+def channel_backend() -> str:
+    name = _backend or os.environ.get("G1_CHANNEL", "dds").lower()
+    if name not in BACKENDS:
+        raise ValueError(f"G1_CHANNEL no soportado: {name}. Usa {BACKENDS}.")
+    return name
+
+
+def _channel_module():
+    if channel_backend() == "loopback":
+        from g1_comun import loopback
+
+        return loopback
+
+    from unitree_sdk2py.core import channel
+
+    return channel
+
+
+def ChannelFactoryInitialize(id: int = 0, networkInterface: str = None):
+    return _channel_module().ChannelFactoryInitialize(id, networkInterface)
+
+
+def ChannelPublisher(name: str, type):
+    return _channel_module().ChannelPublisher(name, type)
+
+
+def ChannelSubscriber(name: str, type):
+    return _channel_module().ChannelSubscriber(name, type)
+
+
+def add_channel_arguments(parser):
+    """Agrega --loopback a un argparse.ArgumentParser."""
+    parser.add_argument(
+        "--loopback",
+        action="store_true",
+        help="Usa el transporte en proceso con planta PD simulada en lugar de DDS (G1_CHANNEL=loopback).",
+    )
+
+
+def configure_channel(args):
+    """Aplica los argumentos de `add_channel_arguments`."""
+    if args.loopback:
+        set_channel_backend("loopback")
@@ -0,0 +1,255 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file crc.py
+# @brief CRC de tramas LowCmd (unitree_hg) con búfer persistente e incremental.
+#
+# @descripcion
+#   `unitree_sdk2py.utils.crc.CRC.Crc` empaqueta el LowCmd completo con
+#   struct.pack en cada llamada y recorre 250 palabras de 32 bits bit a bit.
+#   Este módulo mantiene una copia empaquetada del mensaje en un `bytearray`
+#   persistente y solo reempaqueta los campos que cambian.
+#
+#   El algoritmo del SDK es un CRC-32 MSB-first (polinomio 0x04C11DB7,
+#   init 0xFFFFFFFF, sin reflexión ni XOR final) sobre palabras little-endian.
+#   Es equivalente al CRC-32 reflejado de zlib si cada palabra se invierte
+#   byte a byte y cada byte se invierte bit a bit, de modo que el núcleo
+#   rápido usa `zlib.crc32` (tabla en C). `crc32_table` es la referencia en
+#   Python puro con tabla de 256 entradas.
+#
+#   El cálculo incremental guarda el estado del CRC al inicio de cada
+#   segmento (cabecera, 35 motores, reserva) y recalcula solo desde el primer
+#   segmento modificado.
+# -----------------------------------------------------------------------------
+
+import struct
+import zlib
+from array import array
+
+
+POLYNOMIAL = 0x04C11DB7
+
+# Distribución de unitree_hg.msg.dds_.LowCmd_ usada por el SDK (1004 bytes).
+HG_LOWCMD_FORMAT = "<2B2x" + "B3x5fI" * 35 + "5I"
+NUM_MOTOR_SLOTS = 35
+HEADER_SIZE = 4
+MOTOR_SLOT_SIZE = 28
+RESERVE_OFFSET = HEADER_SIZE + NUM_MOTOR_SLOTS * MOTOR_SLOT_SIZE
+FRAME_SIZE = RESERVE_OFFSET + 5 * 4
+
+# La última palabra (el propio crc) no entra en el cálculo.
+PAYLOAD_SIZE = FRAME_SIZE - 4
+
+_HEADER = struct.Struct("<2B2x")
+_MOTOR = struct.Struct("<B3x5fI")
+_FLOAT = struct.Struct("<f")
+_FLOAT2 = struct.Struct("<2f")
+_RESERVE = struct.Struct("<4I")
+
+_Q_OFFSET = 4
+
+# Segmento 0: cabecera; 1..35: motores; 36: reserva.
+_SEGMENT_OFFSETS = (
+    [0]
+    + [HEADER_SIZE + i * MOTOR_SLOT_SIZE for i in range(NUM_MOTOR_SLOTS)]
+    + [RESERVE_OFFSET, PAYLOAD_SIZE]
+)
+_RESERVE_SEGMENT = NUM_MOTOR_SLOTS + 1
+
+_BITREV = bytes(int(f"{b:08b}"[::-1], 2) for b in range(256))
+
+
+def _build_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 24
+        for _ in range(8):
+            if crc & 0x80000000:
+                crc = ((crc << 1) ^ POLYNOMIAL) & 0xFFFFFFFF
+            else:
+                crc = (crc << 1) & 0xFFFFFFFF
+        table.append(crc)
+    return tuple(table)
+
+
+_TABLE = _build_table()
+
+
+def crc32_table(payload, crc=0xFFFFFFFF):
+    """CRC del SDK en Python puro con tabla de 256 entradas (referencia)."""
+    table = _TABLE
+    data = memoryview(payload)
+
+    for i in range(0, len(data) - len(data) % 4, 4):
+        # La palabra little-endian se consume desde su byte más significativo.
+        for byte in (data[i + 3], data[i + 2], data[i + 1], data[i]):
+            crc = ((crc << 8) & 0xFFFFFFFF) ^ table[(crc >> 24) ^ byte]
+
+    return crc
+
+
+def _zlib_feed(payload, state):
+    words = array("I")
+    words.frombytes(payload)
+    if words.itemsize != 4:
+        raise RuntimeError("array('I') no tiene 4 bytes en esta plataforma.")
+    words.byteswap()
+    return zlib.crc32(words.tobytes().translate(_BITREV), state)
+
+
+def _zlib_finish(state):
+    reflected = (state ^ 0xFFFFFFFF).to_bytes(4, "big").translate(_BITREV)
+    return int.from_bytes(reflected, "little")
+
+
+def crc32_words(payload):
+    """CRC del SDK sobre un búfer little-endian usando zlib (C)."""
+    return _zlib_finish(_zlib_feed(payload, 0))
+
+
+class LowCmdCrc:
+    """
+    Empaquetado persistente de un LowCmd unitree_hg y su CRC.
+
+    Uso directo como reemplazo de `CRC()`:
+        crc = LowCmdCrc()
+        cmd.crc = crc.Crc(cmd)
+
+    Uso incremental en el hot path (solo cambian algunos q):
+        crc.pack(cmd)                # una vez, tras fijar campos constantes
+        crc.set_q(joint, q)          # por tick y por joint modificado
+        cmd.crc = crc.compute()
+    """
+
+    def __init__(self, kernel: str = "zlib"):
+        if kernel not in ("zlib", "table"):
+            raise ValueError(f"Kernel CRC no soportado: {kernel}")
+
+        self.kernel = kernel
+        self.buffer = bytearray(FRAME_SIZE)
+        self.view = memoryview(self.buffer)
+
+        # Estado del CRC al inicio de cada segmento (formato del kernel).
+        # Solo los estados hasta _valid_upto corresponden al búfer actual.
+        initial = 0 if kernel == "zlib" else 0xFFFFFFFF
+        self._states = [initial] * (len(_SEGMENT_OFFSETS) - 1)
+        self._valid_upto = 0
+        self._dirty_from = 0
+        self._last_crc = 0
+
+    # ---------------------------------------------------------
+    # Empaquetado
+    # ---------------------------------------------------------
+
+    def pack(self, cmd):
+        """Empaqueta el mensaje completo en el búfer persistente."""
+        buffer = self.buffer
+        _HEADER.pack_into(buffer, 0, cmd.mode_pr, cmd.mode_machine)
+
+        motors = cmd.motor_cmd
+        for i in range(NUM_MOTOR_SLOTS):
+            m = motors[i]
+            _MOTOR.pack_into(
+                buffer,
+                HEADER_SIZE + i * MOTOR_SLOT_SIZE,
+                m.mode, m.q, m.dq, m.tau, m.kp, m.kd, m.reserve,
+            )
+
+        _RESERVE.pack_into(buffer, RESERVE_OFFSET, *cmd.reserve)
+        self._dirty_from = 0
+        self._valid_upto = 0
+
+    def set_header(self, mode_pr: int, mode_machine: int):
+        _HEADER.pack_into(self.buffer, 0, mode_pr, mode_machine)
+        self._dirty_from = 0
+        self._valid_upto = 0
+
+    def set_motor(self, index: int, mode, q, dq, tau, kp, kd, reserve=0):
+        _MOTOR.pack_into(
+            self.buffer,
+            HEADER_SIZE + index * MOTOR_SLOT_SIZE,
+            mode, q, dq, tau, kp, kd, reserve,
+        )
+        self._mark_dirty(index + 1)
+
+    def set_q(self, index: int, q: float):
+        _FLOAT.pack_into(
+            self.buffer,
+            HEADER_SIZE + index * MOTOR_SLOT_SIZE + _Q_OFFSET,
+            q,
+        )
+        self._mark_dirty(index + 1)
+
+    def set_qdq(self, index: int, q: float, dq: float):
+        """q y dq son contiguos en el slot: un solo pack_into."""
+        _FLOAT2.pack_into(
+            self.buffer,
+            HEADER_SIZE + index * MOTOR_SLOT_SIZE + _Q_OFFSET,
+            q,
+            dq,
+        )
+        self._mark_dirty(index + 1)
+
+    def update_motors(self, cmd, indices):
+        """Reempaqueta solo los slots indicados desde el mensaje."""
+        buffer = self.buffer
+        motors = cmd.motor_cmd
+        first = None
+
+        for i in indices:
+            m = motors[i]
+            _MOTOR.pack_into(
+                buffer,
+                HEADER_SIZE + i * MOTOR_SLOT_SIZE,
+                m.mode, m.q, m.dq, m.tau, m.kp, m.kd, m.reserve,
+            )
+            if first is None or i < first:
+                first = i
+
+        if first is not None:
+            self._mark_dirty(first + 1)
+
+    def _mark_dirty(self, segment: int):
+        if segment < self._dirty_from:
+            self._dirty_from = segment
+        if segment < self._valid_upto:
+            self._valid_upto = segment
+
+    # ---------------------------------------------------------
+    # Cálculo
+    # ---------------------------------------------------------
+
+    def compute(self) -> int:
+        """CRC del búfer actual, recalculando desde el primer segmento sucio."""
+        start = self._dirty_from
+        if start > _RESERVE_SEGMENT:
+            return self._last_crc
+
+        offsets = _SEGMENT_OFFSETS
+        states = self._states
+        view = self.view
+        feed = _zlib_feed if self.kernel == "zlib" else crc32_table
+
+        # Avanza segmento a segmento solo hasta el primer slot sucio y desde
+        # ahí procesa el resto de la trama en una única llamada.
+        seg = min(self._valid_upto, start)
+        state = states[seg]
+        while seg < start:
+            state = feed(view[offsets[seg]:offsets[seg + 1]], state)
+            seg += 1
+            states[seg] = state
+        self._valid_upto = start
+
+        state = feed(view[offsets[start]:PAYLOAD_SIZE], state)
+        crc = _zlib_finish(state) if self.kernel == "zlib" else state
+
+        self._dirty_from = _RESERVE_SEGMENT + 1
+        self._last_crc = crc
+        return crc
+
+    def Crc(self, cmd) -> int:
+        """Reemplazo directo de `unitree_sdk2py.utils.crc.CRC().Crc`."""
+        self.pack(cmd)
+        return self.compute()
@@ -0,0 +1,265 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file joints.py
+# @brief Vectores articulares NumPy y mapas de índices del G1 (23 y 29 DoF).
+#
+# @descripcion
+#   `JointLayout` fija qué motores controla un player y en qué posición del
+#   vector vive cada uno. `JointState` guarda, en arrays de tamaño fijo, la
+#   posición comandada actual, el inicio y el objetivo del movimiento; la
+#   interpolación, la detección de hold y los chequeos de límites son
+#   operaciones vectoriales sobre esos arrays.
+#
+#   Numeraciones:
+#     G1_29DOF          29 motores (rt/lowcmd y rt/arm_sdk del G1 29 DoF).
+#     G1_23DOF_ARM_SDK  G1 23 DoF físico: usa la numeración de 29 motores y
+#                       solo tiene 12, 15-19 y 22-26 en el tren superior.
+#     G1_23DOF_MUJOCO   modelo MuJoCo de 23 motores: 12 = cintura,
+#                       13-17 = brazo izquierdo, 18-22 = brazo derecho.
+# -----------------------------------------------------------------------------
+
+from functools import cached_property
+
+from g1_comun.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+G1_29DOF_NAMES = (
+    "left_hip_pitch_joint",
+    "left_hip_roll_joint",
+    "left_hip_yaw_joint",
+    "left_knee_joint",
+    "left_ankle_pitch_joint",
+    "left_ankle_roll_joint",
+    "right_hip_pitch_joint",
+    "right_hip_roll_joint",
+    "right_hip_yaw_joint",
+    "right_knee_joint",
+    "right_ankle_pitch_joint",
+    "right_ankle_roll_joint",
+    "waist_yaw_joint",
+    "waist_roll_joint",
+    "waist_pitch_joint",
+    "left_shoulder_pitch_joint",
+    "left_shoulder_roll_joint",
+    "left_shoulder_yaw_joint",
+    "left_elbow_joint",
+    "left_wrist_roll_joint",
+    "left_wrist_pitch_joint",
+    "left_wrist_yaw_joint",
+    "right_shoulder_pitch_joint",
+    "right_shoulder_roll_joint",
+    "right_shoulder_yaw_joint",
+    "right_elbow_joint",
+    "right_wrist_roll_joint",
+    "right_wrist_pitch_joint",
+    "right_wrist_yaw_joint",
+)
+
+# Motores del G1 de 29 DoF que no existen en el de 23 DoF.
+G1_29DOF_ONLY = (13, 14, 20, 21, 27, 28)
+
+# Índice del modelo MuJoCo de 23 motores -> índice de 29 motores.
+MUJOCO23_TO_29 = tuple(range(13)) + (15, 16, 17, 18, 19, 22, 23, 24, 25, 26)
+
+G1_23DOF_MUJOCO_NAMES = tuple(G1_29DOF_NAMES[j] for j in MUJOCO23_TO_29)
+
+
+class JointLayout:
+    """
+    Subconjunto ordenado de motores controlados y su mapa de índices.
+
+    La lista de joints y el mapa motor -> posición son Python puro: validar
+    una rutina o listar un catálogo no importa NumPy. Los arrays `joints` y
+    `slot_of` se crean en el primer uso.
+    """
+
+    def __init__(self, name: str, num_motors: int, joints, motor_names=None):
+        self.name = name
+        self.num_motors = int(num_motors)
+        self.joint_list = sorted(set(int(j) for j in joints))
+
+        if self.joint_list and (self.joint_list[0] < 0 or self.joint_list[-1] >= self.num_motors):
+            raise ValueError(
+                f"{name}: índices fuera de rango 0..{self.num_motors - 1}: {self.joint_list}"
+            )
+
+        self.size = len(self.joint_list)
+        self.slots = {motor: slot for slot, motor in enumerate(self.joint_list)}
+        self.motor_names = tuple(motor_names) if motor_names else None
+
+    @cached_property
+    def joints(self):
+        return np.asarray(self.joint_list, dtype=np.intp)
+
+    @cached_property
+    def slot_of(self):
+        """slot_of[motor] = posición en el vector, -1 si el motor no se controla."""
+        slot_of = np.full(self.num_motors, -1, dtype=np.intp)
+        slot_of[self.joints] = np.arange(self.size)
+        return slot_of
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, motor) -> bool:
+        return motor in self.slots
+
+    def name_of(self, motor: int) -> str:
+        if self.motor_names and 0 <= motor < len(self.motor_names):
+            return self.motor_names[motor]
+        return str(motor)
+
+    def subset(self, name: str, joints) -> "JointLayout":
+        return JointLayout(name, self.num_motors, joints, self.motor_names)
+
+    def vector(self, mapping, default=None, out=None):
+        """
+        Convierte {motor: q} en un vector del layout.
+
+        Los motores sin valor toman `default` (array del layout o escalar).
+        Devuelve (vector, claves_ignoradas).
+        """
+        if out is None:
+            out = np.empty(self.size)
+        if default is None:
+            out.fill(0.0)
+        else:
+            out[:] = default
+
+        ignored = []
+        slots = self.slots
+        for key, value in mapping.items():
+            motor = int(key)
+            slot = slots.get(motor)
+            if slot is not None:
+                out[slot] = float(value)
+            else:
+                ignored.append(motor)
+
+        return out, ignored
+
+    def to_dict(self, values) -> dict:
+        return dict(zip(self.joint_list, np.asarray(values, dtype=float).tolist()))
+
+
+G1_29DOF = JointLayout("g1_29dof", 29, range(29), G1_29DOF_NAMES)
+G1_29DOF_UPPER = G1_29DOF.subset("g1_29dof_upper", range(12, 29))
+
+# El G1 23 DoF físico publica con la numeración de 29 motores.
+G1_23DOF_ARM_SDK = G1_29DOF.subset(
+    "g1_23dof_arm_sdk",
+    [12, 15, 16, 17, 18, 19, 22, 23, 24, 25, 26],
+)
+
+G1_23DOF_MUJOCO = JointLayout("g1_23dof_mujoco", 23, range(23), G1_23DOF_MUJOCO_NAMES)
+G1_23DOF_MUJOCO_UPPER = G1_23DOF_MUJOCO.subset("g1_23dof_mujoco_upper", range(12, 23))
+
+
+def read_positions(motor_state, joints, out):
+    """Copia motor_state[j].q de los joints indicados en `out` (sin asignar arrays)."""
+    for slot, j in enumerate(joints):
+        out[slot] = motor_state[j].q
+    return out
+
+
+class JointState:
+    """
+    Vectores articulares de un player sobre un `JointLayout`.
+
+        current  última posición comandada (tras completar el movimiento).
+        start    posición al iniciar el movimiento en curso.
+        target   objetivo del movimiento en curso.
+        command  búfer de salida del writer (posición interpolada).
+        dq       velocidad de feedforward del writer (0 salvo en trayectorias
+                 spline, ver g1_comun.routine).
+    """
+
+    def __init__(self, layout: JointLayout):
+        self.layout = layout
+        n = layout.size
+        self.current = np.zeros(n)
+        self.start = np.zeros(n)
+        self.target = np.zeros(n)
+        self.command = np.zeros(n)
+        self.dq = np.zeros(n)
+        self._scratch = np.empty(n)
+
+    # ---------------------------------------------------------
+    # Carga
+    # ---------------------------------------------------------
+
+    def reset(self, values):
+        """Fija current/start/target/command en `values` (p. ej. el estado medido)."""
+        self.current[:] = values
+        self.start[:] = values
+        self.target[:] = values
+        self.command[:] = values
+
+    def read_state(self, motor_state):
+        """Carga las posiciones medidas de `motor_state` como pose actual."""
+        read_positions(motor_state, self.layout.joint_list, self._scratch)
+        self.reset(self._scratch)
+        return self.current
+
+    def target_from(self, mapping):
+        """
+        Construye el objetivo a partir de {motor: q}; los joints sin valor
+        conservan la posición actual. Devuelve la lista de claves ignoradas.
+        """
+        _, ignored = self.layout.vector(mapping, default=self.current, out=self.target)
+        return ignored
+
+    # ---------------------------------------------------------
+    # Movimiento
+    # ---------------------------------------------------------
+
+    def begin_move(self, target=None):
+        """Arranca un movimiento desde la posición actual hacia `target`."""
+        if target is not None:
+            self.target[:] = target
+        self.start[:] = self.current
+
+    def commit(self):
+        """Da por completado el movimiento: current = target."""
+        self.current[:] = self.target
+        self.start[:] = self.target
+
+    def interpolate(self, s: float, out=None):
+        """out = start + (target - start) * s, sin arrays temporales."""
+        if out is None:
+            out = self.command
+        np.subtract(self.target, self.start, out=out)
+        out *= s
+        out += self.start
+        return out
+
+    # ---------------------------------------------------------
+    # Consultas vectoriales
+    # ---------------------------------------------------------
+
+    def deltas(self, out=None):
+        if out is None:
+            out = self._scratch
+        np.subtract(self.target, self.current, out=out)
+        np.abs(out, out=out)
+        return out
+
+    def max_delta(self) -> float:
+        return float(self.deltas().max()) if self.layout.size else 0.0
+
+    def is_hold(self, epsilon: float) -> bool:
+        return self.max_delta() <= epsilon
+
+    def changed_joints(self, epsilon: float):
+        mask = self.deltas() > epsilon
+        return self.layout.joints[mask].tolist()
+
+    def limit_violations(self, max_abs: float, values=None):
+        """Joints cuyo valor absoluto supera `max_abs`."""
+        values = self.target if values is None else values
+        return self.layout.joints[np.abs(values) > max_abs].tolist()
@@ -0,0 +1,47 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file lazy.py
+# @brief Imports diferidos para que los scripts arranquen rápido.
+#
+# @descripcion
+#   lazy_import("numpy") devuelve un módulo vacío que importa el real en el
+#   primer acceso a un atributo (np.zeros, np.float64...) y desde ahí queda
+#   con sus atributos copiados, así los accesos siguientes cuestan lo mismo
+#   que con `import numpy as np`. Los módulos de g1_comun que solo usan
+#   NumPy dentro de funciones lo importan así, de modo que --help, --list o
+#   --validate de los scripts no pagan los ~150 ms de NumPy.
+#
+#   Un atributo usado a nivel de módulo (un valor por defecto, un dtype, una
+#   clase base) dispara el import al cargar: esos usos van dentro de
+#   funciones. benchmarks/bench_imports.py verifica el presupuesto.
+# -----------------------------------------------------------------------------
+
+import importlib
+import sys
+import threading
+import types
+
+
+class _LazyModule(types.ModuleType):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_lock = threading.Lock()
+
+    def __getattr__(self, attr):
+        # Solo se llama con atributos que aún no están en __dict__. El lock
+        # evita que dos hilos ejecuten el primer import a la vez.
+        with self._lazy_lock:
+            module = importlib.import_module(self.__name__)
+            self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str):
+    """Módulo `name`, importado en el primer acceso a un atributo."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
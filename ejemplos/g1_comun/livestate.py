@@ -0,0 +1,288 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file livestate.py
+# @brief Fuentes en vivo de q / tau_est / q comandado para el visualizador.
+#
+# @descripcion
+#   StateRing es un anillo de filas [t, q, tau, q_cmd por joint] sobre un
+#   búfer plano: un array NumPy del proceso o un bloque de
+#   multiprocessing.shared_memory. El escritor llena la fila y después
+#   avanza `head`; el lector copia las filas nuevas desde su último índice y
+#   vuelve a leer `head`: las filas que el escritor pudo pisar mientras se
+#   copiaban se descartan (lector más lento que una vuelta del anillo).
+#
+#   Fuentes para CSVVisualizer (misma interfaz que telemetry.CSVTail:
+#   `header`, `fields` y read() -> [(t, valores)]):
+#     SharedStateSource  se adjunta al anillo que publica el proceso de
+#                        control (StatePublisher, G1_LIVE_SHM=<nombre>).
+#     DDSStateSource     se suscribe a rt/lowstate y al tópico de comandos
+#                        (rt/arm_sdk o rt/lowcmd) y llena un anillo local.
+#
+#   Cabecera del bloque compartido (int64): magic, capacidad, joints, head;
+#   después los índices de motor de cada joint y las filas float64
+#   [t, q_j, tau_j, q_cmd_j, ...].
+# -----------------------------------------------------------------------------
+
+import os
+import time
+
+from g1_comun.lazy import lazy_import
+
+np = lazy_import("numpy")
+shared_memory = lazy_import("multiprocessing.shared_memory")
+
+
+MAGIC = 0x47314C5331   # "G1LS1"
+HEADER_SLOTS = 4
+FIELDS = ("q", "tau", "q_cmd")
+DEFAULT_SHM_NAME = "g1_lowstate"
+
+
+def state_columns(joints):
+    """Columnas de una fuente en vivo, en el estilo de los CSV de telemetría."""
+    return [f"{field}_joint{j}" for j in joints for field in FIELDS]
+
+
+class StateRing:
+    """Anillo de filas de estado sobre un búfer plano (propio o compartido)."""
+
+    def __init__(self, buffer, joints=None, capacity: int = None):
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=buffer)
+        if joints is not None:
+            header[:] = (0, capacity, len(joints), 0)
+        elif header[0] != MAGIC:
+            raise ValueError("El bloque no contiene un anillo de estado de G1.")
+
+        self.capacity = int(header[1])
+        count = int(header[2])
+        self.width = 1 + len(FIELDS) * count
+
+        offset = 8 * HEADER_SLOTS
+        self.joints = np.ndarray((count,), dtype=np.int64, buffer=buffer, offset=offset)
+        offset += 8 * count
+        self.rows = np.ndarray((self.capacity, self.width), dtype=np.float64, buffer=buffer, offset=offset)
+        self._header = header
+
+        if joints is not None:
+            self.joints[:] = list(joints)
+            header[0] = MAGIC
+
+    @staticmethod
+    def nbytes(joints, capacity: int) -> int:
+        return 8 * (HEADER_SLOTS + len(joints) + capacity * (1 + len(FIELDS) * len(joints)))
+
+    @property
+    def head(self) -> int:
+        return int(self._header[3])
+
+    # Escritor -------------------------------------------------
+
+    def slot(self):
+        """Fila a llenar; publish() la hace visible."""
+        return self.rows[self._header[3] % self.capacity]
+
+    def publish(self):
+        self._header[3] += 1
+
+    # Lector ---------------------------------------------------
+
+    def pull(self, last: int):
+        """
+        Copia las filas en [last, head). Devuelve (filas, nuevo last,
+        descartadas). Con last=None se empieza por lo que ya hay en el anillo.
+        """
+        head = self.head
+        # La fila head - capacity puede estar reescribiéndose ahora mismo.
+        oldest = max(0, head - self.capacity + 1)
+        lost = 0
+        if last is None:
+            last = oldest
+        elif last < oldest:
+            lost, last = oldest - last, oldest
+        if head == last:
+            return self.rows[:0], last, lost
+
+        rows = self.rows[np.arange(last, head) % self.capacity]
+        # Filas que el escritor pudo pisar mientras se copiaban.
+        overwritten = self.head - self.capacity + 1 - last
+        if overwritten > 0:
+            rows = rows[overwritten:]
+            lost += overwritten
+        return rows, head, lost
+
+
+def _fill(row, joints, motor_state, command):
+    # Columnas intercaladas por joint (q, tau, q_cmd), como state_columns().
+    row[0] = time.time()
+    row[1::3] = [motor_state[j].q for j in joints]
+    row[2::3] = [motor_state[j].tau_est for j in joints]
+    if command is not None:
+        cmds = command.motor_cmd
+        row[3::3] = [cmds[j].q for j in joints]
+    else:
+        row[3::3] = np.nan
+
+
+class StatePublisher:
+    """
+    Lado del proceso de control: capture(msg) en el callback de lowstate
+    escribe una fila en el anillo compartido `name`.
+    """
+
+    enabled = True
+
+    def __init__(self, name: str, joints, capacity: int = 8192):
+        self.name = name
+        self.joints = list(joints)
+        size = StateRing.nbytes(self.joints, capacity)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Bloque de una ejecución anterior que no se cerró.
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.ring = StateRing(self._shm.buf, self.joints, capacity)
+        self._command = None
+
+    def attach_command(self, low_cmd):
+        """LowCmd preasignado del writer del que se lee el q comandado."""
+        self._command = low_cmd
+
+    def capture(self, msg):
+        ring = self.ring
+        if ring is None:
+            return
+        _fill(ring.slot(), self.joints, msg.motor_state, self._command)
+        ring.publish()
+
+    def close(self):
+        if self._shm is None:
+            return
+        shm, self._shm = self._shm, None
+        # Las vistas NumPy deben soltarse antes de cerrar el bloque.
+        self.ring = None
+        try:
+            shm.close()
+        except BufferError:
+            # Un callback en curso todavía tiene una fila; el SO libera el
+            # mapeo al salir.
+            pass
+        shm.unlink()
+
+
+class NullStatePublisher:
+    """Sin G1_LIVE_SHM: los players llaman a capture() igual y no se publica nada."""
+
+    enabled = False
+
+    def attach_command(self, low_cmd):
+        pass
+
+    def capture(self, msg):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_STATE_PUBLISHER = NullStatePublisher()
+
+
+def make_state_publisher(joints, name=None):
+    """Publicador del anillo compartido; `name` None toma G1_LIVE_SHM."""
+    if name is None:
+        name = os.environ.get("G1_LIVE_SHM", "")
+        if name.lower() in ("", "0", "false", "no", "off"):
+            return NULL_STATE_PUBLISHER
+        if name.lower() in ("1", "true", "yes", "on"):
+            name = DEFAULT_SHM_NAME
+    return StatePublisher(name, joints)
+
+
+# ---------------------------------------------------------
+# Fuentes para el visualizador
+# ---------------------------------------------------------
+
+def attach_shared_memory(name: str):
+    """
+    Se adjunta a un bloque existente sin registrarlo en el resource_tracker:
+    si no, al salir el lector borraría el bloque del proceso de control.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class _RingSource:
+    fields = FIELDS
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.header = ["timestamp", *state_columns(ring.joints.tolist())]
+        self.dropped = 0
+        self._last = None
+
+    def read(self):
+        rows, self._last, lost = self.ring.pull(self._last)
+        self.dropped += lost
+        return [(row[0], row[1:]) for row in rows]
+
+
+class SharedStateSource(_RingSource):
+    """Lee el anillo compartido que publica el proceso de control."""
+
+    def __init__(self, name: str = DEFAULT_SHM_NAME):
+        self._shm = attach_shared_memory(name)
+        super().__init__(StateRing(self._shm.buf))
+
+    def close(self):
+        self.ring = None
+        self._shm.close()
+
+
+class DDSStateSource(_RingSource):
+    """
+    Se suscribe directamente a rt/lowstate y al tópico de comandos. Requiere
+    unitree_sdk2py; el import se hace aquí para que el modo CSV no lo pida.
+    """
+
+    def __init__(self, interface, joints, command_topic: str = "rt/arm_sdk", capacity: int = 8192):
+        from g1_comun.channel import ChannelFactoryInitialize, ChannelSubscriber
+        from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_, LowState_
+
+        self.joints = list(joints)
+        self._buffer = np.zeros(StateRing.nbytes(self.joints, capacity), dtype=np.uint8)
+        super().__init__(StateRing(self._buffer, self.joints, capacity))
+        self._command = None
+
+        ChannelFactoryInitialize(0, interface)
+        self._state_sub = ChannelSubscriber("rt/lowstate", LowState_)
+        self._state_sub.Init(self._on_state, 10)
+        self._command_sub = None
+        if command_topic:
+            self._command_sub = ChannelSubscriber(command_topic, LowCmd_)
+            self._command_sub.Init(self._on_command, 10)
+
+    def _on_command(self, msg):
+        # Asignación de referencia atómica: se usa en el próximo lowstate.
+        self._command = msg
+
+    def _on_state(self, msg):
+        _fill(self.ring.slot(), self.joints, msg.motor_state, self._command)
+        self.ring.publish()
+
+    def close(self):
+        for sub in (self._state_sub, self._command_sub):
+            if sub is not None:
+                sub.Close()
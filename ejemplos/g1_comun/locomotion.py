@@ -0,0 +1,332 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file locomotion.py
+# @brief Movimientos de LocoClient en lazo cerrado sobre rt/odommodestate:
+#        avanzar una distancia, desplazarse de lado y girar un ángulo.
+#
+# @descripcion
+#   LocoMover termina cada segmento cuando la odometría mide el
+#   desplazamiento pedido y encadena el siguiente sin frenar, así el
+#   recorrido no depende de que el robot siga exactamente la velocidad
+#   comandada.
+#
+#   Los objetivos de una secuencia se planifican en coordenadas del mundo
+#   desde la pose inicial, encadenando las poses ideales: el error de un
+#   segmento se corrige en el siguiente en vez de acumularse. En cada tick
+#   (50 Hz) un segmento lineal comanda la velocidad a lo largo del eje con
+#   rampa de aceleración y frenado en sqrt(2·a·d), corrige el error lateral
+#   y el rumbo; un giro frena igual en yaw y sostiene la posición.
+#
+#   Si la odometría se corta (G1_STALE_MS) el robot se detiene y el segmento
+#   espera a que vuelva sin consumir su timeout, hasta `max_stale_s` en total:
+#   pasado ese límite el segmento falla y run() no sigue con los demás.
+#
+#   El lazo corre en el hilo que llama a run(); reloj y sleep se pueden
+#   reemplazar para simularlo en tiempo virtual (benchmarks/bench_square.py).
+# -----------------------------------------------------------------------------
+
+import math
+import time
+
+from g1_comun.stateslot import make_watchdog
+
+
+DRIVE = "drive"
+STRAFE = "strafe"
+TURN = "turn"
+
+
+def wrap_angle(angle: float) -> float:
+    """Ángulo equivalente en [-pi, pi]."""
+    return math.atan2(math.sin(angle), math.cos(angle))
+
+
+def odom_pose(msg):
+    """(x, y, yaw) de un SportModeState_."""
+    position = msg.position
+    return float(position[0]), float(position[1]), float(msg.imu_state.rpy[2])
+
+
+def _clamp(value: float, limit: float) -> float:
+    return max(-limit, min(limit, value))
+
+
+class Segment:
+    """Tramo de una secuencia: metros (drive, strafe) o radianes (turn)."""
+
+    def __init__(self, kind: str, amount: float, speed: float, label: str = None):
+        if kind not in (DRIVE, STRAFE, TURN):
+            raise ValueError(f"Tipo de segmento no soportado: {kind}.")
+        if speed <= 0:
+            raise ValueError("La velocidad de un segmento debe ser positiva.")
+        self.kind = kind
+        self.amount = float(amount)
+        self.speed = float(speed)
+        self.label = label or f"{kind} {self.amount:+.2f}"
+        # El error de un giro se mide como ángulo envuelto a [-pi, pi].
+        if kind == TURN and abs(self.amount) > math.pi:
+            raise ValueError("Un giro no puede superar pi rad; divídelo en varios segmentos.")
+
+    @property
+    def nominal_s(self) -> float:
+        """Duración a velocidad constante, sin rampas."""
+        return abs(self.amount) / self.speed
+
+    def goal(self, origin):
+        """Pose ideal al terminar el segmento desde `origin` (x, y, yaw)."""
+        x, y, yaw = origin
+        if self.kind == TURN:
+            return x, y, wrap_angle(yaw + self.amount)
+        heading = yaw if self.kind == DRIVE else yaw + math.pi / 2
+        return x + self.amount * math.cos(heading), y + self.amount * math.sin(heading), yaw
+
+
+def drive(distance: float, speed: float = 0.4, label: str = None) -> Segment:
+    """Avanza (o retrocede, si es negativa) `distance` metros."""
+    return Segment(DRIVE, distance, speed, label)
+
+
+def strafe(distance: float, speed: float = 0.3, label: str = None) -> Segment:
+    """Desplazamiento lateral de `distance` metros; positivo hacia la izquierda."""
+    return Segment(STRAFE, distance, speed, label)
+
+
+def turn(angle: float, speed: float = 0.5, label: str = None) -> Segment:
+    """Giro de `angle` radianes; positivo en sentido antihorario."""
+    return Segment(TURN, angle, speed, label)
+
+
+def square(side: float, speed: float = 0.4, yaw_speed: float = 0.5, clockwise: bool = True):
+    """Los ocho segmentos del cuadrado de `side` metros."""
+    angle = -math.pi / 2 if clockwise else math.pi / 2
+    segments = []
+    for i in range(1, 5):
+        segments.append(drive(side, speed, f"lado {i}/4"))
+        segments.append(turn(angle, yaw_speed, f"giro {i}/4"))
+    return segments
+
+
+def from_velocity(x_vel: float, y_vel: float, yaw_vel: float, duration: float):
+    """
+    Segmentos equivalentes a Move(x_vel, y_vel, yaw_vel) durante `duration`
+    con una sola componente no nula; None si no hay ninguna, hay varias o
+    `duration` no es positiva. Los giros de más de 90° se dividen en tramos
+    encadenados.
+    """
+    moving = [(kind, vel) for kind, vel in ((DRIVE, x_vel), (STRAFE, y_vel), (TURN, yaw_vel)) if vel]
+    if len(moving) != 1 or duration <= 0:
+        return None
+    kind, vel = moving[0]
+    amount = vel * duration
+    pieces = max(1, math.ceil(abs(amount) / (math.pi / 2))) if kind == TURN else 1
+    return [Segment(kind, amount / pieces, abs(vel)) for _ in range(pieces)]
+
+
+class SegmentResult:
+    def __init__(self, segment: Segment, duration: float, error: float, timed_out: bool, stale: bool = False):
+        self.segment = segment
+        self.duration = duration
+        # Distancia (m) o ángulo (rad) que quedaba hasta el objetivo al terminar.
+        self.error = error
+        self.timed_out = timed_out
+        # El segmento se abortó por superar max_stale_s sin odometría.
+        self.stale = stale
+
+    def summary(self) -> str:
+        unit = "rad" if self.segment.kind == TURN else "m"
+        status = " (sin odometría)" if self.stale else " (timeout)" if self.timed_out else ""
+        return (
+            f"{self.segment.label}: {self.duration:.2f}s (nominal {self.segment.nominal_s:.2f}s) | "
+            f"error {self.error:+.3f} {unit}{status}"
+        )
+
+
+class LocoMover:
+    """
+    Ejecuta secuencias de segmentos con LocoClient.Move cerrando el lazo con
+    la odometría de `odom` (StateSlot alimentado por rt/odommodestate).
+
+        mover = LocoMover(client, odom)
+        results = mover.run(square(1.2))
+    """
+
+    def __init__(
+        self,
+        client,
+        odom,
+        rate_hz: float = 50.0,
+        accel: float = 0.6,
+        yaw_accel: float = 1.2,
+        min_speed: float = 0.08,
+        min_yaw_speed: float = 0.15,
+        tolerance_m: float = 0.03,
+        tolerance_rad: float = 0.03,
+        cross_gain: float = 1.0,
+        heading_gain: float = 1.5,
+        max_heading_rate: float = 0.5,
+        timeout_factor: float = 2.0,
+        max_age_s: float = None,
+        max_stale_s: float = 5.0,
+        log: bool = True,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.client = client
+        self.odom = odom
+        self.clock = clock
+        self.sleep = sleep
+        self.dt = 1.0 / float(rate_hz)
+        self.accel = float(accel)
+        self.yaw_accel = float(yaw_accel)
+        self.min_speed = float(min_speed)
+        self.min_yaw_speed = float(min_yaw_speed)
+        self.tolerance_m = float(tolerance_m)
+        self.tolerance_rad = float(tolerance_rad)
+        self.cross_gain = float(cross_gain)
+        self.heading_gain = float(heading_gain)
+        self.max_heading_rate = float(max_heading_rate)
+        self.timeout_factor = float(timeout_factor)
+        self.max_stale_s = float(max_stale_s)
+        self.log = log
+        # Sin odometría fresca no se comanda: el flanco detiene la marcha.
+        self.watchdog = make_watchdog(odom, max_age_s, action="stop", on_stale=self._halt, log=log)
+
+    def _halt(self, age=None):
+        self.client.Move(0.0, 0.0, 0.0)
+
+    def pose(self):
+        """Pose medida o None si la odometría no llegó o está vieja."""
+        msg = self.odom.msg
+        if msg is None or not self.watchdog.check(self.clock()):
+            return None
+        return odom_pose(msg)
+
+    def plan(self, segments, start):
+        """Pose ideal al final de cada segmento, encadenadas desde `start`."""
+        goals = []
+        origin = start
+        for segment in segments:
+            origin = segment.goal(origin)
+            goals.append(origin)
+        return goals
+
+    def control(self, segment: Segment, origin, goal, pose, speed: float):
+        """
+        (vx, vy, vyaw) en el marco del robot para un tick, lo que falta del
+        segmento (m o rad, con signo) y la rapidez comandada a lo largo del
+        segmento, que es `speed` del tick siguiente.
+        """
+        x, y, yaw = pose
+        ex, ey = goal[0] - x, goal[1] - y
+
+        if segment.kind == TURN:
+            remaining = wrap_angle(goal[2] - yaw)
+            target = min(segment.speed, math.sqrt(2.0 * self.yaw_accel * abs(remaining)))
+            target = max(target, self.min_yaw_speed)
+            rate = min(target, speed + self.yaw_accel * self.dt)
+            vyaw = math.copysign(rate, remaining)
+            # Sostiene la posición del vértice mientras gira.
+            vx_world, vy_world = self.cross_gain * ex, self.cross_gain * ey
+        else:
+            heading = origin[2] if segment.kind == DRIVE else origin[2] + math.pi / 2
+            ux, uy = math.cos(heading), math.sin(heading)
+            remaining = ex * ux + ey * uy
+            cross = -ex * uy + ey * ux
+            target = min(segment.speed, math.sqrt(2.0 * self.accel * abs(remaining)))
+            target = max(target, self.min_speed)
+            rate = min(target, speed + self.accel * self.dt)
+            along = math.copysign(rate, remaining)
+            lateral = self.cross_gain * cross
+            vx_world = along * ux - lateral * uy
+            vy_world = along * uy + lateral * ux
+            vyaw = _clamp(self.heading_gain * wrap_angle(goal[2] - yaw), self.max_heading_rate)
+
+        cos_yaw, sin_yaw = math.cos(yaw), math.sin(yaw)
+        vx = cos_yaw * vx_world + sin_yaw * vy_world
+        vy = -sin_yaw * vx_world + cos_yaw * vy_world
+        return vx, vy, vyaw, remaining, rate
+
+    def done(self, segment: Segment, remaining: float) -> bool:
+        tolerance = self.tolerance_rad if segment.kind == TURN else self.tolerance_m
+        return abs(remaining) <= tolerance
+
+    def wait_pose(self, timeout: float = 2.0):
+        """Espera la primera odometría fresca; None si vence `timeout`."""
+        deadline = self.clock() + timeout
+        while True:
+            pose = self.pose()
+            if pose is not None or self.clock() >= deadline:
+                return pose
+            self.sleep(self.dt)
+
+    def run(self, segments, stop: bool = True):
+        """
+        Ejecuta `segments` en orden sin detenerse entre ellos. Devuelve un
+        SegmentResult por segmento ejecutado; con stop=True frena al final.
+        Si un segmento se aborta por falta de odometría, la secuencia termina
+        ahí y el último resultado tiene stale=True.
+        """
+        start = self.wait_pose()
+        if start is None:
+            raise RuntimeError("No hay odometría fresca de rt/odommodestate.")
+
+        results = []
+        origin = start
+        kind, speed = None, 0.0
+        try:
+            for segment, goal in zip(segments, self.plan(segments, start)):
+                # Entre segmentos del mismo eje se conserva la rapidez; al
+                # cambiar de eje la rampa arranca de cero.
+                result, speed = self._follow(segment, origin, goal, speed if segment.kind == kind else 0.0)
+                results.append(result)
+                if self.log:
+                    print(f"[LOCO] {result.summary()}")
+                if result.stale:
+                    break
+                # El siguiente segmento arranca desde la pose ideal, no la medida.
+                origin, kind = goal, segment.kind
+        finally:
+            if stop:
+                self._halt()
+        return results
+
+    def _follow(self, segment: Segment, origin, goal, rate: float):
+        """Lazo de un segmento: (SegmentResult, rapidez con la que termina)."""
+        dt = self.dt
+        started = self.clock()
+        deadline = started + self.timeout_factor * segment.nominal_s + 2.0
+        next_tick = started
+        remaining = segment.amount
+        stale_s = 0.0
+
+        while True:
+            now = self.clock()
+            pose = self.pose()
+            if pose is None:
+                # Sin odometría el robot ya se detuvo: el timeout no corre,
+                # pero la espera acumulada tiene su propio límite.
+                deadline += dt
+                stale_s += dt
+                rate = 0.0
+                if stale_s >= self.max_stale_s:
+                    self._halt()
+                    if self.log:
+                        print(f"[WARN] {segment.label}: {stale_s:.1f}s sin odometría, segmento abortado.")
+                    return SegmentResult(segment, now - started, remaining, True, stale=True), 0.0
+            else:
+                vx, vy, vyaw, remaining, rate = self.control(segment, origin, goal, pose, rate)
+                if self.done(segment, remaining):
+                    break
+                if now >= deadline:
+                    if self.log:
+                        print(f"[WARN] {segment.label}: tiempo agotado a {remaining:+.3f} del objetivo.")
+                    return SegmentResult(segment, now - started, remaining, True), 0.0
+                self.client.Move(vx, vy, vyaw, True)
+
+            next_tick += dt
+            self.sleep(max(0.0, next_tick - self.clock()))
+
+        return SegmentResult(segment, self.clock() - started, remaining, False), rate
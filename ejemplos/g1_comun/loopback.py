@@ -0,0 +1,450 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file loopback.py
+# @brief Transporte en proceso con la API de canales de unitree_sdk2py y una
+#        planta PD simulada.
+#
+# @descripcion
+#   ChannelFactoryInitialize, ChannelPublisher y ChannelSubscriber tienen la
+#   misma firma que los de unitree_sdk2py.core.channel, pero los mensajes
+#   viajan por colas en memoria del propio proceso: no hace falta DDS, red
+#   ni robot. Se eligen con G1_CHANNEL=loopback (ver g1_comun/channel.py).
+#
+#   Cada Write() copia el mensaje una vez (los writers reutilizan su LowCmd_)
+#   y lo encola en cada suscriptor; un hilo por suscriptor llama al handler
+#   cuando vence la latencia. El enlace se configura con:
+#     G1_LOOPBACK_LATENCY_MS   latencia fija de entrega (0 por defecto).
+#     G1_LOOPBACK_LOSS         probabilidad de perder un mensaje por lector.
+#     G1_LOOPBACK_RATE_HZ      tasa máxima por tópico; lo que llega antes se
+#                              descarta (0 = sin límite).
+#     G1_LOOPBACK_SEED         semilla de las pérdidas.
+#
+#   PDPlant cierra el lazo: lee rt/lowcmd y rt/arm_sdk, integra
+#   tau = kp (q_cmd - q) + kd (dq_cmd - dq) + tau_ff sobre una inercia con
+#   amortiguamiento por motor y publica rt/lowstate. rt/arm_sdk se mezcla
+#   con el peso de motor_cmd[29].q sobre cintura y brazos, como en el robot;
+#   sin comandos recientes la planta sostiene la pose inicial con un PD
+#   propio (el controlador de locomoción). No hay gravedad ni contactos: es
+#   para probar lazos, tiempos y rutinas, no la dinámica del G1.
+#     G1_LOOPBACK_PLANT        1 (por defecto) inicia la planta en
+#                              ChannelFactoryInitialize; 0 la desactiva.
+#     G1_LOOPBACK_PLANT_HZ     tasa de rt/lowstate (500 por defecto).
+#
+#   Los tipos de mensaje siguen siendo los de unitree_sdk2py.idl; la planta
+#   los importa al iniciarse.
+# -----------------------------------------------------------------------------
+
+import copy
+import os
+import random
+import threading
+import time
+import traceback
+from collections import deque
+
+from g1_comun.joints import G1_29DOF_UPPER
+from g1_comun.lazy import lazy_import
+from g1_comun.scheduler import DeadlineThread
+
+np = lazy_import("numpy")
+
+
+NUM_MOTORS = 35
+ARM_SDK_WEIGHT_INDEX = 29
+DEFAULT_QUEUE_LEN = 10
+
+# Columnas de los arrays de comando: q, dq, kp, kd, tau.
+_Q, _DQ, _KP, _KD, _TAU = range(5)
+
+
+class LinkConfig:
+    """Latencia, pérdida y tasa máxima por tópico del enlace loopback."""
+
+    def __init__(self, latency_s: float = 0.0, loss: float = 0.0, rate_hz: float = 0.0, seed=None):
+        if not 0.0 <= loss <= 1.0:
+            raise ValueError(f"La pérdida debe estar en [0, 1]: {loss}")
+        self.latency_s = max(0.0, float(latency_s))
+        self.loss = float(loss)
+        self.rate_hz = max(0.0, float(rate_hz))
+        self.min_interval = 1.0 / self.rate_hz if self.rate_hz > 0 else 0.0
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls):
+        seed = os.environ.get("G1_LOOPBACK_SEED", "")
+        return cls(
+            latency_s=float(os.environ.get("G1_LOOPBACK_LATENCY_MS", "0")) * 1e-3,
+            loss=float(os.environ.get("G1_LOOPBACK_LOSS", "0")),
+            rate_hz=float(os.environ.get("G1_LOOPBACK_RATE_HZ", "0")),
+            seed=int(seed) if seed else None,
+        )
+
+
+_IMMUTABLE = (int, float, bool, str, bytes, type(None))
+
+
+def snapshot(msg):
+    """
+    Copia independiente del mensaje, como la que entrega DDS a cada lector.
+
+    Recorre los campos de las structs IDL (dataclasses o __slots__) y copia
+    las listas; evita la maquinaria de copy.deepcopy, que es varias veces
+    más lenta con los 35 motor_cmd/motor_state.
+    """
+    if isinstance(msg, _IMMUTABLE):
+        return msg
+    if isinstance(msg, list):
+        if not msg or isinstance(msg[0], _IMMUTABLE):
+            return msg[:]
+        return [snapshot(item) for item in msg]
+
+    cls = type(msg)
+    state = getattr(msg, "__dict__", None)
+    slots = getattr(cls, "__slots__", ())
+    if state is None and not slots:
+        return copy.deepcopy(msg)
+    new = object.__new__(cls)
+    if state is not None:
+        new.__dict__.update({name: snapshot(value) for name, value in state.items()})
+    for name in slots:
+        setattr(new, name, snapshot(getattr(msg, name)))
+    return new
+
+
+class _Reader:
+    """Cola KEEP_LAST de un suscriptor; con handler, un hilo la vacía."""
+
+    def __init__(self, name: str, handler=None, queue_len: int = DEFAULT_QUEUE_LEN):
+        self.name = name
+        self.handler = handler
+        self.queue = deque(maxlen=max(1, int(queue_len)))
+        self.dropped = 0
+        self.delivered = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+        if handler is not None:
+            self._thread = threading.Thread(target=self._run, name=f"loopback:{name}", daemon=True)
+            self._thread.start()
+
+    def push(self, due: float, msg):
+        with self._cond:
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+            self.queue.append((due, msg))
+            self._cond.notify()
+
+    def pop(self, timeout: float = None):
+        """Siguiente mensaje ya entregable, o None si vence `timeout` o se cierra."""
+        limit = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                wait = None
+                if self.queue:
+                    due = self.queue[0][0]
+                    if due <= now:
+                        self.delivered += 1
+                        return self.queue.popleft()[1]
+                    wait = due - now
+                if limit is not None:
+                    if now >= limit:
+                        return None
+                    wait = limit - now if wait is None else min(wait, limit - now)
+                self._cond.wait(wait)
+        return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            msg = self.pop()
+            if msg is None:
+                return
+            try:
+                self.handler(msg)
+            except Exception:
+                traceback.print_exc()
+
+
+class LoopbackBus:
+    """Tópicos (dominio, nombre) -> lectores, con el enlace de `link`."""
+
+    def __init__(self, link: LinkConfig = None):
+        self.link = link or LinkConfig.from_env()
+        self._readers = {}
+        self._last = {}
+        # (dominio, nombre) -> [escritos, limitados por tasa, perdidos]
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(self.link.seed)
+
+    def attach(self, domain: int, name: str, reader: _Reader):
+        key = (domain, name)
+        with self._lock:
+            self._readers[key] = self._readers.get(key, ()) + (reader,)
+
+    def detach(self, domain: int, name: str, reader: _Reader):
+        key = (domain, name)
+        with self._lock:
+            self._readers[key] = tuple(r for r in self._readers.get(key, ()) if r is not reader)
+
+    def publish(self, domain: int, name: str, msg) -> bool:
+        now = time.monotonic()
+        link = self.link
+        key = (domain, name)
+        with self._lock:
+            counts = self.counts.setdefault(key, [0, 0, 0])
+            counts[0] += 1
+            if link.min_interval and now - self._last.get(key, -np.inf) < link.min_interval:
+                counts[1] += 1
+                return True
+            self._last[key] = now
+            readers = self._readers.get(key, ())
+            if link.loss:
+                kept = tuple(r for r in readers if self._random.random() >= link.loss)
+                counts[2] += len(readers) - len(kept)
+                readers = kept
+
+        if readers:
+            sample = snapshot(msg)
+            due = now + link.latency_s
+            for reader in readers:
+                reader.push(due, sample)
+        return True
+
+    def summary(self) -> str:
+        lines = []
+        for (domain, name), (written, throttled, lost) in sorted(self.counts.items()):
+            readers = self._readers.get((domain, name), ())
+            dropped = sum(r.dropped for r in readers)
+            lines.append(
+                f"[LOOPBACK] d{domain} {name}: escritos={written} limitados={throttled} "
+                f"perdidos={lost} desbordados={dropped}"
+            )
+        return "\n".join(lines)
+
+
+_bus = None
+_bus_lock = threading.Lock()
+_domain = 0
+_plants = {}
+
+
+def get_bus() -> LoopbackBus:
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = LoopbackBus()
+        return _bus
+
+
+def reset(link: LinkConfig = None):
+    """Detiene las plantas y crea un bus nuevo (benchmarks y pruebas)."""
+    global _bus
+    for plant in list(_plants.values()):
+        plant.stop()
+    _plants.clear()
+    with _bus_lock:
+        _bus = LoopbackBus(link)
+    return _bus
+
+
+def plant_enabled() -> bool:
+    return os.environ.get("G1_LOOPBACK_PLANT", "1").lower() not in ("0", "false", "no", "off")
+
+
+def ChannelFactoryInitialize(id: int = 0, networkInterface: str = None):
+    """Fija el dominio de los canales siguientes; la interfaz se ignora."""
+    global _domain
+    _domain = int(id)
+    get_bus()
+    if plant_enabled() and _domain not in _plants:
+        rate_hz = float(os.environ.get("G1_LOOPBACK_PLANT_HZ", "500"))
+        _plants[_domain] = PDPlant(domain=_domain, rate_hz=rate_hz).start()
+
+
+class ChannelPublisher:
+    def __init__(self, name: str, type, domain: int = None):
+        self.name = name
+        self.type = type
+        self.domain = _domain if domain is None else int(domain)
+        self._bus = None
+
+    def Init(self):
+        self._bus = get_bus()
+
+    def Write(self, sample, timeout: float = None) -> bool:
+        return self._bus.publish(self.domain, self.name, sample)
+
+    def Close(self):
+        self._bus = None
+
+
+class ChannelSubscriber:
+    def __init__(self, name: str, type, domain: int = None):
+        self.name = name
+        self.type = type
+        self.domain = _domain if domain is None else int(domain)
+        self._reader = None
+
+    def Init(self, handler=None, queueLen: int = 0):
+        self._reader = _Reader(self.name, handler, queueLen or DEFAULT_QUEUE_LEN)
+        get_bus().attach(self.domain, self.name, self._reader)
+
+    def Read(self, timeout: float = None):
+        return self._reader.pop(timeout)
+
+    def Close(self):
+        if self._reader is not None:
+            get_bus().detach(self.domain, self.name, self._reader)
+            self._reader.close()
+            self._reader = None
+
+
+def command_array(msg, out=None):
+    """(NUM_MOTORS, 5) con q, dq, kp, kd, tau de cada motor_cmd."""
+    if out is None:
+        out = np.empty((NUM_MOTORS, 5))
+    out[:] = [(c.q, c.dq, c.kp, c.kd, c.tau) for c in msg.motor_cmd[:NUM_MOTORS]]
+    return out
+
+
+class PDPlant:
+    """Integra los comandos PD de rt/lowcmd y rt/arm_sdk y publica rt/lowstate."""
+
+    def __init__(
+        self,
+        domain: int = 0,
+        rate_hz: float = 500.0,
+        inertia: float = 0.05,
+        damping: float = 0.5,
+        hold_kp: float = 60.0,
+        hold_kd: float = 1.5,
+        tau_limit: float = 80.0,
+        substeps: int = 4,
+        command_timeout_s: float = 0.1,
+        q0=None,
+    ):
+        if rate_hz <= 0:
+            raise ValueError("La tasa de la planta debe ser positiva.")
+        self.domain = int(domain)
+        self.interval = 1.0 / float(rate_hz)
+        self.inertia = float(inertia)
+        self.damping = float(damping)
+        self.tau_limit = float(tau_limit)
+        self.substeps = max(1, int(substeps))
+        self.command_timeout_s = float(command_timeout_s)
+
+        self.q = np.zeros(NUM_MOTORS) if q0 is None else np.array(q0, dtype=float)
+        self.dq = np.zeros(NUM_MOTORS)
+        self.tau = np.zeros(NUM_MOTORS)
+        self.hold = np.zeros((NUM_MOTORS, 5))
+        self.hold[:, _Q] = self.q
+        self.hold[:, _KP] = hold_kp
+        self.hold[:, _KD] = hold_kd
+        self.upper = G1_29DOF_UPPER.joints
+        self.tick = 0
+
+        # (instante de llegada, array de comando); se reemplaza entero.
+        self._lowcmd = None
+        self._arm_sdk = None
+        self._msg = None
+        self._publisher = None
+        self._subscribers = []
+        self._thread = None
+
+    def _on_lowcmd(self, msg):
+        self._lowcmd = (time.monotonic(), command_array(msg))
+
+    def _on_arm_sdk(self, msg):
+        self._arm_sdk = (time.monotonic(), command_array(msg))
+
+    def command(self, now: float = None):
+        """Comando efectivo por motor tras mezclar rt/lowcmd y rt/arm_sdk."""
+        now = time.monotonic() if now is None else now
+        fresh = now - self.command_timeout_s
+
+        lowcmd = self._lowcmd
+        cmd = lowcmd[1].copy() if lowcmd is not None and lowcmd[0] >= fresh else self.hold.copy()
+
+        arm_sdk = self._arm_sdk
+        if arm_sdk is not None and arm_sdk[0] >= fresh:
+            arm = arm_sdk[1]
+            weight = min(1.0, max(0.0, arm[ARM_SDK_WEIGHT_INDEX, _Q]))
+            upper = self.upper
+            cmd[upper] += weight * (arm[upper] - cmd[upper])
+        return cmd
+
+    def step(self, dt: float, cmd=None):
+        """Avanza la planta `dt` segundos (Euler semi-implícito en substeps)."""
+        cmd = self.command() if cmd is None else cmd
+        q, dq = self.q, self.dq
+        q_cmd, dq_cmd, kp, kd, tau_ff = cmd.T
+        h = dt / self.substeps
+        for _ in range(self.substeps):
+            tau = kp * (q_cmd - q) + kd * (dq_cmd - dq) + tau_ff
+            np.clip(tau, -self.tau_limit, self.tau_limit, out=tau)
+            dq += (tau - self.damping * dq) * (h / self.inertia)
+            q += dq * h
+        self.tau = tau
+        self.tick += max(1, int(round(dt * 1000)))
+
+    def _fill(self):
+        msg = self._msg
+        motor_state = msg.motor_state
+        for j, (q, dq, tau) in enumerate(zip(self.q.tolist(), self.dq.tolist(), self.tau.tolist())):
+            motor = motor_state[j]
+            motor.q = q
+            motor.dq = dq
+            motor.tau_est = tau
+        msg.tick = self.tick & 0xFFFFFFFF
+
+    def _tick(self):
+        self.step(self.interval)
+        self._fill()
+        self._publisher.Write(self._msg)
+
+    def start(self):
+        from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowState_
+        from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_, LowState_
+
+        from g1_comun.replay import IMU_FIELDS, IMU_REST
+
+        self._msg = unitree_hg_msg_dds__LowState_()
+        for name in IMU_FIELDS:
+            setattr(self._msg.imu_state, name, list(IMU_REST[name]))
+
+        self._publisher = ChannelPublisher("rt/lowstate", LowState_, domain=self.domain)
+        self._publisher.Init()
+        for topic, handler in (("rt/lowcmd", self._on_lowcmd), ("rt/arm_sdk", self._on_arm_sdk)):
+            subscriber = ChannelSubscriber(topic, LowCmd_, domain=self.domain)
+            subscriber.Init(handler, 1)
+            self._subscribers.append(subscriber)
+
+        self._thread = DeadlineThread(
+            interval=self.interval,
+            target=self._tick,
+            name=f"loopback_plant_d{self.domain}",
+            mode="sleep",
+            policy="skip",
+            report=False,
+        )
+        self._thread.Start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.Wait()
+            self._thread = None
+        for subscriber in self._subscribers:
+            subscriber.Close()
+        self._subscribers = []
@@ -0,0 +1,233 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file motion.py
+# @brief Movimientos no bloqueantes: el writer completa un futuro al terminar.
+#
+# @descripcion
+#   move_to() de los players publica el movimiento y devuelve un
+#   MotionFuture (un concurrent.futures.Future) que el hilo writer completa
+#   en el tick en que emite el objetivo. El llamador elige cómo esperarlo:
+#
+#     player.move_to(pose, 1.0).result()        bloqueante
+#     await player.move_to(pose, 1.0)           asyncio
+#     future.cancel()                           detiene el movimiento
+#
+#   En MotionDriver el planner publica cada movimiento (con su propia copia
+#   del objetivo) asignando una referencia, y solo el writer cuenta ticks y
+#   escribe start/target/current del JointState: no comparten contadores. Un
+#   movimiento nuevo reemplaza al activo, cuyo futuro queda cancelado. Al
+#   cancelar, el writer sostiene el último comando emitido. Los joints que
+#   un movimiento no especifica (NaN) conservan el último comando.
+#
+#   interpolate(advance=False) congela el movimiento activo (p. ej. mientras
+#   el estado medido está viejo) sin cancelarlo.
+#
+#   Los callbacks del futuro (add_done_callback) corren en el hilo writer
+#   cuando el movimiento termina: deben ser breves. Desde asyncio el futuro
+#   se envuelve con asyncio.wrap_future, que solo agenda en el loop.
+# -----------------------------------------------------------------------------
+
+import math
+from concurrent.futures import Future, InvalidStateError, wait
+
+from g1_comun.lazy import lazy_import
+
+asyncio = lazy_import("asyncio")
+np = lazy_import("numpy")
+
+
+class MotionFuture(Future):
+    """Future de concurrent.futures que además es awaitable desde asyncio."""
+
+    def __await__(self):
+        return asyncio.wrap_future(self).__await__()
+
+    def cancel(self) -> bool:
+        # Future.cancel() no despierta a concurrent.futures.wait(); se
+        # notifica aquí para que wait() vuelva en cuanto se cancela. Un
+        # segundo cancel() (el usuario y luego move_to, o el writer) no
+        # vuelve a notificar: set_running_or_notify_cancel() lanzaría. El
+        # lock (reentrante) es el del propio Future.
+        with self._condition:
+            if self.cancelled():
+                return True
+            if not super().cancel():
+                return False
+            self.set_running_or_notify_cancel()
+        return True
+
+    def wait(self, timeout: float = None) -> bool:
+        """Espera sin lanzar excepciones; False si vence `timeout`."""
+        done, _ = wait([self], timeout)
+        return bool(done)
+
+
+def settle(future: Future, result=None) -> bool:
+    """Completa `future`; False si ya estaba cancelado o completado."""
+    try:
+        future.set_result(result)
+    except InvalidStateError:
+        return False
+    return True
+
+
+class PendingMotion:
+    """
+    Movimiento publicado al writer. `cancelled` lo fija el callback del
+    futuro, así el writer lo consulta sin tomar el lock del Future.
+    """
+
+    __slots__ = ("future", "start", "target", "ticks", "tolerance", "settled", "cancelled")
+
+    def __init__(self, target=None, ticks: int = 1, tolerance: float = None, start=None):
+        self.future = MotionFuture()
+        self.start = start
+        self.target = target
+        self.ticks = ticks
+        self.tolerance = tolerance
+        self.settled = False
+        self.cancelled = False
+        self.future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        if future.cancelled():
+            self.cancelled = True
+
+    def settle(self, result=None):
+        """Lado writer: completa el futuro una sola vez."""
+        if not self.settled:
+            self.settled = True
+            settle(self.future, result)
+
+
+class MotionDriver:
+    """
+    Interpolación start -> target de un `JointState`, completada por el writer.
+
+    Planner: move(target, duration) devuelve el MotionFuture del movimiento.
+    Writer: interpolate(profile) una vez por tick escribe joints.command.
+
+    Con from_command=True (players de simulación) cada movimiento parte del
+    último comando emitido. Con False el writer carga joints.start con la
+    posición medida antes de llamar a interpolate() en cada tick; en ese
+    caso `tolerance` completa el futuro en cuanto la medida llega al
+    objetivo, aunque la interpolación sigue hasta el final.
+    """
+
+    def __init__(self, joints, dt: float, from_command: bool = True):
+        self.joints = joints
+        self.dt = float(dt)
+        self.from_command = from_command
+
+        self._pending = None   # lo escribe solo el planner
+        self._active = None    # lo usa solo el writer
+        self._target = None
+        self._tick = 0
+        self._ratio = 1.0
+
+    # ---------------------------------------------------------
+    # Planner
+    # ---------------------------------------------------------
+
+    def unset(self):
+        """Vector objetivo vacío (NaN = conservar) para move()."""
+        return np.full(self.joints.layout.size, np.nan)
+
+    def move(self, target, duration: float, tolerance: float = None, start=None) -> MotionFuture:
+        """
+        Publica un movimiento hacia `target` (orden del layout, NaN conserva
+        el último comando) en `duration` segundos. `start` reemplaza el
+        punto de partida (p. ej. la pose medida).
+        """
+        ticks = max(1, math.ceil(float(duration) / self.dt - 1e-9))
+        if start is not None:
+            start = np.array(start, dtype=float)
+        motion = PendingMotion(np.array(target, dtype=float), ticks, tolerance, start)
+        self._pending = motion
+        return motion.future
+
+    def cancel(self):
+        motion = self._pending
+        if motion is not None:
+            motion.future.cancel()
+
+    @property
+    def busy(self) -> bool:
+        motion = self._pending
+        return motion is not None and not motion.future.done()
+
+    # ---------------------------------------------------------
+    # Writer
+    # ---------------------------------------------------------
+
+    def interpolate(self, profile=None, advance: bool = True):
+        """
+        Escribe joints.command para este tick y avanza el movimiento activo.
+        `profile` transforma la fracción lineal (p. ej. medio coseno). Con
+        advance=False el movimiento queda congelado en su fracción actual.
+        """
+        joints = self.joints
+        motion = self._pending
+
+        if self._target is None:
+            self._hold()
+        if motion is not self._active:
+            self._activate(motion)
+
+        if motion is not None and not motion.cancelled:
+            tick = self._tick
+            if advance and tick <= motion.ticks:
+                ratio = tick / motion.ticks
+                self._ratio = profile(ratio) if profile is not None else ratio
+                self._tick = tick + 1
+
+                if tick == motion.ticks:
+                    joints.current[:] = motion.target
+                    motion.settle(motion.target)
+                elif motion.tolerance is not None and not motion.settled:
+                    if np.abs(motion.target - joints.start).max(initial=0.0) <= motion.tolerance:
+                        motion.settle(motion.target)
+        elif motion is not None and self._target is motion.target:
+            # Cancelado: se sostiene el último comando emitido.
+            self._hold()
+
+        command = joints.command
+        np.subtract(self._target, joints.start, out=command)
+        command *= self._ratio
+        command += joints.start
+        return command
+
+    def _activate(self, motion):
+        previous = self._active
+        if previous is not None and not previous.settled:
+            previous.future.cancel()
+
+        self._active = motion
+        self._tick = 0
+        if motion is None:
+            self._hold()
+            return
+
+        joints = self.joints
+        command = joints.command
+        for vector in (motion.target, motion.start):
+            if vector is not None:
+                missing = np.isnan(vector)
+                vector[missing] = command[missing]
+
+        if motion.start is not None:
+            joints.start[:] = motion.start
+        elif self.from_command:
+            joints.start[:] = command
+        joints.target[:] = motion.target
+        self._target = motion.target
+        self._ratio = 0.0
+
+    def _hold(self):
+        joints = self.joints
+        self._target = joints.command.copy()
+        self._ratio = 1.0
+        joints.current[:] = self._target
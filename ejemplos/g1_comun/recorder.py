@@ -0,0 +1,401 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file recorder.py
+# @brief Grabación columnar a tasa completa de rt/lowstate (memmap por chunks).
+#
+# @descripcion
+#   A diferencia del CSV de telemetry.py (una muestra de cada 500), aquí se
+#   guarda cada LowState: q, dq, tau_est y temperatura de cada motor, la IMU,
+#   el tick del robot y el q/kp/kd comandado en ese instante, con timestamp
+#   time.monotonic_ns().
+#
+#   El callback copia la muestra a un anillo preasignado (una columna NumPy
+#   por campo, un productor y un consumidor, sin lock). Un hilo de fondo
+#   vacía el anillo en el chunk activo: una carpeta chunk_NNNNN/ con un .npy
+#   por columna abierto con np.lib.format.open_memmap y dimensionado para
+#   `chunk_s` segundos. Al llenarse se rota; con `compress` el chunk cerrado
+#   se convierte a chunk_NNNNN.npz (savez_compressed) en otro hilo y se
+#   borra la carpeta. La memoria queda acotada por el anillo y el chunk
+#   activo (páginas del memmap que el SO puede volcar).
+#
+#   Estructura de una grabación:
+#     <nombre>_<fecha>/meta.json       columnas, motores y chunks cerrados
+#     <nombre>_<fecha>/chunk_00000.npz
+#     <nombre>_<fecha>/chunk_00001/q.npy ...
+#
+#   load_recording() concatena los chunks. Un chunk sin entrada en meta.json
+#   (el activo si el proceso murió) se recorta a las filas con t_ns > 0.
+#
+#   El q/kp/kd comandado se lee del LowCmd preasignado del writer con
+#   attach_command(): el writer no hace ningún trabajo extra.
+#
+#   Variables de entorno (para scripts sin argparse):
+#     G1_RECORD            carpeta de destino (o 1 para ./recordings).
+#     G1_RECORD_CHUNK      segundos por chunk (por defecto 60).
+#     G1_RECORD_COMPRESS   0 para dejar los chunks sin comprimir.
+# -----------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from g1_comun.joints import G1_29DOF
+from g1_comun.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+META_FILE = "meta.json"
+CHUNK_PREFIX = "chunk_"
+
+
+def recording_columns(motors: int):
+    """Columnas de una grabación: nombre -> (dtype, forma por fila)."""
+    return {
+        "t_ns": ("int64", ()),
+        "tick": ("uint32", ()),
+        "q": ("float32", (motors,)),
+        "dq": ("float32", (motors,)),
+        "tau_est": ("float32", (motors,)),
+        "temperature": ("int16", (motors, 2)),
+        "imu_quaternion": ("float32", (4,)),
+        "imu_gyroscope": ("float32", (3,)),
+        "imu_accelerometer": ("float32", (3,)),
+        "imu_rpy": ("float32", (3,)),
+        "cmd_q": ("float32", (motors,)),
+        "cmd_kp": ("float32", (motors,)),
+        "cmd_kd": ("float32", (motors,)),
+    }
+
+
+def _allocate(columns, rows):
+    return {name: np.zeros((rows, *shape), dtype=dtype) for name, (dtype, shape) in columns.items()}
+
+
+class LowStateRecorder:
+    """Graba cada LowState en columnas por chunks; capture() va en el callback."""
+
+    enabled = True
+
+    def __init__(self, directory, name: str = "lowstate", layout=G1_29DOF, rate_hz: float = 500.0,
+                 chunk_s: float = 60.0, compress: bool = True, capacity: int = 4096,
+                 flush_interval: float = 0.2):
+        self.layout = layout
+        self.motors = layout.joint_list
+        self.columns = recording_columns(len(self.motors))
+        self.chunk_rows = max(1, int(round(chunk_s * rate_hz)))
+        self.compress = compress
+        self.capacity = int(capacity)
+        self.flush_interval = float(flush_interval)
+
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.path = Path(directory).expanduser() / f"{name}_{stamp}"
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._ring = _allocate(self.columns, self.capacity)
+        self._head = 0   # lo escribe solo capture()
+        self._tail = 0   # lo escribe solo el hilo de fondo
+        self._command = None
+
+        self.written = 0
+        self.dropped = 0
+        self.overruns = 0
+        self.closed = False
+
+        self._chunks = []      # [{"name":, "rows":}] cerrados
+        self._chunk = None     # columnas memmap del chunk activo
+        self._chunk_index = 0
+        self._chunk_fill = 0
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recorder-zip")
+        self._meta_lock = threading.Lock()
+        self._meta = {
+            "layout": layout.name,
+            "motors": list(self.motors),
+            "names": [layout.name_of(j) for j in self.motors],
+            "rate_hz": rate_hz,
+            "chunk_rows": self.chunk_rows,
+            "columns": {name: [dtype, list(shape)] for name, (dtype, shape) in self.columns.items()},
+            "started": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._write_meta()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    def attach_command(self, low_cmd):
+        """LowCmd preasignado del writer del que se leen q/kp/kd comandados."""
+        self._command = low_cmd
+
+    # ---------------------------------------------------------
+    # Callback de DDS
+    # ---------------------------------------------------------
+
+    def capture(self, msg):
+        if self.closed:
+            return
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self.dropped += 1
+            return
+
+        i = head % self.capacity
+        ring = self._ring
+        ring["t_ns"][i] = time.monotonic_ns()
+        ring["tick"][i] = msg.tick
+
+        states = msg.motor_state
+        motors = [states[j] for j in self.motors]
+        ring["q"][i] = [m.q for m in motors]
+        ring["dq"][i] = [m.dq for m in motors]
+        ring["tau_est"][i] = [m.tau_est for m in motors]
+        ring["temperature"][i] = [m.temperature for m in motors]
+
+        imu = msg.imu_state
+        ring["imu_quaternion"][i] = imu.quaternion
+        ring["imu_gyroscope"][i] = imu.gyroscope
+        ring["imu_accelerometer"][i] = imu.accelerometer
+        ring["imu_rpy"][i] = imu.rpy
+
+        command = self._command
+        if command is not None:
+            cmds = command.motor_cmd
+            cmds = [cmds[j] for j in self.motors]
+            ring["cmd_q"][i] = [c.q for c in cmds]
+            ring["cmd_kp"][i] = [c.kp for c in cmds]
+            ring["cmd_kd"][i] = [c.kd for c in cmds]
+
+        # Publica la fila después de escribirla.
+        self._head = head + 1
+
+    # ---------------------------------------------------------
+    # Hilo de fondo
+    # ---------------------------------------------------------
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            started = time.perf_counter()
+            if self._drain():
+                if time.perf_counter() - started > self.flush_interval:
+                    self.overruns += 1
+        self._drain()
+        self._close_chunk()
+        self._compressor.shutdown(wait=True)
+        self._write_meta()
+
+    def _drain(self) -> int:
+        head, tail = self._head, self._tail
+        total = head - tail
+
+        while tail < head:
+            if self._chunk is None:
+                self._open_chunk()
+
+            start = tail % self.capacity
+            # Tramo contiguo: hasta el final del anillo, del anillo lleno o del chunk.
+            n = min(head - tail, self.capacity - start, self.chunk_rows - self._chunk_fill)
+            row = self._chunk_fill
+            for name, column in self._ring.items():
+                self._chunk[name][row:row + n] = column[start:start + n]
+
+            tail += n
+            self._tail = tail
+            self._chunk_fill += n
+            if self._chunk_fill == self.chunk_rows:
+                self._close_chunk()
+
+        self.written += total
+        return total
+
+    def _open_chunk(self):
+        folder = self.path / f"{CHUNK_PREFIX}{self._chunk_index:05d}"
+        folder.mkdir(exist_ok=True)
+        self._chunk = {
+            name: np.lib.format.open_memmap(
+                folder / f"{name}.npy", mode="w+", dtype=dtype, shape=(self.chunk_rows, *shape)
+            )
+            for name, (dtype, shape) in self.columns.items()
+        }
+        self._chunk_fill = 0
+
+    def _close_chunk(self):
+        chunk, rows = self._chunk, self._chunk_fill
+        if chunk is None:
+            return
+
+        for column in chunk.values():
+            column.flush()
+        name = f"{CHUNK_PREFIX}{self._chunk_index:05d}"
+        self._chunk = None
+        self._chunk_index += 1
+
+        if self.compress and rows:
+            self._compressor.submit(self._compress_chunk, name, chunk, rows)
+        else:
+            self._write_meta({"name": name, "rows": rows})
+
+    def _compress_chunk(self, name, chunk, rows):
+        folder = self.path / name
+        np.savez_compressed(self.path / f"{name}.npz", **{k: v[:rows] for k, v in chunk.items()})
+        del chunk
+        shutil.rmtree(folder, ignore_errors=True)
+        self._write_meta({"name": f"{name}.npz", "rows": rows})
+
+    def _write_meta(self, closed=None):
+        # Lo llaman el hilo de fondo y el de compresión.
+        with self._meta_lock:
+            if closed is not None:
+                self._chunks.append(closed)
+            meta = dict(self._meta, chunks=sorted(self._chunks, key=lambda c: c["name"]))
+            tmp = self.path / (META_FILE + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f, indent=2)
+            os.replace(tmp, self.path / META_FILE)
+
+    def close(self, timeout: float = 30.0):
+        """Vacía el anillo, cierra el chunk activo y espera la compresión."""
+        if self.closed:
+            return
+        self.closed = True
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def summary(self) -> str:
+        return (
+            f"{self.written} muestras en {self.path} "
+            f"({self.dropped} descartadas, {self.overruns} overruns)"
+        )
+
+
+class NullRecorder:
+    """Sin --record ni G1_RECORD: capture() descarta el mensaje."""
+
+    enabled = False
+
+    def attach_command(self, low_cmd):
+        pass
+
+    def capture(self, msg):
+        pass
+
+    def close(self, timeout: float = 0.0):
+        pass
+
+    def summary(self) -> str:
+        return "grabación desactivada"
+
+
+NULL_RECORDER = NullRecorder()
+
+
+# ---------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------
+
+def load_recording(path, columns=None) -> dict:
+    """
+    Devuelve {columna: array} con todos los chunks concatenados en orden.
+    Los chunks sin comprimir se leen como memmap de solo lectura.
+    """
+    path = Path(path)
+    with open(path / META_FILE, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    names = list(columns or meta["columns"])
+    listed = {c["name"]: c["rows"] for c in meta.get("chunks", [])}
+    found = sorted(
+        p.name for p in path.iterdir()
+        if p.name.startswith(CHUNK_PREFIX) and (p.is_dir() or p.suffix == ".npz")
+    )
+
+    parts = {name: [] for name in names}
+    for chunk in found:
+        # Durante la compresión conviven carpeta y .npz: vale lo que diga meta.json.
+        if chunk.endswith(".npz"):
+            if chunk not in listed:
+                continue
+            with np.load(path / chunk) as data:
+                for name in names:
+                    parts[name].append(data[name])
+            continue
+
+        if f"{chunk}.npz" in listed:
+            continue
+        t_ns = np.load(path / chunk / "t_ns.npy", mmap_mode="r")
+        rows = listed.get(chunk)
+        if rows is None:
+            rows = int(np.count_nonzero(t_ns))
+        for name in names:
+            parts[name].append(np.load(path / chunk / f"{name}.npy", mmap_mode="r")[:rows])
+
+    data = {}
+    for name in names:
+        dtype, shape = meta["columns"][name]
+        data[name] = np.concatenate(parts[name]) if parts[name] else np.zeros((0, *shape), dtype=dtype)
+    data["meta"] = meta
+    return data
+
+
+# ---------------------------------------------------------
+# Configuración
+# ---------------------------------------------------------
+
+def make_recorder(name: str, layout=G1_29DOF, directory=None, chunk_s=None, compress=None, rate_hz=500.0):
+    """
+    Crea la grabadora de un script. Los argumentos en None toman su valor
+    de G1_RECORD, G1_RECORD_CHUNK y G1_RECORD_COMPRESS.
+    """
+    if directory is None:
+        directory = os.environ.get("G1_RECORD", "")
+        if directory.lower() in ("", "0", "false", "no", "off"):
+            return NULL_RECORDER
+        if directory.lower() in ("1", "true", "yes", "on"):
+            directory = "recordings"
+
+    if chunk_s is None:
+        chunk_s = float(os.environ.get("G1_RECORD_CHUNK", "60"))
+    if compress is None:
+        compress = os.environ.get("G1_RECORD_COMPRESS", "1").lower() not in ("0", "false", "no", "off")
+
+    return LowStateRecorder(directory, name, layout, rate_hz=rate_hz, chunk_s=chunk_s, compress=compress)
+
+
+def add_recorder_arguments(parser):
+    """Agrega las opciones de grabación a un argparse.ArgumentParser."""
+    parser.add_argument(
+        "--record",
+        nargs="?",
+        const="recordings",
+        default=None,
+        help="Graba cada rt/lowstate a tasa completa en esta carpeta (por defecto ./recordings).",
+    )
+    parser.add_argument(
+        "--record-chunk",
+        type=float,
+        default=None,
+        help="Segundos por chunk de la grabación.",
+    )
+    parser.add_argument(
+        "--record-raw",
+        action="store_false",
+        dest="record_compress",
+        default=None,
+        help="No comprime los chunks al rotar.",
+    )
+
+
+def recorder_kwargs(args):
+    """Convierte los argumentos de `add_recorder_arguments` en kwargs de make_recorder."""
+    return {
+        "directory": args.record,
+        "chunk_s": args.record_chunk,
+        "compress": args.record_compress,
+    }
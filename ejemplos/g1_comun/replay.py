@@ -0,0 +1,245 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file replay.py
+# @brief Reproducción de LowState grabado con pacing por deadlines absolutos.
+#
+# @descripcion
+#   load_trace() carga una grabación de g1_comun.recorder (carpeta con
+#   meta.json: q, dq, tau_est, temperatura, IMU y tick a tasa completa) o un
+#   CSV de telemetría (q y tau por joint; dq se estima por diferencias y la
+#   IMU queda en reposo). LowStatePlayer llena un LowState_ preasignado con
+#   cada muestra y lo entrega a `write` (ChannelPublisher.Write) en
+#   t0 + (t_i - t_0) / speed.
+#
+#   Modos:
+#     speed = 1    tiempo real.
+#     speed = k    acelerado (o ralentizado con k < 1).
+#     speed = 0    lo más rápido posible, sin esperar.
+#
+#   La espera usa la misma estrategia que DeadlineThread: "sleep" duerme
+#   hasta el deadline; "hybrid" duerme hasta `spin_s` antes y espera activa
+#   el resto. Los deadlines son absolutos, así el retraso de una muestra no
+#   se acumula; el retraso de publicación se registra en un LogHistogram.
+#
+#   El mensaje se reutiliza: DDS lo serializa en Write(). No se calcula el
+#   crc de LowState (los suscriptores de los ejemplos no lo verifican).
+# -----------------------------------------------------------------------------
+
+import time
+from pathlib import Path
+
+from g1_comun.analysis import LogReader
+from g1_comun.lazy import lazy_import
+from g1_comun.recorder import META_FILE, load_recording
+from g1_comun.telemetry import column_key
+from g1_comun.timing import LogHistogram
+
+np = lazy_import("numpy")
+
+
+IMU_FIELDS = ("quaternion", "gyroscope", "accelerometer", "rpy")
+IMU_REST = {
+    "quaternion": (1.0, 0.0, 0.0, 0.0),
+    "gyroscope": (0.0, 0.0, 0.0),
+    "accelerometer": (0.0, 0.0, 9.81),
+    "rpy": (0.0, 0.0, 0.0),
+}
+
+
+class ReplayTrace:
+    """Muestras a reproducir: tiempo relativo (s), tick y columnas por motor."""
+
+    def __init__(self, t, motors, fields, imu=None, tick=None, source=""):
+        t = np.asarray(t, dtype=float)
+        self.t = t - t[0] if len(t) else t
+        self.motors = list(motors)
+        # {"q": (n, m), "dq": (n, m), "tau_est": (n, m), "temperature": (n, m, 2)}
+        self.fields = fields
+        self.imu = imu
+        self.tick = (
+            np.asarray(tick, dtype=np.int64) if tick is not None
+            else np.round(self.t * 1000.0).astype(np.int64)
+        )
+        self.source = str(source)
+
+    def __len__(self):
+        return len(self.t)
+
+    @property
+    def duration(self) -> float:
+        return float(self.t[-1]) if len(self.t) else 0.0
+
+    def window(self, start: float = 0.0, duration: float = None):
+        """Sub-traza [start, start + duration) en segundos desde el inicio."""
+        stop = np.inf if duration is None else start + duration
+        rows = slice(*np.searchsorted(self.t, [start, stop]))
+        return ReplayTrace(
+            self.t[rows],
+            self.motors,
+            {name: values[rows] for name, values in self.fields.items()},
+            {name: values[rows] for name, values in self.imu.items()} if self.imu else None,
+            self.tick[rows],
+            self.source,
+        )
+
+
+def _trace_from_recording(path: Path):
+    data = load_recording(path)
+    meta = data["meta"]
+    fields = {name: data[name] for name in ("q", "dq", "tau_est", "temperature")}
+    imu = {name: data[f"imu_{name}"] for name in IMU_FIELDS}
+    return ReplayTrace(data["t_ns"] * 1e-9, meta["motors"], fields, imu, data["tick"], path)
+
+
+def _trace_from_csv(path: Path):
+    reader = LogReader(path)
+    columns = {}
+    for index, name in enumerate(reader.header[1:]):
+        key = column_key(name)
+        if key is not None and key[0] in ("q", "tau"):
+            columns.setdefault(key[1], {})[key[0]] = index
+    motors = sorted(j for j, found in columns.items() if "q" in found)
+    if not motors:
+        raise ValueError(f"{path}: el encabezado no tiene columnas q por joint.")
+
+    blocks = [block for block in reader if len(block[0])]
+    if not blocks:
+        raise ValueError(f"{path}: el log no tiene filas.")
+    t = np.concatenate([times for times, _ in blocks])
+    values = np.concatenate([block for _, block in blocks])
+
+    q = values[:, [columns[j]["q"] for j in motors]]
+    tau = np.zeros_like(q)
+    for k, j in enumerate(motors):
+        if "tau" in columns[j]:
+            tau[:, k] = values[:, columns[j]["tau"]]
+    dq = np.gradient(q, t, axis=0) if len(t) > 1 else np.zeros_like(q)
+    fields = {"q": q, "dq": dq, "tau_est": tau}
+    return ReplayTrace(t, motors, fields, source=path)
+
+
+def load_trace(path):
+    """Traza de una carpeta de grabación (meta.json) o de un CSV de telemetría."""
+    path = Path(path).expanduser()
+    if (path / META_FILE).is_file():
+        return _trace_from_recording(path)
+    if path.is_file():
+        return _trace_from_csv(path)
+    raise FileNotFoundError(f"No es una grabación ni un CSV: {path}")
+
+
+class LowStatePlayer:
+    """Publica una ReplayTrace con `write(msg)` a `speed` veces el tiempo real."""
+
+    def __init__(self, trace: ReplayTrace, write, msg, speed: float = 1.0, loops: int = 1,
+                 wait: str = "hybrid", spin_s: float = 0.0003):
+        if len(trace) == 0:
+            raise ValueError("La traza no tiene muestras.")
+        if wait not in ("sleep", "hybrid"):
+            raise ValueError(f"Espera desconocida: {wait}")
+        self.trace = trace
+        self.write = write
+        self.msg = msg
+        self.speed = float(speed)
+        self.loops = int(loops)
+        self.wait = wait
+        self.spin_s = float(spin_s)
+
+        self.sent = 0
+        self.late = LogHistogram()
+        self.publish = LogHistogram()
+        self.elapsed = 0.0
+        self._stopped = False
+
+        # Una vuelta dura la traza más un periodo típico, así las vueltas
+        # siguientes no repiten el instante de la última muestra.
+        steps = np.diff(trace.t)
+        self.period = float(np.median(steps)) if len(steps) else 0.002
+        self.lap = trace.duration + self.period
+
+    def stop(self):
+        self._stopped = True
+
+    def _wait_until(self, deadline: float):
+        now = time.monotonic()
+        if self.wait == "sleep":
+            if deadline > now:
+                time.sleep(deadline - now)
+            return
+        coarse = deadline - self.spin_s
+        if coarse > now:
+            time.sleep(coarse - now)
+        while time.monotonic() < deadline:
+            pass
+
+    def _fill(self, i: int):
+        trace, msg = self.trace, self.msg
+        motor_state = msg.motor_state
+        fields = trace.fields
+        q = fields["q"][i].tolist()
+        dq = fields["dq"][i].tolist()
+        tau = fields["tau_est"][i].tolist()
+        for k, j in enumerate(trace.motors):
+            motor = motor_state[j]
+            motor.q = q[k]
+            motor.dq = dq[k]
+            motor.tau_est = tau[k]
+        temperature = fields.get("temperature")
+        if temperature is not None:
+            for j, pair in zip(trace.motors, temperature[i].tolist()):
+                motor_state[j].temperature = pair
+
+        if trace.imu:
+            imu = msg.imu_state
+            for name in IMU_FIELDS:
+                setattr(imu, name, trace.imu[name][i].tolist())
+
+    def run(self):
+        """Reproduce todas las vueltas (loops <= 0: hasta stop()); bloquea."""
+        trace, msg, write = self.trace, self.msg, self.write
+        realtime = self.speed > 0
+        ticks_per_lap = int(trace.tick[-1] - trace.tick[0]) + max(1, int(round(self.period * 1000)))
+        if not trace.imu:
+            for name in IMU_FIELDS:
+                setattr(msg.imu_state, name, list(IMU_REST[name]))
+        started = time.monotonic()
+        lap = 0
+
+        while not self._stopped and (self.loops <= 0 or lap < self.loops):
+            for i in range(len(trace)):
+                if self._stopped:
+                    break
+                self._fill(i)
+                msg.tick = int(trace.tick[i] + lap * ticks_per_lap) & 0xFFFFFFFF
+
+                if realtime:
+                    deadline = started + (lap * self.lap + trace.t[i]) / self.speed
+                    self._wait_until(deadline)
+                    sent_at = time.monotonic()
+                    self.late.record(max(0, int((sent_at - deadline) * 1e9)))
+                else:
+                    sent_at = time.monotonic()
+
+                write(msg)
+                self.publish.record(int((time.monotonic() - sent_at) * 1e9))
+                self.sent += 1
+            lap += 1
+
+        self.elapsed = time.monotonic() - started
+        return self
+
+    def summary(self) -> str:
+        rate = self.sent / self.elapsed if self.elapsed > 0 else 0.0
+        text = (
+            f"[REPLAY] {self.sent} muestras en {self.elapsed:.2f}s ({rate:.0f} Hz) | "
+            f"publicación p50 {self.publish.percentile(50) / 1e3:.1f} us p99 {self.publish.percentile(99) / 1e3:.1f} us"
+        )
+        if self.speed > 0:
+            text += (
+                f" | retraso p50 {self.late.percentile(50) / 1e3:.1f} us "
+                f"p99 {self.late.percentile(99) / 1e3:.1f} us máx. {self.late.max_ns / 1e3:.1f} us"
+            )
+        return text
@@ -0,0 +1,295 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file retime.py
+# @brief Re-temporización de rutinas bajo límites de velocidad, aceleración
+#        y jerk por joint (estilo TOPP).
+#
+# @descripcion
+#   La trayectoria geométrica (los waypoints de cada paso) no cambia; solo se
+#   buscan las duraciones mínimas con las que el perfil elegido respeta
+#   |dq| <= v, |ddq| <= a y |dddq| <= j en todos los joints.
+#
+#   cosine  cada paso es independiente. Para un salto D en tiempo T los picos
+#           son pi*D/(2T), pi^2*D/(2T^2) y pi^3*D/(2T^3), así que la duración
+#           mínima sale en forma cerrada. El jerk queda acotado dentro de cada
+#           paso; entre pasos la aceleración salta (propio del perfil).
+#   linear  solo se limita la velocidad (D/T); el perfil lineal tiene
+#           aceleración impulsiva en los extremos de cada paso.
+#   spline  los tramos se acoplan. Cada iteración escala cada tramo por su
+#           peor cociente pico/límite y, al final, un escalado global deja
+#           la trayectoria factible (escalar el tiempo por s divide v, a y j
+#           por s, s^2 y s^3).
+#
+#   Los pasos sin movimiento (pausas) conservan su duración. Sin pose
+#   inicial (reescritura por lotes) el primer paso también la conserva,
+#   porque su salto depende de dónde esté el robot.
+#
+#   Los límites por defecto son conservadores, muy por debajo de los
+#   máximos del URDF del G1; `speed_scale` los reduce aún más.
+# -----------------------------------------------------------------------------
+
+import copy
+import json
+import math
+
+from g1_comun.lazy import lazy_import
+from g1_comun.routine import knot_velocity_matrix
+
+np = lazy_import("numpy")
+
+
+# (velocidad rad/s, aceleración rad/s^2, jerk rad/s^3) por grupo de joints.
+DEFAULT_LIMITS = {
+    "hip": (2.0, 8.0, 60.0),
+    "knee": (2.0, 8.0, 60.0),
+    "ankle": (2.0, 8.0, 60.0),
+    "waist": (1.5, 6.0, 40.0),
+    "shoulder": (3.0, 12.0, 80.0),
+    "elbow": (3.0, 12.0, 80.0),
+    "wrist": (4.0, 16.0, 120.0),
+}
+
+HOLD_EPSILON = 1e-4
+
+
+class JointLimits:
+    """Límites v/a/j en el orden de un `JointLayout`."""
+
+    def __init__(self, layout, overrides=None, speed_scale: float = 1.0):
+        if not 0.0 < speed_scale <= 1.0:
+            raise ValueError("speed_scale debe estar en (0, 1].")
+
+        overrides = overrides or {}
+        self.layout = layout
+        self.speed_scale = float(speed_scale)
+        self.velocity = np.empty(layout.size)
+        self.acceleration = np.empty(layout.size)
+        self.jerk = np.empty(layout.size)
+
+        for slot, motor in enumerate(layout.joint_list):
+            name = layout.name_of(motor)
+            v, a, j = self.default_for(name)
+            custom = overrides.get(name, overrides.get(str(motor), {}))
+            self.velocity[slot] = float(custom.get("v", v)) * speed_scale
+            # Mismo perfil a menor velocidad: a escala con s^2 y j con s^3.
+            self.acceleration[slot] = float(custom.get("a", a)) * speed_scale ** 2
+            self.jerk[slot] = float(custom.get("j", j)) * speed_scale ** 3
+
+    @staticmethod
+    def default_for(name: str):
+        for group, limits in DEFAULT_LIMITS.items():
+            if group in name:
+                return limits
+        return min(DEFAULT_LIMITS.values())
+
+    @classmethod
+    def from_file(cls, layout, path=None, speed_scale: float = 1.0):
+        """Carga overrides {nombre_o_indice: {"v":, "a":, "j":}} desde JSON."""
+        overrides = None
+        if path is not None:
+            with open(path, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+        return cls(layout, overrides, speed_scale)
+
+
+# ---------------------------------------------------------
+# Duraciones mínimas
+# ---------------------------------------------------------
+
+def min_step_duration(delta, limits: JointLimits, profile: str) -> float:
+    """Duración mínima de un paso punto a punto con saltos `delta`."""
+    d = np.abs(delta)
+    if profile == "linear":
+        return float(np.max(d / limits.velocity, initial=0.0))
+
+    # cosine
+    t_v = math.pi * d / (2.0 * limits.velocity)
+    t_a = math.pi * np.sqrt(d / (2.0 * limits.acceleration))
+    t_j = math.pi * np.cbrt(d / (2.0 * limits.jerk))
+    return float(np.max(np.maximum(np.maximum(t_v, t_a), t_j), initial=0.0))
+
+
+def spline_ratios(waypoints, durations, limits: JointLimits):
+    """
+    Peor cociente pico/límite de cada tramo del spline (1 = justo en el
+    límite). La velocidad y la aceleración de un cúbico son cuadrática y
+    lineal en cada tramo; el jerk es constante.
+    """
+    y = np.asarray(waypoints, dtype=float)
+    h = np.asarray(durations, dtype=float)
+    v = knot_velocity_matrix(h) @ y
+
+    y0, y1, v0, v1 = y[:-1], y[1:], v[:-1], v[1:]
+    hh = h[:, None]
+    dy = y1 - y0
+
+    # dq(u) = c0 + c1*u + c2*u^2 con u en [0, 1].
+    c0 = v0
+    c1 = 6.0 * dy / hh - 4.0 * v0 - 2.0 * v1
+    c2 = -6.0 * dy / hh + 3.0 * v0 + 3.0 * v1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u_peak = np.where(c2 != 0.0, -c1 / (2.0 * c2), 0.0)
+    u_peak = np.clip(np.nan_to_num(u_peak), 0.0, 1.0)
+    vel = np.maximum.reduce([
+        np.abs(c0),
+        np.abs(c0 + c1 + c2),
+        np.abs(c0 + c1 * u_peak + c2 * u_peak * u_peak),
+    ])
+
+    acc0 = (6.0 * dy / hh - 4.0 * v0 - 2.0 * v1) / hh
+    acc1 = (-6.0 * dy / hh + 2.0 * v0 + 4.0 * v1) / hh
+    acc = np.maximum(np.abs(acc0), np.abs(acc1))
+    jerk = np.abs(-12.0 * dy / hh + 6.0 * (v0 + v1)) / (hh * hh)
+
+    ratio = np.maximum.reduce([
+        vel / limits.velocity,
+        np.sqrt(acc / limits.acceleration),
+        np.cbrt(jerk / limits.jerk),
+    ])
+    return ratio.max(axis=1)
+
+
+# ---------------------------------------------------------
+# Rutinas
+# ---------------------------------------------------------
+
+def routine_waypoints(routine: dict, layout, initial=None):
+    """
+    Recorre los pasos como compile_routine. Devuelve (índices de los pasos
+    válidos, waypoints) con waypoints[0] = pose inicial y waypoints[k] =
+    objetivo del paso válido k. Sin `initial`, cada joint toma hasta su
+    primer valor ese mismo valor (salto nulo) y 0 si nunca aparece. Lanza
+    ValueError si un paso no es un objeto JSON.
+    """
+    current = np.full(layout.size, np.nan) if initial is None else np.array(initial, dtype=float)
+    slot_of = layout.slot_of
+    indices, waypoints = [], [current.copy()]
+
+    for i, step in enumerate(routine.get("pasos", [])):
+        if not isinstance(step, dict):
+            raise ValueError(f"Paso {i + 1}: no es un objeto JSON.")
+        raw = step.get("posiciones", {})
+        if not isinstance(raw, dict):
+            continue
+
+        for key, value in raw.items():
+            try:
+                motor, value = int(key), float(value)
+            except (TypeError, ValueError):
+                continue
+            if 0 <= motor < layout.num_motors and slot_of[motor] >= 0:
+                current[slot_of[motor]] = value
+
+        indices.append(i)
+        waypoints.append(current.copy())
+
+    waypoints = np.asarray(waypoints)
+    if initial is None:
+        for column in waypoints.T:
+            known = np.flatnonzero(~np.isnan(column))
+            if known.size:
+                column[:known[0]] = column[known[0]]
+            else:
+                column.fill(0.0)
+
+    return indices, waypoints
+
+
+def retime_routine(routine: dict, layout, limits: JointLimits, profile: str = "cosine",
+                   initial=None, min_duration: float = 0.0, iterations: int = 40):
+    """
+    Devuelve (rutina con duraciones mínimas, informe). El informe es una
+    lista de (nombre, duración_original, duración_nueva) por paso válido.
+    """
+    indices, waypoints = routine_waypoints(routine, layout, initial)
+    if not indices:
+        raise ValueError("La rutina no contiene pasos con posiciones válidas.")
+
+    steps = routine["pasos"]
+    original = np.array([float(steps[i].get("duracion", 1.0)) for i in indices])
+    deltas = np.diff(waypoints, axis=0)
+    moving = np.abs(deltas).max(axis=1, initial=0.0) > HOLD_EPSILON
+    if initial is None:
+        moving[0] = False
+
+    # Pausas y primer paso sin pose inicial: duración original.
+    floor = np.where(moving, float(min_duration), original)
+
+    durations = np.array([
+        max(floor[k], min_step_duration(deltas[k], limits, "linear" if profile == "linear" else "cosine"))
+        if moving[k] else floor[k]
+        for k in range(len(indices))
+    ])
+
+    if profile == "spline":
+        durations = _retime_spline(waypoints, durations, floor, moving, limits, iterations)
+
+    # Redondeo hacia arriba al ms: el JSON nunca queda por debajo del mínimo,
+    # y compile_routine redondea también hacia arriba a filas de su dt.
+    durations = np.ceil(durations * 1000.0 - 1e-9) / 1000.0
+
+    retimed = copy.deepcopy(routine)
+    report = []
+    for k, i in enumerate(indices):
+        retimed["pasos"][i]["duracion"] = float(durations[k])
+        report.append((steps[i].get("nombre", f"Paso {i + 1}"), float(original[k]), float(durations[k])))
+
+    return retimed, report
+
+
+def _retime_spline(waypoints, durations, floor, moving, limits, iterations):
+    # Punto de partida: las duraciones coseno, ya del orden correcto.
+    for _ in range(iterations):
+        ratio = spline_ratios(waypoints, durations, limits)
+        target = np.maximum(floor, durations * ratio)
+        if np.allclose(target, durations, rtol=1e-3):
+            break
+        durations = target
+
+    # Ajuste final: primero solo los tramos con movimiento (las pausas y el
+    # primer paso desconocido conservan su duración); si no basta, escalado
+    # global, que siempre deja el cociente <= 1.
+    for scale_all in (False,) * 4 + (True,):
+        worst = float(spline_ratios(waypoints, durations, limits).max())
+        if worst <= 1.0:
+            break
+        durations = np.where(moving | scale_all, durations * worst, durations)
+    return durations
+
+
+# ---------------------------------------------------------
+# Argumentos de línea de comandos
+# ---------------------------------------------------------
+
+def add_retime_arguments(parser, fastest_flag: bool = True):
+    """Agrega --limits y --speed-scale (y --fastest) a un ArgumentParser."""
+    if fastest_flag:
+        parser.add_argument(
+            "--fastest",
+            action="store_true",
+            help="Ejecuta cada rutina con las duraciones mínimas que respetan los límites por joint.",
+        )
+    parser.add_argument(
+        "--limits",
+        default=None,
+        help='JSON con límites por joint: {"left_elbow_joint": {"v": 2.0, "a": 8.0, "j": 60.0}}.',
+    )
+    parser.add_argument(
+        "--speed-scale",
+        type=float,
+        default=1.0,
+        help="Fracción (0, 1] de los límites de velocidad a usar.",
+    )
+
+
+def limits_from_args(layout, args) -> JointLimits:
+    return JointLimits.from_file(layout, args.limits, args.speed_scale)
+
+
+def format_report(report) -> str:
+    before = sum(old for _, old, _ in report)
+    after = sum(new for _, _, new in report)
+    return f"{before:.2f}s -> {after:.2f}s ({len(report)} pasos)"
@@ -0,0 +1,105 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file ringbuffer.py
+# @brief Búfer circular NumPy para gráficas en vivo y decimación min/max.
+#
+# @descripcion
+#   SignalRing guarda las últimas `capacity` muestras de un conjunto de
+#   señales con su tiempo. Cada muestra se escribe dos veces (en i y en
+#   i + capacity), así la ventana actual es siempre un slice contiguo del
+#   array: view() devuelve vistas sin copiar que se pasan directo a
+#   pyqtgraph, y extend() agrega un lote con dos asignaciones vectorizadas.
+#
+#   minmax_decimate() reduce una serie a dos puntos (mínimo y máximo, en su
+#   orden temporal) por columna de píxeles cuando la ventana tiene más
+#   puntos que píxeles: la envolvente que se ve es la misma que sin
+#   decimar, y el costo de dibujo queda acotado por el ancho del gráfico.
+# -----------------------------------------------------------------------------
+
+from g1_comun.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+class SignalRing:
+    """Últimas `capacity` muestras de `channels` señales con su tiempo."""
+
+    def __init__(self, capacity: int, channels: int, dtype=float):
+        self.capacity = int(capacity)
+        self.channels = int(channels)
+        self._t = np.zeros(2 * self.capacity)
+        self._data = np.zeros((2 * self.capacity, self.channels), dtype=dtype)
+        self._end = 0      # posición siguiente en [0, capacity)
+        self.size = 0
+
+    def clear(self):
+        self._end = 0
+        self.size = 0
+
+    def extend(self, times, values):
+        """Agrega un lote: `times` (n,) y `values` (n, channels)."""
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values)
+        n = len(times)
+        if n == 0:
+            return
+        if n > self.capacity:
+            times, values = times[-self.capacity:], values[-self.capacity:]
+            n = self.capacity
+
+        cap, end = self.capacity, self._end
+        first = min(n, cap - end)
+        for offset in (0, cap):
+            self._t[end + offset:end + offset + first] = times[:first]
+            self._data[end + offset:end + offset + first] = values[:first]
+        if first < n:
+            rest = n - first
+            for offset in (0, cap):
+                self._t[offset:offset + rest] = times[first:]
+                self._data[offset:offset + rest] = values[first:]
+
+        self._end = (end + n) % cap
+        self.size = min(cap, self.size + n)
+
+    def view(self):
+        """(t, data) de la ventana actual, del más antiguo al más nuevo, sin copiar."""
+        # Sin vuelta todavía la ventana está en la primera copia; con vuelta
+        # empieza en la primera copia y sigue en la segunda.
+        stop = self._end if self._end >= self.size else self._end + self.capacity
+        start = stop - self.size
+        return self._t[start:stop], self._data[start:stop]
+
+
+def minmax_decimate(t, y, bins: int):
+    """
+    Reduce (t, y) a como mucho 2 * bins puntos conservando el mínimo y el
+    máximo de cada tramo. Si la serie ya es corta devuelve las mismas vistas.
+    """
+    n = len(y)
+    bins = max(1, int(bins))
+    if n <= 2 * bins:
+        return t, y
+
+    per = n // bins
+    used = per * bins
+    # Los bins cubren las muestras más nuevas; el resto (menos de un tramo)
+    # queda al principio.
+    blocks = np.asarray(y[n - used:]).reshape(bins, per)
+    base = (n - used) + np.arange(bins) * per
+
+    lo = base + blocks.argmin(axis=1)
+    hi = base + blocks.argmax(axis=1)
+    first, second = np.minimum(lo, hi), np.maximum(lo, hi)
+    index = np.empty(2 * bins, dtype=np.intp)
+    index[0::2] = first
+    index[1::2] = second
+    if n > used:
+        # Las muestras sobrantes del principio se representan con su mín./máx.
+        head = np.asarray(y[:n - used])
+        index = np.concatenate(([int(head.argmin()), int(head.argmax())], index))
+        index[:2].sort()
+
+    return t[index], np.asarray(y)[index]
@@ -0,0 +1,565 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file routine.py
+# @brief Compilación de rutinas (pasos/posiciones/duracion) a tablas densas.
+#
+# @descripcion
+#   `compile_routine` convierte una rutina en una tabla de setpoints con una
+#   fila por tick del writer, de modo que el writer solo indexa una fila y el
+#   coste del tick no depende de la rutina.
+#
+#   El primer movimiento parte de la pose actual del robot, que no se conoce
+#   al compilar. Por eso la tabla se guarda como dos arrays (filas x joints):
+#
+#       q[k] = weight[k] * pose_inicial + offset[k]
+#
+#   weight vale 1 mientras un joint no aparece en la rutina, pasa a 0 durante
+#   el primer paso que lo fija y queda en 0 después. `CompiledRoutine.table`
+#   resuelve la tabla final con una sola operación vectorial al arrancar.
+#
+#   Con profile="spline" la rutina entera es un spline cúbico C2 que pasa
+#   por el objetivo de cada paso (velocidad nula al inicio y al final) sin
+#   detenerse entre pasos, y se compila también la tabla de velocidades
+#   (dweight/doffset) para enviarla como dq de feedforward. El spline es
+#   lineal en los waypoints, así que la descomposición weight/offset vale
+#   igual para q y dq. Entre waypoints repetidos el spline puede sobrepasar
+#   el valor sostenido: los players comprueban los límites sobre la tabla.
+#
+#   Los writers con g1_comun.setpoint publican la tabla con publish_table();
+#   los writers indexados por tick (simulación) usan `TablePlayback`.
+#
+#   `check_routine` aplica las mismas validaciones en Python puro, sin
+#   compilar la tabla, para revisar un catálogo sin importar NumPy.
+#
+#   `compile_file` guarda el resultado junto a la rutina como
+#   <nombre>.<layout>.<perfil>.traj.npz y lo reutiliza mientras coincidan el mtime y
+#   el tamaño del archivo fuente y los parámetros de compilación.
+# -----------------------------------------------------------------------------
+
+import io
+import json
+import math
+import os
+import time
+from pathlib import Path
+
+from g1_comun.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+CACHE_VERSION = 3
+CACHE_SUFFIX = ".traj.npz"
+
+SPLINE = "spline"
+
+
+def cosine_profile(s):
+    return 0.5 - 0.5 * np.cos(np.pi * s)
+
+
+def linear_profile(s):
+    return s
+
+
+PROFILES = {
+    "cosine": cosine_profile,
+    "linear": linear_profile,
+}
+
+TRAJECTORIES = tuple(PROFILES) + (SPLINE,)
+
+
+def resolve_trajectory(value, default: str) -> str:
+    """`value` (p. ej. --trajectory), si no G1_TRAJECTORY, si no `default`."""
+    trajectory = value or os.environ.get("G1_TRAJECTORY") or default
+    if trajectory not in TRAJECTORIES:
+        raise ValueError(f"Trayectoria no soportada: {trajectory}. Usa {TRAJECTORIES}.")
+    return trajectory
+
+
+def add_trajectory_arguments(parser, default: str):
+    """Agrega --trajectory a un argparse.ArgumentParser."""
+    parser.add_argument(
+        "--trajectory",
+        choices=TRAJECTORIES,
+        default=None,
+        help=(
+            f"Perfil de las rutinas (por defecto G1_TRAJECTORY o {default}). "
+            "spline recorre todos los pasos sin detenerse y envía dq de feedforward."
+        ),
+    )
+
+
+class CompiledRoutine:
+    """Tabla densa de una rutina sobre un `JointLayout`."""
+
+    def __init__(self, name, layout_name, joints, dt, profile, weight, offset,
+                 step_names, step_durations, step_rows, ignored=(), invalid=(), skipped=(),
+                 dweight=None, doffset=None):
+        self.name = name
+        self.layout_name = layout_name
+        self.joints = np.asarray(joints, dtype=np.intp)
+        self.dt = float(dt)
+        self.profile = profile
+        self.weight = weight
+        self.offset = offset
+        # Velocidades (solo spline); None = dq 0.
+        self.dweight = dweight
+        self.doffset = doffset
+        self.step_names = list(step_names)
+        self.step_durations = np.asarray(step_durations, dtype=float)
+        # Fila inicial de cada paso más la fila final (len = pasos + 1).
+        self.step_rows = np.asarray(step_rows, dtype=np.intp)
+        self.ignored = list(ignored)
+        self.invalid = list(invalid)
+        self.skipped = list(skipped)
+
+    @property
+    def rows(self) -> int:
+        return int(self.weight.shape[0])
+
+    @property
+    def duration(self) -> float:
+        return self.rows * self.dt
+
+    def table(self, initial, out=None):
+        """Tabla (filas x joints) partiendo de la pose `initial`."""
+        if out is None:
+            out = np.empty_like(self.offset)
+        np.multiply(self.weight, np.asarray(initial, dtype=float), out=out)
+        out += self.offset
+        return out
+
+    def velocity_table(self, initial, out=None):
+        """Tabla de dq (rad/s) partiendo de `initial`, o None si no hay."""
+        if self.dweight is None:
+            return None
+        if out is None:
+            out = np.empty_like(self.doffset)
+        np.multiply(self.dweight, np.asarray(initial, dtype=float), out=out)
+        out += self.doffset
+        return out
+
+    def steps(self):
+        """(índice, nombre, duración, fila_inicial, fila_final) de cada paso."""
+        for i, name in enumerate(self.step_names):
+            yield i, name, float(self.step_durations[i]), int(self.step_rows[i]), int(self.step_rows[i + 1])
+
+    def changed_joints(self, table, step: int, initial, epsilon: float):
+        """Joints que se mueven más de `epsilon` durante el paso `step`."""
+        first, last = int(self.step_rows[step]), int(self.step_rows[step + 1])
+        before = table[first - 1] if first > 0 else np.asarray(initial, dtype=float)
+        return self.joints[np.abs(table[last - 1] - before) > epsilon].tolist()
+
+
+class TablePlayback:
+    """
+    Reproducción de una tabla indexada por tick del writer.
+
+    El planner llama a start() y el writer a step() en cada tick; la tabla
+    se publica asignando la referencia al final de start(), de modo que el
+    writer nunca ve una reproducción a medio preparar.
+    """
+
+    def __init__(self):
+        self.table = None
+        self.dq = None
+        self.columns = None
+        self.row = 0
+
+    def start(self, table, columns, dq=None):
+        self.row = 0
+        self.columns = columns
+        self.dq = dq
+        self.table = table
+
+    def stop(self):
+        self.table = None
+
+    @property
+    def done(self) -> bool:
+        table = self.table
+        return table is None or self.row >= len(table)
+
+    def step(self, out, dq_out=None) -> bool:
+        """
+        Copia la fila del tick en out[columns] (y la de dq en dq_out si la
+        tabla la tiene); False si no hay tabla activa.
+        """
+        table = self.table
+        if table is None:
+            return False
+
+        row = self.row
+        last = len(table) - 1
+        row = row if row < last else last
+        out[self.columns] = table[row]
+
+        dq = self.dq
+        if dq_out is not None and dq is not None:
+            dq_out[self.columns] = dq[row]
+
+        self.row += 1
+        return True
+
+    def wait_row(self, row: int, timeout: float, poll: float = 0.002) -> bool:
+        """Espera (lado planner) a que el writer alcance la fila `row`."""
+        deadline = time.monotonic() + timeout
+        while self.row < row:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+
+def knot_velocity_matrix(h):
+    """
+    Matriz (nodos x nodos) que da las velocidades del spline cúbico C2 en
+    los nodos a partir de los valores (v = m @ y), con v nula en los
+    extremos. `h` son las duraciones de los tramos.
+    """
+    h = np.asarray(h, dtype=float)
+    k = len(h)
+
+    # a @ v = r @ y, con v[0] = v[k] = 0.
+    a = np.eye(k + 1)
+    r = np.zeros((k + 1, k + 1))
+    for i in range(1, k):
+        a[i, i - 1] = h[i]
+        a[i, i] = 2.0 * (h[i - 1] + h[i])
+        a[i, i + 1] = h[i - 1]
+        r[i, i - 1] = -3.0 * h[i] / h[i - 1]
+        r[i, i] = 3.0 * (h[i] / h[i - 1] - h[i - 1] / h[i])
+        r[i, i + 1] = 3.0 * h[i - 1] / h[i]
+    return np.linalg.solve(a, r)
+
+
+def spline_basis(knots, times):
+    """
+    Bases (len(times) x nodos) de posición y velocidad del spline cúbico C2
+    que pasa por los nodos con velocidad nula en el primero y el último:
+    q(times) = pos @ y, dq(times) = vel @ y.
+    """
+    knots = np.asarray(knots, dtype=float)
+    times = np.asarray(times, dtype=float)
+    k = len(knots) - 1
+    h = np.diff(knots)
+    v = knot_velocity_matrix(h)
+
+    # Hermite cúbico en cada tramo.
+    seg = np.clip(np.searchsorted(knots, times, side="right") - 1, 0, k - 1)
+    hs = h[seg]
+    u = (times - knots[seg]) / hs
+    u2 = u * u
+    u3 = u2 * u
+    rows = np.arange(times.size)
+
+    pos = ((u3 - 2.0 * u2 + u) * hs)[:, None] * v[seg] + ((u3 - u2) * hs)[:, None] * v[seg + 1]
+    pos[rows, seg] += 2.0 * u3 - 3.0 * u2 + 1.0
+    pos[rows, seg + 1] += -2.0 * u3 + 3.0 * u2
+
+    vel = (3.0 * u2 - 4.0 * u + 1.0)[:, None] * v[seg] + (3.0 * u2 - 2.0 * u)[:, None] * v[seg + 1]
+    vel[rows, seg] += (6.0 * u2 - 6.0 * u) / hs
+    vel[rows, seg + 1] += (6.0 * u - 6.0 * u2) / hs
+
+    return pos, vel
+
+
+def compile_routine(routine: dict, layout, dt: float, profile: str = "cosine",
+                    min_duration: float = 0.0, max_abs_rad: float = None) -> CompiledRoutine:
+    """
+    Compila `routine` a `dt` segundos por fila.
+
+    Cada paso dura max(duracion, min_duration), redondeado hacia arriba a
+    filas enteras, y termina exactamente en su objetivo. Los joints sin
+    valor conservan el objetivo anterior. Lanza ValueError si un paso no es
+    un objeto JSON o algún valor supera `max_abs_rad`.
+    """
+    if profile not in TRAJECTORIES:
+        raise ValueError(f"Perfil no soportado: {profile}. Usa {TRAJECTORIES}.")
+    dt = float(dt)
+    if dt <= 0:
+        raise ValueError("El periodo de compilación debe ser positivo.")
+
+    steps = routine.get("pasos", [])
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("La rutina no contiene una lista válida de pasos.")
+
+    profile_fn = PROFILES.get(profile, linear_profile)
+    n = layout.size
+    slot_of = layout.slot_of
+
+    prev_w = np.ones(n)
+    prev_b = np.zeros(n)
+    weights, offsets = [], []
+    # Waypoints (fin de cada paso) para el spline; el primero es la pose inicial.
+    waypoint_w, waypoint_b = [prev_w], [prev_b]
+    names, durations, rows = [], [], [0]
+    ignored, invalid, skipped = set(), [], []
+
+    for i, step in enumerate(steps, start=1):
+        if not isinstance(step, dict):
+            raise ValueError(f"Paso {i}: no es un objeto JSON.")
+        name = step.get("nombre", f"Paso {i}")
+        raw = step.get("posiciones", {})
+        if not isinstance(raw, dict):
+            skipped.append(name)
+            continue
+
+        parsed = {}
+        for key, value in raw.items():
+            try:
+                parsed[int(key)] = float(value)
+            except (TypeError, ValueError):
+                invalid.append(key)
+
+        if parsed and max_abs_rad is not None:
+            values = np.fromiter(parsed.values(), dtype=float, count=len(parsed))
+            over = np.flatnonzero(np.abs(values) > max_abs_rad)
+            if over.size:
+                idx, value = list(parsed.items())[int(over[0])]
+                raise ValueError(
+                    f"Valor fuera de límite conservador en joint {idx}: {value} rad. "
+                    f"Límite actual: ±{max_abs_rad} rad."
+                )
+
+        new_w = prev_w.copy()
+        new_b = prev_b.copy()
+        for motor, value in parsed.items():
+            if 0 <= motor < layout.num_motors and slot_of[motor] >= 0:
+                new_w[slot_of[motor]] = 0.0
+                new_b[slot_of[motor]] = value
+            else:
+                ignored.add(motor)
+
+        duration = max(float(step.get("duracion", 1.0)), float(min_duration))
+        # Hacia arriba: el paso nunca es más rápido que su duración (retime
+        # la calcula como mínimo por los límites de los joints).
+        count = max(1, math.ceil(duration / dt - 1e-9))
+        s = profile_fn(np.arange(1, count + 1) / count)[:, None]
+
+        weights.append(prev_w + (new_w - prev_w) * s)
+        offsets.append(prev_b + (new_b - prev_b) * s)
+        waypoint_w.append(new_w)
+        waypoint_b.append(new_b)
+        names.append(name)
+        durations.append(duration)
+        rows.append(rows[-1] + count)
+
+        prev_w, prev_b = new_w, new_b
+
+    if not names:
+        raise ValueError("La rutina no contiene pasos con posiciones válidas.")
+
+    weight = np.concatenate(weights)
+    offset = np.concatenate(offsets)
+    dweight = doffset = None
+
+    if profile == SPLINE:
+        # Nodos en filas exactas: cada paso sigue terminando en su objetivo.
+        knots = np.asarray(rows, dtype=float) * dt
+        times = np.arange(1, rows[-1] + 1) * dt
+        pos, vel = spline_basis(knots, times)
+        ww = np.asarray(waypoint_w)
+        wb = np.asarray(waypoint_b)
+        weight, offset = pos @ ww, pos @ wb
+        dweight, doffset = vel @ ww, vel @ wb
+
+    return CompiledRoutine(
+        name=routine.get("nombre_rutina", "rutina"),
+        layout_name=layout.name,
+        joints=layout.joints,
+        dt=dt,
+        profile=profile,
+        weight=weight,
+        offset=offset,
+        step_names=names,
+        step_durations=durations,
+        step_rows=rows,
+        ignored=sorted(ignored),
+        invalid=[str(k) for k in invalid],
+        skipped=skipped,
+        dweight=dweight,
+        doffset=doffset,
+    )
+
+
+# ---------------------------------------------------------
+# Caché en disco
+# ---------------------------------------------------------
+
+def cache_path(source, layout, profile: str) -> Path:
+    source = Path(source)
+    return source.with_name(f"{source.stem}.{layout.name}.{profile}{CACHE_SUFFIX}")
+
+
+def _cache_key(source: Path, layout, dt, profile, min_duration, max_abs_rad) -> dict:
+    stat = source.stat()
+    return {
+        "version": CACHE_VERSION,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "layout": layout.name,
+        "joints": layout.joint_list,
+        "dt": float(dt),
+        "profile": profile,
+        "min_duration": float(min_duration),
+        "max_abs_rad": None if max_abs_rad is None else float(max_abs_rad),
+    }
+
+
+def _load_cache(path: Path, key: dict):
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("key") != key:
+                return None
+            return CompiledRoutine(
+                name=meta["name"],
+                layout_name=key["layout"],
+                joints=key["joints"],
+                dt=key["dt"],
+                profile=key["profile"],
+                weight=data["weight"],
+                offset=data["offset"],
+                step_names=meta["step_names"],
+                step_durations=data["step_durations"],
+                step_rows=data["step_rows"],
+                ignored=meta["ignored"],
+                invalid=meta["invalid"],
+                skipped=meta["skipped"],
+                dweight=data["dweight"] if "dweight" in data.files else None,
+                doffset=data["doffset"] if "doffset" in data.files else None,
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_cache(path: Path, key: dict, compiled: CompiledRoutine):
+    meta = {
+        "key": key,
+        "name": compiled.name,
+        "step_names": compiled.step_names,
+        "ignored": compiled.ignored,
+        "invalid": compiled.invalid,
+        "skipped": compiled.skipped,
+    }
+    arrays = {
+        "weight": compiled.weight,
+        "offset": compiled.offset,
+        "step_durations": compiled.step_durations,
+        "step_rows": compiled.step_rows,
+    }
+    if compiled.dweight is not None:
+        arrays["dweight"] = compiled.dweight
+        arrays["doffset"] = compiled.doffset
+
+    buffer = io.BytesIO()
+    np.savez(buffer, meta=np.array(json.dumps(meta)), **arrays)
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(buffer.getvalue())
+    os.replace(tmp, path)
+
+
+def load_json_routine(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_routine(routine: dict, layout, min_duration: float = 0.0, max_abs_rad: float = None) -> dict:
+    """
+    Revisa `routine` con los mismos criterios que compile_routine, sin
+    NumPy ni compilar la tabla (para --validate). Devuelve un dict con
+    name, steps, duration, errors, ignored, invalid y skipped; la rutina es
+    ejecutable si `errors` está vacío.
+    """
+    steps = routine.get("pasos", []) if isinstance(routine, dict) else None
+    report = {
+        "name": routine.get("nombre_rutina", "rutina") if isinstance(routine, dict) else "rutina",
+        "steps": 0,
+        "duration": 0.0,
+        "errors": [],
+        "ignored": set(),
+        "invalid": [],
+        "skipped": [],
+    }
+    if not isinstance(steps, list) or not steps:
+        report["errors"].append("La rutina no contiene una lista válida de pasos.")
+        return report
+
+    for i, step in enumerate(steps, start=1):
+        if not isinstance(step, dict):
+            report["errors"].append(f"Paso {i}: no es un objeto JSON.")
+            continue
+        name = step.get("nombre", f"Paso {i}")
+        raw = step.get("posiciones", {})
+        if not isinstance(raw, dict):
+            report["skipped"].append(name)
+            continue
+
+        for key, value in raw.items():
+            try:
+                motor, value = int(key), float(value)
+            except (TypeError, ValueError):
+                report["invalid"].append(str(key))
+                continue
+            if max_abs_rad is not None and abs(value) > max_abs_rad:
+                report["errors"].append(
+                    f"{name}: joint {motor} = {value} rad supera el límite ±{max_abs_rad} rad."
+                )
+            if motor not in layout:
+                report["ignored"].add(motor)
+
+        try:
+            duration = float(step.get("duracion", 1.0))
+        except (TypeError, ValueError):
+            report["errors"].append(f"{name}: duración inválida {step.get('duracion')!r}.")
+            continue
+        report["steps"] += 1
+        report["duration"] += max(duration, float(min_duration))
+
+    if not report["steps"] and not report["errors"]:
+        report["errors"].append("La rutina no contiene pasos con posiciones válidas.")
+    report["ignored"] = sorted(report["ignored"])
+    return report
+
+
+def compile_file(path, layout, dt: float, profile: str = "cosine", min_duration: float = 0.0,
+                 max_abs_rad: float = None, loader=load_json_routine, cache: bool = True):
+    """
+    Compila la rutina de `path` usando la caché en disco si está vigente.
+
+    `loader(path)` devuelve el diccionario de la rutina (JSON por defecto).
+    Devuelve (CompiledRoutine, desde_cache).
+    """
+    path = Path(path)
+    key = _cache_key(path, layout, dt, profile, min_duration, max_abs_rad)
+    target = cache_path(path, layout, profile)
+
+    if cache:
+        compiled = _load_cache(target, key)
+        if compiled is not None:
+            return compiled, True
+
+    compiled = compile_routine(
+        loader(path),
+        layout,
+        dt,
+        profile=profile,
+        min_duration=min_duration,
+        max_abs_rad=max_abs_rad,
+    )
+
+    if cache:
+        try:
+            _save_cache(target, key, compiled)
+        except OSError as error:
+            print(f"[WARN] No se pudo guardar la tabla compilada {target.name}: {error}")
+
+    return compiled, False
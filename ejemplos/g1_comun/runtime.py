@@ -0,0 +1,408 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file runtime.py
+# @brief Runtime común de los players: canales, LowCmd preasignado, CRC
+#        incremental y writer periódico, con backends rt/arm_sdk y rt/lowcmd.
+#
+# @descripcion
+#   MotionRuntime es el lazo de los selectores, los PosePlayer y los Custom
+#   de moveV4/V5: suscribirse a rt/lowstate, interpolar o copiar la fila de
+#   una tabla, llenar un LowCmd, calcular su CRC y publicarlo. El backend
+#   aporta lo que cambia entre tópicos:
+#
+#     ArmSdkBackend   rt/arm_sdk del robot físico. Solo escribe los joints
+#                     del layout y activa el peso de motor_cmd[29]; al
+#                     liberar manda la q medida con kp = kd = 0 y peso 0.
+#     LowCmdBackend   rt/lowcmd (MuJoCo). Escribe todos los motores del
+#                     layout con mode = 1, mode_pr y el mode_machine del
+#                     último rt/lowstate; al cerrar repite el último comando.
+#
+#   El loopback (g1_comun.loopback) es el tercer destino: cualquiera de los
+#   dos backends creado con channel="loopback" abre sus canales en proceso
+#   sobre la planta PD simulada, igual que G1_CHANNEL=loopback.
+#
+#   El LowCmd se asigna una vez en open() con los campos constantes (mode,
+#   kp, kd, tau, peso de arm_sdk) y se empaqueta en el búfer del CRC; cada
+#   tick solo reescribe q y dq de los joints del layout y recalcula el CRC
+#   desde el primer motor modificado (g1_comun.crc).
+#
+#   Los consumidores adjuntos con attach() leen ese mismo LowCmd desde el
+#   callback de rt/lowstate, sin copia ni lock: el writer no hace trabajo
+#   extra, a cambio de que la lectura pueda ser desgarrada. kp, kd y mode
+#   no cambian después de open(), pero q y dq se reescriben joint por joint,
+#   así que una muestra puede mezclar joints de dos ticks consecutivos (una
+#   diferencia de a lo sumo un control_dt de movimiento por joint). Los
+#   consumidores de g1_comun (recorder, telemetry, tracking, livestate) lo
+#   toleran; uno que necesite un vector coherente debe copiarlo en el hilo
+#   del writer (p. ej. desde `source`), no leerlo del LowCmd.
+#
+#   Qué se comanda lo decide el player:
+#     - por defecto el writer copia la fila de `playback` (tabla compilada,
+#       g1_comun.routine) o, sin tabla, interpola con `motion`
+#       (MotionDriver, move_to devuelve un futuro);
+#     - `source(command, dq)`, si se asigna, reemplaza ese paso (p. ej. el
+#       seqlock de setpoints del selector físico o la interpolación desde la
+#       posición medida de moveV4/V5).
+# -----------------------------------------------------------------------------
+
+import time
+from abc import ABC, abstractmethod
+
+from g1_comun.channel import ChannelPublisher, ChannelSubscriber, set_channel_backend
+from g1_comun.crc import LowCmdCrc
+from g1_comun.joints import JointState
+from g1_comun.motion import MotionDriver
+from g1_comun.routine import TablePlayback
+from g1_comun.scheduler import DeadlineThread
+from g1_comun.stateslot import StateSlot
+from g1_comun.timing import NULL_TIMING
+
+
+ARM_SDK_WEIGHT_INDEX = 29
+
+
+class Mode:
+    PR = 0
+    AB = 1
+
+
+def _per_joint(value, size: int, label: str):
+    """Ganancia escalar o por joint (orden del layout) como lista de `size` floats."""
+    if isinstance(value, (int, float)):
+        return [float(value)] * size
+    values = [float(v) for v in value]
+    if len(values) != size:
+        raise ValueError(f"{label} tiene {len(values)} valores; el layout tiene {size} joints.")
+    return values
+
+
+class CommandBackend(ABC):
+    """
+    Tópico y campos fijos del LowCmd de un player. Cada backend define
+    release(): uno que no lo haga falla al crearse, no durante el cierre.
+    """
+
+    name = ""
+    topic = ""
+
+    def __init__(self, layout, kp, kd, channel: str = None):
+        self.layout = layout
+        self.kp = _per_joint(kp, layout.size, "kp")
+        self.kd = _per_joint(kd, layout.size, "kd")
+        # None: el transporte configurado (G1_CHANNEL / --loopback).
+        self.channel = channel
+
+    def allocate(self, command):
+        """LowCmd con los campos constantes fijados y q = `command`."""
+        from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
+
+        cmd = unitree_hg_msg_dds__LowCmd_()
+        for j, q, kp, kd in zip(self.layout.joint_list, command.tolist(), self.kp, self.kd):
+            motor = cmd.motor_cmd[j]
+            motor.q = q
+            motor.dq = 0.0
+            motor.tau = 0.0
+            motor.kp = kp
+            motor.kd = kd
+        return cmd
+
+    def on_state(self, msg):
+        """Desde el callback de rt/lowstate."""
+
+    def refresh(self, cmd, crc):
+        """Desde el writer, antes de llenar q/dq; True si cambió la cabecera."""
+        return False
+
+    @abstractmethod
+    def release(self, cmd, low_state, command):
+        """Deja en `cmd` el mensaje que se repite al cerrar."""
+
+
+class ArmSdkBackend(CommandBackend):
+    name = "arm_sdk"
+    topic = "rt/arm_sdk"
+
+    def allocate(self, command):
+        cmd = super().allocate(command)
+        # Activación obligatoria de arm_sdk en el robot físico.
+        cmd.motor_cmd[ARM_SDK_WEIGHT_INDEX].q = 1.0
+        return cmd
+
+    def release(self, cmd, low_state, command):
+        for j, q_cmd in zip(self.layout.joint_list, command.tolist()):
+            try:
+                q = float(low_state.motor_state[j].q)
+            except (AttributeError, IndexError, TypeError):
+                q = q_cmd
+            motor = cmd.motor_cmd[j]
+            motor.q = q
+            motor.dq = 0.0
+            motor.tau = 0.0
+            motor.kp = 0.0
+            motor.kd = 0.0
+        cmd.motor_cmd[ARM_SDK_WEIGHT_INDEX].q = 0.0
+
+
+class LowCmdBackend(CommandBackend):
+    name = "lowcmd"
+    topic = "rt/lowcmd"
+
+    def __init__(self, layout, kp, kd, channel: str = None):
+        super().__init__(layout, kp, kd, channel)
+        self.mode_machine = 0
+
+    def allocate(self, command):
+        cmd = super().allocate(command)
+        cmd.mode_pr = Mode.PR
+        cmd.mode_machine = self.mode_machine
+        for j in self.layout.joint_list:
+            cmd.motor_cmd[j].mode = 1
+        return cmd
+
+    def on_state(self, msg):
+        mode_machine = getattr(msg, "mode_machine", None)
+        if mode_machine is not None:
+            self.mode_machine = mode_machine
+
+    def refresh(self, cmd, crc):
+        mode_machine = self.mode_machine
+        if cmd.mode_machine == mode_machine:
+            return False
+        cmd.mode_machine = mode_machine
+        crc.set_header(cmd.mode_pr, mode_machine)
+        return True
+
+    def release(self, cmd, low_state, command):
+        # El simulador no tiene arm_sdk que soltar: se sostiene el último q.
+        for j, q in zip(self.layout.joint_list, command.tolist()):
+            motor = cmd.motor_cmd[j]
+            motor.q = q
+            motor.dq = 0.0
+
+
+BACKENDS = {backend.name: backend for backend in (ArmSdkBackend, LowCmdBackend)}
+
+
+def make_backend(name: str, layout, kp, kd, channel: str = None) -> CommandBackend:
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Backend no soportado: {name}. Usa {tuple(BACKENDS)}.") from None
+    return backend(layout, kp, kd, channel)
+
+
+class MotionRuntime:
+    """
+    Writer periódico de un player sobre un backend.
+
+        runtime = MotionRuntime(LowCmdBackend(layout, Kp, Kd), 0.002, "writer")
+        runtime.open()                    # canales y LowCmd preasignado
+        runtime.wait_state(8.0)
+        runtime.read_state()              # pose inicial medida
+        runtime.start_writer()
+        runtime.motion.move(target, 1.0).result()
+        runtime.close()                   # detiene el writer y suelta/sostiene
+    """
+
+    def __init__(self, backend: CommandBackend, control_dt: float, name: str, timing=None,
+                 scheduler: dict = None, startup=None, profile=None, from_command: bool = True):
+        self.backend = backend
+        self.layout = backend.layout
+        self.control_dt = float(control_dt)
+        self.name = name
+        self.timing = timing if timing is not None else NULL_TIMING
+        self.scheduler = scheduler or {}
+        self.startup = startup
+        self.profile = profile
+
+        self.joints = JointState(self.layout)
+        self.motion = MotionDriver(self.joints, self.control_dt, from_command=from_command)
+        self.playback = TablePlayback()
+        self.source = None
+
+        self.state = StateSlot("rt/lowstate")
+        self.crc = LowCmdCrc()
+        self.low_cmd = None
+        self.publisher = None
+        self.subscriber = None
+        self.writer_thread = None
+        self.released = False
+
+        self._consumers = []
+        self._captures = []
+        self._motors = []
+
+    # ---------------------------------------------------------
+    # Canales y estado
+    # ---------------------------------------------------------
+
+    def attach(self, consumer, command: bool = True):
+        """
+        Registra un consumidor de rt/lowstate (recorder, live, tracking,
+        telemetría): su capture(msg) corre en el callback y, con command=True,
+        recibe el LowCmd con attach_command() al abrir. Es el objeto que el
+        writer reescribe en cada tick: su q puede leerse a medio actualizar.
+        """
+        self._captures.append(consumer.capture)
+        if command:
+            self._consumers.append(consumer)
+            if self.low_cmd is not None:
+                consumer.attach_command(self.low_cmd)
+        return consumer
+
+    def open(self):
+        from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_, LowState_
+
+        backend = self.backend
+        if backend.channel is not None:
+            set_channel_backend(backend.channel)
+
+        self.low_cmd = cmd = backend.allocate(self.joints.command)
+        self._motors = [(j, cmd.motor_cmd[j]) for j in self.layout.joint_list]
+        # Copia empaquetada persistente: cada tick solo reempaqueta q y dq.
+        self.crc.pack(cmd)
+        for consumer in self._consumers:
+            consumer.attach_command(cmd)
+
+        self.publisher = ChannelPublisher(backend.topic, LowCmd_)
+        self.publisher.Init()
+
+        self.subscriber = ChannelSubscriber("rt/lowstate", LowState_)
+        self.subscriber.Init(self.handle_state, 10)
+
+    def handle_state(self, msg):
+        self.state.put(msg)
+        self.backend.on_state(msg)
+        if self.startup is not None:
+            self.startup.state_received()
+        for capture in self._captures:
+            capture(msg)
+
+    @property
+    def low_state(self):
+        return self.state.msg
+
+    def wait_state(self, timeout: float = None) -> bool:
+        """Espera el primer rt/lowstate; False si vence `timeout`."""
+        return self.state.wait(timeout)
+
+    def read_state(self):
+        """Toma la posición medida como pose actual (current/start/target/command)."""
+        return self.joints.read_state(self.low_state.motor_state)
+
+    # ---------------------------------------------------------
+    # Writer
+    # ---------------------------------------------------------
+
+    def write(self):
+        if self.released or self.state.msg is None:
+            return
+
+        cmd = self.low_cmd
+        crc = self.crc
+        self.backend.refresh(cmd, crc)
+
+        joints = self.joints
+        command = joints.command
+        dq = joints.dq
+        source = self.source
+        if source is not None:
+            source(command, dq)
+        elif not self.playback.step(command, dq):
+            self.motion.interpolate(self.profile)
+
+        set_qdq = crc.set_qdq
+        for (j, motor), q, v in zip(self._motors, command.tolist(), dq.tolist()):
+            motor.q = q
+            motor.dq = v
+            set_qdq(j, q, v)
+
+        timing = self.timing
+        timing.lap("compute")
+        cmd.crc = crc.compute()
+        timing.lap("crc")
+        self.publisher.Write(cmd)
+        timing.lap("publish")
+        if self.startup is not None:
+            self.startup.command_sent()
+
+    def start_writer(self, target=None):
+        """Arranca el writer; `target` reemplaza write() (p. ej. para medirlo)."""
+        if self.writer_thread is not None and self.writer_thread.is_alive():
+            return False
+
+        self.writer_thread = DeadlineThread(
+            interval=self.control_dt,
+            target=target or self.write,
+            name=self.name,
+            timing=self.timing,
+            **self.scheduler,
+        )
+        self.writer_thread.Start()
+        return True
+
+    def stop_writer(self, timeout: float = 1.0) -> bool:
+        """Detiene el writer; False si no estaba corriendo."""
+        thread = self.writer_thread
+        if thread is None:
+            return False
+        thread.Wait(timeout=timeout)
+        self.writer_thread = None
+        return True
+
+    # ---------------------------------------------------------
+    # Rutinas
+    # ---------------------------------------------------------
+
+    def play_table(self, compiled, columns, initial, on_step=None) -> bool:
+        """
+        Reproduce una CompiledRoutine desde `initial` (valores de `columns`)
+        con una fila por tick y la deja sostenida al terminar. on_step(paso,
+        nombre, duración, joints_que_cambian) se llama al empezar cada paso.
+        False si el writer no alcanzó alguna fila a tiempo.
+        """
+        playback = self.playback
+        table = compiled.table(initial)
+        playback.start(table, columns, compiled.velocity_table(initial))
+
+        on_time = True
+        for step, step_name, duration, first, _ in compiled.steps():
+            on_time &= playback.wait_row(first, timeout=first * self.control_dt + 2.0)
+            if on_step is not None:
+                on_step(step, step_name, duration, compiled.changed_joints(table, step, initial, 1e-9))
+        on_time &= playback.wait_row(compiled.rows, timeout=compiled.duration + 2.0)
+
+        # Al soltar la tabla, el writer sostiene la última fila.
+        final = self.motion.unset()
+        final[columns] = table[-1]
+        hold = self.motion.move(final, 0.0)
+        playback.stop()
+        self.joints.dq.fill(0.0)
+        return hold.wait(timeout=1.0) and on_time
+
+    # ---------------------------------------------------------
+    # Cierre
+    # ---------------------------------------------------------
+
+    def close(self, repeat: int = 20, delay: float = 0.02, command=None):
+        """
+        Detiene el writer y repite el mensaje de cierre del backend: en
+        arm_sdk suelta el control, en lowcmd sostiene `command` (por defecto
+        el último comando). Devuelve False si no había canales abiertos.
+        """
+        self.stop_writer()
+        self.released = True
+        if self.publisher is None:
+            return False
+
+        cmd = self.low_cmd
+        self.backend.release(cmd, self.low_state, self.joints.command if command is None else command)
+        cmd.crc = self.crc.Crc(cmd)
+
+        for _ in range(repeat):
+            self.publisher.Write(cmd)
+            time.sleep(delay)
+        return True
@@ -0,0 +1,319 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file scheduler.py
+# @brief Hilo periódico con deadlines absolutos para los writers de LowCmd.
+#
+# @descripcion
+#   `DeadlineThread` sustituye a `RecurrentThread` (misma interfaz Start/Wait)
+#   y a los bucles `time.sleep` de los writers. Los deadlines se calculan
+#   sobre una rejilla absoluta (t0 + k * periodo), de modo que el error de un
+#   tick no se acumula en los siguientes.
+#
+#   Modos de espera:
+#     sleep   time.sleep hasta el deadline absoluto.
+#     hybrid  time.sleep hasta `spin_s` antes del deadline y espera activa
+#             el resto (menor sobrepaso a costa de CPU).
+#     fifo    hybrid + SCHED_FIFO y afinidad de CPU (Linux, requiere
+#             permisos; si fallan se continúa en hybrid con aviso).
+#
+#   Políticas ante un deadline perdido:
+#     skip     descarta los ticks perdidos y continúa en la rejilla.
+#     catchup  ejecuta los ticks perdidos sin esperar (máximo `max_catchup`
+#              periodos de retraso; por encima se resincroniza).
+#     degrade  multiplica el periodo por `degrade_factor` y lo restaura
+#              tras `restore_after` ticks a tiempo.
+#
+#   Variables de entorno (valores por defecto cuando no se pasan argumentos):
+#     G1_WRITER_MODE    sleep | hybrid | fifo
+#     G1_WRITER_POLICY  skip | catchup | degrade
+#     G1_WRITER_CPUS    lista de CPUs, ej. "2,3"
+#
+#   Con `timing` (g1_comun.timing.WriterTiming) el hilo marca el inicio de
+#   cada tick, arranca el reporte periódico en Start() y lo cierra en Wait().
+# -----------------------------------------------------------------------------
+
+import math
+import os
+import threading
+import time
+
+
+MODES = ("sleep", "hybrid", "fifo")
+POLICIES = ("skip", "catchup", "degrade")
+
+
+def parse_cpus(text):
+    if not text:
+        return None
+    return sorted({int(item) for item in str(text).split(",") if item.strip()})
+
+
+class JitterStats:
+    """
+    Estadísticas de periodo y retraso de un hilo periódico.
+
+    Solo las actualiza el propio hilo del writer; el resto de hilos únicamente
+    las leen, por lo que no necesitan lock.
+    """
+
+    def __init__(self, nominal_period: float):
+        self.nominal_period = float(nominal_period)
+        self.ticks = 0
+        self.missed = 0
+        self.skipped = 0
+        self.degraded = 0
+        self.period_sum = 0.0
+        self.period_err_sq = 0.0
+        self.period_err_max = 0.0
+        self.late_max = 0.0
+        self._last_start = None
+
+    def record(self, start: float, deadline: float, period: float):
+        self.ticks += 1
+
+        late = start - deadline
+        if late > self.late_max:
+            self.late_max = late
+
+        if self._last_start is not None:
+            measured = start - self._last_start
+            err = measured - period
+            self.period_sum += measured
+            self.period_err_sq += err * err
+            if abs(err) > self.period_err_max:
+                self.period_err_max = abs(err)
+        self._last_start = start
+
+    def summary(self, name: str = "writer") -> str:
+        intervals = max(self.ticks - 1, 1)
+        mean = self.period_sum / intervals if self.ticks > 1 else 0.0
+        rms = math.sqrt(self.period_err_sq / intervals) if self.ticks > 1 else 0.0
+
+        return (
+            f"[SCHED] {name} | ticks={self.ticks} | "
+            f"periodo_medio={mean * 1e3:.3f} ms "
+            f"(nominal {self.nominal_period * 1e3:.3f} ms) | "
+            f"jitter_rms={rms * 1e6:.0f} us | jitter_max={self.period_err_max * 1e6:.0f} us | "
+            f"retraso_max={self.late_max * 1e6:.0f} us | "
+            f"perdidos={self.missed} descartados={self.skipped} degradados={self.degraded}"
+        )
+
+
+class DeadlineThread:
+    """
+    Ejecuta `target` cada `interval` segundos sobre deadlines absolutos.
+
+    Compatible con la interfaz de `unitree_sdk2py.utils.thread.RecurrentThread`:
+        thread = DeadlineThread(interval=0.002, target=self.LowCmdWrite, name="writer")
+        thread.Start()
+        ...
+        thread.Wait()
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        target,
+        name: str = "writer",
+        mode: str = None,
+        policy: str = None,
+        cpus=None,
+        priority: int = 80,
+        spin_s: float = 0.0003,
+        max_catchup: int = 5,
+        degrade_factor: float = 2.0,
+        max_degrade: float = 8.0,
+        restore_after: int = 250,
+        report: bool = True,
+        timing=None,
+    ):
+        self.interval = float(interval)
+        if self.interval <= 0:
+            raise ValueError("El periodo del writer debe ser positivo.")
+
+        self.target = target
+        self.name = name
+        self.mode = mode or os.environ.get("G1_WRITER_MODE", "sleep")
+        self.policy = policy or os.environ.get("G1_WRITER_POLICY", "skip")
+        self.cpus = parse_cpus(cpus) if isinstance(cpus, str) else cpus
+        if self.cpus is None:
+            self.cpus = parse_cpus(os.environ.get("G1_WRITER_CPUS", ""))
+
+        if self.mode not in MODES:
+            raise ValueError(f"Modo de scheduler no soportado: {self.mode}. Usa {MODES}.")
+        if self.policy not in POLICIES:
+            raise ValueError(f"Política no soportada: {self.policy}. Usa {POLICIES}.")
+
+        self.priority = int(priority)
+        self.spin_s = float(spin_s)
+        self.max_catchup = int(max_catchup)
+        self.degrade_factor = float(degrade_factor)
+        self.max_degrade = float(max_degrade)
+        self.restore_after = int(restore_after)
+        self.report = report
+        self.timing = timing
+
+        self.period = self.interval
+        self.stats = JitterStats(self.interval)
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------------------------------------------------------
+    # Interfaz pública
+    # ---------------------------------------------------------
+
+    def Start(self):
+        if self._thread is not None and self._thread.is_alive():
+            raise RuntimeError(f"El hilo {self.name} ya está en ejecución.")
+
+        self._stop.clear()
+        if self.timing is not None:
+            self.timing.start()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def Wait(self, timeout: float = 1.0):
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+            if self.report:
+                print(self.stats.summary(self.name))
+            if self.timing is not None:
+                self.timing.close()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------------------------------------------------------
+    # Bucle
+    # ---------------------------------------------------------
+
+    def _apply_realtime(self):
+        if self.mode != "fifo":
+            return "sleep" if self.mode == "sleep" else "hybrid"
+
+        try:
+            if self.cpus:
+                os.sched_setaffinity(0, self.cpus)
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.priority))
+            print(
+                f"[SCHED] {self.name}: SCHED_FIFO prioridad {self.priority}, "
+                f"CPUs {self.cpus if self.cpus else 'todas'}."
+            )
+        except (AttributeError, OSError) as error:
+            print(
+                f"[WARN] {self.name}: no se pudo activar SCHED_FIFO ({error}). "
+                "Se continúa en modo hybrid."
+            )
+
+        return "hybrid"
+
+    def _wait_until(self, deadline: float, wait_mode: str):
+        stop = self._stop
+        now = time.monotonic()
+
+        if wait_mode == "sleep":
+            if deadline > now:
+                stop.wait(deadline - now)
+            return
+
+        coarse = deadline - self.spin_s
+        if coarse > now:
+            stop.wait(coarse - now)
+
+        while time.monotonic() < deadline and not stop.is_set():
+            pass
+
+    def _run(self):
+        wait_mode = self._apply_realtime()
+        stats = self.stats
+        target = self.target
+        begin = self.timing.begin if self.timing is not None and self.timing.enabled else None
+        on_time = 0
+
+        deadline = time.monotonic()
+
+        while not self._stop.is_set():
+            start = time.monotonic()
+            stats.record(start, deadline, self.period)
+
+            if begin is not None:
+                begin()
+            target()
+
+            deadline += self.period
+            now = time.monotonic()
+
+            if now <= deadline:
+                on_time += 1
+                if (
+                    self.policy == "degrade"
+                    and self.period > self.interval
+                    and on_time >= self.restore_after
+                ):
+                    self.period = max(self.interval, self.period / self.degrade_factor)
+                    on_time = 0
+                self._wait_until(deadline, wait_mode)
+                continue
+
+            # Deadline perdido.
+            stats.missed += 1
+            on_time = 0
+            behind = int((now - deadline) // self.period) + 1
+
+            if self.policy == "skip":
+                stats.skipped += behind
+                deadline += behind * self.period
+                self._wait_until(deadline, wait_mode)
+
+            elif self.policy == "catchup":
+                # El siguiente tick corre de inmediato; si el retraso supera
+                # max_catchup periodos se resincroniza la rejilla.
+                if behind > self.max_catchup:
+                    stats.skipped += behind
+                    deadline = now
+
+            else:
+                limit = self.interval * self.max_degrade
+                if self.period < limit:
+                    self.period = min(self.period * self.degrade_factor, limit)
+                    stats.degraded += 1
+                deadline = now + self.period
+                self._wait_until(deadline, wait_mode)
+
+
+def add_scheduler_arguments(parser):
+    """Agrega las opciones del scheduler a un argparse.ArgumentParser."""
+    parser.add_argument(
+        "--writer-mode",
+        choices=MODES,
+        default=None,
+        help="Espera del writer: sleep, hybrid (sleep + busy-wait) o fifo (SCHED_FIFO).",
+    )
+    parser.add_argument(
+        "--deadline-policy",
+        choices=POLICIES,
+        default=None,
+        help="Acción ante un deadline perdido: skip, catchup o degrade.",
+    )
+    parser.add_argument(
+        "--writer-cpus",
+        default=None,
+        help="CPUs para el writer en modo fifo, separadas por coma. Ej: 2,3",
+    )
+
+
+def scheduler_kwargs(args):
+    """Convierte los argumentos de `add_scheduler_arguments` en kwargs."""
+    return {
+        "mode": args.writer_mode,
+        "policy": args.deadline_policy,
+        "cpus": args.writer_cpus,
+    }
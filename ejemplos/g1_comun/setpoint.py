@@ -0,0 +1,223 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file setpoint.py
+# @brief Traspaso de setpoints planner -> writer sin locks (seqlock + doble búfer).
+#
+# @descripcion
+#   El planner (move_to / play_routine) es el único escritor y el hilo del
+#   writer es el lector. El setpoint (posición inicial, objetivo, instante
+#   de inicio y duración) vive en dos slots preasignados:
+#
+#     publish()  escribe en el slot inactivo con `seq` impar y lo publica
+#                dejando `seq` par; el slot publicado es (seq >> 1) & 1.
+#     read()     devuelve el seq par publicado y su slot.
+#     valid(s)   True si el slot no se reescribió mientras se leía.
+#
+#   El lector nunca espera al escritor: mientras el planner escribe el slot
+#   inactivo, el publicado sigue siendo legible. Solo hay que repetir la
+#   lectura si el planner publica dos veces durante un mismo tick.
+#
+#   Los slots son arrays NumPy en el orden del `JointLayout` del player.
+#   Un slot puede llevar además una tabla densa (g1_comun.routine): en ese
+#   caso `evaluate()` copia la fila del instante actual en lugar de
+#   interpolar start -> target, y también la de velocidades si la tabla
+#   trae dq de feedforward (trayectorias spline).
+#
+#   En sentido contrario, el writer marca `done_seq` cuando emite el último
+#   punto de un setpoint, y el planner espera ese valor sin lock. Con
+#   track(seq) el planner obtiene en cambio un MotionFuture (g1_comun.motion)
+#   que el writer completa en finish(seq).
+# -----------------------------------------------------------------------------
+
+import time
+
+from g1_comun.lazy import lazy_import
+from g1_comun.motion import PendingMotion
+
+np = lazy_import("numpy")
+
+
+class SetpointSlot:
+    __slots__ = ("start", "target", "t0", "duration", "table", "dq_table", "dt")
+
+    def __init__(self, size: int):
+        self.start = np.zeros(size)
+        self.target = np.zeros(size)
+        self.t0 = 0.0
+        self.duration = 0.0
+        # Tabla (filas x joints) de solo lectura y periodo de sus filas.
+        self.table = None
+        self.dq_table = None
+        self.dt = 0.0
+
+
+class SetpointBuffer:
+    """
+    Seqlock de un solo escritor sobre dos slots de setpoint.
+
+    Uso en el writer:
+        while True:
+            seq, slot = buffer.read()
+            ratio = buffer.evaluate(slot, time.monotonic(), out, profile)
+            if buffer.valid(seq):
+                break
+    """
+
+    def __init__(self, size: int, initial=None):
+        self.size = int(size)
+        self._slots = (SetpointSlot(self.size), SetpointSlot(self.size))
+        self._seq = 0
+        # Solo lo escribe el writer.
+        self.done_seq = 0
+        self.retries = 0
+        # (seq, PendingMotion) del último track(); se reemplaza entero.
+        self._motion = None
+
+        if initial is not None:
+            self.hold(initial)
+
+    # ---------------------------------------------------------
+    # Escritor (planner)
+    # ---------------------------------------------------------
+
+    def publish(self, start, target, duration: float, t0: float = None, table=None, dt: float = 0.0,
+                dq_table=None) -> int:
+        seq = self._seq
+        slot = self._slots[((seq >> 1) + 1) & 1]
+
+        self._seq = seq + 1
+        slot.start[:] = start
+        slot.target[:] = target
+        slot.duration = max(float(duration), 0.0)
+        slot.table = table
+        slot.dq_table = dq_table
+        slot.dt = float(dt)
+        slot.t0 = time.monotonic() if t0 is None else float(t0)
+        self._seq = seq + 2
+
+        return seq + 2
+
+    def publish_table(self, table, dt: float, t0: float = None, dq_table=None) -> int:
+        """Publica una tabla densa; el planner no debe modificarla después."""
+        return self.publish(table[0], table[-1], len(table) * dt, t0=t0, table=table, dt=dt, dq_table=dq_table)
+
+    def hold(self, values) -> int:
+        """Publica un setpoint estático en `values`."""
+        return self.publish(values, values, 0.0)
+
+    def position_at(self, now: float = None, profile=None):
+        """Posición que comanda el setpoint publicado en `now` (lado planner)."""
+        slot = self._slots[(self._seq >> 1) & 1]
+        out = np.empty(self.size)
+        self.evaluate(slot, time.monotonic() if now is None else now, out, profile)
+        return out
+
+    def wait_done(self, seq: int, timeout: float, poll: float = 0.002) -> bool:
+        deadline = time.monotonic() + timeout
+
+        while self.done_seq < seq:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(poll)
+
+        return True
+
+    def track(self, seq: int):
+        """
+        Futuro que el writer completa al emitir el final de `seq`. El futuro
+        del movimiento anterior, si seguía en curso, queda cancelado.
+        """
+        previous = self._motion
+        if previous is not None:
+            previous[1].future.cancel()
+
+        motion = PendingMotion()
+        self._motion = (seq, motion)
+        # El writer pudo terminar `seq` antes de este registro.
+        if self.done_seq >= seq:
+            motion.settle()
+        return motion.future
+
+    # ---------------------------------------------------------
+    # Lector (writer)
+    # ---------------------------------------------------------
+
+    def read(self):
+        """Devuelve (seq par del setpoint publicado, slot)."""
+        seq = self._seq & ~1
+        return seq, self._slots[(seq >> 1) & 1]
+
+    def valid(self, seq: int) -> bool:
+        # El slot leído solo se reescribe a partir del segundo publish
+        # posterior (seq + 3).
+        return self._seq - seq < 3
+
+    @property
+    def seq(self) -> int:
+        return self._seq & ~1
+
+    def finish(self, seq: int):
+        """Marca `seq` como emitido y completa su futuro si lo hay."""
+        self.done_seq = seq
+        tracked = self._motion
+        if tracked is not None and tracked[0] == seq:
+            tracked[1].settle()
+
+    @property
+    def halted(self) -> bool:
+        """True si el futuro del movimiento publicado fue cancelado."""
+        tracked = self._motion
+        return tracked is not None and tracked[1].cancelled
+
+    @staticmethod
+    def evaluate(slot, now: float, out, profile=None, dq_out=None) -> float:
+        """
+        Escribe en `out` la posición del slot en `now` y devuelve el avance
+        lineal [0, 1]. Sin tabla interpola con `profile(ratio)`; con tabla
+        copia la fila correspondiente a `now`. `dq_out`, si se pasa, recibe
+        la fila de dq de la tabla o ceros.
+        """
+        ratio = SetpointBuffer.ratio(slot, now)
+        table = slot.table
+
+        if table is None:
+            SetpointBuffer.sample(slot, ratio if profile is None else profile(ratio), out)
+            if dq_out is not None:
+                dq_out.fill(0.0)
+            return ratio
+
+        row = int((now - slot.t0) / slot.dt)
+        last = len(table) - 1
+        row = 0 if row < 0 else (row if row < last else last)
+        out[:] = table[row]
+
+        if dq_out is not None:
+            dq_table = slot.dq_table
+            if dq_table is None:
+                dq_out.fill(0.0)
+            else:
+                # Tras la última fila el setpoint queda sostenido.
+                dq_out[:] = dq_table[row] if ratio < 1.0 else 0.0
+        return ratio
+
+    @staticmethod
+    def sample(slot, s: float, out):
+        """out = start + (target - start) * s, sin arrays temporales."""
+        np.subtract(slot.target, slot.start, out=out)
+        out *= s
+        out += slot.start
+        return out
+
+    @staticmethod
+    def ratio(slot, now: float) -> float:
+        """Avance lineal [0, 1] del slot; el perfil lo aplica quien lo usa."""
+        if slot.duration <= 0.0:
+            return 1.0
+
+        ratio = (now - slot.t0) / slot.duration
+        if ratio <= 0.0:
+            return 0.0
+        return ratio if ratio < 1.0 else 1.0
@@ -0,0 +1,139 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file startup.py
+# @brief Arranque guiado por eventos y tiempo hasta el primer comando.
+#
+# @descripcion
+#   Startup espera el primer estado y las inicializaciones lentas con eventos:
+#     state_received()  lo llama el callback del primer tópico de estado y
+#                       despierta a wait_state() al instante.
+#     background()      ejecuta una inicialización lenta (p. ej.
+#                       LocoClient.Init(), que ya requiere
+#                       ChannelFactoryInitialize) en un hilo mientras el
+#                       script crea sus canales y espera el primer estado;
+#                       join() la espera y relanza su excepción.
+#     command_sent()    lo llama el writer tras cada publicación; la
+#                       primera vez imprime el tiempo hasta el primer
+#                       comando y las etapas intermedias. Los scripts que
+#                       esperan al operador antes de comandar imprimen
+#                       summary() al quedar listos.
+#
+#   Los tiempos se cuentan desde la creación de Startup, que los scripts
+#   hacen después de sus confirmaciones por consola. El reporte agrega cuánto
+#   tardó el proceso en llegar ahí (intérprete e imports), leído de
+#   /proc/self/stat con resolución de 10 ms.
+# -----------------------------------------------------------------------------
+
+import os
+import threading
+import time
+
+
+_IMPORTED = time.monotonic()
+
+
+def process_launch() -> float:
+    """
+    Instante (reloj de time.monotonic) en que arrancó el proceso. Fuera de
+    Linux devuelve el instante en que se importó este módulo.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # El nombre del proceso puede tener espacios; los campos siguen al ")".
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        age = uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return _IMPORTED
+    return time.monotonic() - max(0.0, age)
+
+
+class Startup:
+    """Etapas del arranque de un script hasta su primer comando publicado."""
+
+    def __init__(self, name: str, log: bool = True):
+        self.name = name
+        self.log = log
+        self.launched = process_launch()
+        self.started = time.monotonic()
+        self.stages = []
+        self.first_command = None
+        self._state = threading.Event()
+        self._workers = {}
+
+    def mark(self, label: str):
+        self.stages.append((label, time.monotonic()))
+
+    # Estado ---------------------------------------------------
+
+    def state_received(self):
+        """Desde el callback de estado; tras el primer mensaje solo consulta un flag."""
+        if not self._state.is_set():
+            self.mark("primer estado")
+            self._state.set()
+
+    def wait_state(self, timeout: float = None) -> bool:
+        """Espera el primer estado; False si vence `timeout`."""
+        return self._state.wait(timeout)
+
+    # Inicializaciones en paralelo ------------------------------
+
+    def background(self, label: str, fn, *args):
+        """Ejecuta fn(*args) en un hilo daemon; join(label) lo espera."""
+        worker = {"thread": None, "error": None}
+
+        def run():
+            try:
+                fn(*args)
+            except BaseException as e:
+                worker["error"] = e
+            else:
+                self.mark(label)
+
+        worker["thread"] = threading.Thread(target=run, name=f"startup:{label}", daemon=True)
+        self._workers[label] = worker
+        worker["thread"].start()
+        return self
+
+    def join(self, label: str = None, timeout: float = None):
+        """Espera las inicializaciones en segundo plano y relanza su error."""
+        labels = [label] if label is not None else list(self._workers)
+        for name in labels:
+            worker = self._workers.get(name)
+            if worker is None:
+                continue
+            worker["thread"].join(timeout)
+            if worker["thread"].is_alive():
+                raise TimeoutError(f"{name} no terminó en {timeout:.1f}s.")
+            del self._workers[name]
+            if worker["error"] is not None:
+                raise worker["error"]
+
+    # Primer comando -------------------------------------------
+
+    def command_sent(self):
+        """Desde el writer, después de publicar."""
+        if self.first_command is None:
+            self.first_command = time.monotonic()
+            if self.log:
+                # Una sola escritura: corre en el hilo writer, junto a los print del script.
+                print(f"{self.summary()}\n", end="", flush=True)
+
+    def summary(self) -> str:
+        """Tiempo hasta el primer comando (o hasta ahora, si aún no hubo) y etapas."""
+        if self.first_command is not None:
+            head = f"primer comando a {(self.first_command - self.started) * 1e3:.0f} ms del arranque"
+        else:
+            head = f"listo a {(time.monotonic() - self.started) * 1e3:.0f} ms del arranque"
+        stages = "".join(
+            f" | {label} +{(stamp - self.started) * 1e3:.0f} ms"
+            for label, stamp in sorted(self.stages, key=lambda stage: stage[1])
+        )
+        return (
+            f"[STARTUP] {self.name}: {head} "
+            f"({(self.started - self.launched) * 1e3:.0f} ms previos desde el lanzamiento){stages}"
+        )
@@ -0,0 +1,393 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file statehub.py
+# @brief Hub local de estado: un proceso se suscribe a rt/lowstate y
+#        rt/odommodestate y los reparte por memoria compartida.
+#
+# @descripcion
+#   StateHub decodifica cada mensaje una sola vez a un registro NumPy de
+#   layout fijo (LOWSTATE_FIELDS, ODOM_FIELDS; ver record_dtype) y lo
+#   escribe en un anillo de memoria compartida POSIX por tópico
+#   (<nombre>_lowstate, <nombre>_odom). Los consumidores (visualizador,
+#   capturador de poses, registro de odometría) se adjuntan con
+#   StateHubClient en lugar de crear su propio ChannelSubscriber: leer es
+#   copiar un registro o tomar una vista, sin deserializar nada.
+#
+#   Cada registro lleva un contador seqlock: el hub lo pone impar antes de
+#   escribir y par (2 * (índice + 1)) al terminar, y después avanza `head`.
+#     latest()   copia el último registro y la reintenta si el contador
+#                cambió durante la copia.
+#     pull(last) copia los registros nuevos desde `last`, como
+#                livestate.StateRing.pull, descartando los que el hub pudo
+#                pisar durante la copia.
+#     records / column(campo)  vistas NumPy sin copia sobre el bloque; el
+#                lector valida con valid(i, seq) si las usa directamente.
+#
+#   Cabecera del bloque (int64): magic, tipo (1 lowstate, 2 odom),
+#   capacidad, head; después los registros.
+# -----------------------------------------------------------------------------
+
+import time
+from functools import lru_cache
+
+from g1_comun.lazy import lazy_import
+from g1_comun.livestate import attach_shared_memory
+from g1_comun.timing import LogHistogram
+
+np = lazy_import("numpy")
+shared_memory = lazy_import("multiprocessing.shared_memory")
+
+
+MAGIC = 0x4731485542   # "G1HUB"
+HEADER_SLOTS = 4
+NUM_MOTORS = 35
+DEFAULT_HUB_NAME = "g1_hub"
+DEFAULT_CAPACITY = 2048
+
+# Campos de los registros (formato de np.dtype). El dtype se arma en el
+# primer uso con record_dtype(): los scripts que solo leen las constantes
+# no importan NumPy.
+LOWSTATE_FIELDS = (
+    ("seq", "u8"),
+    ("stamp", "f8"),   # time.monotonic() al recibir
+    ("wall", "f8"),    # time.time() al recibir
+    ("tick", "u4"),
+    ("mode_machine", "u1"),
+    ("q", "f4", NUM_MOTORS),
+    ("dq", "f4", NUM_MOTORS),
+    ("ddq", "f4", NUM_MOTORS),
+    ("tau_est", "f4", NUM_MOTORS),
+    ("temperature", "i2", (NUM_MOTORS, 2)),
+    ("motorstate", "u4", NUM_MOTORS),
+    ("imu_quaternion", "f4", 4),
+    ("imu_gyroscope", "f4", 3),
+    ("imu_accelerometer", "f4", 3),
+    ("imu_rpy", "f4", 3),
+    ("wireless_remote", "u1", 40),
+)
+
+ODOM_FIELDS = (
+    ("seq", "u8"),
+    ("stamp", "f8"),
+    ("wall", "f8"),
+    ("mode", "u1"),
+    ("body_height", "f4"),
+    ("position", "f4", 3),
+    ("velocity", "f4", 3),
+    ("yaw_speed", "f4"),
+    ("imu_quaternion", "f4", 4),
+    ("imu_gyroscope", "f4", 3),
+    ("imu_accelerometer", "f4", 3),
+    ("imu_rpy", "f4", 3),
+)
+
+KINDS = {1: "lowstate", 2: "odom"}
+KIND_OF = {name: kind for kind, name in KINDS.items()}
+FIELDS = {"lowstate": LOWSTATE_FIELDS, "odom": ODOM_FIELDS}
+
+
+@lru_cache(maxsize=None)
+def record_dtype(kind: str):
+    """dtype NumPy (alineado) de los registros de `kind`."""
+    return np.dtype(list(FIELDS[kind]), align=True)
+
+
+class HubRing:
+    """Anillo seqlock de registros de layout fijo sobre un búfer plano."""
+
+    def __init__(self, buffer, kind: str = None, capacity: int = None):
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=buffer)
+        if kind is not None:
+            header[:] = (0, KIND_OF[kind], capacity, 0)
+        elif header[0] != MAGIC or int(header[1]) not in KINDS:
+            raise ValueError("El bloque no contiene un anillo del hub de estado.")
+
+        self.kind = KINDS[int(header[1])]
+        self.dtype = record_dtype(self.kind)
+        self.capacity = int(header[2])
+        self.records = np.ndarray((self.capacity,), dtype=self.dtype, buffer=buffer, offset=8 * HEADER_SLOTS)
+        # Vistas sin copia por campo; escribir en ellas es más barato que
+        # hacerlo a través de records[i].
+        self.columns = {field: self.records[field] for field in self.dtype.names}
+        self._seqs = self.columns["seq"]
+        self._header = header
+
+        if kind is not None:
+            self._seqs[:] = 0
+            header[0] = MAGIC
+
+    @staticmethod
+    def nbytes(kind: str, capacity: int) -> int:
+        return 8 * HEADER_SLOTS + record_dtype(kind).itemsize * capacity
+
+    @property
+    def head(self) -> int:
+        return int(self._header[3])
+
+    def column(self, field: str):
+        """Vista sin copia de un campo para todos los registros."""
+        return self.columns[field]
+
+    # Escritor -------------------------------------------------
+
+    def begin(self):
+        """Índice del registro a llenar, marcado como en escritura."""
+        head = int(self._header[3])
+        index = head % self.capacity
+        self._seqs[index] = 2 * head + 1
+        return index
+
+    def commit(self, index: int):
+        head = int(self._header[3])
+        self._seqs[index] = 2 * head + 2
+        self._header[3] = head + 1
+
+    # Lector ---------------------------------------------------
+
+    def valid(self, index: int, seq: int) -> bool:
+        """True si el registro `index` sigue siendo el que tenía `seq`."""
+        return not seq & 1 and int(self._seqs[index]) == seq
+
+    def latest(self, out=None, retries: int = 8):
+        """Copia coherente del último registro (array 0-d) o None."""
+        if out is None:
+            out = np.zeros((), dtype=self.dtype)
+        for _ in range(retries):
+            head = self.head
+            if head == 0:
+                return None
+            index = (head - 1) % self.capacity
+            seq = int(self._seqs[index])
+            if seq & 1:
+                continue
+            out[...] = self.records[index]
+            if self.valid(index, seq):
+                return out
+        return None
+
+    def pull(self, last: int):
+        """
+        Copia los registros en [last, head). Devuelve (registros, nuevo
+        last, descartados). Con last=None se empieza por el más reciente.
+        """
+        head = self.head
+        # El registro head - capacity puede estar reescribiéndose ahora mismo.
+        oldest = max(0, head - self.capacity + 1)
+        lost = 0
+        if last is None:
+            last = max(oldest, head - 1)
+        elif last < oldest:
+            lost, last = oldest - last, oldest
+        if head <= last:
+            return self.records[:0], last, lost
+
+        records = self.records[np.arange(last, head) % self.capacity]
+        overwritten = self.head - self.capacity + 1 - last
+        if overwritten > 0:
+            records = records[overwritten:]
+            lost += overwritten
+        return records, head, lost
+
+
+def decode_lowstate(msg, columns, index: int):
+    """Copia un LowState_ al registro `index` (columns: HubRing.columns)."""
+    motors = msg.motor_state[:NUM_MOTORS]
+    columns["tick"][index] = msg.tick
+    columns["mode_machine"][index] = msg.mode_machine
+    columns["q"][index] = [m.q for m in motors]
+    columns["dq"][index] = [m.dq for m in motors]
+    columns["ddq"][index] = [m.ddq for m in motors]
+    columns["tau_est"][index] = [m.tau_est for m in motors]
+    columns["temperature"][index] = [m.temperature for m in motors]
+    columns["motorstate"][index] = [m.motorstate for m in motors]
+    imu = msg.imu_state
+    columns["imu_quaternion"][index] = imu.quaternion
+    columns["imu_gyroscope"][index] = imu.gyroscope
+    columns["imu_accelerometer"][index] = imu.accelerometer
+    columns["imu_rpy"][index] = imu.rpy
+    columns["wireless_remote"][index] = msg.wireless_remote
+
+
+def decode_odom(msg, columns, index: int):
+    """Copia un SportModeState_ al registro `index`."""
+    columns["mode"][index] = msg.mode
+    columns["body_height"][index] = msg.body_height
+    columns["position"][index] = msg.position
+    columns["velocity"][index] = msg.velocity
+    columns["yaw_speed"][index] = msg.yaw_speed
+    imu = msg.imu_state
+    columns["imu_quaternion"][index] = imu.quaternion
+    columns["imu_gyroscope"][index] = imu.gyroscope
+    columns["imu_accelerometer"][index] = imu.accelerometer
+    columns["imu_rpy"][index] = imu.rpy
+
+
+DECODERS = {"lowstate": decode_lowstate, "odom": decode_odom}
+
+
+def _create_block(name: str, size: int):
+    try:
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        # Bloque de una ejecución anterior que no se cerró.
+        old = shared_memory.SharedMemory(name=name)
+        old.close()
+        old.unlink()
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+
+class HubTopic:
+    """Lado del hub para un tópico: decodifica y publica en su anillo."""
+
+    def __init__(self, name: str, kind: str, capacity: int):
+        self.block_name = f"{name}_{kind}"
+        self._shm = _create_block(self.block_name, HubRing.nbytes(kind, capacity))
+        self.ring = HubRing(self._shm.buf, kind, capacity)
+        self.decode = DECODERS[kind]
+        self.cost = LogHistogram()
+        self.count = 0
+
+    def capture(self, msg):
+        ring = self.ring
+        if ring is None:
+            return
+        started = time.perf_counter_ns()
+        index = ring.begin()
+        columns = ring.columns
+        columns["stamp"][index] = time.monotonic()
+        columns["wall"][index] = time.time()
+        self.decode(msg, columns, index)
+        ring.commit(index)
+        self.cost.record(time.perf_counter_ns() - started)
+        self.count += 1
+
+    def close(self):
+        if self._shm is None:
+            return
+        shm, self._shm = self._shm, None
+        self.ring = None
+        try:
+            shm.close()
+        except BufferError:
+            pass
+        shm.unlink()
+
+
+class StateHub:
+    """
+    Proceso hub: una suscripción por tópico para todos los consumidores
+    locales. start() debe llamarse después de ChannelFactoryInitialize.
+    """
+
+    def __init__(self, name: str = DEFAULT_HUB_NAME, capacity: int = DEFAULT_CAPACITY, odom: bool = True):
+        self.name = name
+        self.topics = {"lowstate": HubTopic(name, "lowstate", capacity)}
+        if odom:
+            self.topics["odom"] = HubTopic(name, "odom", capacity)
+        self._subscribers = []
+
+    def start(self):
+        from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
+
+        from g1_comun.channel import ChannelSubscriber
+
+        subscriptions = [("rt/lowstate", LowState_, self.topics["lowstate"])]
+        if "odom" in self.topics:
+            from unitree_sdk2py.idl.unitree_go.msg.dds_ import SportModeState_
+
+            subscriptions.append(("rt/odommodestate", SportModeState_, self.topics["odom"]))
+
+        for topic, msg_type, hub_topic in subscriptions:
+            subscriber = ChannelSubscriber(topic, msg_type)
+            subscriber.Init(hub_topic.capture, 10)
+            self._subscribers.append(subscriber)
+        return self
+
+    def summary(self) -> str:
+        lines = []
+        for kind, topic in self.topics.items():
+            cost = topic.cost
+            lines.append(
+                f"[HUB] {topic.block_name}: {topic.count} mensajes | decodificación "
+                f"p50 {cost.percentile(50) / 1e3:.1f} us p99 {cost.percentile(99) / 1e3:.1f} us"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        for subscriber in self._subscribers:
+            subscriber.Close()
+        self._subscribers = []
+        for topic in self.topics.values():
+            topic.close()
+
+
+class StateHubClient:
+    """
+    Consumidor: se adjunta a los anillos del hub `name`. `lowstate` y
+    `odom` quedan en None si el hub no publica ese tópico.
+    """
+
+    def __init__(self, name: str = DEFAULT_HUB_NAME):
+        self.name = name
+        self._blocks = []
+        self.lowstate = self._attach("lowstate")
+        self.odom = self._attach("odom")
+        if self.lowstate is None and self.odom is None:
+            raise FileNotFoundError(f"No hay un hub de estado '{name}'. Inicia state_hub.py primero.")
+
+    def _attach(self, kind: str):
+        try:
+            shm = attach_shared_memory(f"{self.name}_{kind}")
+        except FileNotFoundError:
+            return None
+        self._blocks.append(shm)
+        return HubRing(shm.buf)
+
+    def wait(self, timeout: float = None, kind: str = "lowstate") -> bool:
+        """Espera el primer registro del tópico; False si vence `timeout`."""
+        ring = getattr(self, kind)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while ring is not None and ring.head == 0:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return ring is not None
+
+    def close(self):
+        self.lowstate = self.odom = None
+        for shm in self._blocks:
+            shm.close()
+        self._blocks = []
+
+
+class HubStateSource:
+    """Fuente para CSVVisualizer: q y tau_est de `joints` desde el hub."""
+
+    fields = ("q", "tau")
+
+    def __init__(self, joints, name: str = DEFAULT_HUB_NAME):
+        self.client = StateHubClient(name)
+        if self.client.lowstate is None:
+            raise FileNotFoundError(f"El hub '{name}' no publica rt/lowstate.")
+        self.ring = self.client.lowstate
+        self.joints = list(joints)
+        self.header = ["timestamp", *(f"{field}_joint{j}" for j in self.joints for field in self.fields)]
+        self.dropped = 0
+        self._last = None
+
+    def read(self):
+        records, self._last, lost = self.ring.pull(self._last)
+        self.dropped += lost
+        if not len(records):
+            return []
+        values = np.empty((len(records), 2 * len(self.joints)))
+        values[:, 0::2] = records["q"][:, self.joints]
+        values[:, 1::2] = records["tau_est"][:, self.joints]
+        return list(zip(records["wall"].tolist(), values))
+
+    def close(self):
+        self.ring = None
+        self.client.close()
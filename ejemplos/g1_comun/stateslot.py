@@ -0,0 +1,204 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file stateslot.py
+# @brief Último mensaje recibido con sello de tiempo y secuencia, y watchdog
+#        de estado viejo.
+#
+# @descripcion
+#   StateSlot es lo que escribe el callback de estado: guarda el mensaje
+#   junto con su instante de llegada (time.monotonic) y un número de
+#   secuencia en una sola tupla, así el lector obtiene siempre los tres
+#   coherentes sin lock. Expone la edad del último mensaje, la tasa de
+#   recepción (media móvil del intervalo) y un histograma de intervalos.
+#
+#   StaleWatchdog vigila la edad de un slot. check() detecta los flancos
+#   fresco -> viejo y viejo -> fresco y llama a on_stale/on_recover; start()
+#   lo ejecuta en su propio hilo para que una acción lenta (detener la
+#   locomoción por RPC) no bloquee al writer, que solo lee `stale`.
+#   La acción de degradación la aplica el script:
+#     hold     cancela el movimiento y sostiene el último comando.
+#     freeze   congela la interpolación y la reanuda al volver el estado.
+#     stop     detiene la locomoción (LocoClient.Move(0, 0, 0)).
+#
+#   make_watchdog() toma los valores por defecto de G1_STALE_MS y
+#   G1_STALE_ACTION.
+# -----------------------------------------------------------------------------
+
+import math
+import os
+import threading
+import time
+
+from g1_comun.scheduler import DeadlineThread
+from g1_comun.timing import LogHistogram
+
+
+DEGRADE_ACTIONS = ("hold", "freeze", "stop")
+
+
+class StateSlot:
+    """Último mensaje de un tópico como (msg, instante, secuencia)."""
+
+    def __init__(self, name: str = "rt/lowstate", rate_alpha: float = 0.05):
+        self.name = name
+        self.rate_alpha = float(rate_alpha)
+        self.gaps = LogHistogram()
+        self.count = 0
+        self._latest = None
+        self._interval = 0.0
+        self._ready = threading.Event()
+
+    def put(self, msg, now: float = None):
+        """Lado callback: sella y publica el mensaje con una sola asignación."""
+        now = time.monotonic() if now is None else now
+        latest = self._latest
+        if latest is not None:
+            gap = now - latest[1]
+            self.gaps.record(max(0, int(gap * 1e9)))
+            interval = self._interval
+            self._interval = gap if interval == 0.0 else interval + self.rate_alpha * (gap - interval)
+        self.count += 1
+        self._latest = (msg, now, self.count)
+        if latest is None:
+            self._ready.set()
+
+    def latest(self):
+        """(msg, instante, secuencia) o None si aún no llegó nada."""
+        return self._latest
+
+    @property
+    def msg(self):
+        latest = self._latest
+        return latest[0] if latest is not None else None
+
+    @property
+    def seq(self) -> int:
+        latest = self._latest
+        return latest[2] if latest is not None else 0
+
+    def age(self, now: float = None) -> float:
+        """Segundos desde el último mensaje (inf si no llegó ninguno)."""
+        latest = self._latest
+        if latest is None:
+            return math.inf
+        return (time.monotonic() if now is None else now) - latest[1]
+
+    @property
+    def rate_hz(self) -> float:
+        return 1.0 / self._interval if self._interval > 0 else 0.0
+
+    def wait(self, timeout: float = None) -> bool:
+        """Espera el primer mensaje; False si vence `timeout`."""
+        return self._ready.wait(timeout)
+
+    def summary(self) -> str:
+        gaps = self.gaps
+        return (
+            f"[STATE] {self.name}: {self.count} mensajes | {self.rate_hz:.0f} Hz | intervalo "
+            f"p50 {gaps.percentile(50) / 1e6:.1f} ms p99 {gaps.percentile(99) / 1e6:.1f} ms "
+            f"máx. {gaps.max_ns / 1e6:.1f} ms"
+        )
+
+
+class StaleWatchdog:
+    """
+    Detecta cuándo la edad de `slot` supera `max_age_s`. Los callbacks
+    reciben la edad en segundos y corren en el hilo que llama a check().
+    """
+
+    def __init__(self, slot: StateSlot, max_age_s: float = 0.1, action: str = "hold",
+                 on_stale=None, on_recover=None, log: bool = True):
+        if action not in DEGRADE_ACTIONS:
+            raise ValueError(f"Acción de degradación no soportada: {action}. Usa {DEGRADE_ACTIONS}.")
+        if max_age_s <= 0:
+            raise ValueError("La edad máxima del estado debe ser positiva.")
+        self.slot = slot
+        self.max_age_s = float(max_age_s)
+        self.action = action
+        self.on_stale = on_stale
+        self.on_recover = on_recover
+        self.log = log
+
+        self.stale = False
+        self.events = 0
+        self.stale_s = 0.0
+        self.worst_age = 0.0
+        self._since = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def check(self, now: float = None) -> bool:
+        """True si el estado está fresco; dispara los callbacks en cada flanco."""
+        now = time.monotonic() if now is None else now
+        age = self.slot.age(now)
+        fresh = age <= self.max_age_s
+
+        with self._lock:
+            if fresh == (not self.stale):
+                if not fresh and math.isfinite(age):
+                    self.worst_age = max(self.worst_age, age)
+                return fresh
+            self.stale = not fresh
+            if self.stale:
+                self.events += 1
+                self._since = now
+            else:
+                self.stale_s += now - self._since
+
+        if self.stale:
+            if math.isfinite(age):
+                self.worst_age = max(self.worst_age, age)
+            if self.log:
+                print(
+                    f"[WARN] {self.slot.name}: sin mensajes hace {age * 1e3:.0f} ms "
+                    f"(máx. {self.max_age_s * 1e3:.0f} ms). Acción: {self.action}."
+                )
+            if self.on_stale is not None:
+                self.on_stale(age)
+        else:
+            if self.log:
+                print(f"[INFO] {self.slot.name}: estado recuperado tras {(now - self._since) * 1e3:.0f} ms.")
+            if self.on_recover is not None:
+                self.on_recover(age)
+        return fresh
+
+    def start(self, period_s: float = 0.01):
+        """Ejecuta check() cada `period_s` en un hilo propio."""
+        if self._thread is None:
+            self._thread = DeadlineThread(
+                interval=period_s,
+                target=self.check,
+                name=f"watchdog:{self.slot.name}",
+                mode="sleep",
+                policy="skip",
+                report=False,
+            )
+            self._thread.Start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.Wait()
+            self._thread = None
+
+    def summary(self) -> str:
+        stale_s = self.stale_s + (time.monotonic() - self._since if self.stale else 0.0)
+        return (
+            f"[WATCHDOG] {self.slot.name}: {self.events} cortes > {self.max_age_s * 1e3:.0f} ms | "
+            f"{stale_s:.2f}s sin estado | edad máx. {self.worst_age * 1e3:.0f} ms | acción {self.action}"
+        )
+
+
+def make_watchdog(slot: StateSlot, max_age_s: float = None, action: str = None, **kwargs) -> StaleWatchdog:
+    """
+    Crea el watchdog de `slot`. Los argumentos en None toman su valor de
+    G1_STALE_MS (100 ms por defecto) y G1_STALE_ACTION (hold por defecto).
+    """
+    if max_age_s is None:
+        max_age_s = float(os.environ.get("G1_STALE_MS", "100")) * 1e-3
+    if action is None:
+        action = os.environ.get("G1_STALE_ACTION", "hold").lower()
+    return StaleWatchdog(slot, max_age_s, action, **kwargs)
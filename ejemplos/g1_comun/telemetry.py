@@ -0,0 +1,375 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file telemetry.py
+# @brief Registro CSV de telemetría fuera del callback de DDS.
+#
+# @descripcion
+#   El callback de rt/lowstate solo copia los campos de motor pedidos a una
+#   fila de un anillo NumPy preasignado, junto con time.time(). Un hilo de
+#   fondo despierta cada `flush_interval`, formatea los timestamps, codifica
+#   el lote con csv.writer y hace flush. Así una pausa del disco nunca
+#   retrasa la entrega del estado ni el tick del writer.
+#
+#   El anillo es de un productor (callback) y un consumidor (hilo de fondo):
+#   cada lado escribe solo su contador (`_head` / `_tail`), así que no hace
+#   falta lock. Si el anillo está lleno la muestra se descarta.
+#
+#   Con `command_fields` (p. ej. ("q", "kp", "kd")) cada fila agrega, por
+#   joint, los campos del LowCmd adjunto con attach_command(): lo último que
+#   publicó el writer, tomado en el mismo instante que el estado medido.
+#
+#   Contadores:
+#     written   filas escritas en el CSV.
+#     dropped   muestras descartadas por anillo lleno.
+#     overruns  lotes cuya escritura tardó más que flush_interval.
+#
+#   Uso:
+#       self.telemetry = TelemetryRecorder("data.csv", joints, columns, every=500)
+#       def LowStateHandler(self, msg):
+#           ...
+#           self.telemetry.capture(msg)
+#       ...
+#       self.telemetry.close()
+#
+#   Marcas de rutina: mark(rutina, paso, nombre) agrega una línea
+#   "timestamp,routine,step,name" a <csv>.steps.csv (markers_path) con el
+#   mismo reloj que las filas; paso -1 marca el fin de la rutina. Lo llama
+#   el planner, nunca el callback. g1_comun.analysis segmenta con ellas.
+#
+#   Lectura: CSVTail guarda el offset en bytes y en cada read() lee solo
+#   lo agregado desde la llamada anterior; una línea final incompleta
+#   queda pendiente hasta la próxima lectura. Si el archivo se reemplaza
+#   (otro inodo) o se trunca, se relee desde el principio. Los timestamps
+#   se convierten con aritmética sobre el texto (la fecha se cachea), sin
+#   datetime.strptime por fila. `fields` son los campos por joint según el
+#   encabezado (q, tau y, si existen, q_cmd, kp, kd).
+# -----------------------------------------------------------------------------
+
+import csv
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from g1_comun.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+MARKER_COLUMNS = ["timestamp", "routine", "step", "name"]
+
+
+def markers_path(path) -> Path:
+    """Archivo de marcas de rutina de un CSV de telemetría."""
+    path = Path(path)
+    return path.with_name(path.stem + ".steps.csv")
+
+
+def joint_columns(joints, fields=("q", "tau")):
+    """Columnas q_joint{j}, tau_joint{j} de los CSV de los players."""
+    return [f"{field}_joint{j}" for j in joints for field in fields]
+
+
+class TelemetryRecorder:
+    """Anillo de muestras de motor_state volcado a CSV por un hilo de fondo."""
+
+    def __init__(self, path, joints, columns, every: int = 1, capacity: int = 1024,
+                 fields=("q", "tau_est"), flush_interval: float = 0.2, command_fields=()):
+        self.path = str(path)
+        self.joints = list(joints)
+        self.fields = tuple(fields)
+        self.command_fields = tuple(command_fields)
+        self.every = max(1, int(every))
+        self.capacity = int(capacity)
+        self.flush_interval = float(flush_interval)
+
+        width = len(self.joints) * (len(self.fields) + len(self.command_fields))
+        if len(columns) != width:
+            raise ValueError(f"Se esperaban {width} columnas, hay {len(columns)}.")
+
+        self._stamps = np.zeros(self.capacity)
+        self._rows = np.zeros((self.capacity, width))
+        self._head = 0   # lo escribe solo capture()
+        self._tail = 0   # lo escribe solo el hilo de fondo
+        self._count = 0
+        self._command = None
+
+        self.written = 0
+        self.dropped = 0
+        self.overruns = 0
+        self.closed = False
+        self._markers = None
+
+        self._file = open(self.path, mode="w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(["timestamp", *columns])
+        self._file.flush()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    # ---------------------------------------------------------
+    # Callback de DDS
+    # ---------------------------------------------------------
+
+    def attach_command(self, low_cmd):
+        """LowCmd preasignado del writer del que se leen `command_fields`."""
+        self._command = low_cmd
+
+    def capture(self, msg):
+        """Copia los campos de `msg.motor_state` si toca muestrear."""
+        self._count += 1
+        if self._count < self.every or self.closed:
+            return
+        self._count = 0
+
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self.dropped += 1
+            return
+
+        slot = head % self.capacity
+        row = self._rows[slot]
+        motors = msg.motor_state
+        command_fields = self.command_fields
+        cmds = self._command.motor_cmd if self._command is not None else None
+        k = 0
+        for j in self.joints:
+            motor = motors[j]
+            for field in self.fields:
+                row[k] = getattr(motor, field)
+                k += 1
+            if command_fields:
+                if cmds is None:
+                    row[k:k + len(command_fields)] = np.nan
+                    k += len(command_fields)
+                    continue
+                cmd = cmds[j]
+                for field in command_fields:
+                    row[k] = getattr(cmd, field)
+                    k += 1
+        self._stamps[slot] = time.time()
+        # Publica la fila después de escribirla.
+        self._head = head + 1
+
+    # ---------------------------------------------------------
+    # Hilo de fondo
+    # ---------------------------------------------------------
+
+    def _run(self):
+        # El archivo lo cierra este hilo: así close() nunca lo cierra con un
+        # _drain() todavía en curso.
+        try:
+            while not self._stop.wait(self.flush_interval):
+                started = time.perf_counter()
+                if self._drain():
+                    if time.perf_counter() - started > self.flush_interval:
+                        self.overruns += 1
+            self._drain()
+        finally:
+            self._file.close()
+
+    def _drain(self) -> int:
+        head, tail = self._head, self._tail
+        if head == tail:
+            return 0
+
+        slots = np.arange(tail, head) % self.capacity
+        stamps = self._stamps[slots].tolist()
+        rows = self._rows[slots].tolist()
+        # Las filas ya copiadas se pueden reutilizar.
+        self._tail = head
+
+        for stamp, row in zip(stamps, rows):
+            row.insert(0, datetime.fromtimestamp(stamp).strftime(TIMESTAMP_FORMAT))
+        self._csv.writerows(rows)
+        self._file.flush()
+        self.written += len(rows)
+        return len(rows)
+
+    # ---------------------------------------------------------
+    # Marcas de rutina (planner)
+    # ---------------------------------------------------------
+
+    def mark(self, routine: str, step: int = -1, name: str = ""):
+        """Marca el inicio del paso `step` de `routine`; -1 es el fin."""
+        if self.closed:
+            return
+        if self._markers is None:
+            self._markers = open(markers_path(self.path), mode="w", newline="", encoding="utf-8")
+            self._markers_csv = csv.writer(self._markers)
+            self._markers_csv.writerow(MARKER_COLUMNS)
+        stamp = datetime.fromtimestamp(time.time()).strftime(TIMESTAMP_FORMAT)
+        self._markers_csv.writerow([stamp, routine, step, name])
+        self._markers.flush()
+
+    def close(self, timeout: float = 2.0):
+        """
+        Vacía el anillo y espera a que el hilo cierre el archivo. Si no
+        termina en `timeout` (disco bloqueado) avisa y lo deja terminar solo:
+        las filas pendientes se escriben igual, después del resumen.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(
+                f"[WARN] Telemetría: el volcado de {self.path} sigue en curso tras {timeout:g}s; "
+                "el archivo se cierra al terminar."
+            )
+        if self._markers is not None:
+            self._markers.close()
+
+    def summary(self) -> str:
+        return (
+            f"{self.written} filas en {self.path} "
+            f"({self.dropped} descartadas, {self.overruns} overruns)"
+        )
+
+
+# ---------------------------------------------------------
+# Lectura incremental
+# ---------------------------------------------------------
+
+_DAY_EPOCH = {}
+_COLUMN = re.compile(r"(.+?)_(?:joint)?(\d+)")
+
+
+def column_key(name: str):
+    """(campo, joint) de q_joint12, tau_12, q_12_nombre o q_cmd_12; None si no aplica."""
+    match = _COLUMN.match(name)
+    if match is None:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def header_fields(columns, default=("q", "tau")):
+    """
+    Campos por joint de un encabezado agrupado por joint: q_joint12,
+    tau_joint12, ... o q_12_nombre, tau_12, q_cmd_12, ... Devuelve `default`
+    si las columnas no siguen ese patrón.
+    """
+    fields = []
+    first = None
+    for name in columns:
+        key = column_key(name)
+        if key is None:
+            return default
+        if first is None:
+            first = key[1]
+        elif key[1] != first:
+            break
+        fields.append(key[0])
+    if not fields or len(columns) % len(fields):
+        return default
+    return tuple(fields)
+
+
+def parse_timestamp(text: str) -> float:
+    """Segundos (hora local) de un timestamp en TIMESTAMP_FORMAT."""
+    day = text[:10]
+    base = _DAY_EPOCH.get(day)
+    if base is None:
+        base = _DAY_EPOCH[day] = datetime.strptime(day, "%Y-%m-%d").timestamp()
+    return base + int(text[11:13]) * 3600 + int(text[14:16]) * 60 + float(text[17:])
+
+
+class CSVTail:
+    """
+    Lector incremental de un CSV de telemetría que otro proceso va
+    escribiendo. read() devuelve [(timestamp_s, [valores])] de las líneas
+    completas nuevas; el costo depende solo de lo agregado.
+    """
+
+    def __init__(self, path, backlog_bytes: int = None):
+        self.path = str(path)
+        self.backlog_bytes = backlog_bytes
+        self.header = []
+        self.fields = ("q", "tau")
+        self.rotations = 0
+        self.skipped = 0
+        self._file = None
+        self._open(backlog_bytes)
+
+    def _open(self, backlog_bytes=None):
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "rb")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._partial = b""
+
+        line = self._file.readline()
+        if not line.endswith(b"\n"):
+            # Encabezado todavía incompleto: se toma en el próximo read().
+            self._partial = line
+            self._need_header = True
+            return
+        self._set_header(line)
+
+        # Con backlog solo se leen los últimos bytes de un log largo; la
+        # primera línea tras el salto puede quedar cortada y se descarta.
+        if backlog_bytes is not None:
+            size = os.fstat(self._file.fileno()).st_size
+            start = size - backlog_bytes
+            if start > self._file.tell():
+                self._file.seek(start)
+                self._file.readline()
+
+    def _set_header(self, line: bytes):
+        self.header = line.decode("utf-8").rstrip("\r\n").split(",")
+        self.fields = header_fields(self.header[1:])
+        self._need_header = False
+
+    def _replaced(self) -> bool:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Rotación en curso: se sigue con el archivo abierto.
+            return False
+        return stat.st_ino != self._inode or stat.st_size < self._file.tell()
+
+    def read(self):
+        rows = []
+        if self._replaced():
+            # Lo que quedó por leer del archivo anterior se pierde si fue
+            # truncado; si fue renombrado, se vacía antes de cambiar.
+            self._parse(self._file.read(), rows)
+            self._open()
+            self.rotations += 1
+
+        self._parse(self._file.read(), rows)
+        return rows
+
+    def _parse(self, chunk: bytes, rows):
+        if not chunk:
+            return
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+
+        if self._need_header and lines:
+            self._set_header(lines.pop(0))
+
+        width = len(self.header) - 1
+        for line in lines:
+            fields = line.decode("utf-8").rstrip("\r").split(",")
+            if len(fields) != width + 1:
+                self.skipped += 1
+                continue
+            try:
+                rows.append((parse_timestamp(fields[0]), [float(x) for x in fields[1:]]))
+            except ValueError:
+                self.skipped += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
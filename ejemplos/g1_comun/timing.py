@@ -0,0 +1,324 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file timing.py
+# @brief Instrumentación de tiempos por fase de los writers de LowCmd.
+#
+# @descripcion
+#   `WriterTiming` registra, en cada tick del writer, cuatro fases:
+#     period   tiempo entre inicios de tick consecutivos.
+#     compute  interpolación y llenado del LowCmd.
+#     crc      cálculo del crc.
+#     publish  Publisher.Write.
+#
+#   Cada fase se acumula en un `LogHistogram` de estilo HDR: buckets
+#   log-lineales sobre nanosegundos enteros (32 sub-buckets por potencia de
+#   dos, error relativo < 3.2 %) en un `array` preasignado. Solo el hilo del
+#   writer escribe en los histogramas; el hilo de reporte los lee sin lock,
+#   aceptando que una línea periódica mezcle ticks de dos instantes.
+#
+#   Uso en un writer:
+#       def LowCmdWrite(self):
+#           ...
+#           self.timing.lap("compute")
+#           cmd.crc = self.crc.Crc(cmd)
+#           self.timing.lap("crc")
+#           publisher.Write(cmd)
+#           self.timing.lap("publish")
+#
+#   `DeadlineThread(..., timing=self.timing)` llama a begin() al inicio de cada
+#   tick, arranca el reporte periódico en Start() y vuelca el resultado en
+#   Wait(). Los scripts que terminan con sys.exit sin llamar a Wait() hacen
+#   el volcado desde atexit.
+#
+#   Variables de entorno (para scripts sin argparse):
+#     G1_TIMING          1 para activar la instrumentación.
+#     G1_TIMING_REPORT   segundos entre líneas de resumen (0 = solo al final).
+#     G1_TIMING_DUMP     ruta del JSON final (por defecto timing_<nombre>_<fecha>.json).
+# -----------------------------------------------------------------------------
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+
+PHASES = ("period", "compute", "crc", "publish")
+
+SUB_BITS = 5
+SUB_COUNT = 1 << SUB_BITS
+# 2^36 ns ~ 68 s: cualquier valor mayor se satura en el último bucket.
+MAX_BITS = 36
+BUCKETS = SUB_COUNT * (MAX_BITS - SUB_BITS + 1)
+
+
+def bucket_index(value_ns: int) -> int:
+    if value_ns < 2 * SUB_COUNT:
+        return value_ns if value_ns > 0 else 0
+
+    shift = value_ns.bit_length() - SUB_BITS - 1
+    index = SUB_COUNT * shift + (value_ns >> shift)
+    return index if index < BUCKETS else BUCKETS - 1
+
+
+def bucket_bounds(index: int):
+    """Rango [inferior, superior) en ns del bucket `index`."""
+    if index < 2 * SUB_COUNT:
+        return index, index + 1
+
+    shift = index // SUB_COUNT - 1
+    lower = (index - SUB_COUNT * shift) << shift
+    return lower, lower + (1 << shift)
+
+
+class LogHistogram:
+    """Histograma log-lineal de duraciones en nanosegundos."""
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * BUCKETS))
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = 0
+        self.max_ns = 0
+
+    def record(self, value_ns: int):
+        if value_ns < 0:
+            value_ns = 0
+
+        self.counts[bucket_index(value_ns)] += 1
+        if self.count == 0 or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+        self.total_ns += value_ns
+        self.count += 1
+
+    def percentile(self, p: float) -> int:
+        """Cota superior del bucket que contiene el percentil `p` (0-100)."""
+        if self.count == 0:
+            return 0
+
+        rank = max(1, int(round(self.count * p / 100.0)))
+        seen = 0
+
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            if seen >= rank:
+                return min(bucket_bounds(index)[1] - 1, self.max_ns)
+
+        return self.max_ns
+
+    def to_dict(self) -> dict:
+        mean = self.total_ns / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "min_ns": self.min_ns,
+            "mean_ns": mean,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "p999_ns": self.percentile(99.9),
+            "max_ns": self.max_ns,
+            "buckets": [
+                [bucket_bounds(index)[0], n]
+                for index, n in enumerate(self.counts) if n
+            ],
+        }
+
+
+def _fmt_us(value_ns: int) -> str:
+    return f"{value_ns / 1e3:.0f}"
+
+
+class WriterTiming:
+    """Histogramas por fase de un writer periódico."""
+
+    enabled = True
+
+    def __init__(self, name: str, interval: float, report_s: float = 5.0, dump_path=None):
+        self.name = name
+        self.interval = float(interval)
+        self.report_s = float(report_s)
+        self.dump_path = dump_path
+        self.histograms = {phase: LogHistogram() for phase in PHASES}
+
+        self._period = self.histograms["period"]
+        self._last_start = None
+        self._mark = 0
+        self._stop = threading.Event()
+        self._reporter = None
+        self._closed = True
+        self._atexit = False
+
+    # ---------------------------------------------------------
+    # Hot path (hilo del writer)
+    # ---------------------------------------------------------
+
+    def begin(self):
+        now = time.perf_counter_ns()
+        if self._last_start is not None:
+            self._period.record(now - self._last_start)
+        self._last_start = now
+        self._mark = now
+
+    def lap(self, phase: str):
+        now = time.perf_counter_ns()
+        self.histograms[phase].record(now - self._mark)
+        self._mark = now
+
+    # ---------------------------------------------------------
+    # Reporte
+    # ---------------------------------------------------------
+
+    def summary(self) -> str:
+        parts = [f"[TIMING] {self.name}"]
+        for phase in PHASES:
+            h = self.histograms[phase]
+            if h.count == 0:
+                continue
+            parts.append(
+                f"{phase} p50/p99/max={_fmt_us(h.percentile(50))}/"
+                f"{_fmt_us(h.percentile(99))}/{_fmt_us(h.max_ns)} us"
+            )
+        return " | ".join(parts)
+
+    def start(self):
+        self._closed = False
+        if not self._atexit:
+            atexit.register(self.close)
+            self._atexit = True
+
+        if self.report_s <= 0 or self._reporter is not None:
+            return
+
+        self._stop.clear()
+        self._reporter = threading.Thread(
+            target=self._report_loop,
+            name=f"{self.name}_timing",
+            daemon=True,
+        )
+        self._reporter.start()
+
+    def _report_loop(self):
+        while not self._stop.wait(self.report_s):
+            print(self.summary())
+
+    def close(self):
+        """Detiene el reporte, imprime el resumen final y vuelca el JSON."""
+        if self._closed:
+            return
+        self._closed = True
+
+        self._stop.set()
+        if self._reporter is not None:
+            self._reporter.join(timeout=1.0)
+            self._reporter = None
+
+        print(self.summary())
+
+        try:
+            path = self.dump()
+            print(f"[TIMING] Histogramas guardados en: {path}")
+        except OSError as error:
+            print(f"[WARN] No se pudo guardar el volcado de tiempos: {error}")
+
+    def dump(self, path=None) -> Path:
+        if path is None:
+            path = self.dump_path
+        if path is None:
+            stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = f"timing_{self.name}_{stamp}.json"
+
+        path = Path(path).expanduser()
+        data = {
+            "name": self.name,
+            "interval_s": self.interval,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "argv": sys.argv,
+            "unit": "ns",
+            "sub_bucket_bits": SUB_BITS,
+            "phases": {phase: h.to_dict() for phase, h in self.histograms.items()},
+        }
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+        return path
+
+
+class NullTiming:
+    """Writer sin --timing ni G1_TIMING: begin() y lap() no registran nada."""
+
+    enabled = False
+
+    def begin(self):
+        pass
+
+    def lap(self, phase: str):
+        pass
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_TIMING = NullTiming()
+
+
+def make_timing(name: str, interval: float, enabled=None, report_s=None, dump_path=None):
+    """
+    Crea la instrumentación de un writer. Los argumentos en None toman su
+    valor de G1_TIMING, G1_TIMING_REPORT y G1_TIMING_DUMP.
+    """
+    if enabled is None:
+        enabled = os.environ.get("G1_TIMING", "0").lower() in ("1", "true", "yes", "on")
+    if not enabled:
+        return NULL_TIMING
+
+    if report_s is None:
+        report_s = float(os.environ.get("G1_TIMING_REPORT", "5.0"))
+    if dump_path is None:
+        dump_path = os.environ.get("G1_TIMING_DUMP") or None
+
+    return WriterTiming(name, interval, report_s=report_s, dump_path=dump_path)
+
+
+def add_timing_arguments(parser):
+    """Agrega las opciones de instrumentación a un argparse.ArgumentParser."""
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        default=None,
+        help="Registra histogramas de periodo, cómputo, crc y publicación del writer.",
+    )
+    parser.add_argument(
+        "--timing-report",
+        type=float,
+        default=None,
+        help="Segundos entre líneas de resumen de tiempos (0 = solo al final).",
+    )
+    parser.add_argument(
+        "--timing-dump",
+        default=None,
+        help="Ruta del JSON con los histogramas al salir.",
+    )
+
+
+def timing_kwargs(args):
+    """Convierte los argumentos de `add_timing_arguments` en kwargs de make_timing."""
+    return {
+        "enabled": args.timing,
+        "report_s": args.timing_report,
+        "dump_path": args.timing_dump,
+    }
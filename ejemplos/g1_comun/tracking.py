@@ -0,0 +1,127 @@
+# -----------------------------------------------------------------------------
+# © 2025 Robotics 4.0.
+# Este archivo forma parte de ejemplos y guías de uso distribuidos bajo
+# la Licencia Apache 2.0.
+# -----------------------------------------------------------------------------
+# @file tracking.py
+# @brief Error de seguimiento q medido - q comandado, por joint y por paso.
+#
+# @descripcion
+#   TrackingError se alimenta desde el callback de rt/lowstate: compara el
+#   q medido de cada joint con el q del LowCmd que el writer publicó por
+#   última vez (el mismo objeto preasignado, adjunto con attach_command) y
+#   acumula suma de cuadrados, máximo absoluto y cantidad de muestras en la
+#   fila del paso de rutina en curso. No asigna memoria por muestra.
+#
+#   El planner marca los pasos:
+#       tracking.begin(len(compiled.step_names))
+#       for i, ... in compiled.steps():
+#           ...
+#           tracking.step(i)
+#       stats = tracking.end()
+#       print(stats.summary(compiled.step_names))
+#
+#   El error incluye el retardo propio de la trayectoria coseno y del PD
+#   (kp/kd) respecto del setpoint: es lo que se quiere medir. El q comandado
+#   se lee sin lock mientras el writer lo reescribe (g1_comun.runtime), así
+#   que algunos joints de una muestra pueden ser del tick anterior; frente
+#   al retardo del PD esa diferencia es despreciable.
+# -----------------------------------------------------------------------------
+
+from g1_comun.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+
+class TrackingStats:
+    """Resultado de una rutina: RMS y máximo por paso y joint (rad)."""
+
+    def __init__(self, joints, sumsq, peak, count):
+        self.joints = list(joints)
+        self.count = count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.rms = np.sqrt(sumsq / count[:, None])
+        self.max = np.where(count[:, None] > 0, peak, np.nan)
+        total = count.sum()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.total_rms = np.sqrt(sumsq.sum(axis=0) / total)
+        # Los pasos sin muestras tienen pico 0 y no cambian el máximo.
+        self.total_max = peak.max(axis=0) if total else np.full(len(self.joints), np.nan)
+
+    def summary(self, step_names) -> str:
+        """Tabla en mrad: una fila por paso con rms/máx de cada joint."""
+        label = max([len("rutina")] + [len(name) for name in step_names])
+        head = " | ".join(f"{j:>9}" for j in self.joints)
+        lines = [
+            "[TRACK] Error de seguimiento q medido - q comandado (rms/máx, mrad)",
+            f"  {'paso':<{4 + label}} | {head}",
+        ]
+
+        def row(name, rms, peak):
+            cells = " | ".join(
+                f"{'-':>9}" if np.isnan(r) else f"{f'{1e3 * r:.0f}/{1e3 * m:.0f}':>9}"
+                for r, m in zip(rms.tolist(), peak.tolist())
+            )
+            return f"  {name} | {cells}"
+
+        for i, name in enumerate(step_names):
+            lines.append(row(f"{i + 1:02d}. {name:<{label}}", self.rms[i], self.max[i]))
+        lines.append(row(f"{'rutina':<{4 + label}}", self.total_rms, self.total_max))
+        return "\n".join(lines)
+
+
+class TrackingError:
+    """Acumulador online del error de seguimiento, por paso de rutina."""
+
+    def __init__(self, joints):
+        self.joints = list(joints)
+        n = len(self.joints)
+        self._q = np.zeros(n)
+        self._cmd = np.zeros(n)
+        self._err = np.zeros(n)
+        self._command = None
+        # (sumsq, pico, cuenta) del paso en curso: una sola asignación de
+        # referencia, así el callback nunca mezcla filas de dos rutinas.
+        self._active = None
+        self._sumsq = np.zeros((0, n))
+        self._peak = np.zeros((0, n))
+        self._count = np.zeros(0, dtype=np.int64)
+
+    def attach_command(self, low_cmd):
+        """LowCmd preasignado del writer: su q es lo que se comandó."""
+        self._command = low_cmd
+
+    def begin(self, steps: int):
+        n = len(self.joints)
+        self._active = None
+        self._sumsq = np.zeros((steps, n))
+        self._peak = np.zeros((steps, n))
+        self._count = np.zeros(steps, dtype=np.int64)
+
+    def step(self, index: int):
+        self._active = (self._sumsq[index], self._peak[index], self._count[index:index + 1])
+
+    def capture(self, msg):
+        active = self._active
+        command = self._command
+        if active is None or command is None:
+            return
+        sumsq, peak, count = active
+
+        motors, cmds = msg.motor_state, command.motor_cmd
+        q, cmd, err = self._q, self._cmd, self._err
+        for k, j in enumerate(self.joints):
+            q[k] = motors[j].q
+            cmd[k] = cmds[j].q
+
+        np.subtract(q, cmd, out=err)
+        np.abs(err, out=err)
+        np.maximum(peak, err, out=peak)
+        np.multiply(err, err, out=err)
+        sumsq += err
+        count += 1
+
+    def end(self) -> TrackingStats:
+        """Deja de acumular y devuelve las estadísticas de la rutina."""
+        self._active = None
+        return TrackingStats(self.joints, self._sumsq, self._peak, self._count)
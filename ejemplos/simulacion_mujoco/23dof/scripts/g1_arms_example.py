@@ -28,33 +28,36 @@
 #   Las articulaciones no incluidas en la rutina conservan la posición tomada
 #   del primer LowState recibido.
 #
+#   La rutina se compila a una tabla con una fila por tick (g1_comun.routine)
+#   que se guarda junto al archivo fuente; --no-cache la recompila siempre.
+#   Con --trajectory spline la rutina es un spline C2 sin paradas entre pasos
+#   y cada tick envía también dq de feedforward.
+#
 # @uso
 #   python3 g1_arms_example.py --pose <rutina.json>
 #   python3 g1_arms_example.py --pose <rutina.txt> --interface lo
 # -----------------------------------------------------------------------------
 
 import argparse
+import importlib
 import json
-import math
 import sys
-import time
 from pathlib import Path
 
-try:
-    from unitree_sdk2py.core.channel import (
-        ChannelFactoryInitialize,
-        ChannelPublisher,
-        ChannelSubscriber,
-    )
-    from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
-    from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_, LowState_
-    from unitree_sdk2py.utils.crc import CRC
-    from unitree_sdk2py.utils.thread import RecurrentThread
-except Exception as error:
-    print("[ERROR] No se pudo importar unitree_sdk2py.")
-    print("Verifica que el entorno de Unitree SDK2 Python esté instalado y activado.")
-    print(f"Detalle: {error}")
-    sys.exit(1)
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize
+from g1_comun.joints import G1_23DOF_MUJOCO
+from g1_comun.routine import (
+    add_trajectory_arguments,
+    compile_file,
+    cosine_profile,
+    resolve_trajectory,
+)
+from g1_comun.runtime import LowCmdBackend, MotionRuntime
+from g1_comun.scheduler import add_scheduler_arguments, scheduler_kwargs
+from g1_comun.timing import add_timing_arguments, make_timing, timing_kwargs
 
 
 G1_NUM_MOTOR = 23
@@ -96,9 +99,15 @@ def find_default_joint_map():
 DEFAULT_JOINT_MAP = find_default_joint_map()
 
 
-class Mode:
-    PR = 0
-    AB = 1
+def load_sdk():
+    """Comprueba unitree_sdk2py justo antes de abrir los canales."""
+    try:
+        importlib.import_module("unitree_sdk2py.idl.unitree_hg.msg.dds_")
+    except Exception as error:
+        print("[ERROR] No se pudo importar unitree_sdk2py.")
+        print("Verifica que el entorno de Unitree SDK2 Python esté instalado y activado.")
+        print(f"Detalle: {error}")
+        sys.exit(1)
 
 
 def init_channel(interface):
@@ -223,50 +232,40 @@ def validate_23dof_indices(indices, source_name):
 
 
 class PosePlayer:
-    def __init__(self, controlled_indices, control_dt=0.002):
+    def __init__(self, controlled_indices, control_dt=0.002, scheduler=None, timing=None):
         self.num_motors = G1_NUM_MOTOR
         self.controlled_indices = sorted(set(int(i) for i in controlled_indices))
         self.controlled_index_set = set(self.controlled_indices)
         self.control_dt = float(control_dt)
 
-        self.crc = CRC()
-        self.lowcmd_publisher = None
-        self.lowstate_subscriber = None
-        self.low_state = None
-        self.mode_machine = 0
-        self.writer_thread = None
-
-        self.target_pos = {i: 0.0 for i in range(self.num_motors)}
-        self.q_init = {i: 0.0 for i in range(self.num_motors)}
-        self.current_cmd_pos = {i: 0.0 for i in range(self.num_motors)}
+        # Canales, LowCmd preasignado y writer (g1_comun.runtime) para los 23
+        # motores; los no controlados tienen start == target y conservan su q.
+        self.runtime = MotionRuntime(
+            LowCmdBackend(G1_23DOF_MUJOCO, Kp, Kd),
+            self.control_dt,
+            name="g1_23dof_arms_writer",
+            timing=make_timing(Path(__file__).stem, self.control_dt, **(timing or {})),
+            scheduler=scheduler,
+            profile=cosine_profile,
+        )
+        self.joints = self.runtime.joints
+        self.motion = self.runtime.motion
 
-        self.t = 0.0
-        self.T = 1.0
+    @property
+    def low_state(self):
+        return self.runtime.low_state
 
     def init_dds(self):
-        self.lowcmd_publisher = ChannelPublisher("rt/lowcmd", LowCmd_)
-        self.lowcmd_publisher.Init()
-
-        self.lowstate_subscriber = ChannelSubscriber("rt/lowstate", LowState_)
-        self.lowstate_subscriber.Init(self.low_state_handler, 10)
-
-    def low_state_handler(self, msg):
-        self.low_state = msg
-
-        if hasattr(msg, "mode_machine"):
-            self.mode_machine = msg.mode_machine
+        self.runtime.open()
 
     def wait_lowstate(self, timeout=8.0):
         print("[INFO] Esperando rt/lowstate...")
-        start = time.time()
 
-        while self.low_state is None:
-            if time.time() - start > timeout:
-                raise RuntimeError(
-                    "No llegó rt/lowstate. Verifica que MuJoCo esté ejecutándose "
-                    "con el modelo de 23 DoF."
-                )
-            time.sleep(0.05)
+        if not self.runtime.wait_state(timeout):
+            raise RuntimeError(
+                "No llegó rt/lowstate. Verifica que MuJoCo esté ejecutándose "
+                "con el modelo de 23 DoF."
+            )
 
         if len(self.low_state.motor_state) < self.num_motors:
             raise RuntimeError(
@@ -279,76 +278,22 @@ class PosePlayer:
         if self.low_state is None:
             raise RuntimeError("No hay LowState para inicializar.")
 
-        for index in range(self.num_motors):
-            position = float(self.low_state.motor_state[index].q)
-            self.q_init[index] = position
-            self.target_pos[index] = position
-            self.current_cmd_pos[index] = position
+        self.runtime.read_state()
 
         print("[OK] Posición inicial tomada desde LowState.")
 
-    def interpolate_position(self, q_start, q_target):
-        if self.T <= 0:
-            return q_target
-
-        ratio = (
-            (1.0 - math.cos(math.pi * (self.t / self.T))) / 2.0
-            if self.t < self.T
-            else 1.0
-        )
-        return q_start + (q_target - q_start) * ratio
-
-    def low_cmd_write(self):
-        if self.low_state is None:
-            return
-
-        cmd = unitree_hg_msg_dds__LowCmd_()
-        cmd.mode_pr = Mode.PR
-        cmd.mode_machine = self.mode_machine
-
-        for index in range(self.num_motors):
-            cmd.motor_cmd[index].mode = 1
-            cmd.motor_cmd[index].dq = 0.0
-            cmd.motor_cmd[index].tau = 0.0
-            cmd.motor_cmd[index].kp = Kp[index]
-            cmd.motor_cmd[index].kd = Kd[index]
-
-            if index in self.controlled_index_set:
-                q_start = self.q_init[index]
-                q_target = self.target_pos[index]
-                commanded_position = self.interpolate_position(
-                    q_start,
-                    q_target,
-                )
-            else:
-                commanded_position = self.current_cmd_pos[index]
-
-            cmd.motor_cmd[index].q = commanded_position
-            self.current_cmd_pos[index] = commanded_position
-
-        cmd.crc = self.crc.Crc(cmd)
-        self.lowcmd_publisher.Write(cmd)
-
-        self.t += self.control_dt
-
     def start_writer(self):
-        if self.writer_thread is not None:
+        if not self.runtime.start_writer():
             raise RuntimeError("El hilo LowCmd ya está en ejecución.")
 
-        self.writer_thread = RecurrentThread(
-            interval=self.control_dt,
-            target=self.low_cmd_write,
-            name="g1_23dof_arms_writer",
-        )
-        self.writer_thread.Start()
         print("[OK] Writer LowCmd iniciado.")
 
     def move_to(self, updates, duration):
+        """Publica el movimiento y devuelve su MotionFuture (g1_comun.motion)."""
         if self.low_state is None:
             raise RuntimeError("LowState no recibido.")
 
-        for index in self.controlled_indices:
-            self.q_init[index] = self.current_cmd_pos[index]
+        target = self.motion.unset()
 
         for key, value in updates.items():
             index = int(key)
@@ -360,90 +305,43 @@ class PosePlayer:
                 )
                 continue
 
-            self.target_pos[index] = float(value)
+            target[index] = float(value)
 
-        self.T = max(float(duration), 0.001)
-        self.t = 0.0
+        return self.motion.move(target, duration)
 
-        wait_start = time.time()
-        max_wait = self.T + 2.0
-
-        while self.t < self.T:
-            if time.time() - wait_start > max_wait:
-                raise RuntimeError(
-                    "El hilo de control no completó la interpolación dentro "
-                    "del tiempo esperado."
-                )
-            time.sleep(self.control_dt)
-
-        self.t = self.T
-        time.sleep(max(self.control_dt, 0.002))
-
-    def play_routine(self, routine):
-        name = routine.get("nombre_rutina", "routine")
-        steps = routine.get("pasos", [])
-
-        if not isinstance(steps, list):
-            raise ValueError("El campo 'pasos' debe ser una lista.")
-
-        print(f"\n[INFO] Ejecutando rutina: {name}")
-        print(f"[INFO] Pasos: {len(steps)}")
-
-        for step in steps:
-            step_name = step.get("nombre", "Paso")
-            duration = float(step.get("duracion", 1.0))
-            raw_positions = step.get("posiciones", {})
-
-            if not isinstance(raw_positions, dict):
-                raise ValueError(
-                    f"Las posiciones del paso '{step_name}' deben ser un objeto."
-                )
-
-            updates = {}
+    def play_routine(self, compiled):
+        if self.low_state is None:
+            raise RuntimeError("LowState no recibido.")
 
-            for key, value in raw_positions.items():
-                index = int(key)
-                updates[index] = float(value)
+        print(f"\n[INFO] Ejecutando rutina: {compiled.name}")
+        print(f"[INFO] Pasos: {len(compiled.step_names)}")
 
+        for index in compiled.ignored:
             print(
-                f"  -> {step_name} | dur={duration:.3f}s | "
-                f"joints={sorted(updates.keys())}"
+                f"[WARN] Índice {index} no está habilitado para esta rutina. "
+                "Se ignora."
             )
-            self.move_to(updates, duration)
 
-        print("[OK] Rutina finalizada.")
-
-    def hold_current_pose(self, repeat=50, delay=0.02):
-        final_cmd = unitree_hg_msg_dds__LowCmd_()
-        final_cmd.mode_pr = Mode.PR
-        final_cmd.mode_machine = self.mode_machine
-
-        for index in range(self.num_motors):
-            final_cmd.motor_cmd[index].mode = 1
-            final_cmd.motor_cmd[index].q = self.current_cmd_pos[index]
-            final_cmd.motor_cmd[index].dq = 0.0
-            final_cmd.motor_cmd[index].tau = 0.0
-            final_cmd.motor_cmd[index].kp = Kp[index]
-            final_cmd.motor_cmd[index].kd = Kd[index]
+        def report(step, step_name, duration, active):
+            print(f"  -> {step_name} | dur={duration:.3f}s | joints={active}")
 
-        final_cmd.crc = self.crc.Crc(final_cmd)
+        columns = compiled.joints
+        if not self.runtime.play_table(compiled, columns, self.joints.command[columns].copy(), report):
+            raise RuntimeError(
+                "El hilo de control no completó la interpolación dentro "
+                "del tiempo esperado."
+            )
 
-        for _ in range(repeat):
-            self.lowcmd_publisher.Write(final_cmd)
-            time.sleep(delay)
+        print("[OK] Rutina finalizada.")
 
     def stop(self):
-        # El hilo debe detenerse antes de publicar el comando final para evitar
-        # que ambas rutas escriban simultáneamente sobre rt/lowcmd.
-        if self.writer_thread is not None:
-            try:
-                self.writer_thread.Wait()
-                print("[INFO] Writer LowCmd detenido.")
-            finally:
-                self.writer_thread = None
+        # close() detiene el hilo antes de publicar el comando final para
+        # evitar que ambas rutas escriban simultáneamente sobre rt/lowcmd.
+        if self.runtime.stop_writer():
+            print("[INFO] Writer LowCmd detenido.")
 
-        if self.lowcmd_publisher is not None and self.low_state is not None:
-            self.hold_current_pose()
+        if self.low_state is not None:
+            self.runtime.close(repeat=50)
 
         print("[INFO] Programa terminado.")
 
@@ -485,6 +383,14 @@ def main():
         default=8.0,
         help="Tiempo máximo para esperar rt/lowstate.",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Compila la rutina sin leer ni guardar la tabla .traj.npz.",
+    )
+    add_scheduler_arguments(parser)
+    add_timing_arguments(parser)
+    add_trajectory_arguments(parser, "cosine")
     args = parser.parse_args()
 
     pose_path = Path(args.pose).expanduser().resolve()
@@ -494,6 +400,7 @@ def main():
         sys.exit(1)
 
     try:
+        trajectory = resolve_trajectory(args.trajectory, "cosine")
         routine = load_routine(pose_path)
         routine_indices = indices_from_routine(routine)
         validate_23dof_indices(routine_indices, "La rutina")
@@ -513,6 +420,16 @@ def main():
         if not controlled_indices:
             raise ValueError("No hay índices controlables en la rutina.")
 
+        compiled, cached = compile_file(
+            pose_path,
+            G1_23DOF_MUJOCO.subset("g1_23dof_mujoco_rutina", controlled_indices),
+            args.control_dt,
+            profile=trajectory,
+            min_duration=0.001,
+            loader=lambda _path: routine,
+            cache=not args.no_cache,
+        )
+
     except (OSError, TypeError, ValueError, json.JSONDecodeError) as error:
         print(f"[ERROR] {error}")
         sys.exit(1)
@@ -522,13 +439,21 @@ def main():
     print(f"Número de motores: {G1_NUM_MOTOR}")
     print(f"Rutina: {pose_path}")
     print(f"Índices controlados: {controlled_indices}")
+    print(f"Trayectoria: {trajectory}")
+    print(
+        f"Tabla {'en caché' if cached else 'compilada'}: "
+        f"{compiled.rows} filas ({compiled.duration:.2f}s)"
+    )
     print("")
 
+    load_sdk()
     init_channel(args.interface)
 
     player = PosePlayer(
         controlled_indices=controlled_indices,
         control_dt=args.control_dt,
+        scheduler=scheduler_kwargs(args),
+        timing=timing_kwargs(args),
     )
     player.init_dds()
 
@@ -544,7 +469,7 @@ def main():
         )
 
         player.start_writer()
-        player.play_routine(routine)
+        player.play_routine(compiled)
 
     except KeyboardInterrupt:
         print("\n[INFO] Ctrl+C detectado. Interrumpiendo.")
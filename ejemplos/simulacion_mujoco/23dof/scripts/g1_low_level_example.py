@@ -31,17 +31,23 @@
 # -----------------------------------------------------------------------------
 import time
 import sys
+from pathlib import Path
+
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
 
-from unitree_sdk2py.core.channel import ChannelPublisher, ChannelFactoryInitialize
-from unitree_sdk2py.core.channel import ChannelSubscriber, ChannelFactoryInitialize
 from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
 from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowState_
 from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_
 from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-from unitree_sdk2py.utils.crc import CRC
-from unitree_sdk2py.utils.thread import RecurrentThread
 from unitree_sdk2py.comm.motion_switcher.motion_switcher_client import MotionSwitcherClient
 
+from g1_comun.channel import ChannelFactoryInitialize, ChannelPublisher, ChannelSubscriber
+from g1_comun.crc import LowCmdCrc
+from g1_comun.scheduler import DeadlineThread
+from g1_comun.startup import Startup
+from g1_comun.timing import make_timing
+
 import numpy as np
 
 G1_NUM_MOTOR = 23
@@ -103,7 +109,8 @@ class Mode:
 
 
 class Custom:
-    def __init__(self):
+    def __init__(self, startup: Startup = None):
+        self.startup = startup or Startup(Path(__file__).stem)
         self.time_ = 0.0
         self.control_dt_ = 0.002  # [2ms]
         self.duration_ = 3.0      # [3 s]
@@ -113,7 +120,8 @@ class Custom:
         self.low_cmd = unitree_hg_msg_dds__LowCmd_()
         self.low_state = None
         self.update_mode_machine_ = False
-        self.crc = CRC()
+        self.crc = LowCmdCrc()
+        self.timing = make_timing(Path(__file__).stem, self.control_dt_)
 
     def Init(self):
         # self.msc = MotionSwitcherClient()
@@ -135,14 +143,13 @@ class Custom:
         self.lowstate_subscriber.Init(self.LowStateHandler, 10)
 
     def Start(self):
-        self.lowCmdWriteThreadPtr = RecurrentThread(
-            interval=self.control_dt_, target=self.LowCmdWrite, name="control"
+        self.lowCmdWriteThreadPtr = DeadlineThread(
+            interval=self.control_dt_, target=self.LowCmdWrite, name="control",
+            timing=self.timing,
         )
-        while self.update_mode_machine_ == False:
-            time.sleep(1)
-
-        if self.update_mode_machine_ == True:
-            self.lowCmdWriteThreadPtr.Start()
+        # El primer LowState fija mode_machine_ antes de despertar a wait_state().
+        self.startup.wait_state()
+        self.lowCmdWriteThreadPtr.Start()
 
     def LowStateHandler(self, msg: LowState_):
         self.low_state = msg
@@ -150,6 +157,7 @@ class Custom:
         if self.update_mode_machine_ == False:
             self.mode_machine_ = self.low_state.mode_machine
             self.update_mode_machine_ = True
+            self.startup.state_received()
 
         self.counter_ += 1
         if self.counter_ % 500 == 0:
@@ -214,8 +222,12 @@ class Custom:
             self.low_cmd.motor_cmd[G1JointIndex.LeftWristRoll].q = L_WristYaw_des
             self.low_cmd.motor_cmd[G1JointIndex.RightWristRoll].q = R_WristYaw_des
 
+        self.timing.lap("compute")
         self.low_cmd.crc = self.crc.Crc(self.low_cmd)
+        self.timing.lap("crc")
         self.lowcmd_publisher_.Write(self.low_cmd)
+        self.timing.lap("publish")
+        self.startup.command_sent()
 
     def StopAndShutdown(self, repeat: int = 50, delay: float = 0.05):
         """Detiene hilo de control y pone todos los motores a cero de forma segura."""
@@ -253,12 +265,14 @@ if __name__ == '__main__':
     print("WARNING: Please ensure there are no obstacles around the robot while running this example.")
     input("Press Enter to continue...")
 
+    startup = Startup(Path(__file__).stem)
     if len(sys.argv) > 1:
         ChannelFactoryInitialize(0, sys.argv[1])
     else:
         ChannelFactoryInitialize(1, "lo")
+    startup.mark("DDS")
 
-    custom = Custom()
+    custom = Custom(startup)
     custom.Init()
     custom.Start()
 
@@ -6,15 +6,9 @@ import time
 from pathlib import Path
 from datetime import datetime
 
-try:
-    from unitree_sdk2py.core.channel import ChannelFactoryInitialize
-    from unitree_sdk2py.core.channel import ChannelSubscriber
-    from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-except Exception as e:
-    print("[ERROR] No se pudo importar unitree_sdk2py.")
-    print("Verifica que el entorno de Unitree SDK2 Python esté instalado/activado.")
-    print(f"Detalle: {e}")
-    sys.exit(1)
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))  # ejemplos/
+
+from g1_comun.statehub import DEFAULT_HUB_NAME, StateHubClient
 
 
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -28,10 +22,43 @@ class LowStateReader:
         self.low_state = None
         self.last_time = None
 
-    def handler(self, msg: LowState_):
+    def handler(self, msg: "LowState_"):
         self.low_state = msg
         self.last_time = time.time()
 
+    def motor_positions(self):
+        return [m.q for m in self.low_state.motor_state]
+
+
+class HubStateReader:
+    """Lee rt/lowstate del hub de estado local (herramientas/state_hub.py)."""
+
+    def __init__(self, name: str):
+        self.client = StateHubClient(name)
+        if self.client.lowstate is None:
+            raise FileNotFoundError(f"El hub '{name}' no publica rt/lowstate.")
+
+    @property
+    def low_state(self):
+        return self.client.lowstate.latest()
+
+    def motor_positions(self):
+        return self.low_state["q"]
+
+
+def load_sdk():
+    """Canales y LowState_ del SDK; con --hub no hacen falta y no se importan."""
+    global ChannelFactoryInitialize, ChannelSubscriber, LowState_
+    try:
+        from unitree_sdk2py.core.channel import ChannelFactoryInitialize
+        from unitree_sdk2py.core.channel import ChannelSubscriber
+        from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
+    except Exception as e:
+        print("[ERROR] No se pudo importar unitree_sdk2py.")
+        print("Verifica que el entorno de Unitree SDK2 Python esté instalado/activado.")
+        print(f"Detalle: {e}")
+        sys.exit(1)
+
 
 def init_channel(interface: str):
     if interface == "lo":
@@ -92,18 +119,20 @@ def resolve_capture_indices(args):
     sys.exit(1)
 
 
-def get_motor_q(low_state, idx: int):
+def get_motor_q(motor_q, idx: int):
     try:
-        return float(low_state.motor_state[idx].q)
+        return float(motor_q[idx])
     except Exception:
         raise RuntimeError(f"No se pudo leer motor_state[{idx}].q")
 
 
-def snapshot_positions(low_state, indices):
+def snapshot_positions(reader, indices):
+    # Una sola lectura del estado para que todos los joints sean del mismo instante.
+    motor_q = reader.motor_positions()
     positions = {}
 
     for idx in indices:
-        positions[str(idx)] = round(get_motor_q(low_state, idx), 6)
+        positions[str(idx)] = round(get_motor_q(motor_q, idx), 6)
 
     return positions
 
@@ -152,7 +181,7 @@ def save_routine(args, steps):
     print("")
 
 
-def wait_lowstate(reader: LowStateReader, timeout: float):
+def wait_lowstate(reader, timeout: float):
     print("[INFO] Esperando rt/lowstate...")
 
     start = time.time()
@@ -181,21 +210,38 @@ def main():
     parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR))
     parser.add_argument("--overwrite", action="store_true")
     parser.add_argument("--timeout", type=float, default=8.0)
+    parser.add_argument(
+        "--hub",
+        nargs="?",
+        const=DEFAULT_HUB_NAME,
+        help="Lee rt/lowstate del hub de estado local en lugar de suscribirse (ignora --interface).",
+    )
     args = parser.parse_args()
 
     indices, name_by_index = resolve_capture_indices(args)
 
     print("\n[CONFIGURACIÓN]")
-    print(f"Interface: {args.interface}")
+    if args.hub:
+        print(f"Hub de estado: {args.hub}")
+    else:
+        print(f"Interface: {args.interface}")
     print(f"Num motors: {args.num_motors}")
     print(f"Índices capturados: {indices}")
     print("")
 
-    init_channel(args.interface)
+    if args.hub:
+        try:
+            reader = HubStateReader(args.hub)
+        except FileNotFoundError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+    else:
+        load_sdk()
+        init_channel(args.interface)
 
-    reader = LowStateReader()
-    sub = ChannelSubscriber("rt/lowstate", LowState_)
-    sub.Init(reader.handler, 10)
+        reader = LowStateReader()
+        sub = ChannelSubscriber("rt/lowstate", LowState_)
+        sub.Init(reader.handler, 10)
 
     wait_lowstate(reader, args.timeout)
 
@@ -212,7 +258,7 @@ def main():
         cmd = input("capture> ").strip().lower()
 
         if cmd == "p":
-            positions = snapshot_positions(reader.low_state, indices)
+            positions = snapshot_positions(reader, indices)
             print_snapshot(positions, name_by_index)
 
         elif cmd == "c":
@@ -231,7 +277,7 @@ def main():
                     print("[WARN] Duración inválida. Usando 1.0 s.")
                     duration = 1.0
 
-            positions = snapshot_positions(reader.low_state, indices)
+            positions = snapshot_positions(reader, indices)
             print_snapshot(positions, name_by_index)
 
             steps.append({
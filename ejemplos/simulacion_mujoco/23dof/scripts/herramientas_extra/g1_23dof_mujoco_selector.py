@@ -15,22 +15,32 @@
 # Comandos:
 #   número = ejecutar rutina
 #   l      = listar rutinas otra vez
+#   f      = activar/desactivar el modo más rápido seguro
 #   x      = salir y sostener última postura
+#
+# Cada rutina se compila una vez a una tabla con una fila por tick
+# (g1_comun.routine) y se guarda junto al .json; el writer solo copia la
+# fila del tick. G1_TRAJECTORY=spline recorre cada rutina como un spline C2
+# sin paradas entre pasos y envía dq de feedforward.
+#
+# En modo más rápido seguro (f) cada rutina se re-temporiza desde la pose
+# actual con las duraciones mínimas que respetan los límites por joint de
+# g1_comun.retime; esas tablas no se guardan en caché.
 # -----------------------------------------------------------------------------
 
-import time
 import sys
-import json
 import re
 from pathlib import Path
 
-from unitree_sdk2py.core.channel import ChannelPublisher, ChannelFactoryInitialize
-from unitree_sdk2py.core.channel import ChannelSubscriber
-from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-from unitree_sdk2py.utils.crc import CRC
-from unitree_sdk2py.utils.thread import RecurrentThread
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize
+from g1_comun.joints import G1_23DOF_ARM_SDK, G1_29DOF, G1_29DOF_ONLY
+from g1_comun.retime import JointLimits, format_report, retime_routine
+from g1_comun.routine import compile_file, compile_routine, load_json_routine, resolve_trajectory
+from g1_comun.runtime import LowCmdBackend, MotionRuntime
+from g1_comun.timing import make_timing
 
 
 # Aunque el modelo operativo sea G1 23 DoF, el LowCmd mantiene slots tipo G1.
@@ -54,11 +64,6 @@ Kd = [
 ]
 
 
-class Mode:
-    PR = 0
-    AB = 1
-
-
 class G123DoFMujocoSelector:
     """
     Selector de rutinas JSON para G1 23 DoF.
@@ -81,75 +86,51 @@ class G123DoFMujocoSelector:
     porque corresponden a grados extra del modelo 29 DoF.
     """
 
-    def __init__(self, poses_dir: Path, control_dt: float = 0.002):
+    def __init__(self, poses_dir: Path, control_dt: float = 0.002, trajectory: str = "linear",
+                 fastest: bool = False):
         self.poses_dir = poses_dir
         self.control_dt = control_dt
-        self.crc = CRC()
-
-        self.lowcmd_publisher_ = None
-        self.lowstate_subscriber = None
-        self.low_state = None
-        self.mode_machine_ = 0
-        self._writer_thread = None
-
-        self.controlled_joints = [
-            12,
-            15, 16, 17, 18, 19,
-            22, 23, 24, 25, 26
-        ]
-
-        self.excluded_29dof_only_joints = [
-            13, 14, 20, 21, 27, 28
-        ]
-
-        self.target_pos = {i: 0.0 for i in range(G1_NUM_MOTOR)}
-        self.q_init = {i: 0.0 for i in range(G1_NUM_MOTOR)}
-        self.current_cmd_pos = {i: 0.0 for i in range(G1_NUM_MOTOR)}
-
-        # Posiciones de retención para joints no controlados.
-        # Esto evita mandar piernas o grados extra a cero de forma brusca.
-        self.hold_pos = {i: 0.0 for i in range(G1_NUM_MOTOR)}
-
-        self.t = 0.0
-        self.T = 1.0
+        self.trajectory = trajectory
+        self.fastest = fastest
+
+        self.controlled_layout = G1_23DOF_ARM_SDK
+        self.controlled_joints = G1_23DOF_ARM_SDK.joint_list
+        self.excluded_29dof_only_joints = list(G1_29DOF_ONLY)
+        self.limits = JointLimits(self.controlled_layout)
+
+        # Writer de rt/lowcmd sobre los 29 motores (g1_comun.runtime). Los
+        # joints no controlados conservan start == target == postura inicial
+        # real: no se mandan piernas ni grados extra a cero de forma brusca.
+        # move_to devuelve un futuro que el writer completa al terminar.
+        self.runtime = MotionRuntime(
+            LowCmdBackend(G1_29DOF, Kp, Kd),
+            self.control_dt,
+            name="g1_23dof_lowcmd_writer",
+            timing=make_timing(Path(__file__).stem, self.control_dt),
+        )
+        self.joints = self.runtime.joints
+        self.motion = self.runtime.motion
 
     # ---------------------------------------------------------
     # Comunicación MuJoCo
     # ---------------------------------------------------------
 
     def Init(self):
-        self.lowcmd_publisher_ = ChannelPublisher("rt/lowcmd", LowCmd_)
-        self.lowcmd_publisher_.Init()
+        self.runtime.open()
 
-        self.lowstate_subscriber = ChannelSubscriber("rt/lowstate", LowState_)
-        self.lowstate_subscriber.Init(self.LowStateHandler, 10)
-
-    def LowStateHandler(self, msg: LowState_):
-        self.low_state = msg
-        if hasattr(msg, "mode_machine"):
-            self.mode_machine_ = msg.mode_machine
+    @property
+    def low_state(self):
+        return self.runtime.low_state
 
     def wait_lowstate(self, timeout=8.0):
         print("[INFO] Esperando rt/lowstate...")
-        start = time.time()
 
-        while self.low_state is None:
-            if time.time() - start > timeout:
-                print("[ERROR] LowState no recibido dentro del timeout.")
-                print("Verifica que MuJoCo esté abierto y que estés usando interface lo.")
-                return False
-            time.sleep(0.05)
+        if not self.runtime.wait_state(timeout):
+            print("[ERROR] LowState no recibido dentro del timeout.")
+            print("Verifica que MuJoCo esté abierto y que estés usando interface lo.")
+            return False
 
-        for i in range(G1_NUM_MOTOR):
-            try:
-                q0 = float(self.low_state.motor_state[i].q)
-            except Exception:
-                q0 = 0.0
-
-            self.hold_pos[i] = q0
-            self.q_init[i] = q0
-            self.target_pos[i] = q0
-            self.current_cmd_pos[i] = q0
+        self.runtime.read_state()
 
         print("\n[POSE INICIAL REAL - JOINTS CONTROLADOS]")
         for j in self.controlled_joints:
@@ -159,71 +140,24 @@ class G123DoFMujocoSelector:
         return True
 
     # ---------------------------------------------------------
-    # Interpolación y envío LowCmd
+    # Envío LowCmd
     # ---------------------------------------------------------
 
-    def interpolate_position(self, q_init, q_target):
-        if self.T <= 0:
-            return q_target
-
-        s = max(0.0, min(self.t / self.T, 1.0))
-        return q_init + (q_target - q_init) * s
-
-    def LowCmdWrite(self):
-        if self.low_state is None:
-            return
-
-        cmd = unitree_hg_msg_dds__LowCmd_()
-        cmd.mode_pr = Mode.PR
-        cmd.mode_machine = self.mode_machine_
-
-        for i in range(G1_NUM_MOTOR):
-            cmd.motor_cmd[i].mode = 1
-            cmd.motor_cmd[i].kp = Kp[i]
-            cmd.motor_cmd[i].kd = Kd[i]
-            cmd.motor_cmd[i].dq = 0.0
-            cmd.motor_cmd[i].tau = 0.0
-
-            if i in self.controlled_joints:
-                q0 = self.q_init.get(i, self.current_cmd_pos.get(i, 0.0))
-                q1 = self.target_pos.get(i, q0)
-                cmd.motor_cmd[i].q = self.interpolate_position(q0, q1)
-            else:
-                # Mantener el resto en la postura inicial real.
-                # No se fuerzan piernas ni joints extra a cero.
-                cmd.motor_cmd[i].q = self.hold_pos.get(i, 0.0)
-
-        cmd.crc = self.crc.Crc(cmd)
-        self.lowcmd_publisher_.Write(cmd)
-
-        self.t += self.control_dt
-
     def StartWriter(self):
-        if self._writer_thread is None:
-            self._writer_thread = RecurrentThread(
-                self.control_dt,
-                target=self.LowCmdWrite,
-                name="g1_23dof_lowcmd_writer"
-            )
-            self._writer_thread.Start()
+        if self.runtime.start_writer():
             print("[INFO] LowCmd writer iniciado.")
         else:
             print("[WARN] Writer ya estaba corriendo.")
 
     def move_to(self, updates: dict, duration: float = 1.0):
+        """
+        Publica el movimiento y devuelve su MotionFuture (g1_comun.motion):
+        .result() para esperar, await desde asyncio o .cancel() para detenerlo.
+        """
         if self.low_state is None:
             raise RuntimeError("LowState no recibido. No se puede mover con seguridad.")
 
-        for j in self.controlled_joints:
-            self.q_init[j] = float(
-                self.current_cmd_pos.get(j, self.low_state.motor_state[j].q)
-            )
-
-        new_targets = {
-            j: float(self.current_cmd_pos.get(j, self.low_state.motor_state[j].q))
-            for j in self.controlled_joints
-        }
-
+        new_targets = {}
         ignored = []
 
         for k, v in updates.items():
@@ -233,7 +167,7 @@ class G123DoFMujocoSelector:
             except Exception:
                 continue
 
-            if jidx in self.controlled_joints:
+            if jidx in self.controlled_layout:
                 new_targets[jidx] = value
             elif jidx in self.excluded_29dof_only_joints:
                 ignored.append(jidx)
@@ -241,22 +175,12 @@ class G123DoFMujocoSelector:
         if ignored:
             print(f"[INFO] Joints 29 DoF ignorados para G1 23 DoF: {sorted(set(ignored))}")
 
-        for j in self.controlled_joints:
-            self.target_pos[j] = new_targets[j]
-
-        self.T = float(duration) if float(duration) > 0 else 0.001
-        self.t = 0.0
+        # Los joints sin valor (NaN) conservan el último comando.
+        target = self.motion.unset()
+        if new_targets:
+            target[list(new_targets)] = list(new_targets.values())
 
-        while self.t < self.T:
-            time.sleep(self.control_dt)
-
-        self.t = self.T
-
-        for j in self.controlled_joints:
-            self.current_cmd_pos[j] = self.target_pos[j]
-            self.q_init[j] = self.target_pos[j]
-
-        time.sleep(max(self.control_dt, 0.002))
+        return self.motion.move(target, duration)
 
     # ---------------------------------------------------------
     # Carga y ejecución de rutinas
@@ -266,45 +190,49 @@ class G123DoFMujocoSelector:
         if not filepath.is_file():
             raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
 
-        with open(filepath, "r", encoding="utf-8") as f:
-            routine = json.load(f)
-
-        return routine
-
-    def PlayRoutine(self, routine: dict):
-        name = routine.get("nombre_rutina", "routine")
-        pasos = routine.get("pasos", [])
+        if self.fastest:
+            routine, report = retime_routine(
+                load_json_routine(filepath),
+                self.controlled_layout,
+                self.limits,
+                profile=self.trajectory,
+                initial=self.joints.current[self.controlled_layout.joints],
+            )
+            print(f"[INFO] Modo más rápido seguro: {format_report(report)}")
+            return compile_routine(routine, self.controlled_layout, self.control_dt, profile=self.trajectory)
+
+        compiled, cached = compile_file(
+            filepath,
+            self.controlled_layout,
+            self.control_dt,
+            profile=self.trajectory,
+        )
+        print(
+            f"[INFO] Tabla {'en caché' if cached else 'compilada'}: "
+            f"{compiled.rows} filas ({compiled.duration:.2f}s)"
+        )
+        return compiled
+
+    def PlayRoutine(self, compiled):
+        joints = self.joints
+        columns = self.controlled_layout.joints
 
         print("\n" + "=" * 72)
-        print(f"[INFO] Ejecutando rutina: {name}")
-        print(f"[INFO] Total de pasos: {len(pasos)}")
+        print(f"[INFO] Ejecutando rutina: {compiled.name}")
+        print(f"[INFO] Total de pasos: {len(compiled.step_names)}")
         print("=" * 72)
 
-        for idx, paso in enumerate(pasos, 1):
-            pname = paso.get("nombre", f"Paso {idx}")
-            dur = float(paso.get("duracion", 1.0))
-            raw_pos = paso.get("posiciones", {})
-
-            updates = {}
-
-            for k, v in raw_pos.items():
-                try:
-                    joint_idx = int(k)
-                    updates[joint_idx] = float(v)
-                except Exception:
-                    continue
-
-            active_updates = {
-                k: v for k, v in updates.items()
-                if k in self.controlled_joints
-            }
+        excluded = [j for j in compiled.ignored if j in self.excluded_29dof_only_joints]
+        if excluded:
+            print(f"[INFO] Joints 29 DoF ignorados para G1 23 DoF: {excluded}")
 
+        def report(idx, pname, dur, active):
             print(
-                f"  -> {idx:02d}. {pname} | "
-                f"dur={dur:.2f}s | joints={sorted(active_updates.keys())}"
+                f"  -> {idx + 1:02d}. {pname} | "
+                f"dur={dur:.2f}s | joints={active}"
             )
 
-            self.move_to(updates, duration=dur)
+        self.runtime.play_table(compiled, columns, joints.current[columns].copy(), report)
 
         print("[INFO] Rutina finalizada.")
 
@@ -368,7 +296,7 @@ class G123DoFMujocoSelector:
         print("=" * 72)
         print(f"Carpeta de rutinas: {self.poses_dir}")
         print("Escribe el número de la rutina para ejecutarla.")
-        print("Comandos: l = listar | x = salir")
+        print(f"Comandos: l = listar | f = más rápido seguro ({'on' if self.fastest else 'off'}) | x = salir")
         print("-" * 72)
 
         if not catalog:
@@ -396,8 +324,8 @@ class G123DoFMujocoSelector:
         print("=" * 72)
 
         try:
-            routine = self.load_routine(path)
-            self.PlayRoutine(routine)
+            compiled = self.load_routine(path)
+            self.PlayRoutine(compiled)
         except Exception as e:
             print(f"[ERROR] No se pudo ejecutar {path.name}: {e}")
 
@@ -405,7 +333,7 @@ class G123DoFMujocoSelector:
         self.print_menu()
 
         while True:
-            choice = input("\nNúmero de rutina / l / x: ").strip().lower()
+            choice = input("\nNúmero de rutina / l / f / x: ").strip().lower()
 
             if choice == "":
                 continue
@@ -414,12 +342,17 @@ class G123DoFMujocoSelector:
                 self.print_menu()
                 continue
 
+            if choice == "f":
+                self.fastest = not self.fastest
+                print(f"[INFO] Modo más rápido seguro: {'activado' if self.fastest else 'desactivado'}")
+                continue
+
             if choice == "x":
                 print("[INFO] Saliendo del selector.")
                 return
 
             if not choice.isdigit():
-                print("[WARN] Entrada inválida. Usa un número, l o x.")
+                print("[WARN] Entrada inválida. Usa un número, l, f o x.")
                 continue
 
             number = int(choice)
@@ -439,36 +372,8 @@ class G123DoFMujocoSelector:
         if self.low_state is None:
             print("[WARN] LowState no recibido. Intentando cierre de todas formas.")
 
-        final_cmd = unitree_hg_msg_dds__LowCmd_()
-        final_cmd.mode_pr = Mode.PR
-        final_cmd.mode_machine = self.mode_machine_
-
-        for i in range(G1_NUM_MOTOR):
-            final_cmd.motor_cmd[i].mode = 1
-
-            if i in self.controlled_joints:
-                final_q = self.current_cmd_pos.get(i, self.hold_pos.get(i, 0.0))
-            else:
-                final_q = self.hold_pos.get(i, 0.0)
-
-            final_cmd.motor_cmd[i].q = final_q
-            final_cmd.motor_cmd[i].dq = 0.0
-            final_cmd.motor_cmd[i].tau = 0.0
-            final_cmd.motor_cmd[i].kp = Kp[i]
-            final_cmd.motor_cmd[i].kd = Kd[i]
-
-        final_cmd.crc = self.crc.Crc(final_cmd)
-
-        for _ in range(repeat):
-            self.lowcmd_publisher_.Write(final_cmd)
-            time.sleep(delay)
-
-        try:
-            if self._writer_thread is not None:
-                self._writer_thread.Wait()
-                self._writer_thread = None
-        except Exception:
-            pass
+        # Detiene el writer y repite la última postura comandada.
+        self.runtime.close(repeat, delay)
 
         print("[INFO] Cierre completado. Última postura sostenida.")
 
@@ -493,13 +398,16 @@ def main():
     print("WARNING: Asegúrate de que MuJoCo G1 23 DoF esté corriendo antes de ejecutar.")
     print(f"[INFO] Interface: {interface}")
     print(f"[INFO] Poses dir: {poses_dir}")
+    trajectory = resolve_trajectory(None, "linear")
+    print(f"[INFO] Trayectoria: {trajectory}")
     input("Presiona Enter para continuar...")
 
     ChannelFactoryInitialize(1, interface)
 
     selector = G123DoFMujocoSelector(
         poses_dir=poses_dir,
-        control_dt=0.002
+        control_dt=0.002,
+        trajectory=trajectory,
     )
 
     selector.Init()
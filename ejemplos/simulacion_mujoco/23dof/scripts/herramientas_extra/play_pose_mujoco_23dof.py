@@ -1,23 +1,22 @@
 #!/usr/bin/env python3
 import argparse
+import importlib
 import json
 import sys
-import time
 from pathlib import Path
 
-try:
-    from unitree_sdk2py.core.channel import ChannelPublisher, ChannelFactoryInitialize
-    from unitree_sdk2py.core.channel import ChannelSubscriber
-    from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
-    from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_
-    from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-    from unitree_sdk2py.utils.crc import CRC
-    from unitree_sdk2py.utils.thread import RecurrentThread
-except Exception as e:
-    print("[ERROR] No se pudo importar unitree_sdk2py.")
-    print("Verifica que el entorno de Unitree SDK2 Python esté instalado/activado.")
-    print(f"Detalle: {e}")
-    sys.exit(1)
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize
+from g1_comun.joints import G1_23DOF_MUJOCO, JointLayout
+from g1_comun.lazy import lazy_import
+from g1_comun.routine import add_trajectory_arguments, compile_file, resolve_trajectory
+from g1_comun.runtime import LowCmdBackend, MotionRuntime
+from g1_comun.scheduler import add_scheduler_arguments, scheduler_kwargs
+from g1_comun.timing import add_timing_arguments, make_timing, timing_kwargs
+
+np = lazy_import("numpy")
 
 
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -25,9 +24,18 @@ POSES_ROOT = SCRIPT_DIR.parent
 DEFAULT_JOINT_MAP = POSES_ROOT / "config" / "g1_23dof_joint_map.json"
 
 
-class Mode:
-    PR = 0
-    AB = 1
+def load_sdk():
+    """
+    Comprueba unitree_sdk2py al conectar (el runtime importa sus tipos al
+    abrir los canales): --help y los errores de la rutina no cargan CycloneDDS.
+    """
+    try:
+        importlib.import_module("unitree_sdk2py.idl.unitree_hg.msg.dds_")
+    except Exception as e:
+        print("[ERROR] No se pudo importar unitree_sdk2py.")
+        print("Verifica que el entorno de Unitree SDK2 Python esté instalado/activado.")
+        print(f"Detalle: {e}")
+        sys.exit(1)
 
 
 def init_channel(interface: str):
@@ -73,6 +81,12 @@ def upper_body_indices_from_joint_map(joint_map):
     return sorted(set(int(x) for x in values))
 
 
+def layout_for(num_motors):
+    if num_motors == G1_23DOF_MUJOCO.num_motors:
+        return G1_23DOF_MUJOCO
+    return JointLayout(f"{num_motors}_motores", num_motors, range(num_motors))
+
+
 def make_gains(num_motors, controlled_indices):
     kp = []
     kd = []
@@ -91,48 +105,37 @@ def make_gains(num_motors, controlled_indices):
 
 
 class PosePlayer:
-    def __init__(self, num_motors, controlled_indices, control_dt=0.002):
+    def __init__(self, num_motors, controlled_indices, control_dt=0.002, scheduler=None, timing=None):
         self.num_motors = int(num_motors)
         self.controlled_indices = sorted(set(int(x) for x in controlled_indices))
         self.control_dt = float(control_dt)
 
-        self.crc = CRC()
-        self.lowcmd_publisher = None
-        self.lowstate_subscriber = None
-        self.low_state = None
-        self.mode_machine = 0
-        self.writer_thread = None
+        kp, kd = make_gains(self.num_motors, self.controlled_indices)
 
-        self.target_pos = {i: 0.0 for i in range(self.num_motors)}
-        self.q_init = {i: 0.0 for i in range(self.num_motors)}
-        self.current_cmd_pos = {i: 0.0 for i in range(self.num_motors)}
+        # Canales, LowCmd preasignado y writer (g1_comun.runtime). Los índices
+        # no controlados tienen start == target: conservan su q.
+        self.runtime = MotionRuntime(
+            LowCmdBackend(layout_for(self.num_motors), kp, kd),
+            self.control_dt,
+            name="g1_23dof_pose_writer",
+            timing=make_timing(Path(__file__).stem, self.control_dt, **(timing or {})),
+            scheduler=scheduler,
+        )
+        self.joints = self.runtime.joints
+        self.motion = self.runtime.motion
 
-        self.t = 0.0
-        self.T = 1.0
-
-        self.kp, self.kd = make_gains(self.num_motors, self.controlled_indices)
+    @property
+    def low_state(self):
+        return self.runtime.low_state
 
     def init_dds(self):
-        self.lowcmd_publisher = ChannelPublisher("rt/lowcmd", LowCmd_)
-        self.lowcmd_publisher.Init()
-
-        self.lowstate_subscriber = ChannelSubscriber("rt/lowstate", LowState_)
-        self.lowstate_subscriber.Init(self.low_state_handler, 10)
-
-    def low_state_handler(self, msg: LowState_):
-        self.low_state = msg
-
-        if hasattr(msg, "mode_machine"):
-            self.mode_machine = msg.mode_machine
+        self.runtime.open()
 
     def wait_lowstate(self, timeout=8.0):
         print("[INFO] Esperando rt/lowstate...")
-        start = time.time()
 
-        while self.low_state is None:
-            if time.time() - start > timeout:
-                raise RuntimeError("No llegó rt/lowstate. Verifica que MuJoCo esté corriendo.")
-            time.sleep(0.05)
+        if not self.runtime.wait_state(timeout):
+            raise RuntimeError("No llegó rt/lowstate. Verifica que MuJoCo esté corriendo.")
 
         print("[OK] rt/lowstate recibido.")
 
@@ -140,72 +143,27 @@ class PosePlayer:
         if self.low_state is None:
             raise RuntimeError("No hay low_state para inicializar.")
 
+        values = np.zeros(self.num_motors)
         for i in range(self.num_motors):
             try:
-                q = float(self.low_state.motor_state[i].q)
+                values[i] = float(self.low_state.motor_state[i].q)
             except Exception:
-                q = 0.0
+                pass
 
-            self.q_init[i] = q
-            self.target_pos[i] = q
-            self.current_cmd_pos[i] = q
+        self.joints.reset(values)
 
         print("[OK] Posición inicial tomada desde low_state.")
 
-    def interpolate_position(self, q0, q1):
-        if self.T <= 0:
-            return q1
-
-        s = max(0.0, min(self.t / self.T, 1.0))
-        return q0 + (q1 - q0) * s
-
-    def low_cmd_write(self):
-        if self.low_state is None:
-            return
-
-        cmd = unitree_hg_msg_dds__LowCmd_()
-        cmd.mode_pr = Mode.PR
-        cmd.mode_machine = self.mode_machine
-
-        for i in range(self.num_motors):
-            try:
-                cmd.motor_cmd[i].mode = 1
-                cmd.motor_cmd[i].dq = 0.0
-                cmd.motor_cmd[i].tau = 0.0
-                cmd.motor_cmd[i].kp = self.kp[i]
-                cmd.motor_cmd[i].kd = self.kd[i]
-
-                if i in self.controlled_indices:
-                    q0 = self.q_init.get(i, self.current_cmd_pos.get(i, 0.0))
-                    q1 = self.target_pos.get(i, q0)
-                    cmd.motor_cmd[i].q = self.interpolate_position(q0, q1)
-                else:
-                    cmd.motor_cmd[i].q = self.current_cmd_pos.get(i, 0.0)
-
-            except Exception:
-                continue
-
-        cmd.crc = self.crc.Crc(cmd)
-        self.lowcmd_publisher.Write(cmd)
-
-        self.t += self.control_dt
-
     def start_writer(self):
-        if self.writer_thread is None:
-            self.writer_thread = RecurrentThread(
-                self.control_dt,
-                target=self.low_cmd_write,
-                name="g1_23dof_pose_writer"
-            )
-            self.writer_thread.Start()
+        if self.runtime.start_writer():
             print("[OK] Writer LowCmd iniciado.")
 
     def move_to(self, updates, duration):
+        """Publica el movimiento y devuelve su MotionFuture (g1_comun.motion)."""
         if self.low_state is None:
             raise RuntimeError("LowState no recibido.")
 
-        for i in self.controlled_indices:
-            self.q_init[i] = float(self.current_cmd_pos.get(i, self.low_state.motor_state[i].q))
+        target = self.motion.unset()
 
         for k, v in updates.items():
             idx = int(k)
@@ -215,84 +173,39 @@ class PosePlayer:
                 print(f"[WARN] Índice {idx} no está en controlled_indices. Se ignora.")
                 continue
 
-            self.target_pos[idx] = value
+            target[idx] = value
 
-        self.T = max(float(duration), 0.001)
-        self.t = 0.0
+        return self.motion.move(target, duration)
 
-        while self.t < self.T:
-            time.sleep(self.control_dt)
-
-        self.t = self.T
-
-        for i in self.controlled_indices:
-            self.current_cmd_pos[i] = self.target_pos[i]
-            self.q_init[i] = self.target_pos[i]
-
-        time.sleep(max(self.control_dt, 0.002))
-
-    def play_routine(self, routine):
-        name = routine.get("nombre_rutina", "routine")
-        pasos = routine.get("pasos", [])
-
-        print(f"\n[INFO] Ejecutando rutina: {name}")
-        print(f"[INFO] Pasos: {len(pasos)}")
-
-        for paso in pasos:
-            pname = paso.get("nombre", "Paso")
-            duration = float(paso.get("duracion", 1.0))
-            raw_positions = paso.get("posiciones", {})
+    def play_routine(self, compiled):
+        if self.low_state is None:
+            raise RuntimeError("LowState no recibido.")
 
-            updates = {}
+        print(f"\n[INFO] Ejecutando rutina: {compiled.name}")
+        print(f"[INFO] Pasos: {len(compiled.step_names)}")
 
-            for k, v in raw_positions.items():
-                try:
-                    idx = int(k)
-                    updates[idx] = float(v)
-                except Exception:
-                    print(f"[WARN] Posición inválida ignorada: {k}: {v}")
+        for k in compiled.invalid:
+            print(f"[WARN] Posición inválida ignorada: {k}")
+        for idx in compiled.ignored:
+            print(f"[WARN] Índice {idx} no está en controlled_indices. Se ignora.")
 
-            print(f"  -> {pname} | dur={duration:.3f}s | joints={sorted(updates.keys())}")
-            self.move_to(updates, duration)
+        columns = compiled.joints
+        self.runtime.play_table(
+            compiled,
+            columns,
+            self.joints.current[columns].copy(),
+            lambda step, pname, duration, active: print(f"  -> {pname} | dur={duration:.3f}s | joints={active}"),
+        )
 
         print("[OK] Rutina finalizada.")
 
-    def hold_final_pose(self, repeat=50, delay=0.02):
-        final_cmd = unitree_hg_msg_dds__LowCmd_()
-        final_cmd.mode_pr = Mode.PR
-        final_cmd.mode_machine = self.mode_machine
-
-        for i in range(self.num_motors):
-            try:
-                final_cmd.motor_cmd[i].mode = 1
-                final_cmd.motor_cmd[i].q = self.current_cmd_pos.get(i, 0.0)
-                final_cmd.motor_cmd[i].dq = 0.0
-                final_cmd.motor_cmd[i].tau = 0.0
-                final_cmd.motor_cmd[i].kp = self.kp[i]
-                final_cmd.motor_cmd[i].kd = self.kd[i]
-            except Exception:
-                continue
-
-        final_cmd.crc = self.crc.Crc(final_cmd)
-
-        for _ in range(repeat):
-            self.lowcmd_publisher.Write(final_cmd)
-            time.sleep(delay)
-
     def stop(self):
         try:
-            self.hold_final_pose()
+            # Detiene el writer y repite el último comando con las ganancias.
+            self.runtime.close(repeat=50)
         except Exception:
             pass
 
-        if self.writer_thread is not None:
-            try:
-                self.writer_thread.Wait()
-            except Exception:
-                pass
-
-            self.writer_thread = None
-
         print("[INFO] Programa terminado.")
 
 
@@ -304,6 +217,10 @@ def main():
     parser.add_argument("--joint-map", default=str(DEFAULT_JOINT_MAP))
     parser.add_argument("--control-dt", type=float, default=0.002)
     parser.add_argument("--timeout", type=float, default=8.0)
+    parser.add_argument("--no-cache", action="store_true", help="No lee ni guarda la tabla .traj.npz.")
+    add_scheduler_arguments(parser)
+    add_timing_arguments(parser)
+    add_trajectory_arguments(parser, "linear")
     args = parser.parse_args()
 
     pose_path = Path(args.pose).expanduser().resolve()
@@ -327,19 +244,40 @@ def main():
         print("[ERROR] No hay índices controlables en la rutina.")
         sys.exit(1)
 
+    try:
+        trajectory = resolve_trajectory(args.trajectory, "linear")
+        layout = layout_for(args.num_motors)
+        compiled, cached = compile_file(
+            pose_path,
+            layout.subset(f"{layout.name}_rutina", controlled_indices),
+            args.control_dt,
+            profile=trajectory,
+            min_duration=0.001,
+            loader=lambda _path: routine,
+            cache=not args.no_cache,
+        )
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
     print("\n[CONFIGURACIÓN]")
     print(f"Interface: {args.interface}")
     print(f"Num motors: {args.num_motors}")
     print(f"Rutina: {pose_path}")
     print(f"Controlled indices: {controlled_indices}")
+    print(f"Trayectoria: {trajectory}")
+    print(f"Tabla {'en caché' if cached else 'compilada'}: {compiled.rows} filas ({compiled.duration:.2f}s)")
     print("")
 
+    load_sdk()
     init_channel(args.interface)
 
     player = PosePlayer(
         num_motors=args.num_motors,
         controlled_indices=controlled_indices,
-        control_dt=args.control_dt
+        control_dt=args.control_dt,
+        scheduler=scheduler_kwargs(args),
+        timing=timing_kwargs(args)
     )
 
     player.init_dds()
@@ -351,7 +289,7 @@ def main():
         input("Verifica que el robot esté estable y sin obstáculos. Presiona Enter para ejecutar...")
 
         player.start_writer()
-        player.play_routine(routine)
+        player.play_routine(compiled)
 
     except KeyboardInterrupt:
         print("\n[INFO] Ctrl+C detectado. Interrumpiendo.")
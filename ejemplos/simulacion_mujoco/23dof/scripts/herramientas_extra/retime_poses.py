@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# Reescribe las duraciones de todas las rutinas de una carpeta poses/ con las
+# mínimas que respetan los límites de velocidad, aceleración y jerk por joint
+# (g1_comun.retime).
+#
+# Uso:
+#   python3 retime_poses.py ../../poses --dry-run
+#   python3 retime_poses.py ../../poses --output-dir /tmp/poses_rapidas
+#   python3 retime_poses.py ../../../29dof/poses --layout g1_29dof_upper \
+#       --profile spline --speed-scale 0.7
+#
+# Lee .json y .txt con contenido JSON; los .txt en formato de líneas
+# "joint posición duración" se omiten. Como no se conoce la pose de partida,
+# el primer paso de cada rutina conserva su duración, igual que las pausas.
+# Sin --output-dir los archivos se sobrescriben en su lugar.
+# No requiere unitree_sdk2py.
+# -----------------------------------------------------------------------------
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[4]))  # ejemplos/
+
+from g1_comun.joints import G1_23DOF_ARM_SDK, G1_23DOF_MUJOCO_UPPER, G1_29DOF, G1_29DOF_UPPER
+from g1_comun.retime import add_retime_arguments, format_report, limits_from_args, retime_routine
+from g1_comun.routine import TRAJECTORIES
+
+
+LAYOUTS = {
+    layout.name: layout
+    for layout in (G1_23DOF_ARM_SDK, G1_23DOF_MUJOCO_UPPER, G1_29DOF_UPPER, G1_29DOF)
+}
+
+
+def load_routine(path: Path):
+    """Devuelve la rutina o None si el archivo no es JSON."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            routine = json.load(f)
+    except json.JSONDecodeError:
+        return None
+    return routine if isinstance(routine, dict) and "pasos" in routine else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Re-temporiza todas las rutinas de una carpeta de poses."
+    )
+    parser.add_argument("poses_dir", help="Carpeta con rutinas .json/.txt")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default=G1_23DOF_ARM_SDK.name)
+    parser.add_argument("--profile", choices=TRAJECTORIES, default="cosine")
+    parser.add_argument("--min-duration", type=float, default=0.0)
+    parser.add_argument("--output-dir", default=None, help="Escribe aquí en lugar de sobrescribir.")
+    parser.add_argument("--dry-run", action="store_true", help="Solo muestra el informe.")
+    parser.add_argument("--verbose", action="store_true", help="Informe por paso.")
+    add_retime_arguments(parser, fastest_flag=False)
+    args = parser.parse_args()
+
+    layout = LAYOUTS[args.layout]
+    try:
+        limits = limits_from_args(layout, args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    poses_dir = Path(args.poses_dir).expanduser().resolve()
+    if not poses_dir.is_dir():
+        parser.error(f"No existe la carpeta: {poses_dir}")
+
+    output_dir = Path(args.output_dir).expanduser().resolve() if args.output_dir else poses_dir
+    paths = sorted(p for p in poses_dir.iterdir() if p.suffix.lower() in (".json", ".txt"))
+
+    print(f"[INFO] Layout: {layout.name} | perfil: {args.profile} | escala: {args.speed_scale}")
+    if not args.dry_run:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    for path in paths:
+        routine = load_routine(path)
+        if routine is None:
+            print(f"[WARN] {path.name}: no es una rutina JSON, se omite.")
+            continue
+
+        try:
+            retimed, report = retime_routine(
+                routine,
+                layout,
+                limits,
+                profile=args.profile,
+                min_duration=args.min_duration,
+            )
+        except ValueError as e:
+            print(f"[WARN] {path.name}: {e}")
+            continue
+
+        print(f"[OK] {path.name}: {format_report(report)}")
+        if args.verbose:
+            for name, before, after in report:
+                print(f"       {name:<32} {before:>7.3f}s -> {after:>7.3f}s")
+
+        if args.dry_run:
+            continue
+
+        with open(output_dir / path.name, "w", encoding="utf-8") as f:
+            json.dump(retimed, f, indent=2, ensure_ascii=False)
+
+    if args.dry_run:
+        print("[INFO] --dry-run: no se escribió ningún archivo.")
+
+
+if __name__ == "__main__":
+    main()
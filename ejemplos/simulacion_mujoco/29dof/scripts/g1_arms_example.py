@@ -20,6 +20,10 @@
 #   Este script demuestra cómo enviar comandos LowCmd interpolados al robot G1
 #   dentro del simulador Unitree Mujoco. Permite ejecutar secuencias de prueba
 #   de brazos a partir de rutinas embebidas o cargadas desde archivo (.txt/.json).
+#   Las rutinas se compilan a una tabla con una fila por tick (g1_comun.routine);
+#   las cargadas desde archivo se guardan junto a él como .traj.npz.
+#   G1_TRAJECTORY=spline las recorre como un spline C2 sin paradas entre pasos
+#   y envía dq de feedforward.
 #
 # @requisitos
 #   - Unitree mujoco instalado y configurado.
@@ -29,19 +33,25 @@
 # @uso
 #   python3 g1_arm_example.py
 # -----------------------------------------------------------------------------
-import time
 import sys
-import math
 import json
 import os
-from unitree_sdk2py.core.channel import ChannelPublisher, ChannelFactoryInitialize
-from unitree_sdk2py.core.channel import ChannelSubscriber
-from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowCmd_
-from unitree_sdk2py.idl.default import unitree_hg_msg_dds__LowState_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowCmd_
-from unitree_sdk2py.idl.unitree_hg.msg.dds_ import LowState_
-from unitree_sdk2py.utils.crc import CRC
-from unitree_sdk2py.utils.thread import RecurrentThread
+from pathlib import Path
+
+# Librería compartida de los ejemplos (ejemplos/g1_comun).
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))  # ejemplos/
+
+from g1_comun.channel import ChannelFactoryInitialize
+from g1_comun.joints import G1_29DOF, read_positions
+from g1_comun.routine import (
+    CompiledRoutine,
+    compile_file,
+    compile_routine,
+    cosine_profile,
+    resolve_trajectory,
+)
+from g1_comun.runtime import LowCmdBackend, MotionRuntime
+from g1_comun.timing import make_timing
 
 import numpy as np
 
@@ -102,105 +112,40 @@ class G1JointIndex:
     RightWristPitch = 27
     RightWristYaw = 28
 
-# ------------------ modes ------------------
-class Mode:
-    PR = 0  # pitch-roll series
-    AB = 1  # parallel
-
 # ------------------ main class ------------------
 class Custom:
-    def __init__(self, control_dt: float = 0.002):
+    def __init__(self, control_dt: float = 0.002, trajectory: str = "cosine"):
         self.control_dt = control_dt  # 2 ms default
-        self.crc = CRC()
-
-        # publisher/subscriber placeholders (se crean en Init)
-        self.lowcmd_publisher_ = None
-        self.lowstate_subscriber = None
-
-        # low-level state
-        self.low_state = None
-        self.mode_machine_ = 0
-
-        # thread for sending low cmds continuously
-        self._writer_thread = None
-
-        # interpolation state
-        # target positions for all joints (default 0)
-        self.target_pos = {i: 0.0 for i in range(G1_NUM_MOTOR)}
-        # q_init used at start of each interpolation (updated in move_to)
-        self.q_init = {i: 0.0 for i in range(G1_NUM_MOTOR)}
-        self.t = 0.0
-        self.T = 1.0
+        self.trajectory = trajectory  # "cosine", "linear" or "spline"
+
+        # rt/lowcmd writer (g1_comun.runtime): preallocated LowCmd, channels,
+        # interpolation state for all 29 joints (default 0) and the routine
+        # table player. move_to returns a future the writer completes when
+        # the motion ends.
+        self.runtime = MotionRuntime(
+            LowCmdBackend(G1_29DOF, Kp, Kd),
+            self.control_dt,
+            name="lowcmd_writer",
+            timing=make_timing(Path(__file__).stem, self.control_dt),
+            profile=cosine_profile,
+        )
+        self.joints = self.runtime.joints
+        self.motion = self.runtime.motion
 
         # which joints are considered "arm joints"
-        self.arm_joints = list(range(G1JointIndex.LeftShoulderPitch, G1JointIndex.RightWristYaw + 1))
-
-        # pre-create a low_cmd object to avoid reallocations (optional)
-        self.low_cmd = unitree_hg_msg_dds__LowCmd_()
+        self.arm_layout = G1_29DOF.subset(
+            "g1_29dof_arms",
+            range(G1JointIndex.LeftShoulderPitch, G1JointIndex.RightWristYaw + 1),
+        )
+        self.arm_joints = self.arm_layout.joint_list
 
     def Init(self):
-        # Publisher
-        self.lowcmd_publisher_ = ChannelPublisher("rt/lowcmd", LowCmd_)
-        self.lowcmd_publisher_.Init()
-
-        # Subscriber
-        self.lowstate_subscriber = ChannelSubscriber("rt/lowstate", LowState_)
-        self.lowstate_subscriber.Init(self.LowStateHandler, 10)
-
-    def LowStateHandler(self, msg: LowState_):
-        self.low_state = msg
-        # capture mode_machine once
-        if hasattr(msg, "mode_machine"):
-            self.mode_machine_ = msg.mode_machine
-
-    # ---- interpolation helper ----
-    def interpolate_position(self, q_init, q_target):
-        """Half-cosine smoothing (0->1) based on self.t/self.T"""
-        if self.T <= 0:
-            return q_target
-        ratio = (1 - math.cos(math.pi * (self.t / self.T))) / 2.0 if self.t < self.T else 1.0
-        return q_init + (q_target - q_init) * ratio
-
-    # ---- main low command writer (runs in recurrent thread) ----
-    def LowCmdWrite(self):
-        """
-        This function is called periodically by the RecurrentThread.
-        It composes a LowCmd where:
-          - arm joints are interpolated from q_init -> target_pos using half-cos
-          - non-arm joints (legs, waist) are commanded to 0
-        """
-        if self.low_state is None:
-            return
-
-        cmd = unitree_hg_msg_dds__LowCmd_()
-        cmd.mode_pr = Mode.PR
-        cmd.mode_machine = self.mode_machine_
-
-        # fill per-joint fields
-        for i in range(G1_NUM_MOTOR):
-            # enable
-            cmd.motor_cmd[i].mode = 1
-            # PD gains
-            cmd.motor_cmd[i].kp = Kp[i]
-            cmd.motor_cmd[i].kd = Kd[i]
-            # feedforward/velocity
-            cmd.motor_cmd[i].dq = 0.0
-            cmd.motor_cmd[i].tau = 0.0
-
-            if i in self.arm_joints:
-                q_init = self.q_init.get(i, 0.0)
-                q_target = self.target_pos.get(i, q_init)
-                pos = self.interpolate_position(q_init, q_target)
-                cmd.motor_cmd[i].q = pos
-            else:
-                # legs + waist forced to zero
-                cmd.motor_cmd[i].q = 0.0
-
-        cmd.crc = self.crc.Crc(cmd)
-        self.lowcmd_publisher_.Write(cmd)
-
-        # advance interpolation time
-        self.t += self.control_dt
+        # LowCmd, rt/lowcmd publisher and rt/lowstate subscriber
+        self.runtime.open()
+
+    @property
+    def low_state(self):
+        return self.runtime.low_state
 
     # ---- high-level motion API ----
     def move_to(self, updates: dict, duration: float = 1.0):
@@ -208,72 +153,64 @@ class Custom:
         updates: dict mapping joint_index (int) -> q_target (float).
                  Only arm joints in 'updates' will be used; other indices ignored.
         duration: seconds for the interpolation
-        This method blocks until interpolation completes.
+        Returns a MotionFuture (g1_comun.motion) completed by the writer when
+        the interpolation ends: call .result() to block, await it from
+        asyncio or .cancel() it to hold the current command.
         """
-        # need low_state to sample q_init
+        # need low_state to sample the start positions
         if self.low_state is None:
             raise RuntimeError("LowState not received yet — cannot move safely.")
 
-        # capture initial positions for all arm joints from current low_state
-        for j in self.arm_joints:
-            try:
-                self.q_init[j] = self.low_state.motor_state[j].q
-            except Exception:
-                # fallback to 0.0 if reading fails
-                self.q_init[j] = 0.0
+        # start the arm joints from the current low_state
+        target = self.motion.unset()
+        start = target.copy()
+        start[self.arm_layout.joints] = self.read_arm_positions()
 
         # set targets (only for provided joint indices)
         for k, v in updates.items():
-            if isinstance(k, str):
-                jidx = int(k)
-            else:
-                jidx = int(k)
+            jidx = int(k)
             # only accept if it's an arm joint, otherwise ignore
-            if jidx in self.arm_joints:
-                self.target_pos[jidx] = float(v)
-
-        # interpolation parameters
-        self.T = float(duration) if duration > 0 else 0.0
-        self.t = 0.0
-
-        # Wait until interpolation finished (thread should be running)
-        while self.t < self.T:
-            time.sleep(self.control_dt)
-        # ensure final target reached (set t > T and send one command)
-        self.t = self.T
-        # give writer one cycle to push final pos
-        time.sleep(max(self.control_dt, 0.002))
-
-    def PlayRoutine(self, routine: dict):
+            if jidx in self.arm_layout:
+                target[jidx] = float(v)
+
+        return self.motion.move(target, duration, start=start)
+
+    def read_arm_positions(self):
+        measured = np.zeros(self.arm_layout.size)
+        try:
+            read_positions(self.low_state.motor_state, self.arm_joints, measured)
+        except Exception:
+            # fallback to 0.0 if reading fails
+            measured.fill(0.0)
+        return measured
+
+    def CompileRoutine(self, routine: dict) -> CompiledRoutine:
+        """Compile an in-memory routine (no disk cache) for the arm joints."""
+        return compile_routine(routine, self.arm_layout, self.control_dt, profile=self.trajectory)
+
+    def PlayRoutine(self, routine):
         """
         routine: dict that follows your JSON structure:
           { "nombre_rutina": "...", "pasos": [ {"nombre":.., "posiciones": { "15":.. }, "duracion":.. }, ... ] }
-        Executes steps sequentially using move_to.
+        or a CompiledRoutine from load_compiled_routine().
+        The whole routine plays from a single table starting at the measured
+        arm pose; arm joints not named yet hold that pose.
         """
-        name = routine.get("nombre_rutina", "routine")
-        print(f"[INFO] Ejecutando rutina: {name}")
-        for paso in routine.get("pasos", []):
-            pname = paso.get("nombre", "step")
-            dur = float(paso.get("duracion", 1.0))
-            raw_pos = paso.get("posiciones", {})
-            # convert keys to ints, keep only arm joints (others ignored but legs will remain 0)
-            updates = {}
-            for k, v in raw_pos.items():
-                try:
-                    idx = int(k)
-                except:
-                    continue
-                if idx in self.arm_joints:
-                    updates[idx] = float(v)
-            print(f"  -> {pname} dur={dur}s update_joints={list(updates.keys())}")
-            self.move_to(updates, duration=dur)
+        if self.low_state is None:
+            raise RuntimeError("LowState not received yet — cannot move safely.")
+
+        compiled = routine if isinstance(routine, CompiledRoutine) else self.CompileRoutine(routine)
+        print(f"[INFO] Ejecutando rutina: {compiled.name}")
+
+        def report(step, pname, dur, moving):
+            print(f"  -> {pname} dur={dur}s update_joints={moving}")
+
+        self.runtime.play_table(compiled, self.arm_layout.joints, self.read_arm_positions(), report)
         print("[INFO] Rutina finalizada.")
 
     # ---- thread control ----
     def StartWriter(self):
-        if self._writer_thread is None:
-            self._writer_thread = RecurrentThread(self.control_dt, target=self.LowCmdWrite, name="lowcmd_writer")
-            self._writer_thread.Start()
+        if self.runtime.start_writer():
             print("[INFO] LowCmd writer thread started.")
         else:
             print("[WARN] Writer thread already running.")
@@ -282,12 +219,7 @@ class Custom:
         """
         Stop the writer thread and send a final safe posture to all joints.
         """
-        if self._writer_thread is not None:
-            try:
-                self._writer_thread.Wait()
-            except Exception:
-                pass
-            self._writer_thread = None
+        if self.runtime.stop_writer():
             print("[INFO] Writer thread stopped.")
 
         if self.low_state is None:
@@ -314,29 +246,16 @@ class Custom:
             14: 0.0
         }
 
-        # --- comando de apagado con postura final ---
-        final_cmd = unitree_hg_msg_dds__LowCmd_()
-        final_cmd.mode_pr = Mode.PR
-        final_cmd.mode_machine = self.mode_machine_
-
-        for i in range(G1_NUM_MOTOR):
-            final_cmd.motor_cmd[i].mode = 1
-            # si está en posiciones definidas, usarla; si no, dejar en 0.0
-            final_cmd.motor_cmd[i].q = final_positions.get(i, 0.0)
-            final_cmd.motor_cmd[i].dq = 0.0
-            final_cmd.motor_cmd[i].tau = 0.0
-            final_cmd.motor_cmd[i].kp = Kp[i]
-            final_cmd.motor_cmd[i].kd = Kd[i]
-
-        final_cmd.crc = self.crc.Crc(final_cmd)
+        # si está en posiciones definidas, usarla; si no, dejar en 0.0
+        final_q = np.zeros(G1_NUM_MOTOR)
+        for i, q in final_positions.items():
+            final_q[i] = q
 
         # enviar varias veces para asegurar que llegue
-        for _ in range(repeat):
-            self.lowcmd_publisher_.Write(final_cmd)
-            time.sleep(delay)
+        self.runtime.close(repeat, delay, command=final_q)
 
         print("[INFO] Sent final shutdown posture to all joints.")
-        
+
     def load_routine(self, filepath):
         if not os.path.isfile(filepath):
             raise FileNotFoundError(f"File {filepath} not found")
@@ -379,12 +298,23 @@ class Custom:
 
         return routine
 
+    def load_compiled_routine(self, filepath):
+        """load_routine + compile, reusing <name>.g1_29dof_arms.<profile>.traj.npz while the file is unchanged."""
+        if not os.path.isfile(filepath):
+            raise FileNotFoundError(f"File {filepath} not found")
+
+        compiled, cached = compile_file(
+            filepath, self.arm_layout, self.control_dt, profile=self.trajectory, loader=self.load_routine
+        )
+        print(f"[INFO] Tabla {'en caché' if cached else 'compilada'}: {compiled.rows} filas ({compiled.duration:.2f}s)")
+        return compiled
+
 
     def execute_routine(self, routine):
         for step in routine["steps"]:
             positions = step["positions"]
             duration = step["duration"]
-            self.move_to(positions, duration)
+            self.move_to(positions, duration).result()
 
 # ------------------ example usage ------------------
 if __name__ == '__main__':
@@ -397,17 +327,11 @@ if __name__ == '__main__':
     else:
         ChannelFactoryInitialize(1, "lo")
 
-    custom = Custom(control_dt=0.002)
+    custom = Custom(control_dt=0.002, trajectory=resolve_trajectory(None, "cosine"))
     custom.Init()
 
     # Esperar hasta que llegue el low_state (timeout a 5s)
-    wait_t = 0.0
-    timeout = 5.0
-    while custom.low_state is None and wait_t < timeout:
-        time.sleep(0.1)
-        wait_t += 0.1
-
-    if custom.low_state is None:
+    if not custom.runtime.wait_state(5.0):
         print("[WARN] LowState not received within timeout; continuing but moves may be unsafe.")
 
     # Start writer thread
@@ -471,7 +395,7 @@ if __name__ == '__main__':
 
     # Opción 2: cargar desde archivo externo
     # routine = custom.executor.load_routine("rutina.json")   # JSON
-    routine = custom.load_routine("aplaudir.txt")    # TXT
+    routine = custom.load_compiled_routine("aplaudir.txt")    # TXT
 
     try:
         # Ejecuta opción 1: